@@ -0,0 +1,312 @@
+# accaunt/activation.py
+"""
+Etiket aktivasyon akışları için session tabanlı durum makinesi.
+
+Her akış (yeni kayıt, künye aktivasyonu, misafir aktivasyonu) session'da tek bir
+sözlük olarak tutulur: etiket id, seri numarası, sıradaki adım ve doğrulanmış veri.
+Adımlar etiketi en fazla bir kez okur; son aktivasyon `select_for_update` ile
+kilitli okunur, böylece aynı etiket iki kişi tarafından aynı anda aktif edilemez.
+Adım geçişleri `AktivasyonFunnelMetrik` tablosuna günlük sayaç olarak yazılır.
+"""
+import logging
+import time
+
+from django.contrib import messages
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from courseapp.constants import ETIKET_SATIS_KREDI
+from etiket.models import Etiket
+from etiket.serial_lookup import SeriAramaLimitiAsildi, seri_ile_etiket_bul
+
+from .models import AKIS_KAYIT, AKIS_KUNYE, AKIS_MISAFIR, AktivasyonFunnelMetrik
+
+logger = logging.getLogger(__name__)
+
+# Adımlar
+ADIM_ETIKET = 'etiket'
+ADIM_HAYVAN = 'hayvan'
+ADIM_SAHIP = 'sahip'
+ADIM_TELEFON = 'telefon'
+ADIM_KAYIT_DEVRI = 'kayit_devri'  # Künye akışından yeni kayıt akışına geçiş
+ADIM_GIRIS = 'giris'  # Künye akışından giriş + add_pet akışına geçiş
+
+# Her akışın sıralı adımları (geri dönüşlerde hangi adıma izin verildiğini belirler)
+AKIS_ADIMLARI = {
+    AKIS_KAYIT: (ADIM_ETIKET, ADIM_HAYVAN, ADIM_SAHIP),
+    AKIS_KUNYE: (ADIM_ETIKET, ADIM_TELEFON, ADIM_HAYVAN),
+    AKIS_MISAFIR: (ADIM_ETIKET, ADIM_HAYVAN, ADIM_SAHIP),
+}
+
+# Eski session anahtarı: allauth adapter'ı kayıt akışını buradan tanır
+KAYIT_ESKI_SESSION_KEY = 'etiket_id'
+
+
+class AktivasyonAkisi:
+    """Bir aktivasyon akışının session'daki durumu."""
+
+    def __init__(self, request, akis):
+        self.request = request
+        self.akis = akis
+        self.session_key = f'aktivasyon_{akis}'
+        self._etiket = None
+
+    # --- Durum ---
+
+    @property
+    def durum(self):
+        return self.request.session.get(self.session_key)
+
+    @property
+    def aktif(self) -> bool:
+        return bool(self.durum)
+
+    @property
+    def etiket_id(self):
+        durum = self.durum
+        return durum['etiket_id'] if durum else None
+
+    @property
+    def seri(self):
+        durum = self.durum
+        return durum['seri'] if durum else None
+
+    @property
+    def adim(self):
+        durum = self.durum
+        return durum['adim'] if durum else None
+
+    @property
+    def veri(self) -> dict:
+        durum = self.durum
+        return dict(durum['veri']) if durum else {}
+
+    def adima_izin_var_mi(self, adim) -> bool:
+        """Akış bu adıma (veya daha ilerisine) ulaşmış mı?"""
+        durum = self.durum
+        if not durum:
+            return False
+        adimlar = AKIS_ADIMLARI[self.akis]
+        return adimlar.index(durum['adim']) >= adimlar.index(adim)
+
+    def _yaz(self, durum):
+        self.request.session[self.session_key] = durum
+        if self.akis == AKIS_KAYIT:
+            self.request.session[KAYIT_ESKI_SESSION_KEY] = durum['etiket_id']
+        self.request.session.modified = True
+
+    def _gecen_sure_ms(self):
+        durum = self.durum
+        if not durum or not durum.get('zaman'):
+            return None
+        return max(0, int((time.time() - durum['zaman']) * 1000))
+
+    # --- Geçişler ---
+
+    def baslat(self, etiket, sonraki_adim):
+        """Doğrulanmış etiket ile akışı (yeniden) başlatır."""
+        if self.aktif:
+            self._metrik('terk', self.adim)
+            self.temizle()
+        self._etiket = etiket
+        self._yaz({
+            'etiket_id': etiket.id,
+            'seri': etiket.seri_numarasi,
+            'adim': sonraki_adim,
+            'veri': {},
+            'zaman': time.time(),
+        })
+        self._metrik('tamamlanan', ADIM_ETIKET)
+
+    def ilerle(self, tamamlanan_adim, sonraki_adim, **veri):
+        """Adımı tamamlar, doğrulanmış veriyi saklar ve sıradaki adıma geçer."""
+        durum = dict(self.durum)
+        sure_ms = self._gecen_sure_ms()
+        durum['veri'] = dict(durum['veri'], **veri)
+        durum['adim'] = sonraki_adim
+        durum['zaman'] = time.time()
+        self._yaz(durum)
+        self._metrik('tamamlanan', tamamlanan_adim, sure_ms)
+
+    def tamamla(self, adim, gecici_dosyalari_sil=False):
+        """Son adımı kaydeder ve akışı session'dan kaldırır."""
+        self._metrik('tamamlanan', adim, self._gecen_sure_ms())
+        self.temizle(gecici_dosyalari_sil=gecici_dosyalari_sil)
+
+    def hata(self, adim):
+        """Adımda doğrulama hatası (bulunamadı, zaten aktif vb.)."""
+        self._metrik('hata', adim)
+
+    def temizle(self, gecici_dosyalari_sil=True):
+        durum = self.request.session.pop(self.session_key, None)
+        if self.akis == AKIS_KAYIT:
+            self.request.session.pop(KAYIT_ESKI_SESSION_KEY, None)
+        self._etiket = None
+        if not durum or not gecici_dosyalari_sil:
+            return
+        temp_path = (durum.get('veri') or {}).get('evcil', {}).get('resim_temp_path')
+        if temp_path and default_storage.exists(temp_path):
+            try:
+                default_storage.delete(temp_path)
+            except Exception as exc:  # pragma: no cover - sadece loglama
+                logger.warning("Geçici görsel silinemedi: %s", exc)
+
+    # --- Etiket okuma ---
+
+    def etiket_dogrula(self, seri, yok_mesaji="Bu seri numarası sistemde bulunamadı.",
+                       aktif_mesaji="Bu etiket zaten aktif!"):
+        """
+        Girilen seriyi normalize ederek arar. Etiket yoksa, zaten aktifse veya
+        IP limiti aşıldıysa mesaj yazar, funnel hatası kaydeder ve None döner.
+        """
+        try:
+            etiket = seri_ile_etiket_bul(seri, request=self.request)
+        except SeriAramaLimitiAsildi as exc:
+            self.hata(ADIM_ETIKET)
+            messages.error(self.request, exc.mesaj)
+            return None
+        if etiket is None:
+            self.hata(ADIM_ETIKET)
+            messages.error(self.request, yok_mesaji)
+            return None
+        if etiket.aktif:
+            self.hata(ADIM_ETIKET)
+            messages.error(self.request, aktif_mesaji)
+            return None
+        return etiket
+
+    def etiket_getir(self):
+        """Akıştaki etiketi istek başına bir kez okur."""
+        if self._etiket is None and self.etiket_id:
+            self._etiket = Etiket.objects.filter(pk=self.etiket_id).first()
+        return self._etiket
+
+    def etiketi_kilitle(self):
+        """
+        Son aktivasyon için etiketi kilitli okur (transaction.atomic içinde çağrılmalı).
+        Etiket yoksa, aktifse veya bir hayvana bağlıysa None döner.
+        """
+        if not self.etiket_id:
+            return None
+        self._etiket = Etiket.objects.select_for_update().filter(
+            pk=self.etiket_id, aktif=False, evcil_hayvan__isnull=True
+        ).first()
+        return self._etiket
+
+    # --- Metrikler ---
+
+    def _metrik(self, alan, adim, sure_ms=None):
+        funnel_metrik_kaydet(self.akis, adim, alan, sure_ms)
+
+
+def funnel_metrik_kaydet(akis, adim, alan='tamamlanan', sure_ms=None):
+    """
+    Günlük funnel sayacını artırır. Tüm yazım tek savepoint içindedir; veritabanı
+    hatası çağıranın transaction'ını bozmaz, akış sürer ve hata loglanır.
+    """
+    guncelleme = {alan: F(alan) + 1}
+    if sure_ms is not None:
+        guncelleme['sure_toplam_ms'] = F('sure_toplam_ms') + sure_ms
+        guncelleme['sure_sayisi'] = F('sure_sayisi') + 1
+    filtre = {'tarih': timezone.localdate(), 'akis': akis, 'adim': adim}
+    try:
+        with transaction.atomic():
+            if AktivasyonFunnelMetrik.objects.filter(**filtre).update(**guncelleme):
+                return
+            ilk_deger = {alan: 1}
+            if sure_ms is not None:
+                ilk_deger.update(sure_toplam_ms=sure_ms, sure_sayisi=1)
+            try:
+                with transaction.atomic():
+                    AktivasyonFunnelMetrik.objects.create(**filtre, **ilk_deger)
+            except IntegrityError:
+                # Aynı anda başka bir istek satırı oluşturdu
+                AktivasyonFunnelMetrik.objects.filter(**filtre).update(**guncelleme)
+    except DatabaseError as exc:
+        logger.warning("Aktivasyon funnel metriği yazılamadı (%s/%s): %s", akis, adim, exc)
+
+
+def funnel_raporu(akis, baslangic, bitis=None):
+    """
+    Akışın tarih aralığındaki huni özetini döndürür.
+
+    Her adım için tamamlanma, hata, terk, ortalama süre ve bir önceki adıma göre
+    düşüş oranı (drop-off) hesaplanır. Akış dışı devir adımları sona eklenir.
+    """
+    from django.db.models import Sum
+
+    qs = AktivasyonFunnelMetrik.objects.filter(akis=akis, tarih__gte=baslangic)
+    if bitis:
+        qs = qs.filter(tarih__lte=bitis)
+    toplamlar = {
+        satir['adim']: satir
+        for satir in qs.values('adim').annotate(
+            tamamlanan_toplam=Sum('tamamlanan'),
+            hata_toplam=Sum('hata'),
+            terk_toplam=Sum('terk'),
+            sure_toplam=Sum('sure_toplam_ms'),
+            sure_adet=Sum('sure_sayisi'),
+        )
+    }
+
+    sirali = list(AKIS_ADIMLARI[akis]) + sorted(a for a in toplamlar if a not in AKIS_ADIMLARI[akis])
+    rapor = []
+    onceki = None
+    for adim in sirali:
+        satir = toplamlar.get(adim, {})
+        tamamlanan = satir.get('tamamlanan_toplam') or 0
+        sure_adet = satir.get('sure_adet') or 0
+        ana_adim = adim in AKIS_ADIMLARI[akis]
+        dusus = None
+        if ana_adim and onceki:
+            dusus = round(100 * (1 - tamamlanan / onceki), 1)
+        rapor.append({
+            'adim': adim,
+            'tamamlanan': tamamlanan,
+            'hata': satir.get('hata_toplam') or 0,
+            'terk': satir.get('terk_toplam') or 0,
+            'ortalama_sure_ms': int((satir.get('sure_toplam') or 0) / sure_adet) if sure_adet else None,
+            'dusus_orani': dusus,
+        })
+        if ana_adim:
+            onceki = tamamlanan
+    return rapor
+
+
+def etiketi_aktiflestir(etiket, evcil, kullanici, kilidi_ac=False, qr_url=None):
+    """
+    Kilitli okunmuş etiketi hayvana bağlayıp aktif eder ve satıcı bayiye
+    aktivasyon kredisini yazar.
+    """
+    etiket.evcil_hayvan = evcil
+    etiket.aktif = True
+    if kilidi_ac:
+        etiket.kilitli = False
+    etiket.aktiflestiren = kullanici
+    etiket.aktiflestirme_tarihi = timezone.now()
+    if qr_url:
+        etiket.qr_kod_url = qr_url
+    etiket.save()
+
+    # Etiket aktivasyonunda veteriner/petshop'a kredi ver
+    try:
+        from ilan.models import KrediHareketi
+
+        satici_kullanici = None
+        if etiket.satici_veteriner_id and etiket.satici_veteriner.kullanici_id:
+            satici_kullanici = etiket.satici_veteriner.kullanici
+        elif etiket.satici_petshop_id and etiket.satici_petshop.kullanici_id:
+            satici_kullanici = etiket.satici_petshop.kullanici
+
+        if satici_kullanici:
+            KrediHareketi.objects.create(
+                kullanici=satici_kullanici,
+                hareket_turu=KrediHareketi.HAREKET_ETIKET_AKTIVASYON,
+                miktar=ETIKET_SATIS_KREDI,
+                aciklama=f"Etiket aktivasyonu: {etiket.seri_numarasi}",
+                etiket=etiket
+            )
+    except Exception as e:
+        logger.error(f"Etiket aktivasyon kredisi verme hatası: {e}", exc_info=True)
@@ -1,3 +1,22 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AktivasyonFunnelMetrik
+
+
+@admin.register(AktivasyonFunnelMetrik)
+class AktivasyonFunnelMetrikAdmin(admin.ModelAdmin):
+    list_display = ('tarih', 'akis', 'adim', 'tamamlanan', 'hata', 'terk', 'ortalama_sure_goster')
+    list_filter = ('akis', 'adim', 'tarih')
+    date_hierarchy = 'tarih'
+
+    def ortalama_sure_goster(self, obj):
+        if not obj.sure_sayisi:
+            return '-'
+        return f"{obj.ortalama_sure_ms / 1000:.1f} sn"
+    ortalama_sure_goster.short_description = 'Ort. Süre'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccauntConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accaunt'
+
+    def ready(self):
+        # Rol önbelleğini profil değişikliklerinde geçersiz kılan sinyaller
+        from . import roles  # noqa: F401
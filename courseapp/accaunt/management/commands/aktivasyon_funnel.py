@@ -0,0 +1,33 @@
+"""
+Etiket aktivasyon hunisi raporu: adım bazında tamamlanma, süre ve düşüş oranı.
+Kullanım: python manage.py aktivasyon_funnel --gun 7
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accaunt.activation import funnel_raporu
+from accaunt.models import AKIS_SECENEKLERI
+
+
+class Command(BaseCommand):
+    help = 'Etiket aktivasyon akışlarının adım bazında funnel raporunu yazdırır'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gun', type=int, default=7, help='Kaç günlük veri (varsayılan: 7)')
+        parser.add_argument('--akis', choices=[k for k, _ in AKIS_SECENEKLERI], help='Sadece bu akış')
+
+    def handle(self, *args, **options):
+        baslangic = timezone.localdate() - timedelta(days=options['gun'] - 1)
+        for akis, ad in AKIS_SECENEKLERI:
+            if options['akis'] and akis != options['akis']:
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{ad} ({baslangic} - bugün)"))
+            for satir in funnel_raporu(akis, baslangic):
+                sure = f"{satir['ortalama_sure_ms'] / 1000:.1f} sn" if satir['ortalama_sure_ms'] is not None else '-'
+                dusus = f"%{satir['dusus_orani']}" if satir['dusus_orani'] is not None else '-'
+                self.stdout.write(
+                    f"  {satir['adim']:<12} tamamlanan={satir['tamamlanan']:<6} hata={satir['hata']:<5} "
+                    f"terk={satir['terk']:<5} ort_sure={sure:<9} dusus={dusus}"
+                )
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accaunt', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AktivasyonFunnelMetrik',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(db_index=True)),
+                ('akis', models.CharField(choices=[('kayit', 'Yeni Kayıt'), ('kunye', 'Künye Aktivasyonu'), ('misafir', 'Misafir Aktivasyonu')], max_length=20)),
+                ('adim', models.CharField(max_length=30)),
+                ('tamamlanan', models.PositiveIntegerField(default=0, help_text='Adımı başarıyla geçen oturum sayısı')),
+                ('hata', models.PositiveIntegerField(default=0, help_text='Doğrulama hatası ile adımda kalan deneme sayısı')),
+                ('terk', models.PositiveIntegerField(default=0, help_text='Akış yarıda bırakılıp yeniden başlatıldı')),
+                ('sure_toplam_ms', models.BigIntegerField(default=0, help_text='Önceki adımdan bu adıma geçiş süreleri toplamı (ms)')),
+                ('sure_sayisi', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Aktivasyon Funnel Metriği',
+                'verbose_name_plural': 'Aktivasyon Funnel Metrikleri',
+                'ordering': ['-tarih', 'akis', 'adim'],
+                'unique_together': {('tarih', 'akis', 'adim')},
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:15
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('accaunt', '0002_aktivasyonfunnelmetrik'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KullaniciRolSurumu',
+            fields=[
+                ('kullanici', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rol_surumu', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('surum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Kullanıcı Rol Sürümü',
+                'verbose_name_plural': 'Kullanıcı Rol Sürümleri',
+            },
+        ),
+    ]
@@ -15,3 +15,53 @@ class MisafirProfil(models.Model):
 
     def __str__(self):
         return self.ad_soyad or self.kullanici.get_username()
+
+
+class KullaniciRolSurumu(models.Model):
+    """Session'daki rol özetinin geçerlilik sürümü (accaunt/roles.py). Profil değiştikçe artar."""
+    kullanici = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='rol_surumu')
+    surum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Kullanıcı Rol Sürümü'
+        verbose_name_plural = 'Kullanıcı Rol Sürümleri'
+
+    def __str__(self):
+        return f"{self.kullanici_id}: {self.surum}"
+
+
+# Etiket aktivasyon akışları (accaunt/activation.py)
+AKIS_KAYIT = 'kayit'
+AKIS_KUNYE = 'kunye'
+AKIS_MISAFIR = 'misafir'
+
+AKIS_SECENEKLERI = [
+    (AKIS_KAYIT, 'Yeni Kayıt'),
+    (AKIS_KUNYE, 'Künye Aktivasyonu'),
+    (AKIS_MISAFIR, 'Misafir Aktivasyonu'),
+]
+
+
+class AktivasyonFunnelMetrik(models.Model):
+    """Aktivasyon hunisi: gün / akış / adım bazında tamamlanma, hata ve süre sayaçları."""
+    tarih = models.DateField(db_index=True)
+    akis = models.CharField(max_length=20, choices=AKIS_SECENEKLERI)
+    adim = models.CharField(max_length=30)
+    tamamlanan = models.PositiveIntegerField(default=0, help_text="Adımı başarıyla geçen oturum sayısı")
+    hata = models.PositiveIntegerField(default=0, help_text="Doğrulama hatası ile adımda kalan deneme sayısı")
+    terk = models.PositiveIntegerField(default=0, help_text="Akış yarıda bırakılıp yeniden başlatıldı")
+    sure_toplam_ms = models.BigIntegerField(default=0, help_text="Önceki adımdan bu adıma geçiş süreleri toplamı (ms)")
+    sure_sayisi = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Aktivasyon Funnel Metriği'
+        verbose_name_plural = 'Aktivasyon Funnel Metrikleri'
+        unique_together = ('tarih', 'akis', 'adim')
+        ordering = ['-tarih', 'akis', 'adim']
+
+    def __str__(self):
+        return f"{self.tarih} {self.akis}/{self.adim}"
+
+    @property
+    def ortalama_sure_ms(self) -> int:
+        return int(self.sure_toplam_ms / self.sure_sayisi) if self.sure_sayisi else 0
@@ -0,0 +1,224 @@
+# accaunt/roles.py
+"""
+Kullanıcı rol çözümleyici.
+
+Veteriner / petshop / misafir / sahip profillerini tek sorguda okur ve
+sonucu hem istek (request.user) hem de session üzerinde saklar. Profil
+oluşturulduğunda veya güncellendiğinde kullanıcının rol sürümü artırılır, böylece
+session'daki eski özet bir sonraki istekte otomatik olarak geçersiz olur.
+
+Sürüm veritabanında (KullaniciRolSurumu) tutulur: cache süreç içi (LocMem)
+olduğundan bir worker'daki geçersiz kılma diğerlerine ulaşmazdı. Session özeti
+okunurken sürüm birincil anahtarla tek sorguda kontrol edilir.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courseapp.constants import KULLANICI_ROL_SESSION_KEY
+
+# Rol sabitleri (panel yönlendirme önceliği ile aynı sırada)
+ROL_VETERINER = 'veteriner'
+ROL_PETSHOP = 'petshop'
+ROL_MISAFIR = 'misafir'
+ROL_SAHIP = 'sahip'
+ROL_NORMAL = 'normal'
+ROL_ANONIM = 'anonim'
+
+# User üzerindeki ters OneToOne ilişkiler
+PROFIL_ILISKILERI = ('veteriner_profili', 'petshop_profili', 'misafir_profili', 'sahip')
+
+_USER_MEMO_ATTR = '_kullanici_rolu'
+
+
+class KullaniciRolu:
+    """Kullanıcının profil bilgilerinin hafif, serileştirilebilir özeti."""
+
+    __slots__ = (
+        'user_id',
+        'veteriner_id', 'veteriner_profil_tamam',
+        'petshop_id', 'petshop_profil_tamam',
+        'misafir_id', 'sahip_id',
+    )
+
+    def __init__(self, user_id=None, veteriner_id=None, veteriner_profil_tamam=False,
+                 petshop_id=None, petshop_profil_tamam=False, misafir_id=None, sahip_id=None):
+        self.user_id = user_id
+        self.veteriner_id = veteriner_id
+        self.veteriner_profil_tamam = veteriner_profil_tamam
+        self.petshop_id = petshop_id
+        self.petshop_profil_tamam = petshop_profil_tamam
+        self.misafir_id = misafir_id
+        self.sahip_id = sahip_id
+
+    def __repr__(self):
+        return f"<KullaniciRolu user={self.user_id} rol={self.rol}>"
+
+    @property
+    def veteriner_mi(self) -> bool:
+        return self.veteriner_id is not None
+
+    @property
+    def petshop_mi(self) -> bool:
+        return self.petshop_id is not None
+
+    @property
+    def misafir_mi(self) -> bool:
+        return self.misafir_id is not None
+
+    @property
+    def sahip_mi(self) -> bool:
+        return self.sahip_id is not None
+
+    @property
+    def bayi_mi(self) -> bool:
+        """Veteriner ve petshop kullanıcıları bayi fiyatı ve bayi kurallarına tabidir."""
+        return self.veteriner_mi or self.petshop_mi
+
+    @property
+    def rol(self) -> str:
+        """Birincil rol (veteriner > petshop > misafir > sahip)."""
+        if self.user_id is None:
+            return ROL_ANONIM
+        if self.veteriner_mi:
+            return ROL_VETERINER
+        if self.petshop_mi:
+            return ROL_PETSHOP
+        if self.misafir_mi:
+            return ROL_MISAFIR
+        if self.sahip_mi:
+            return ROL_SAHIP
+        return ROL_NORMAL
+
+    @property
+    def profil_tamam_mi(self) -> bool:
+        """Birincil rolün profili tamamlanmış mı? (veteriner/petshop dışı her zaman True)"""
+        if self.veteriner_mi:
+            return self.veteriner_profil_tamam
+        if self.petshop_mi:
+            return self.petshop_profil_tamam
+        return True
+
+    def as_dict(self) -> dict:
+        return {alan: getattr(self, alan) for alan in self.__slots__}
+
+
+ANONIM_ROL = KullaniciRolu()
+
+
+def _rol_surumu(user_id):
+    """Kullanıcının geçerli rol sürümü (satır yoksa profil hiç değişmemiştir: 0)."""
+    from .models import KullaniciRolSurumu
+
+    surum = KullaniciRolSurumu.objects.filter(kullanici_id=user_id).values_list('surum', flat=True)[:1]
+    return next(iter(surum), 0)
+
+
+def _profil_tamam(profil) -> bool:
+    return bool(profil.il_id and profil.adres_detay)
+
+
+def _iliski_cache_yaz(user, iliski, deger):
+    """request.user üzerindeki ters OneToOne cache'ini doldurur (hasattr sorgusu önlenir)."""
+    getattr(get_user_model(), iliski).related.set_cached_value(user, deger)
+
+
+def resolve_user_role(user) -> KullaniciRolu:
+    """
+    Kullanıcının rolünü tek sorguda çözer ve user nesnesinde saklar.
+
+    Bulunan profil nesneleri user'ın ilişki cache'ine yazılır; böylece aynı istek
+    içindeki `hasattr(user, 'veteriner_profili')` gibi kontroller tekrar sorgu atmaz.
+    """
+    if user is None or not user.is_authenticated:
+        return ANONIM_ROL
+
+    memo = getattr(user, _USER_MEMO_ATTR, None)
+    if memo is not None:
+        return memo
+
+    satir = get_user_model().objects.select_related(*PROFIL_ILISKILERI).filter(pk=user.pk).first()
+    profiller = {iliski: getattr(satir, iliski, None) if satir else None for iliski in PROFIL_ILISKILERI}
+    for iliski, profil in profiller.items():
+        _iliski_cache_yaz(user, iliski, profil)
+
+    vet = profiller['veteriner_profili']
+    shop = profiller['petshop_profili']
+    misafir = profiller['misafir_profili']
+    sahip = profiller['sahip']
+    rol = KullaniciRolu(
+        user_id=user.pk,
+        veteriner_id=vet.pk if vet else None,
+        veteriner_profil_tamam=_profil_tamam(vet) if vet else False,
+        petshop_id=shop.pk if shop else None,
+        petshop_profil_tamam=_profil_tamam(shop) if shop else False,
+        misafir_id=misafir.pk if misafir else None,
+        sahip_id=sahip.pk if sahip else None,
+    )
+    setattr(user, _USER_MEMO_ATTR, rol)
+    return rol
+
+
+def get_user_role(request) -> KullaniciRolu:
+    """
+    İstek için rolü döndürür: önce request.user üzerindeki değer, sonra session özeti,
+    en son veritabanı (tek sorgu). Session özeti sürüm anahtarı ile doğrulanır.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return ANONIM_ROL
+
+    memo = getattr(user, _USER_MEMO_ATTR, None)
+    if memo is not None:
+        return memo
+
+    session = getattr(request, 'session', None)
+    surum = _rol_surumu(user.pk)
+    ozet = session.get(KULLANICI_ROL_SESSION_KEY) if session is not None else None
+
+    if ozet and ozet.get('surum') == surum and ozet.get('user_id') == user.pk:
+        veriler = {alan: ozet.get(alan) for alan in KullaniciRolu.__slots__}
+        rol = KullaniciRolu(**veriler)
+        # Olmadığı kesin bilinen profiller için "yok" bilgisini cache'e yaz
+        for iliski, profil_id in zip(PROFIL_ILISKILERI, (rol.veteriner_id, rol.petshop_id, rol.misafir_id, rol.sahip_id)):
+            if profil_id is None:
+                _iliski_cache_yaz(user, iliski, None)
+        setattr(user, _USER_MEMO_ATTR, rol)
+        return rol
+
+    rol = resolve_user_role(user)
+    if session is not None:
+        session[KULLANICI_ROL_SESSION_KEY] = dict(rol.as_dict(), surum=surum)
+    return rol
+
+
+def invalidate_user_role(user_id):
+    """Rol özetini geçersiz kılar (session'daki özetler bir sonraki istekte yeniden hesaplanır)."""
+    from .models import KullaniciRolSurumu
+
+    if not user_id:
+        return
+    if KullaniciRolSurumu.objects.filter(kullanici_id=user_id).update(surum=F('surum') + 1):
+        return
+    try:
+        with transaction.atomic():
+            KullaniciRolSurumu.objects.create(kullanici_id=user_id, surum=1)
+    except IntegrityError:
+        # Eşzamanlı ilk geçersiz kılma satırı oluşturdu
+        KullaniciRolSurumu.objects.filter(kullanici_id=user_id).update(surum=F('surum') + 1)
+
+
+# --- Profil değişikliklerinde otomatik geçersiz kılma ---
+
+@receiver(post_save, sender='veteriner.Veteriner')
+@receiver(post_save, sender='petshop.PetShop')
+@receiver(post_save, sender='accaunt.MisafirProfil')
+@receiver(post_save, sender='anahtarlik.Sahip')
+@receiver(post_delete, sender='veteriner.Veteriner')
+@receiver(post_delete, sender='petshop.PetShop')
+@receiver(post_delete, sender='accaunt.MisafirProfil')
+@receiver(post_delete, sender='anahtarlik.Sahip')
+def profil_degisti(sender, instance, **kwargs):
+    invalidate_user_role(instance.kullanici_id)
@@ -1,3 +1,108 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 
-# Create your tests here.
+from accaunt.activation import ADIM_ETIKET, ADIM_HAYVAN, ADIM_SAHIP, AktivasyonAkisi, funnel_raporu
+from accaunt.models import AKIS_KAYIT, AKIS_MISAFIR, KullaniciRolSurumu
+from accaunt.roles import ROL_VETERINER, get_user_role
+from anahtarlik.dictionaries import Il
+from etiket.models import Etiket
+from veteriner.models import Veteriner
+
+
+class KullaniciRoluTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='vet', password='x')
+        self.veteriner = Veteriner.objects.create(ad='Klinik', kullanici=self.user)
+        self.session = SessionStore()
+
+    def _istek(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=self.user.pk)
+        request.session = self.session
+        return request
+
+    def test_rol_tek_sorgu_ve_session_ozeti(self):
+        request = self._istek()
+        with CaptureQueriesContext(connection) as ctx:
+            rol = get_user_role(request)
+            # Aynı istek içindeki profil kontrolleri tekrar sorgu atmamalı
+            hasattr(request.user, 'petshop_profili')
+            hasattr(request.user, 'misafir_profili')
+        # rol sürümü + profiller
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(rol.rol, ROL_VETERINER)
+        self.assertTrue(rol.bayi_mi)
+        self.assertFalse(rol.profil_tamam_mi)
+
+        # Sonraki istek session özetinden okunur; yalnızca rol sürümü sorgulanır
+        request = self._istek()
+        with CaptureQueriesContext(connection) as ctx:
+            rol = get_user_role(request)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(rol.veteriner_id, self.veteriner.pk)
+
+    def test_profil_tamamlaninca_ozet_gecersiz(self):
+        self.assertFalse(get_user_role(self._istek()).profil_tamam_mi)
+
+        self.veteriner.il = Il.objects.create(ad='Ankara')
+        self.veteriner.adres_detay = 'Çankaya'
+        self.veteriner.save()
+
+        self.assertTrue(get_user_role(self._istek()).profil_tamam_mi)
+
+    def test_surum_veritabaninda(self):
+        get_user_role(self._istek())
+        # Süreç içi cache'in boşalması (başka worker / yeniden başlatma) özeti geçersiz kılmaz
+        cache.clear()
+        request = self._istek()
+        with self.assertNumQueries(1):
+            self.assertEqual(get_user_role(request).rol, ROL_VETERINER)
+
+        self.veteriner.delete()
+        self.assertGreater(KullaniciRolSurumu.objects.get(kullanici=self.user).surum, 0)
+        self.assertNotEqual(get_user_role(self._istek()).rol, ROL_VETERINER)
+
+
+class AktivasyonAkisiTests(TestCase):
+    def setUp(self):
+        self.etiket = Etiket.objects.create()
+        self.request = RequestFactory().get('/')
+        self.request.session = SessionStore()
+
+    def test_adim_gecisleri_ve_funnel_metrikleri(self):
+        akis = AktivasyonAkisi(self.request, AKIS_MISAFIR)
+        self.assertFalse(akis.adima_izin_var_mi(ADIM_HAYVAN))
+
+        akis.baslat(self.etiket, ADIM_HAYVAN)
+        self.assertTrue(akis.adima_izin_var_mi(ADIM_HAYVAN))
+        self.assertFalse(akis.adima_izin_var_mi(ADIM_SAHIP))
+
+        akis.ilerle(ADIM_HAYVAN, ADIM_SAHIP, evcil={'ad': 'Pamuk'})
+        self.assertEqual(akis.veri['evcil']['ad'], 'Pamuk')
+        self.assertEqual(akis.seri, self.etiket.seri_numarasi)
+
+        with transaction.atomic():
+            self.assertEqual(akis.etiketi_kilitle().pk, self.etiket.pk)
+        akis.tamamla(ADIM_SAHIP)
+        self.assertFalse(akis.aktif)
+
+        rapor = {satir['adim']: satir for satir in funnel_raporu(AKIS_MISAFIR, timezone.localdate())}
+        self.assertEqual(rapor[ADIM_ETIKET]['tamamlanan'], 1)
+        self.assertEqual(rapor[ADIM_SAHIP]['tamamlanan'], 1)
+        self.assertEqual(rapor[ADIM_SAHIP]['dusus_orani'], 0.0)
+        self.assertIsNotNone(rapor[ADIM_HAYVAN]['ortalama_sure_ms'])
+
+    def test_aktif_etiket_kilitlenemez(self):
+        akis = AktivasyonAkisi(self.request, AKIS_KAYIT)
+        akis.baslat(self.etiket, ADIM_HAYVAN)
+        self.assertEqual(self.request.session['etiket_id'], self.etiket.pk)
+
+        Etiket.objects.filter(pk=self.etiket.pk).update(aktif=True)
+        with transaction.atomic():
+            self.assertIsNone(akis.etiketi_kilitle())
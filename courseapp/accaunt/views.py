@@ -18,61 +18,89 @@ from django.urls import reverse
 from django.utils import timezone
 
 from anahtarlik.models import Sahip, EvcilHayvan
-from etiket.models import Etiket
 from accaunt.forms import EtiketForm, MisafirKayitForm, MisafirProfilForm, EvcilHayvanForm
 from accaunt.register_forms import EvcilHayvanKayitForm, KullaniciAdresForm, GuestOwnerInfoForm
-from accaunt.models import MisafirProfil
+from accaunt.models import MisafirProfil, AKIS_KAYIT, AKIS_KUNYE, AKIS_MISAFIR
+from accaunt.activation import (
+    AktivasyonAkisi, etiketi_aktiflestir,
+    ADIM_HAYVAN, ADIM_SAHIP, ADIM_TELEFON, ADIM_KAYIT_DEVRI, ADIM_GIRIS,
+)
+from accaunt.roles import get_user_role
 # Veteriner ve petshop modellerini de import edelim ki kontrol edebilelim
 from veteriner.models import Veteriner
 from petshop.models import PetShop
 
 logger = logging.getLogger(__name__)
 
-GUEST_ACTIVATION_ETIKET_KEY = 'guest_activation_etiket_id'
-GUEST_ACTIVATION_PET_KEY = 'guest_activation_pet_data'
 
+def _gecici_resim_kaydet(request):
+    """Yüklenen hayvan fotoğrafını geçici konuma kaydeder, yolunu döndürür."""
+    if 'resim' not in request.FILES:
+        return None
+    import uuid
+    resim = request.FILES['resim']
+    temp_name = f"temp_{uuid.uuid4()}_{resim.name}"
+    return default_storage.save(f"temp_images/{temp_name}", resim)
+
+
+def _evcil_session_verisi(cd):
+    """Form verisini session'a yazılabilir hale getirir."""
+    return {
+        'ad': cd.get('ad'),
+        'tur_id': cd.get('tur').id if cd.get('tur') else None,
+        'irk_id': cd.get('irk').id if cd.get('irk') else None,
+        'cinsiyet': cd.get('cinsiyet'),
+        'dogum_tarihi': cd.get('dogum_tarihi').isoformat() if cd.get('dogum_tarihi') else None,
+    }
+
+
+def _evcil_olustur(sahip, evcil_data):
+    """Session'daki hayvan verisinden EvcilHayvan oluşturur, geçici fotoğrafı taşır."""
+    evcil_kwargs = {
+        'ad': evcil_data.get('ad'),
+        'cinsiyet': evcil_data.get('cinsiyet'),
+        'sahip': sahip,
+    }
+    if evcil_data.get('dogum_tarihi'):
+        try:
+            evcil_kwargs['dogum_tarihi'] = date.fromisoformat(evcil_data['dogum_tarihi'])
+        except ValueError:
+            pass
+    if evcil_data.get('tur_id'):
+        evcil_kwargs['tur_id'] = evcil_data['tur_id']
+    if evcil_data.get('irk_id'):
+        evcil_kwargs['irk_id'] = evcil_data['irk_id']
+
+    evcil = EvcilHayvan.objects.create(**evcil_kwargs)
+
+    temp_path = evcil_data.get('resim_temp_path')
+    if temp_path and default_storage.exists(temp_path):
+        # Geçici dosyayı kalıcı konuma taşı
+        with default_storage.open(temp_path, 'rb') as temp_file:
+            evcil.resim.save(os.path.basename(temp_path), temp_file, save=True)
+        default_storage.delete(temp_path)
+    return evcil
 
-def _clear_guest_activation_session(request):
-    pet_data = request.session.pop(GUEST_ACTIVATION_PET_KEY, None)
-    if pet_data:
-        temp_path = pet_data.get('resim_temp_path')
-        if temp_path and default_storage.exists(temp_path):
-            try:
-                default_storage.delete(temp_path)
-            except Exception as exc:  # pragma: no cover - sadece loglama
-                logger.warning("Geçici görsel silinemedi: %s", exc)
-    request.session.pop(GUEST_ACTIVATION_ETIKET_KEY, None)
 
 # --- 1. Adım: Etiket kontrolü ---
 def step_1_check_tag(request):
-    # Eğer session'da etiket_id varsa (künye aktivasyonundan geliyorsa), direkt step 2'ye git
-    if request.session.get('etiket_id'):
-        try:
-            etiket = Etiket.objects.get(id=request.session['etiket_id'])
-            if not etiket.aktif:
-                return redirect('step_2_pet_info')
-            else:
-                # Etiket zaten aktif, session'ı temizle
-                del request.session['etiket_id']
-                messages.error(request, "Bu etiket zaten aktif!")
-        except Etiket.DoesNotExist:
-            # Etiket bulunamadı, session'ı temizle
-            del request.session['etiket_id']
-            messages.error(request, "Etiket bulunamadı. Lütfen tekrar deneyin.")
-    
+    akis = AktivasyonAkisi(request, AKIS_KAYIT)
+
+    # Künye aktivasyonundan geliyorsa etiket zaten doğrulandı, direkt step 2'ye git
+    if akis.aktif:
+        etiket = akis.etiket_getir()
+        if etiket is not None and not etiket.aktif:
+            return redirect('step_2_pet_info')
+        akis.temizle()
+        messages.error(request, "Bu etiket zaten aktif!" if etiket else "Etiket bulunamadı. Lütfen tekrar deneyin.")
+
     if request.method == 'POST':
         form = EtiketForm(request.POST)
         if form.is_valid():
-            seri = form.cleaned_data['seri_numarasi']
-            try:
-                etiket = Etiket.objects.get(seri_numarasi=seri)
-                if etiket.aktif:
-                    messages.error(request, "Bu etiket zaten aktif!")
-                else:
-                    request.session['etiket_id'] = etiket.id
-                    return redirect('step_2_pet_info')
-            except Etiket.DoesNotExist:
-                messages.error(request, "Bu seri numarası sistemde bulunamadı.")
+            etiket = akis.etiket_dogrula(form.cleaned_data['seri_numarasi'])
+            if etiket is not None:
+                akis.baslat(etiket, ADIM_HAYVAN)
+                return redirect('step_2_pet_info')
     else:
         form = EtiketForm()
     return render(request, 'accaunt/register.html', {'form': form, 'step': 1})
@@ -80,34 +108,19 @@ def step_1_check_tag(request):
 
 # --- 2. Adım: Pet bilgileri ---
 def step_2_pet_info(request):
-    if 'etiket_id' not in request.session:
+    akis = AktivasyonAkisi(request, AKIS_KAYIT)
+    if not akis.adima_izin_var_mi(ADIM_HAYVAN):
         return redirect('step_1_check_tag')
 
     if request.method == 'POST':
         form = EvcilHayvanKayitForm(request.POST, request.FILES)
         if form.is_valid():
-            cd = form.cleaned_data
-            evcil_data = {
-                'ad': cd.get('ad'),
-                'tur_id': cd.get('tur').id if cd.get('tur') else None,
-                'irk_id': cd.get('irk').id if cd.get('irk') else None,
-                'cinsiyet': cd.get('cinsiyet'),
-                'dogum_tarihi': cd.get('dogum_tarihi').isoformat() if cd.get('dogum_tarihi') else None,
-            }
-            
-            # Fotoğraf işleme
-            if 'resim' in request.FILES:
-                import uuid
-                resim = request.FILES['resim']
-                
-                temp_name = f"temp_{uuid.uuid4()}_{resim.name}"
-                temp_path = f"temp_images/{temp_name}"
-                
-                # Geçici dosyayı kaydet
-                saved_path = default_storage.save(temp_path, resim)
+            evcil_data = _evcil_session_verisi(form.cleaned_data)
+            saved_path = _gecici_resim_kaydet(request)
+            if saved_path:
                 evcil_data['resim_temp_path'] = saved_path
-            
-            request.session['evcil_data'] = evcil_data
+
+            akis.ilerle(ADIM_HAYVAN, ADIM_SAHIP, evcil=evcil_data)
             return redirect('step_3_owner_info')
     else:
         form = EvcilHayvanKayitForm()
@@ -116,7 +129,8 @@ def step_2_pet_info(request):
 
 # --- 3. Adım: Kullanıcı/Sahip bilgileri ---
 def step_3_owner_info(request):
-    if 'etiket_id' not in request.session or 'evcil_data' not in request.session:
+    akis = AktivasyonAkisi(request, AKIS_KAYIT)
+    if not akis.adima_izin_var_mi(ADIM_SAHIP) or 'evcil' not in akis.veri:
         return redirect('step_1_check_tag')
 
     if request.method == 'POST':
@@ -134,6 +148,14 @@ def step_3_owner_info(request):
                 messages.error(request, "Telefon numarası zaten kayıtlı.")
             else:
                 with transaction.atomic():
+                    # Aynı etiketin eşzamanlı aktivasyonunu engelle
+                    etiket = akis.etiketi_kilitle()
+                    if etiket is None:
+                        akis.hata(ADIM_SAHIP)
+                        akis.temizle()
+                        messages.error(request, "Etiket bulunamadı veya zaten aktif. Lütfen tekrar deneyin.")
+                        return redirect('step_1_check_tag')
+
                     user = User.objects.create_user(
                         username=username,
                         email=email,
@@ -154,69 +176,11 @@ def step_3_owner_info(request):
                     danisman_veteriner = sahip.danisman_veteriner_ata()
                     if danisman_veteriner:
                         messages.info(request, f"Danışman veterineriniz: {danisman_veteriner.ad}")
-                    evcil_data = request.session['evcil_data']
-                    if evcil_data.get('dogum_tarihi'):
-                        evcil_data['dogum_tarihi'] = date.fromisoformat(evcil_data['dogum_tarihi'])
-                    
-                    # ID'leri model objelerine çevir
-                    if evcil_data.get('tur_id'):
-                        from anahtarlik.dictionaries import Tur
-                        evcil_data['tur'] = Tur.objects.get(id=evcil_data['tur_id'])
-                        del evcil_data['tur_id']
-                    
-                    if evcil_data.get('irk_id'):
-                        from anahtarlik.dictionaries import Irk
-                        evcil_data['irk'] = Irk.objects.get(id=evcil_data['irk_id'])
-                        del evcil_data['irk_id']
 
-                    # Fotoğraf temp path'ini çıkar
-                    resim_temp_path = evcil_data.pop('resim_temp_path', None)
-                    
-                    evcil = EvcilHayvan.objects.create(sahip=sahip, **evcil_data)
-                    
-                    # Fotoğraf işleme
-                    if resim_temp_path and default_storage.exists(resim_temp_path):
-                        # Geçici dosyayı kalıcı konuma taşı
-                        with default_storage.open(resim_temp_path, 'rb') as temp_file:
-                            evcil.resim.save(
-                                os.path.basename(resim_temp_path),
-                                temp_file,
-                                save=True
-                            )
-                        # Geçici dosyayı sil
-                        default_storage.delete(resim_temp_path)
-
-                    etiket = Etiket.objects.get(id=request.session['etiket_id'])
-                    etiket.evcil_hayvan = evcil
-                    etiket.kilitli = False
-                    etiket.aktif = True
-                    etiket.aktiflestiren = user
-                    etiket.aktiflestirme_tarihi = timezone.now()
-                    etiket.save()
-                    
-                    # Etiket aktivasyonunda veteriner/petshop'a kredi ver
-                    try:
-                        from ilan.models import KrediHareketi
-                        
-                        if etiket.satici_veteriner and etiket.satici_veteriner.kullanici:
-                            KrediHareketi.objects.create(
-                                kullanici=etiket.satici_veteriner.kullanici,
-                                hareket_turu=KrediHareketi.HAREKET_ETIKET_AKTIVASYON,
-                                miktar=150,
-                                aciklama=f"Etiket aktivasyonu: {etiket.seri_numarasi}",
-                                etiket=etiket
-                            )
-                        elif etiket.satici_petshop and etiket.satici_petshop.kullanici:
-                            KrediHareketi.objects.create(
-                                kullanici=etiket.satici_petshop.kullanici,
-                                hareket_turu=KrediHareketi.HAREKET_ETIKET_AKTIVASYON,
-                                miktar=150,
-                                aciklama=f"Etiket aktivasyonu: {etiket.seri_numarasi}",
-                                etiket=etiket
-                            )
-                    except Exception as e:
-                        logger.error(f"Etiket aktivasyon kredisi verme hatası: {e}", exc_info=True)
+                    evcil = _evcil_olustur(sahip, akis.veri['evcil'])
+                    etiketi_aktiflestir(etiket, evcil, user, kilidi_ac=True)
 
+                    akis.tamamla(ADIM_SAHIP)
                     request.session.flush()
                     return redirect('step_4_complete')
     else:
@@ -231,6 +195,17 @@ def step_4_complete(request):
 
 
 # --- KÜNYE AKTİVASYON (Login olmayan kullanıcılar için) ---
+def _künye_adim1_render(request, form=None, **extra):
+    context = {
+        'form': form or EtiketForm(),
+        'step': 1,
+        'title': 'Künye Aktivasyonu',
+        'show_choice': False,
+    }
+    context.update(extra)
+    return render(request, 'accaunt/künye_aktivasyon.html', context)
+
+
 def künye_aktivasyon_adim1(request):
     """Login olmayan kullanıcılar için künye aktivasyon - Adım 1: Künye kontrolü"""
     
@@ -238,126 +213,60 @@ def künye_aktivasyon_adim1(request):
     if request.user.is_authenticated:
         return redirect('kullanici_paneli')
     
+    akis = AktivasyonAkisi(request, AKIS_KUNYE)
+
     if request.method == 'POST':
         # Seçenek kontrolü (yeni kayıt vs mevcut hesap)
         kayit_tipi = request.POST.get('kayit_tipi')
         
-        if kayit_tipi == 'yeni_kayit':
-            # Yeni kayıt için user_register sürecine yönlendir
-            # Etiket ID zaten session'da (künye_etiket_id olarak), onu etiket_id'ye kopyala
-            etiket_id = request.session.get('künye_etiket_id')
-            if etiket_id:
-                try:
-                    etiket = Etiket.objects.get(id=etiket_id)
-                    if etiket.aktif:
-                        messages.error(request, "Bu künye zaten aktif!")
-                        del request.session['künye_etiket_id']
-                        form = EtiketForm()
-                        return render(request, 'accaunt/künye_aktivasyon.html', {
-                            'form': form, 
-                            'step': 1,
-                            'title': 'Künye Aktivasyonu',
-                            'show_choice': False
-                        })
-                    else:
-                        # Etiket ID'yi user_register için session'a ekle
-                        request.session['etiket_id'] = etiket_id
-                        del request.session['künye_etiket_id']  # Künye aktivasyon session'ını temizle
-                        return redirect('user_register')
-                except Etiket.DoesNotExist:
+        if kayit_tipi in ('yeni_kayit', 'mevcut_hesap'):
+            # Etiket akışta zaten doğrulandı; tek okuma ile güncel durumu kontrol et
+            etiket = akis.etiket_getir()
+            if etiket is None or etiket.aktif:
+                if not akis.aktif:
+                    messages.error(request, "Etiket bilgisi bulunamadı. Lütfen tekrar deneyin.")
+                elif etiket is None:
                     messages.error(request, "Etiket bulunamadı. Lütfen tekrar deneyin.")
-                    del request.session['künye_etiket_id']
-                    form = EtiketForm()
-                    return render(request, 'accaunt/künye_aktivasyon.html', {
-                        'form': form, 
-                        'step': 1,
-                        'title': 'Künye Aktivasyonu',
-                        'show_choice': False
-                    })
-            else:
-                messages.error(request, "Etiket bilgisi bulunamadı. Lütfen tekrar deneyin.")
-                form = EtiketForm()
-                return render(request, 'accaunt/künye_aktivasyon.html', {
-                    'form': form, 
-                    'step': 1,
-                    'title': 'Künye Aktivasyonu',
-                    'show_choice': False
-                })
-        
-        elif kayit_tipi == 'mevcut_hesap':
-            # Mevcut hesap için giriş sayfasına yönlendir
-            # Etiket ID zaten session'da
-            etiket_id = request.session.get('künye_etiket_id')
-            if etiket_id:
-                try:
-                    etiket = Etiket.objects.get(id=etiket_id)
-                    if etiket.aktif:
-                        messages.error(request, "Bu künye zaten aktif!")
-                        del request.session['künye_etiket_id']
-                        form = EtiketForm()
-                        return render(request, 'accaunt/künye_aktivasyon.html', {
-                            'form': form, 
-                            'step': 1,
-                            'title': 'Künye Aktivasyonu',
-                            'show_choice': False
-                        })
-                    else:
-                        # Künye bulundu, bilgi mesajı göster ve giriş sayfasına yönlendir
-                        request.session['künye_aktivasyon_redirect'] = True
-                        messages.info(request, "Giriş yaparak künyenizi mevcut hesabınıza ekleyebilirsiniz.")
-                        return redirect('user_login')
-                except Etiket.DoesNotExist:
-                    messages.error(request, "Etiket bulunamadı. Lütfen tekrar deneyin.")
-                    del request.session['künye_etiket_id']
-                    form = EtiketForm()
-                    return render(request, 'accaunt/künye_aktivasyon.html', {
-                        'form': form, 
-                        'step': 1,
-                        'title': 'Künye Aktivasyonu',
-                        'show_choice': False
-                    })
-            else:
-                messages.error(request, "Etiket bilgisi bulunamadı. Lütfen tekrar deneyin.")
-                form = EtiketForm()
-                return render(request, 'accaunt/künye_aktivasyon.html', {
-                    'form': form, 
-                    'step': 1,
-                    'title': 'Künye Aktivasyonu',
-                    'show_choice': False
-                })
+                else:
+                    messages.error(request, "Bu künye zaten aktif!")
+                akis.temizle()
+                return _künye_adim1_render(request)
+
+            if kayit_tipi == 'yeni_kayit':
+                # Yeni kayıt sürecine devret: kayıt akışı etiket adımı geçilmiş olarak başlar
+                akis.tamamla(ADIM_KAYIT_DEVRI)
+                AktivasyonAkisi(request, AKIS_KAYIT).baslat(etiket, ADIM_HAYVAN)
+                return redirect('user_register')
+
+            # Mevcut hesap: giriş sonrası add_pet akışına devredilir (bkz. user_login)
+            request.session['künye_aktivasyon_redirect'] = True
+            messages.info(request, "Giriş yaparak künyenizi mevcut hesabınıza ekleyebilirsiniz.")
+            return redirect('user_login')
         
         # Normal form gönderimi (ilk etiket kontrolü)
         form = EtiketForm(request.POST)
         if form.is_valid():
-            seri = form.cleaned_data['seri_numarasi']
-            try:
-                etiket = Etiket.objects.get(seri_numarasi=seri)
-                if etiket.aktif:
-                    messages.error(request, "Bu künye zaten aktif!")
-                else:
-                    # Künye geçerli, seçenek göster
-                    request.session['künye_etiket_id'] = etiket.id
-                    # Form'u seri numarası ile başlat (seçenek ekranında gösterilmek için)
-                    form_with_seri = EtiketForm(initial={'seri_numarasi': seri})
-                    return render(request, 'accaunt/künye_aktivasyon.html', {
-                        'form': form_with_seri,
-                        'step': 1,
-                        'title': 'Künye Aktivasyonu',
-                        'show_choice': True,  # Seçenek göster
-                        'etiket_id': etiket.id,
-                        'seri_numarasi': seri  # Template'de kullanmak için
-                    })
-            except Etiket.DoesNotExist:
-                messages.error(request, "Bu künye numarası sistemde bulunamadı.")
+            etiket = akis.etiket_dogrula(
+                form.cleaned_data['seri_numarasi'],
+                yok_mesaji="Bu künye numarası sistemde bulunamadı.",
+                aktif_mesaji="Bu künye zaten aktif!",
+            )
+            if etiket is not None:
+                # Künye geçerli, seçenek göster
+                akis.baslat(etiket, ADIM_TELEFON)
+                # Form'u (normalize edilmiş) seri numarası ile başlat
+                seri = etiket.seri_numarasi
+                return _künye_adim1_render(
+                    request,
+                    EtiketForm(initial={'seri_numarasi': seri}),
+                    show_choice=True,  # Seçenek göster
+                    etiket_id=etiket.id,
+                    seri_numarasi=seri,  # Template'de kullanmak için
+                )
     else:
         form = EtiketForm()
     
-    return render(request, 'accaunt/künye_aktivasyon.html', {
-        'form': form, 
-        'step': 1,
-        'title': 'Künye Aktivasyonu',
-        'show_choice': False
-    })
+    return _künye_adim1_render(request, form)
 
 
 def künye_aktivasyon_adim2(request):
@@ -367,8 +276,9 @@ def künye_aktivasyon_adim2(request):
     if request.user.is_authenticated:
         return redirect('kullanici_paneli')
     
-    # Künye ID yoksa başa dön
-    if 'künye_etiket_id' not in request.session:
+    # Künye doğrulanmamışsa başa dön
+    akis = AktivasyonAkisi(request, AKIS_KUNYE)
+    if not akis.adima_izin_var_mi(ADIM_TELEFON):
         return redirect('künye_aktivasyon')
     
     if request.method == 'POST':
@@ -380,14 +290,14 @@ def künye_aktivasyon_adim2(request):
                 telefon = telefon[1:]
             
             # Bu telefon numarasına sahip sahip var mı?
-            try:
-                sahip = Sahip.objects.get(telefon=telefon)
-                request.session['künye_sahip_id'] = sahip.id
+            sahip_id = Sahip.objects.filter(telefon=telefon).values_list('id', flat=True).first()
+            if sahip_id:
+                akis.ilerle(ADIM_TELEFON, ADIM_HAYVAN, sahip_id=sahip_id)
                 return redirect('künye_aktivasyon_adim3')
-            except Sahip.DoesNotExist:
-                messages.error(request, "Bu telefon numarası ile kayıtlı kullanıcı bulunamadı.")
-                messages.warning(request, "Eğer bu telefon numarası zaten kayıtlı ise, lütfen giriş yapıp 'Yeni Evcil Hayvan Ekle' seçeneğini kullanın.")
-                messages.info(request, "İlk kez kayıt oluyorsanız lütfen 'İlk Kez Kayıt Ol' seçeneğini kullanın.")
+            akis.hata(ADIM_TELEFON)
+            messages.error(request, "Bu telefon numarası ile kayıtlı kullanıcı bulunamadı.")
+            messages.warning(request, "Eğer bu telefon numarası zaten kayıtlı ise, lütfen giriş yapıp 'Yeni Evcil Hayvan Ekle' seçeneğini kullanın.")
+            messages.info(request, "İlk kez kayıt oluyorsanız lütfen 'İlk Kez Kayıt Ol' seçeneğini kullanın.")
         else:
             messages.error(request, "Telefon numarası gerekli.")
     
@@ -404,16 +314,25 @@ def künye_aktivasyon_adim3(request):
     if request.user.is_authenticated:
         return redirect('kullanici_paneli')
     
-    # Gerekli session verileri yoksa başa dön
-    if 'künye_etiket_id' not in request.session or 'künye_sahip_id' not in request.session:
+    # Gerekli akış verileri yoksa başa dön
+    akis = AktivasyonAkisi(request, AKIS_KUNYE)
+    if not akis.adima_izin_var_mi(ADIM_HAYVAN) or not akis.veri.get('sahip_id'):
         return redirect('künye_aktivasyon')
     
     if request.method == 'POST':
         form = EvcilHayvanForm(request.POST, request.FILES)
         if form.is_valid():
             with transaction.atomic():
+                # Etiketi kilitle: aynı künye eşzamanlı iki kez aktif edilemez
+                etiket = akis.etiketi_kilitle()
+                if etiket is None:
+                    akis.hata(ADIM_HAYVAN)
+                    akis.temizle()
+                    messages.error(request, "Künye bulunamadı veya zaten aktif. Lütfen tekrar deneyin.")
+                    return redirect('künye_aktivasyon')
+
                 # Sahip'i al
-                sahip = get_object_or_404(Sahip, id=request.session['künye_sahip_id'])
+                sahip = get_object_or_404(Sahip, id=akis.veri['sahip_id'])
                 
                 # Hayvan'ı oluştur
                 evcil = form.save(commit=False)
@@ -421,45 +340,18 @@ def künye_aktivasyon_adim3(request):
                 evcil.save()
                 
                 # Etiket'i aktif et
-                etiket = Etiket.objects.get(id=request.session['künye_etiket_id'])
-                etiket.evcil_hayvan = evcil
-                etiket.aktif = True
-                etiket.aktiflestiren = sahip.kullanici
-                etiket.aktiflestirme_tarihi = timezone.now()
-                etiket.qr_kod_url = f"{settings.SITE_URL}{reverse('etiket:qr_landing', kwargs={'tag_id': etiket.etiket_id})}"
-                etiket.save()
-                
-                # Etiket aktivasyonunda veteriner/petshop'a kredi ver
-                try:
-                    from ilan.models import KrediHareketi
-                    
-                    if etiket.satici_veteriner and etiket.satici_veteriner.kullanici:
-                        KrediHareketi.objects.create(
-                            kullanici=etiket.satici_veteriner.kullanici,
-                            hareket_turu=KrediHareketi.HAREKET_ETIKET_AKTIVASYON,
-                            miktar=150,
-                            aciklama=f"Etiket aktivasyonu: {etiket.seri_numarasi}",
-                            etiket=etiket
-                        )
-                    elif etiket.satici_petshop and etiket.satici_petshop.kullanici:
-                        KrediHareketi.objects.create(
-                            kullanici=etiket.satici_petshop.kullanici,
-                            hareket_turu=KrediHareketi.HAREKET_ETIKET_AKTIVASYON,
-                            miktar=150,
-                            aciklama=f"Etiket aktivasyonu: {etiket.seri_numarasi}",
-                            etiket=etiket
-                        )
-                except Exception as e:
-                    logger.error(f"Etiket aktivasyon kredisi verme hatası: {e}", exc_info=True)
+                etiketi_aktiflestir(
+                    etiket, evcil, sahip.kullanici,
+                    qr_url=f"{settings.SITE_URL}{reverse('etiket:qr_landing', kwargs={'tag_id': etiket.etiket_id})}",
+                )
                 
                 # Danışman veteriner atama (künye aktivasyonu sonrası)
                 danisman_veteriner = sahip.danisman_veteriner_ata()
                 if danisman_veteriner:
                     messages.info(request, f"Danışman veterineriniz: {danisman_veteriner.ad}")
                 
-                # Session'ı temizle
-                del request.session['künye_etiket_id']
-                del request.session['künye_sahip_id']
+                # Akışı tamamla ve session'ı temizle
+                akis.tamamla(ADIM_HAYVAN)
                 
                 messages.success(request, f'Künye başarıyla aktif edildi! {evcil.ad} adlı hayvanınız profilinize eklendi.')
                 messages.info(request, 'Giriş yaparak hayvanınızı görüntüleyebilirsiniz.')
@@ -477,34 +369,28 @@ def künye_aktivasyon_adim3(request):
 # --- Misafir kullanıcılar için etiket aktivasyonu ---
 @login_required
 def guest_activate_tag(request):
-    user = request.user
+    rol = get_user_role(request)
 
-    if hasattr(user, 'sahip'):
+    if rol.sahip_mi:
         messages.info(request, "Zaten sahip profiliniz bulunuyor.")
         return redirect('anahtarlik:kullanici_paneli')
 
-    if not hasattr(user, 'misafir_profili'):
+    if not rol.misafir_mi:
         messages.error(request, "Bu işlem yalnızca misafir kullanıcılar içindir.")
         return redirect('anahtarlik:kullanici_paneli')
 
+    akis = AktivasyonAkisi(request, AKIS_MISAFIR)
     if request.method == 'GET':
-        _clear_guest_activation_session(request)
+        akis.temizle()
 
     form = EtiketForm(request.POST or None)
 
     if request.method == 'POST' and form.is_valid():
-        seri = form.cleaned_data['seri_numarasi']
-        try:
-            etiket = Etiket.objects.get(seri_numarasi=seri)
-            if etiket.aktif:
-                messages.error(request, "Bu etiket zaten aktif!")
-            else:
-                request.session[GUEST_ACTIVATION_ETIKET_KEY] = etiket.id
-                request.session.modified = True
-                messages.success(request, "Etiket doğrulandı. Şimdi evcil hayvan bilgilerini girin.")
-                return redirect('guest_activate_pet')
-        except Etiket.DoesNotExist:
-            messages.error(request, "Bu seri numarası sistemde bulunamadı.")
+        etiket = akis.etiket_dogrula(form.cleaned_data['seri_numarasi'])
+        if etiket is not None:
+            akis.baslat(etiket, ADIM_HAYVAN)
+            messages.success(request, "Etiket doğrulandı. Şimdi evcil hayvan bilgilerini girin.")
+            return redirect('guest_activate_pet')
 
     return render(request, 'accaunt/guest_activate_tag.html', {
         'form': form,
@@ -513,18 +399,18 @@ def guest_activate_tag(request):
 
 @login_required
 def guest_activate_pet(request):
-    user = request.user
-    if hasattr(user, 'sahip'):
+    rol = get_user_role(request)
+    if rol.sahip_mi:
         return redirect('anahtarlik:kullanici_paneli')
-    if not hasattr(user, 'misafir_profili'):
+    if not rol.misafir_mi:
         return redirect('anahtarlik:ev')
 
-    etiket_id = request.session.get(GUEST_ACTIVATION_ETIKET_KEY)
-    if not etiket_id:
+    akis = AktivasyonAkisi(request, AKIS_MISAFIR)
+    if not akis.adima_izin_var_mi(ADIM_HAYVAN):
         messages.warning(request, "Önce etiket seri numarasını doğrulayın.")
         return redirect('guest_activate_tag')
 
-    pet_data = request.session.get(GUEST_ACTIVATION_PET_KEY, {})
+    pet_data = akis.veri.get('evcil', {})
     initial = {}
     if pet_data:
         initial = {
@@ -542,31 +428,18 @@ def guest_activate_pet(request):
     form = EvcilHayvanKayitForm(request.POST or None, request.FILES or None, initial=initial)
 
     if request.method == 'POST' and form.is_valid():
-        cd = form.cleaned_data
-        evcil_data = {
-            'ad': cd.get('ad'),
-            'tur_id': cd.get('tur').id if cd.get('tur') else None,
-            'irk_id': cd.get('irk').id if cd.get('irk') else None,
-            'cinsiyet': cd.get('cinsiyet'),
-            'dogum_tarihi': cd.get('dogum_tarihi').isoformat() if cd.get('dogum_tarihi') else None,
-        }
+        evcil_data = _evcil_session_verisi(form.cleaned_data)
+
+        # Önceki denemeden kalan geçici fotoğrafı sil
+        temp_path = pet_data.get('resim_temp_path')
+        if temp_path and default_storage.exists(temp_path):
+            default_storage.delete(temp_path)
 
-        existing = request.session.get(GUEST_ACTIVATION_PET_KEY)
-        if existing:
-            temp_path = existing.get('resim_temp_path')
-            if temp_path and default_storage.exists(temp_path):
-                default_storage.delete(temp_path)
-
-        if 'resim' in request.FILES:
-            import uuid
-            resim = request.FILES['resim']
-            temp_name = f"temp_{uuid.uuid4()}_{resim.name}"
-            temp_path = f"temp_images/{temp_name}"
-            saved_path = default_storage.save(temp_path, resim)
+        saved_path = _gecici_resim_kaydet(request)
+        if saved_path:
             evcil_data['resim_temp_path'] = saved_path
 
-        request.session[GUEST_ACTIVATION_PET_KEY] = evcil_data
-        request.session.modified = True
+        akis.ilerle(ADIM_HAYVAN, ADIM_SAHIP, evcil=evcil_data)
         messages.success(request, "Evcil hayvan bilgileri kaydedildi. Şimdi adres bilgilerini tamamlayın.")
         return redirect('guest_activate_owner')
 
@@ -578,14 +451,15 @@ def guest_activate_pet(request):
 @login_required
 def guest_activate_owner(request):
     user = request.user
-    if hasattr(user, 'sahip'):
+    rol = get_user_role(request)
+    if rol.sahip_mi:
         return redirect('anahtarlik:kullanici_paneli')
-    if not hasattr(user, 'misafir_profili'):
+    if not rol.misafir_mi:
         return redirect('anahtarlik:ev')
 
-    etiket_id = request.session.get(GUEST_ACTIVATION_ETIKET_KEY)
-    pet_data = request.session.get(GUEST_ACTIVATION_PET_KEY)
-    if not etiket_id or not pet_data:
+    akis = AktivasyonAkisi(request, AKIS_MISAFIR)
+    pet_data = akis.veri.get('evcil')
+    if not akis.adima_izin_var_mi(ADIM_SAHIP) or not pet_data:
         messages.warning(request, "Etiket ve hayvan bilgilerini tamamlamadan ilerleyemezsiniz.")
         return redirect('guest_activate_tag')
 
@@ -606,18 +480,6 @@ def guest_activate_owner(request):
     form = GuestOwnerInfoForm(request.POST or None, user=user, initial=initial)
 
     if request.method == 'POST' and form.is_valid():
-        try:
-            etiket = Etiket.objects.get(id=etiket_id)
-        except Etiket.DoesNotExist:
-            messages.error(request, "Etiket bulunamadı. Lütfen süreci yeniden başlatın.")
-            _clear_guest_activation_session(request)
-            return redirect('guest_activate_tag')
-
-        if etiket.aktif:
-            messages.error(request, "Bu etiket zaten aktif durumda.")
-            _clear_guest_activation_session(request)
-            return redirect('guest_activate_tag')
-
         cd = form.cleaned_data
         telefon = cd['telefon']
         yedek_telefon = cd.get('yedek_telefon') or ''
@@ -628,6 +490,14 @@ def guest_activate_owner(request):
         adres = cd['adres']
 
         with transaction.atomic():
+            # Etiketi kilitle: aynı etiket eşzamanlı iki kez aktif edilemez
+            etiket = akis.etiketi_kilitle()
+            if etiket is None:
+                akis.hata(ADIM_SAHIP)
+                akis.temizle()
+                messages.error(request, "Etiket bulunamadı veya zaten aktif. Lütfen süreci yeniden başlatın.")
+                return redirect('guest_activate_tag')
+
             user.first_name = cd['ad']
             user.last_name = cd['soyad']
             user.save(update_fields=['first_name', 'last_name'])
@@ -659,39 +529,8 @@ def guest_activate_owner(request):
                 sahip.mahalle_diger = mahalle_diger
                 sahip.save()
 
-            evcil_kwargs = {
-                'ad': pet_data.get('ad'),
-                'cinsiyet': pet_data.get('cinsiyet'),
-                'sahip': sahip,
-            }
-
-            if pet_data.get('dogum_tarihi'):
-                try:
-                    evcil_kwargs['dogum_tarihi'] = date.fromisoformat(pet_data['dogum_tarihi'])
-                except ValueError:
-                    pass
-
-            if pet_data.get('tur_id'):
-                from anahtarlik.dictionaries import Tur
-                evcil_kwargs['tur'] = Tur.objects.get(id=pet_data['tur_id'])
-            if pet_data.get('irk_id'):
-                from anahtarlik.dictionaries import Irk
-                evcil_kwargs['irk'] = Irk.objects.get(id=pet_data['irk_id'])
-
-            evcil = EvcilHayvan.objects.create(**evcil_kwargs)
-
-            temp_path = pet_data.get('resim_temp_path')
-            if temp_path and default_storage.exists(temp_path):
-                with default_storage.open(temp_path, 'rb') as temp_file:
-                    evcil.resim.save(os.path.basename(temp_path), temp_file, save=True)
-                default_storage.delete(temp_path)
-
-            etiket.evcil_hayvan = evcil
-            etiket.aktif = True
-            etiket.kilitli = False
-            etiket.aktiflestiren = user
-            etiket.aktiflestirme_tarihi = timezone.now()
-            etiket.save()
+            evcil = _evcil_olustur(sahip, pet_data)
+            etiketi_aktiflestir(etiket, evcil, user, kilidi_ac=True)
 
             try:
                 sahip.danisman_veteriner_ata()
@@ -700,7 +539,8 @@ def guest_activate_owner(request):
 
             MisafirProfil.objects.filter(kullanici=user).delete()
 
-        _clear_guest_activation_session(request)
+            akis.tamamla(ADIM_SAHIP)
+
         messages.success(request, "Etiket aktivasyonu tamamlandı. Sahip paneline yönlendiriliyorsunuz.")
         return redirect('anahtarlik:kullanici_paneli')
 
@@ -747,32 +587,24 @@ def user_login(request):
             merge_guest_cart_to_user(request, user)
 
             # Künye aktivasyon sürecinden geliyorsa kontrol et
-            etiket_id = request.session.get('künye_etiket_id')
-            if etiket_id:
-                try:
-                    etiket = Etiket.objects.get(id=etiket_id)
-                    if not etiket.aktif:
-                        # Etiket geçerli ve aktif değil, add_pet step 2'ye yönlendir
-                        request.session['etiket_id'] = etiket_id
-                        request.session['add_pet_step'] = 2
-                        del request.session['künye_etiket_id']
-                        if request.session.get('künye_aktivasyon_redirect'):
-                            del request.session['künye_aktivasyon_redirect']
-                        
-                        # Sadece Sahip kullanıcıları için add_pet'e yönlendir
-                        Sahip.objects.get_or_create(kullanici=user)
-                        return redirect('anahtarlik:add_pet')
-                    else:
-                        # Etiket zaten aktif
-                        del request.session['künye_etiket_id']
-                        if request.session.get('künye_aktivasyon_redirect'):
-                            del request.session['künye_aktivasyon_redirect']
-                        messages.error(request, "Bu künye zaten aktif!")
-                except Etiket.DoesNotExist:
-                    # Etiket bulunamadı
-                    del request.session['künye_etiket_id']
-                    if request.session.get('künye_aktivasyon_redirect'):
-                        del request.session['künye_aktivasyon_redirect']
+            künye_akisi = AktivasyonAkisi(request, AKIS_KUNYE)
+            if künye_akisi.aktif:
+                etiket = künye_akisi.etiket_getir()
+                request.session.pop('künye_aktivasyon_redirect', None)
+                if etiket is not None and not etiket.aktif:
+                    # Etiket geçerli ve aktif değil, add_pet step 2'ye devret
+                    künye_akisi.tamamla(ADIM_GIRIS)
+                    request.session['etiket_id'] = etiket.id
+                    request.session['add_pet_step'] = 2
+
+                    # Sadece Sahip kullanıcıları için add_pet'e yönlendir
+                    Sahip.objects.get_or_create(kullanici=user)
+                    return redirect('anahtarlik:add_pet')
+
+                künye_akisi.hata(ADIM_GIRIS)
+                künye_akisi.temizle()
+                if etiket is not None:
+                    messages.error(request, "Bu künye zaten aktif!")
 
             # 0) Sahip mi?
             if hasattr(user, "sahip"):
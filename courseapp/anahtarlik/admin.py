@@ -7,6 +7,9 @@ from django.urls import path
 from django.shortcuts import redirect
 from django.utils.html import format_html
 from django.utils import timezone
+from django.db.models import OuterRef
+
+from core.queries import alt_sayac
 
 from .models import (
     Sahip, EvcilHayvan, Alerji, SaglikKaydi, AsiTakvimi,
@@ -84,15 +87,22 @@ class TurAdmin(admin.ModelAdmin):
     list_display = ("ad", "irk_sayisi", "evcil_hayvan_sayisi")
     inlines = [IrkInline]
     
+    def get_queryset(self, request):
+        # Sayaçlar satır başına COUNT yerine alt sorgularla tek sorguda gelir
+        return super().get_queryset(request).annotate(
+            irk_adedi=alt_sayac(Irk.objects.filter(tur=OuterRef('pk'))),
+            evcil_hayvan_adedi=alt_sayac(EvcilHayvan.objects.filter(tur=OuterRef('pk'))),
+        )
+    
     def irk_sayisi(self, obj):
-        return obj.irklari.count()
+        return obj.irk_adedi
     irk_sayisi.short_description = "Irk Sayısı"
-    irk_sayisi.admin_order_field = None
+    irk_sayisi.admin_order_field = "irk_adedi"
     
     def evcil_hayvan_sayisi(self, obj):
-        return obj.evcil_hayvanlar.count()
+        return obj.evcil_hayvan_adedi
     evcil_hayvan_sayisi.short_description = "Evcil Hayvan Sayısı"
-    evcil_hayvan_sayisi.admin_order_field = None
+    evcil_hayvan_sayisi.admin_order_field = "evcil_hayvan_adedi"
 
 
 @admin.register(Irk)
@@ -101,11 +111,17 @@ class IrkAdmin(admin.ModelAdmin):
     list_filter = ("tur",)
     search_fields = ("ad", "tur__ad")
     ordering = ("tur__ad", "ad")
+    list_select_related = ("tur",)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            evcil_hayvan_adedi=alt_sayac(EvcilHayvan.objects.filter(irk=OuterRef('pk'))),
+        )
     
     def evcil_hayvan_sayisi(self, obj):
-        return obj.evcil_hayvanlar.count()
+        return obj.evcil_hayvan_adedi
     evcil_hayvan_sayisi.short_description = "Evcil Hayvan Sayısı"
-    evcil_hayvan_sayisi.admin_order_field = None
+    evcil_hayvan_sayisi.admin_order_field = "evcil_hayvan_adedi"
 
 
 class IlceInline(admin.TabularInline):
@@ -121,10 +137,15 @@ class IlAdmin(admin.ModelAdmin):
     list_display = ("ad", "ilce_sayisi")
     inlines = [IlceInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            ilce_adedi=alt_sayac(Ilce.objects.filter(il=OuterRef('pk'))),
+        )
+    
     def ilce_sayisi(self, obj):
-        return obj.ilceler.count()
+        return obj.ilce_adedi
     ilce_sayisi.short_description = "İlçe Sayısı"
-    ilce_sayisi.admin_order_field = None
+    ilce_sayisi.admin_order_field = "ilce_adedi"
 
 
 @admin.register(Ilce)
@@ -133,11 +154,17 @@ class IlceAdmin(admin.ModelAdmin):
     list_filter = ("il",)
     search_fields = ("ad", "il__ad")
     ordering = ("il__ad", "ad")
+    list_select_related = ("il",)
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            sahip_adedi=alt_sayac(Sahip.objects.filter(ilce=OuterRef('pk'))),
+        )
     
     def sahip_sayisi(self, obj):
-        return obj.sahipleri.count()
+        return obj.sahip_adedi
     sahip_sayisi.short_description = "Sahip Sayısı"
-    sahip_sayisi.admin_order_field = None
+    sahip_sayisi.admin_order_field = "sahip_adedi"
 
 
 # ---------- Sahip ----------
@@ -333,6 +360,7 @@ from django.contrib import admin
 from django.contrib.admin import SimpleListFilter
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db.models import Case, CharField, Value, When
 
 class KullaniciTuruFilter(SimpleListFilter):
     title = "kullanıcı türü"
@@ -362,7 +390,19 @@ class KullaniciTuruFilter(SimpleListFilter):
             )
         return queryset
 
+# Öncelik sırası kullanici_turu() ile aynı: veteriner > petshop > sahip
+KULLANICI_TURU_IFADESI = Case(
+    When(veteriner_profili__isnull=False, then=Value("Veteriner")),
+    When(petshop_profili__isnull=False, then=Value("Petshop")),
+    When(sahip__isnull=False, then=Value("QR Sahibi")),
+    default=Value("—"),
+    output_field=CharField(),
+)
+
 def kullanici_turu(obj: User):
+    # Admin listesinde get_queryset annotasyonu gelir; tek nesnede ilişkiler yoklanır
+    if hasattr(obj, "kullanici_turu_adi"):
+        return obj.kullanici_turu_adi
     if hasattr(obj, "veteriner_profili"):
         return "Veteriner"
     if hasattr(obj, "petshop_profili"):
@@ -371,7 +411,7 @@ def kullanici_turu(obj: User):
         return "QR Sahibi"
     return "—"
 kullanici_turu.short_description = "Tür"
-kullanici_turu.admin_order_field = None
+kullanici_turu.admin_order_field = "kullanici_turu_adi"
 
 # Varsayılan User adminini kaldırıp kendi sürümümüzü kaydediyoruz
 admin.site.unregister(User)
@@ -383,8 +423,13 @@ class UserAdmin(BaseUserAdmin):
     # mevcut filtrelere özel filtreyi ekle
     list_filter = BaseUserAdmin.list_filter + (KullaniciTuruFilter,)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(kullanici_turu_adi=KULLANICI_TURU_IFADESI)
+
     def kullanici_turu(self, obj):
         return kullanici_turu(obj)
+    kullanici_turu.short_description = "Tür"
+    kullanici_turu.admin_order_field = "kullanici_turu_adi"
 
 
 @admin.register(SahipProPaket)
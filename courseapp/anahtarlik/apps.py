@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class anahtarlikConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'anahtarlik'
+
+    def ready(self):
+        # Panel özeti cache geçersiz kılma sinyalleri
+        from . import dashboard  # noqa: F401
+        # Aşı / ilaç hatırlatma indeksi sinyalleri
+        from . import reminders  # noqa: F401
+        # Sağlık zaman çizelgesi cache geçersiz kılma sinyalleri
+        from . import timeline  # noqa: F401
+        # Kilo serisi artımlı cache sinyalleri
+        from . import weight_series  # noqa: F401
@@ -0,0 +1,154 @@
+# anahtarlik/dashboard.py
+"""
+Sahip paneli özet sayaçları.
+
+Panelin tüm sayaçları (geçerli hayvan, künye, kayıp, süresi dolmak üzere olan
+künye, okunmamış bildirim, aktif ilan, yaklaşan aşı) koşullu aggregate ve alt
+sorgularla iki sorguda hesaplanır ve sahip başına cache'lenir. İlgili kayıtlar
+değiştiğinde sinyallerle cache silinir; cache süresi sadece tarihe bağlı
+sayaçlar (künye bitişi, yaklaşan aşı) için üst sınırdır.
+"""
+import logging
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.queries import alt_sayac
+from courseapp.background import arka_planda_calistir
+from courseapp.constants import KUNYE_BITIS_UYARI_GUN, SAHIP_PANEL_CACHE_SURESI, YAKLASAN_ASI_GUN
+from etiket.models import Etiket
+from ilan.models import Ilan
+
+from .models import AsiTakvimi, Bildirim, EvcilHayvan, Sahip
+
+logger = logging.getLogger(__name__)
+
+
+def _cache_anahtari(sahip_id):
+    return f'sahip_panel_ozeti_{sahip_id}'
+
+
+def gecerli_hayvan_filtresi(simdi=None):
+    """Künyesi olmayan veya künye süresi dolmamış hayvanlar (panelde gösterilenler)."""
+    simdi = simdi or timezone.now()
+    return (
+        Q(etiket__isnull=True)
+        | Q(etiket__son_kullanma_tarihi__isnull=True)
+        | Q(etiket__son_kullanma_tarihi__gt=simdi)
+    )
+
+
+def _kunye_bitis_filtresi(simdi):
+    # Kalan tam gün sayısı 1..KUNYE_BITIS_UYARI_GUN arasında olanlar
+    return Q(
+        etiket__son_kullanma_tarihi__gte=simdi + timedelta(days=1),
+        etiket__son_kullanma_tarihi__lt=simdi + timedelta(days=KUNYE_BITIS_UYARI_GUN + 1),
+    )
+
+
+def _ozet_hesapla(sahip):
+    simdi = timezone.now()
+    bugun = timezone.localdate()
+    gecerli = gecerli_hayvan_filtresi(simdi)
+    kunye_bitiyor = _kunye_bitis_filtresi(simdi)
+
+    # 1) Hayvan sayaçları: tek geçişte koşullu aggregate
+    ozet = EvcilHayvan.objects.filter(sahip_id=sahip.pk).aggregate(
+        toplam_evcil_hayvan_sayisi=Count('pk', filter=gecerli),
+        kunye_sayisi=Count('pk', filter=gecerli & Q(etiket__isnull=False)),
+        kayip_hayvan_sayisi=Count('pk', filter=Q(kayip_durumu=True)),
+        kunye_bitiyor_sayisi=Count('pk', filter=kunye_bitiyor),
+    )
+
+    # 2) Diğer tablolardaki sayaçlar: tek satırda alt sorgular
+    ozet.update(Sahip.objects.filter(pk=sahip.pk).annotate(
+        okunmamis_bildirim_sayisi=alt_sayac(Bildirim.objects.filter(sahip_id=OuterRef('pk'), okundu=False)),
+        sahip_ilan_sayisi=alt_sayac(Ilan.objects.filter(hayvan_profili__kullanici_id=OuterRef('kullanici_id'), aktif=True)),
+        yaklasan_asi_sayisi=alt_sayac(AsiTakvimi.objects.filter(
+            evcil_hayvan__sahip_id=OuterRef('pk'),
+            tamamlandi=False,
+            planlanan_tarih__gte=bugun,
+            planlanan_tarih__lte=bugun + timedelta(days=YAKLASAN_ASI_GUN),
+        )),
+    ).values('okunmamis_bildirim_sayisi', 'sahip_ilan_sayisi', 'yaklasan_asi_sayisi').first() or {})
+
+    # Uyarı listeleri sadece gerektiğinde okunur (sadece ad ve kalan gün)
+    ozet['kayip_hayvanlar'] = []
+    ozet['kunye_suresi_dolmak_uzere'] = []
+    if ozet['kayip_hayvan_sayisi'] or ozet['kunye_bitiyor_sayisi']:
+        uyarilar = EvcilHayvan.objects.filter(
+            Q(kayip_durumu=True) | kunye_bitiyor, sahip_id=sahip.pk
+        ).values('id', 'ad', 'kayip_durumu', 'etiket__son_kullanma_tarihi')
+        for hayvan in uyarilar:
+            if hayvan['kayip_durumu']:
+                ozet['kayip_hayvanlar'].append({'id': hayvan['id'], 'ad': hayvan['ad']})
+            bitis = hayvan['etiket__son_kullanma_tarihi']
+            if bitis and 0 < (bitis - simdi).days <= KUNYE_BITIS_UYARI_GUN:
+                ozet['kunye_suresi_dolmak_uzere'].append({
+                    'hayvan': {'id': hayvan['id'], 'ad': hayvan['ad']},
+                    'kalan_gun': (bitis - simdi).days,
+                })
+    return ozet
+
+
+def sahip_panel_ozeti(sahip):
+    """Sahibin panel sayaçlarını cache'ten (yoksa hesaplayıp) döndürür."""
+    anahtar = _cache_anahtari(sahip.pk)
+    ozet = cache.get(anahtar)
+    if ozet is None:
+        ozet = _ozet_hesapla(sahip)
+        cache.set(anahtar, ozet, SAHIP_PANEL_CACHE_SURESI)
+    return ozet
+
+
+def sahip_panel_ozeti_sil(sahip_id):
+    if sahip_id:
+        cache.delete(_cache_anahtari(sahip_id))
+
+
+# --- Danışman atama ---
+
+def _danisman_ata(sahip_id):
+    sahip = Sahip.objects.filter(pk=sahip_id, danisman_veteriner__isnull=True).first()
+    if sahip:
+        sahip.danisman_veteriner_ata()
+
+
+def danisman_atamasini_kuyruga_al(sahip):
+    """
+    Danışman veteriner ataması (skor hesaplaması) panel isteğini bekletmesin diye
+    arka planda yapılır; sonuç bir sonraki panel açılışında görünür.
+    """
+    return arka_planda_calistir(_danisman_ata, sahip.pk, anahtar=f'danisman_ata_{sahip.pk}')
+
+
+# --- Cache geçersiz kılma ---
+
+@receiver([post_save, post_delete], sender=EvcilHayvan)
+def _evcil_hayvan_degisti(sender, instance, **kwargs):
+    sahip_panel_ozeti_sil(instance.sahip_id)
+
+
+@receiver([post_save, post_delete], sender=Bildirim)
+def _bildirim_degisti(sender, instance, **kwargs):
+    sahip_panel_ozeti_sil(instance.sahip_id)
+
+
+@receiver([post_save, post_delete], sender=Etiket)
+@receiver([post_save, post_delete], sender=AsiTakvimi)
+def _hayvan_kaydi_degisti(sender, instance, **kwargs):
+    if instance.evcil_hayvan_id:
+        sahip_id = EvcilHayvan.objects.filter(pk=instance.evcil_hayvan_id).values_list('sahip_id', flat=True).first()
+        sahip_panel_ozeti_sil(sahip_id)
+
+
+@receiver([post_save, post_delete], sender=Ilan)
+def _ilan_degisti(sender, instance, **kwargs):
+    for sahip_id in Sahip.objects.filter(
+        kullanici__hayvan_profilleri=instance.hayvan_profili_id
+    ).values_list('pk', flat=True):
+        sahip_panel_ozeti_sil(sahip_id)
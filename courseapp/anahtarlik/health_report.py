@@ -0,0 +1,129 @@
+# anahtarlik/health_report.py
+"""
+Evcil hayvan sağlık raporu (PDF) üretimi.
+
+Hayvanın tüm sağlık kayıtları zaman çizelgesinden (anahtarlik/timeline.py) okunur.
+Parmak izi hayvan bilgilerinden ve veritabanındaki sağlık sürümünden
+(EvcilHayvanSurumu.saglik_surumu) hesaplanır; süreç içi önbellekten okunmaz.
+PDF bu parmak izine göre depolamada saklanır; kayıtlar değişmedikçe aynı dosya
+tekrar kullanılır.
+Önbellekte olmayan raporlar istek dışında, süreç içi arka plan havuzunda
+(courseapp/background.py) üretilir; istemci aynı adresi yoklayarak dosya hazır olunca indirir.
+"""
+import hashlib
+import hmac
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import get_template
+from xhtml2pdf import pisa
+
+from courseapp.background import arka_planda_calistir
+from courseapp.constants import SAGLIK_RAPORU_KILIT_SURESI
+
+from .models import EvcilHayvan
+from .timeline import saglik_surumu, saglik_zaman_cizelgesi
+
+logger = logging.getLogger(__name__)
+
+RAPOR_KLASORU = 'saglik_raporlari'
+
+
+def rapor_queryset():
+    """Rapordaki hayvan bilgileri ve sağlık sürümü; sağlık kayıtları zaman çizelgesinden (tek sorgu) gelir."""
+    return EvcilHayvan.objects.select_related('tur', 'irk', 'sahip', 'surum')
+
+
+def rapor_parmak_izi(hayvan):
+    """
+    Hayvan bilgileri ve sağlık sürümünden parmak izi üretir (rapor_queryset ile ek sorgu yok).
+    Herhangi bir kayıt eklenir, silinir veya değişirse sürüm, dolayısıyla parmak izi değişir.
+    """
+    parcalar = [
+        str(hayvan.pk), str(saglik_surumu(hayvan)), hayvan.ad, str(hayvan.tur_id), str(hayvan.irk_id),
+        hayvan.cinsiyet, str(hayvan.dogum_tarihi), hayvan.saglik_notu, hayvan.beslenme_notu, hayvan.genel_not,
+        hayvan.sahip.ad, hayvan.sahip.soyad,
+    ]
+    veri = '\x1f'.join(p or '' for p in parcalar).encode('utf-8')
+    # SECRET_KEY ile imzalanır: dosya adı içerikten tahmin edilemez
+    return hmac.new(settings.SECRET_KEY.encode('utf-8'), veri, hashlib.sha256).hexdigest()[:32]
+
+
+def rapor_yolu(hayvan_id, parmak_izi):
+    return f'{RAPOR_KLASORU}/{hayvan_id}/{parmak_izi}.pdf'
+
+
+def rapor_hazir_mi(hayvan_id, parmak_izi) -> bool:
+    return default_storage.exists(rapor_yolu(hayvan_id, parmak_izi))
+
+
+def _hata_anahtari(hayvan_id, parmak_izi):
+    return f'saglik_raporu_hata_{hayvan_id}_{parmak_izi}'
+
+
+def rapor_hatali_mi(hayvan_id, parmak_izi) -> bool:
+    """Son üretim denemesi başarısız olduysa True (kilit süresi boyunca tekrar denenmez)."""
+    return bool(cache.get(_hata_anahtari(hayvan_id, parmak_izi)))
+
+
+def rapor_olustur(hayvan_id):
+    """
+    PDF'i üretip depolamaya yazar ve hayvanın kendisinden eski raporlarını siler.
+    Parmak izi işin okuduğu sürümden yeniden hesaplanır: istek ile iş arasında
+    kayıt değiştiyse dosya güncel sürüme göre adlandırılır.
+    """
+    hayvan = rapor_queryset().get(pk=hayvan_id)
+    parmak_izi = rapor_parmak_izi(hayvan)
+    saglik_zaman_cizelgesi(hayvan)  # hayvan.<ilişki>.all template'te buradan okunur
+    html = get_template('anahtarlik/pdf_template.html').render({'hayvan': hayvan})
+
+    cikti = io.BytesIO()
+    sonuc = pisa.CreatePDF(html, dest=cikti)
+    if sonuc.err:
+        raise RuntimeError(f"PDF oluşturulamadı (hayvan={hayvan_id}, hata={sonuc.err})")
+
+    yol = rapor_yolu(hayvan_id, parmak_izi)
+    if not default_storage.exists(yol):
+        default_storage.save(yol, ContentFile(cikti.getvalue()))
+    _eski_raporlari_sil(yol)
+    return yol
+
+
+def _eski_raporlari_sil(yol):
+    """Aynı klasörde `yol`dan önce yazılmış raporları siler (daha yeni bir iş yazdıysa onunkine dokunmaz)."""
+    klasor = os.path.dirname(yol)
+    try:
+        _, dosyalar = default_storage.listdir(klasor)
+        yazilma = default_storage.get_modified_time(yol)
+        for dosya in dosyalar:
+            eski = f'{klasor}/{dosya}'
+            if eski != yol and default_storage.get_modified_time(eski) < yazilma:
+                default_storage.delete(eski)
+    except (FileNotFoundError, NotImplementedError):
+        pass
+
+
+def _arka_plan_isi(hayvan_id, parmak_izi):
+    try:
+        rapor_olustur(hayvan_id)
+    except Exception:
+        logger.exception("Sağlık raporu üretilemedi (hayvan=%s)", hayvan_id)
+        cache.set(_hata_anahtari(hayvan_id, parmak_izi), True, SAGLIK_RAPORU_KILIT_SURESI)
+
+
+def rapor_kuyruga_al(hayvan_id, parmak_izi) -> bool:
+    """
+    Raporu arka planda üretilmek üzere kuyruğa alır. Aynı rapor zaten üretiliyorsa
+    tekrar eklenmez. Kuyruğa yeni eklendiyse True döner.
+    """
+    if rapor_hatali_mi(hayvan_id, parmak_izi):
+        return False
+    return arka_planda_calistir(
+        _arka_plan_isi, hayvan_id, parmak_izi,
+        anahtar=f'saglik_raporu_{hayvan_id}_{parmak_izi}', kilit_suresi=SAGLIK_RAPORU_KILIT_SURESI,
+    )
@@ -0,0 +1,39 @@
+"""
+Vadesi gelen aşı ve ilaç hatırlatmalarını bildirim + e-posta olarak gönderir (günde bir kez, cron).
+Kullanım: python manage.py saglik_hatirlatmalari [--sure 120] [--indeksle]
+"""
+from django.core.management.base import BaseCommand
+
+from anahtarlik.reminders import eski_hatirlatmalari_sil, hatirlatma_indeksini_olustur, hatirlatmalari_gonder
+from courseapp.constants import HATIRLATMA_PARTI_BOYUTU, HATIRLATMA_SURE_BUTCESI
+
+
+class Command(BaseCommand):
+    help = 'Aşı ve ilaç hatırlatmalarını partiler halinde gönderir'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sure', type=float, default=HATIRLATMA_SURE_BUTCESI,
+            help=f'Süre sınırı (saniye, varsayılan: {HATIRLATMA_SURE_BUTCESI}); kalanlar sonraki çalıştırmaya kalır'
+        )
+        parser.add_argument('--parti', type=int, default=HATIRLATMA_PARTI_BOYUTU, help='Parti boyutu')
+        parser.add_argument(
+            '--indeksle', action='store_true',
+            help='Önce mevcut aşı/ilaç kayıtlarından hatırlatma indeksini doldur (ilk kurulum)'
+        )
+
+    def handle(self, *args, **options):
+        if options['indeksle']:
+            self.stdout.write(f"{hatirlatma_indeksini_olustur()} kayıt indekslendi")
+
+        silinen = eski_hatirlatmalari_sil()
+        rapor = hatirlatmalari_gonder(sure_butcesi=options['sure'], parti_boyutu=options['parti'])
+
+        mesaj = (
+            f"{rapor['hatirlatma']} hatırlatma, {rapor['eposta']} e-posta kuyruğa alındı "
+            f"({rapor['parti']} parti), {silinen} eski kayıt silindi"
+        )
+        if rapor['tamamlandi']:
+            self.stdout.write(self.style.SUCCESS(mesaj))
+        else:
+            self.stdout.write(self.style.WARNING(f"{mesaj} - süre doldu, kalanlar sonraki çalıştırmada"))
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:40
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anahtarlik', '0019_alter_sahip_options_alter_sahip_acil_durum_kontagi_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evcilhayvan',
+            name='resim',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.IcerikAdresliDepolama(), upload_to='evcil_hayvanlar/'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anahtarlik', '0020_alter_evcilhayvan_resim'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaglikHatirlatmasi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tur', models.CharField(choices=[('ASI', 'Aşı'), ('ILAC', 'İlaç Bitişi')], max_length=4, verbose_name='Tür')),
+                ('kaynak_id', models.PositiveBigIntegerField(verbose_name='Kaynak Kayıt ID')),
+                ('baslik', models.CharField(max_length=100, verbose_name='Aşı / İlaç')),
+                ('vade', models.DateField(verbose_name='Vade')),
+                ('hatirlatma_tarihi', models.DateField(verbose_name='Hatırlatma Tarihi')),
+                ('gonderim_zamani', models.DateTimeField(blank=True, null=True, verbose_name='Gönderim Zamanı')),
+                ('evcil_hayvan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saglik_hatirlatmalari', to='anahtarlik.evcilhayvan')),
+            ],
+            options={
+                'verbose_name': 'Sağlık Hatırlatması',
+                'verbose_name_plural': 'Sağlık Hatırlatmaları',
+                'indexes': [models.Index(condition=models.Q(('gonderim_zamani__isnull', True)), fields=['hatirlatma_tarihi'], name='saglik_hatirlatmasi_bekleyen')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='saglikhatirlatmasi',
+            constraint=models.UniqueConstraint(fields=('tur', 'kaynak_id'), name='saglik_hatirlatmasi_kaynak_tekil'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anahtarlik', '0021_saglikhatirlatmasi'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sahip',
+            name='danisman_atanma_sebebi',
+            field=models.CharField(blank=True, choices=[('KUNYE_ALIMI', 'Künye Alımı'), ('ILCE_ESLESME', 'İlçe Eşleşmesi'), ('IL_ESLESME', 'İl Eşleşmesi'), ('YAKIN_KONUM', 'Konuma En Yakın')], max_length=20, verbose_name='Danışman Atanma Sebebi'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anahtarlik', '0022_danisman_yakin_konum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EvcilHayvanSurumu',
+            fields=[
+                ('evcil_hayvan', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='surum', serialize=False, to='anahtarlik.evcilhayvan')),
+                ('saglik_surumu', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Evcil Hayvan Kayıt Sürümü',
+                'verbose_name_plural': 'Evcil Hayvan Kayıt Sürümleri',
+            },
+        ),
+    ]
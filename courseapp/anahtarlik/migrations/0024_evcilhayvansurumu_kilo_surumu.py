@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('anahtarlik', '0023_evcilhayvansurumu'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evcilhayvansurumu',
+            name='kilo_surumu',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # anahtarlik/models.py
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, RegexValidator
 from django.db import models
@@ -9,6 +10,9 @@ from django.utils import timezone
 from django.contrib.auth.models import User
 from django.db.models import F
 import uuid
+
+from core.storage import icerik_depolama
+
 # Import additional model modules so Django registers them
 from . import dictionaries as _dictionary_models  # noqa: F401
 
@@ -70,6 +74,7 @@ class Sahip(models.Model):
             ('KUNYE_ALIMI', 'Künye Alımı'),
             ('ILCE_ESLESME', 'İlçe Eşleşmesi'),
             ('IL_ESLESME', 'İl Eşleşmesi'),
+            ('YAKIN_KONUM', 'Konuma En Yakın'),
         ],
         blank=True,
         verbose_name="Danışman Atanma Sebebi"
@@ -121,7 +126,8 @@ class Sahip(models.Model):
         """
         ADİL VETERİNER ATAMA ALGORİTMASI:
         - Adres uyumlu VET satışta danışman doğrudan o veteriner olur.
-        - Online veya petshop ise ilçe bazında aktif veterinerler arasından skor (satış, yük, kapasite bazlı) ile seçim yapılır, ilçe yoksa il bazına iner.
+        - Online veya petshop ise ilçe bazında aktif veterinerler arasından skor (satış, yük, kapasite bazlı) ile seçim yapılır, ilçede aday yoksa
+          sahibin konumuna en yakın veterinerlere (ilçe/il sınırından bağımsız), o da yoksa il bazına iner.
         - Skor formülü: skor = satış * uyum_puani - (yük * katsayi). Eşitse random.
         """
         from django.utils import timezone
@@ -187,9 +193,27 @@ class Sahip(models.Model):
             satis = vet.satis_sayisi_ilce(self.ilce)
             uyum = 1
             skor = satis * uyum - (yuk * 0.2)
-            adaylar.append({'vet': vet, 'skor': skor, 'uyum': uyum})
+            adaylar.append({'vet': vet, 'skor': skor, 'uyum': uyum, 'sebep': 'ILCE_ESLESME'})
+
+        # İlçede aday yoksa sahibin konumuna en yakın veterinerleri dene (ilçe/il sınırı fark etmez)
+        if not adaylar and self.latitude is not None and self.longitude is not None:
+            from courseapp.constants import DANISMAN_YAKINLIK_M, YAKIN_ISLETME_SAYISI
+            from veteriner.nearby import en_yakin_klinikler
+
+            yakin_vetler = en_yakin_klinikler(
+                self.latitude, self.longitude, k=YAKIN_ISLETME_SAYISI, maks_mesafe_m=DANISMAN_YAKINLIK_M
+            )
+            for vet in yakin_vetler:
+                kapasite = getattr(vet, 'dinamik_kapasite', 100)
+                yuk = getattr(vet, 'mevcut_yuk', 0)
+                if yuk >= kapasite:
+                    continue
+                satis = vet.satis_sayisi_ilce(self.ilce)
+                uyum = 0.75
+                skor = satis * uyum - (yuk * 0.2)
+                adaylar.append({'vet': vet, 'skor': skor, 'uyum': uyum, 'sebep': 'YAKIN_KONUM'})
 
-        # İlçede aday yoksa ilde dene
+        # Yakında da aday yoksa ilde dene
         if not adaylar:
             il_vetler = Veteriner.objects.filter(il=self.il, aktif=True)
             for vet in il_vetler:
@@ -200,7 +224,7 @@ class Sahip(models.Model):
                 satis = vet.satis_sayisi_il(self.il)
                 uyum = 0.5
                 skor = satis * uyum - (yuk * 0.2)
-                adaylar.append({'vet': vet, 'skor': skor, 'uyum': uyum})
+                adaylar.append({'vet': vet, 'skor': skor, 'uyum': uyum, 'sebep': 'IL_ESLESME'})
 
         if not adaylar:
             return None
@@ -211,11 +235,8 @@ class Sahip(models.Model):
         secilen = secilen_aday['vet']
         self.danisman_veteriner = secilen
         self.danisman_atanma_tarihi = timezone.now()
-        # Seçilen adayın uyum değerine göre atanma sebebini belirle
-        if secilen_aday['uyum'] == 1:
-            self.danisman_atanma_sebebi = 'ILCE_ESLESME'
-        else:
-            self.danisman_atanma_sebebi = 'IL_ESLESME'
+        # Atanma sebebi adayın hangi adımda bulunduğudur (uyum katsayısından çıkarılmaz)
+        self.danisman_atanma_sebebi = secilen_aday['sebep']
         self.save(update_fields=['danisman_veteriner', 'danisman_atanma_tarihi', 'danisman_atanma_sebebi'])
         return secilen
 
@@ -319,7 +340,7 @@ class EvcilHayvan(models.Model):
     kayip_durumu = models.BooleanField(default=False)
     kayip_bildirim_tarihi = models.DateTimeField(null=True, blank=True)
     odul_miktari = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    resim = models.ImageField(upload_to='evcil_hayvanlar/', null=True, blank=True)
+    resim = models.ImageField(upload_to='evcil_hayvanlar/', storage=icerik_depolama, null=True, blank=True)
 
     def resim_varsa_url(self):
         return self.resim.url if self.resim else None
@@ -410,6 +431,45 @@ class IlacKaydi(models.Model):
         return f"{self.evcil_hayvan.ad} - {self.ilac_adi}"
 
 
+class SaglikHatirlatmasi(models.Model):
+    """
+    Aşı ve ilaç bitiş tarihleri için hatırlatma indeksi (next_due tablosu).
+    Kaynak kayıt başına tek satır; günlük gönderim sadece vadesi gelen satırları okur.
+    """
+    TUR_ASI = 'ASI'
+    TUR_ILAC = 'ILAC'
+    TUR_SECENEKLERI = [
+        (TUR_ASI, 'Aşı'),
+        (TUR_ILAC, 'İlaç Bitişi'),
+    ]
+
+    tur = models.CharField(max_length=4, choices=TUR_SECENEKLERI, verbose_name="Tür")
+    kaynak_id = models.PositiveBigIntegerField(verbose_name="Kaynak Kayıt ID")
+    evcil_hayvan = models.ForeignKey(EvcilHayvan, on_delete=models.CASCADE, related_name='saglik_hatirlatmalari')
+    baslik = models.CharField(max_length=100, verbose_name="Aşı / İlaç")
+    vade = models.DateField(verbose_name="Vade")
+    hatirlatma_tarihi = models.DateField(verbose_name="Hatırlatma Tarihi")
+    gonderim_zamani = models.DateTimeField(null=True, blank=True, verbose_name="Gönderim Zamanı")
+
+    class Meta:
+        verbose_name = "Sağlık Hatırlatması"
+        verbose_name_plural = "Sağlık Hatırlatmaları"
+        constraints = [
+            models.UniqueConstraint(fields=['tur', 'kaynak_id'], name='saglik_hatirlatmasi_kaynak_tekil'),
+        ]
+        indexes = [
+            # Sadece gönderilmemiş satırlar: günlük tarama hayvan sayısından bağımsız
+            models.Index(
+                fields=['hatirlatma_tarihi'],
+                name='saglik_hatirlatmasi_bekleyen',
+                condition=models.Q(gonderim_zamani__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.evcil_hayvan.ad} - {self.baslik} ({self.vade})"
+
+
 class AmeliyatKaydi(models.Model):
     evcil_hayvan = models.ForeignKey(EvcilHayvan, on_delete=models.CASCADE, related_name='ameliyat_kayitlari')
     ameliyat_turu = models.CharField(max_length=100)
@@ -452,6 +512,24 @@ class KiloKaydi(models.Model):
         verbose_name_plural = "Kilo Kayıtları"
 
 
+class EvcilHayvanSurumu(models.Model):
+    """
+    Hayvanın sağlık kayıtlarının (anahtarlik/timeline.py) ve kilo serisinin
+    (anahtarlik/weight_series.py) önbellek sürümleri. Kayıtlar değiştikçe F() ile
+    artar; EvcilHayvan.save() eski değeri geri yazamasın diye ayrı tablodadır.
+    """
+    evcil_hayvan = models.OneToOneField(EvcilHayvan, on_delete=models.CASCADE, primary_key=True, related_name='surum')
+    saglik_surumu = models.PositiveIntegerField(default=0)
+    kilo_surumu = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Evcil Hayvan Kayıt Sürümü"
+        verbose_name_plural = "Evcil Hayvan Kayıt Sürümleri"
+
+    def __str__(self):
+        return f"{self.evcil_hayvan_id}: {self.saglik_surumu}"
+
+
 class SahipProPaket(models.Model):
     """Sahip kullanıcıları için pro paket tanımları"""
     paket_adi = models.CharField(max_length=50, verbose_name="Paket Adı")
@@ -716,10 +794,13 @@ class AnaSayfaAyar(models.Model):
     def __str__(self):
         return "Ana Sayfa Ayarları"
 
+    CACHE_ANAHTARI = 'ana_sayfa_ayar'
+
     def save(self, *args, **kwargs):
         """Singleton pattern - sadece bir kayıt olmasını sağla"""
         self.pk = 1
         super().save(*args, **kwargs)
+        cache.delete(self.CACHE_ANAHTARI)
 
     def delete(self, *args, **kwargs):
         """Silmeyi engelle"""
@@ -727,6 +808,15 @@ class AnaSayfaAyar(models.Model):
 
     @classmethod
     def load(cls):
-        """Tek kaydı yükle veya oluştur"""
-        obj, created = cls.objects.get_or_create(pk=1)
+        """
+        Tek kaydı yükle veya oluştur (önbellekten; her sayfa açılışında yazma denemesi yapılmaz).
+        Kaydetme yalnızca kendi sürecinin önbelleğini siler; diğer süreçler değişikliği
+        en geç ANA_SAYFA_AYAR_CACHE_SURESI sonra görür.
+        """
+        from courseapp.constants import ANA_SAYFA_AYAR_CACHE_SURESI
+
+        obj = cache.get(cls.CACHE_ANAHTARI)
+        if obj is None:
+            obj, created = cls.objects.get_or_create(pk=1)
+            cache.set(cls.CACHE_ANAHTARI, obj, ANA_SAYFA_AYAR_CACHE_SURESI)
         return obj
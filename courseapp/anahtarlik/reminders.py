@@ -0,0 +1,195 @@
+# anahtarlik/reminders.py
+"""
+Aşı ve ilaç hatırlatmaları.
+
+`SaglikHatirlatmasi` tablosu, AsiTakvimi.planlanan_tarih ve IlacKaydi.bitis_tarihi
+için bir "sıradaki vade" indeksidir; kaynak kayıtlar değiştikçe sinyallerle
+güncellenir. Günlük gönderim (`saglik_hatirlatmalari` komutu) sadece kısmi indeksteki
+vadesi gelmiş, gönderilmemiş satırları parti parti okur. Böylece süre toplam hayvan
+sayısına değil, o gün gönderilecek hatırlatma sayısına bağlıdır. Gönderildi
+işareti bildirimlerle ve e-postalarla aynı transaction'da atılır: e-postalar giden
+e-posta kutusuna (core/outbox.py) yazılır, SMTP hataları orada yeniden denenir.
+Aynı hatırlatma iki kez gitmez, işaretlenen hatırlatmanın e-postası da kaybolmaz.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import GidenEposta
+from core.outbox import epostalari_kuyruga_al
+from courseapp.constants import (
+    ASI_HATIRLATMA_GUN,
+    HATIRLATMA_PARTI_BOYUTU,
+    ILAC_HATIRLATMA_GUN,
+)
+
+from .models import AsiTakvimi, Bildirim, IlacKaydi, SaglikHatirlatmasi
+
+
+def _hedef(kaynak):
+    """Kaynak kayıt için (tur, baslik, vade, hatirlatma_tarihi); hatırlatma gerekmiyorsa None."""
+    if isinstance(kaynak, AsiTakvimi):
+        if kaynak.tamamlandi or not kaynak.planlanan_tarih:
+            return None
+        vade = kaynak.planlanan_tarih
+        return SaglikHatirlatmasi.TUR_ASI, kaynak.asi_turu, vade, vade - timedelta(days=ASI_HATIRLATMA_GUN)
+    if not kaynak.bitis_tarihi:
+        return None
+    vade = kaynak.bitis_tarihi
+    return SaglikHatirlatmasi.TUR_ILAC, kaynak.ilac_adi, vade, vade - timedelta(days=ILAC_HATIRLATMA_GUN)
+
+
+def _tur(kaynak):
+    return SaglikHatirlatmasi.TUR_ASI if isinstance(kaynak, AsiTakvimi) else SaglikHatirlatmasi.TUR_ILAC
+
+
+def hatirlatmayi_guncelle(kaynak):
+    """Kaynak kayda göre indeks satırını ekler, günceller veya siler."""
+    hedef = _hedef(kaynak)
+    if hedef is None:
+        SaglikHatirlatmasi.objects.filter(tur=_tur(kaynak), kaynak_id=kaynak.pk).delete()
+        return None
+    tur, baslik, vade, hatirlatma_tarihi = hedef
+
+    mevcut = SaglikHatirlatmasi.objects.filter(tur=tur, kaynak_id=kaynak.pk).first()
+    if mevcut is None:
+        return SaglikHatirlatmasi.objects.create(
+            tur=tur, kaynak_id=kaynak.pk, evcil_hayvan_id=kaynak.evcil_hayvan_id,
+            baslik=baslik[:100], vade=vade, hatirlatma_tarihi=hatirlatma_tarihi,
+        )
+    if mevcut.vade != vade:
+        # Tarih değişti: yeni vade için tekrar hatırlatılmalı
+        mevcut.gonderim_zamani = None
+    mevcut.baslik = baslik[:100]
+    mevcut.vade = vade
+    mevcut.hatirlatma_tarihi = hatirlatma_tarihi
+    mevcut.save()
+    return mevcut
+
+
+def hatirlatma_indeksini_olustur(bugun=None):
+    """Mevcut kayıtlardan indeksi doldurur (ilk kurulum / toplu içe aktarma sonrası)."""
+    bugun = bugun or timezone.localdate()
+    yeni = []
+    kaynaklar = (
+        AsiTakvimi.objects.filter(tamamlandi=False, planlanan_tarih__gte=bugun),
+        IlacKaydi.objects.filter(bitis_tarihi__gte=bugun),
+    )
+    for qs in kaynaklar:
+        for kaynak in qs.iterator():
+            tur, baslik, vade, hatirlatma_tarihi = _hedef(kaynak)
+            yeni.append(SaglikHatirlatmasi(
+                tur=tur, kaynak_id=kaynak.pk, evcil_hayvan_id=kaynak.evcil_hayvan_id,
+                baslik=baslik[:100], vade=vade, hatirlatma_tarihi=hatirlatma_tarihi,
+            ))
+    SaglikHatirlatmasi.objects.bulk_create(yeni, batch_size=HATIRLATMA_PARTI_BOYUTU, ignore_conflicts=True)
+    return len(yeni)
+
+
+def _mesaj(hatirlatma, bugun):
+    kalan = (hatirlatma.vade - bugun).days
+    ne_zaman = 'bugün' if kalan == 0 else f'{kalan} gün sonra ({hatirlatma.vade.strftime("%d.%m.%Y")})'
+    hayvan = hatirlatma.evcil_hayvan.ad
+    if hatirlatma.tur == SaglikHatirlatmasi.TUR_ASI:
+        return f"💉 {hayvan} için aşı hatırlatması", f"{hayvan} için {hatirlatma.baslik} aşısı {ne_zaman}."
+    return f"💊 {hayvan} için ilaç hatırlatması", f"{hayvan} için {hatirlatma.baslik} ilacı {ne_zaman} bitiyor."
+
+
+def _epostalari_kuyruga_al(sahip_mesajlari):
+    """Sahip başına tek e-posta; çağıranın transaction'ında giden e-posta kutusuna yazılır."""
+    panel_url = f"{settings.SITE_URL}{reverse('anahtarlik:kullanici_paneli')}"
+    epostalar = []
+    for eposta, satirlar in sahip_mesajlari.items():
+        govde = "\n".join(f"- {satir}" for satir in satirlar)
+        epostalar.append(GidenEposta(
+            alici=eposta,
+            konu="Evcil hayvanınız için sağlık hatırlatması",
+            mesaj=f"Merhaba,\n\n{govde}\n\nDetaylar için: {panel_url}",
+            gonderen=settings.DEFAULT_FROM_EMAIL,
+        ))
+    return epostalari_kuyruga_al(epostalar)
+
+
+def _parti_gonder(bugun, parti_boyutu):
+    """Bir partiyi işaretler, bildirimlerini ve e-postalarını yazar. Dönüş: (hatırlatma sayısı, e-posta sayısı)."""
+    sahip_mesajlari = defaultdict(list)
+    with transaction.atomic():
+        hatirlatmalar = list(
+            SaglikHatirlatmasi.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .filter(gonderim_zamani__isnull=True, hatirlatma_tarihi__lte=bugun, vade__gte=bugun)
+            .select_related('evcil_hayvan__sahip__kullanici')
+            .order_by('hatirlatma_tarihi', 'pk')[:parti_boyutu]
+        )
+        if not hatirlatmalar:
+            return 0, 0
+
+        bildirimler = []
+        for hatirlatma in hatirlatmalar:
+            hayvan = hatirlatma.evcil_hayvan
+            baslik, mesaj = _mesaj(hatirlatma, bugun)
+            bildirimler.append(Bildirim(
+                sahip=hayvan.sahip, baslik=baslik, mesaj=mesaj, tur='GENEL', oncelik='NORMAL',
+                url=reverse('anahtarlik:pet_detail', args=[hayvan.pk]),
+            ))
+            if hayvan.sahip.kullanici.email:
+                sahip_mesajlari[hayvan.sahip.kullanici.email].append(mesaj)
+
+        Bildirim.objects.bulk_create(bildirimler)
+        eposta_sayisi = _epostalari_kuyruga_al(sahip_mesajlari)
+        SaglikHatirlatmasi.objects.filter(pk__in=[h.pk for h in hatirlatmalar]).update(
+            gonderim_zamani=timezone.now()
+        )
+        # Toplu oluşturma sinyal tetiklemez; panel sayaçlarını commit'ten sonra elle tazele
+        from .dashboard import sahip_panel_ozeti_sil
+        sahip_idleri = {b.sahip_id for b in bildirimler}
+        transaction.on_commit(lambda: [sahip_panel_ozeti_sil(sahip_id) for sahip_id in sahip_idleri])
+
+    return len(hatirlatmalar), eposta_sayisi
+
+
+def hatirlatmalari_gonder(bugun=None, sure_butcesi=None, parti_boyutu=HATIRLATMA_PARTI_BOYUTU):
+    """
+    Vadesi gelen hatırlatmaları partiler halinde gönderir. `sure_butcesi` (saniye)
+    aşılınca yeni parti başlatılmaz; kalanlar bir sonraki çalıştırmada gönderilir.
+    Dönüş: {'hatirlatma': n, 'eposta': n, 'parti': n, 'tamamlandi': bool}
+    """
+    bugun = bugun or timezone.localdate()
+    baslangic = time.monotonic()
+    rapor = {'hatirlatma': 0, 'eposta': 0, 'parti': 0, 'tamamlandi': False}
+    while True:
+        if sure_butcesi is not None and time.monotonic() - baslangic >= sure_butcesi:
+            return rapor
+        adet, eposta = _parti_gonder(bugun, parti_boyutu)
+        if not adet:
+            rapor['tamamlandi'] = True
+            return rapor
+        rapor['hatirlatma'] += adet
+        rapor['eposta'] += eposta
+        rapor['parti'] += 1
+
+
+def eski_hatirlatmalari_sil(bugun=None):
+    """Vadesi geçmiş satırları indeksten temizler."""
+    bugun = bugun or timezone.localdate()
+    return SaglikHatirlatmasi.objects.filter(vade__lt=bugun).delete()[0]
+
+
+@receiver(post_save, sender=AsiTakvimi)
+@receiver(post_save, sender=IlacKaydi)
+def _kaynak_kaydedildi(sender, instance, raw=False, **kwargs):
+    if not raw:
+        hatirlatmayi_guncelle(instance)
+
+
+@receiver(post_delete, sender=AsiTakvimi)
+@receiver(post_delete, sender=IlacKaydi)
+def _kaynak_silindi(sender, instance, **kwargs):
+    SaglikHatirlatmasi.objects.filter(tur=_tur(instance), kaynak_id=instance.pk).delete()
@@ -1,3 +1,364 @@
-from django.test import TestCase
+import shutil
+import tempfile
 
-# Create your tests here.
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from anahtarlik.dictionaries import Il, Ilce, Irk, Tur
+from anahtarlik.dashboard import sahip_panel_ozeti
+from anahtarlik.health_report import rapor_olustur, rapor_parmak_izi, rapor_queryset, rapor_yolu
+from anahtarlik.models import (
+    Alerji, AsiTakvimi, Bildirim, EvcilHayvan, IlacKaydi, KiloKaydi, SaglikHatirlatmasi, SaglikKaydi, Sahip,
+)
+from anahtarlik.reminders import hatirlatmalari_gonder
+from anahtarlik.timeline import saglik_surumunu_artir, saglik_zaman_cizelgesi
+from anahtarlik.weight_series import kilo_grafik_verisi, kilo_surumunu_artir, lttb_indeksleri
+from core.models import GidenEposta
+from core.outbox import bekleyen_epostalari_gonder
+from etiket.models import Etiket
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class SaglikRaporuTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='sahip', password='x')
+        il = Il.objects.create(ad='Ankara')
+        sahip = Sahip.objects.create(
+            kullanici=self.user, ad='Ayşe', soyad='Yılmaz', il=il, ilce=Ilce.objects.create(il=il, ad='Çankaya')
+        )
+        tur = Tur.objects.create(ad='Kedi')
+        self.hayvan = EvcilHayvan.objects.create(
+            ad='Pamuk', tur=tur, irk=Irk.objects.create(tur=tur, ad='Tekir'), sahip=sahip
+        )
+        KiloKaydi.objects.create(evcil_hayvan=self.hayvan, kilo=4.2, tarih=timezone.localdate())
+
+    def _parmak_izi(self):
+        return rapor_parmak_izi(rapor_queryset().get(pk=self.hayvan.pk))
+
+    def test_parmak_izi_kayit_degisince_degisir(self):
+        ilk = self._parmak_izi()
+        self.assertEqual(ilk, self._parmak_izi())
+        with self.captureOnCommitCallbacks(execute=True):
+            KiloKaydi.objects.create(evcil_hayvan=self.hayvan, kilo=4.5, tarih=timezone.localdate())
+        self.assertNotEqual(ilk, self._parmak_izi())
+
+    def test_parmak_izi_veritabanindaki_surumden(self):
+        with self.assertNumQueries(1):  # yalnızca hayvan + sürüm; zaman çizelgesi önbelleği okunmaz
+            ilk = self._parmak_izi()
+        saglik_surumunu_artir(self.hayvan.pk)  # başka bir worker'daki değişiklik
+        self.assertNotEqual(ilk, self._parmak_izi())
+
+    def test_rapor_uretilir_ve_indirilir(self):
+        self.client.force_login(self.user)
+        url = reverse('anahtarlik:hayvan_pdf_indir', args=[self.hayvan.pk])
+
+        # Rapor henüz yok: kuyruğa alınır, istemci yoklar
+        yanit = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(yanit.status_code, 202)
+        self.assertEqual(yanit.json()['durum'], 'hazirlaniyor')
+        self.assertContains(self.client.get(url), 'hazırlanıyor', status_code=202)
+
+        eski = rapor_olustur(self.hayvan.pk)
+        # İstekten sonra eklenen kayıt: iş parmak izini kendisi hesaplar, eski dosyayı siler
+        with self.captureOnCommitCallbacks(execute=True):
+            KiloKaydi.objects.create(evcil_hayvan=self.hayvan, kilo=4.5, tarih=timezone.localdate())
+        parmak_izi = self._parmak_izi()
+        yol = rapor_olustur(self.hayvan.pk)
+        self.assertEqual(yol, rapor_yolu(self.hayvan.pk, parmak_izi))
+        self.assertFalse(default_storage.exists(eski))
+        with default_storage.open(yol, 'rb') as dosya:
+            self.assertTrue(dosya.read(5).startswith(b'%PDF'))
+
+        yanit = self.client.get(url)
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual(yanit['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(yanit.streaming_content).startswith(b'%PDF'))
+
+
+class SahipPanelOzetiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='panel', password='x')
+        il = Il.objects.create(ad='İzmir')
+        self.sahip = Sahip.objects.create(kullanici=self.user, il=il, ilce=Ilce.objects.create(il=il, ad='Bornova'))
+        tur = Tur.objects.create(ad='Köpek')
+        irk = Irk.objects.create(tur=tur, ad='Kangal')
+        simdi = timezone.now()
+
+        def hayvan(ad, bitis=None, etiketli=True, kayip=False):
+            evcil = EvcilHayvan.objects.create(ad=ad, tur=tur, irk=irk, sahip=self.sahip, kayip_durumu=kayip)
+            if etiketli:
+                etiket = Etiket.objects.create(evcil_hayvan=evcil, aktif=True)
+                Etiket.objects.filter(pk=etiket.pk).update(son_kullanma_tarihi=bitis)
+            return evcil
+
+        hayvan('Karabaş', etiketli=False)
+        hayvan('Boncuk', bitis=simdi + timedelta(days=200), kayip=True)
+        hayvan('Duman', bitis=simdi + timedelta(days=10, hours=1))
+        hayvan('Eski', bitis=simdi - timedelta(days=1))
+
+    def test_sayaclar_iki_sorguda_ve_cache_gecersiz_kilma(self):
+        with CaptureQueriesContext(connection) as ctx:
+            ozet = sahip_panel_ozeti(self.sahip)
+        # Hayvan aggregate + alt sorgular + (uyarı varsa) uyarı listesi
+        self.assertEqual(len(ctx.captured_queries), 3)
+        self.assertEqual(ozet['toplam_evcil_hayvan_sayisi'], 3)
+        self.assertEqual(ozet['kunye_sayisi'], 2)
+        self.assertEqual(ozet['kayip_hayvan_sayisi'], 1)
+        self.assertEqual([h['ad'] for h in ozet['kayip_hayvanlar']], ['Boncuk'])
+        self.assertEqual(ozet['kunye_suresi_dolmak_uzere'][0]['kalan_gun'], 10)
+        self.assertEqual(ozet['okunmamis_bildirim_sayisi'], 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            sahip_panel_ozeti(self.sahip)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        Bildirim.objects.create(sahip=self.sahip, baslik='Tarama', mesaj='Künyeniz tarandı')
+        self.assertEqual(sahip_panel_ozeti(self.sahip)['okunmamis_bildirim_sayisi'], 1)
+
+    def test_panel_sayfasi(self):
+        self.client.force_login(self.user)
+        yanit = self.client.get(reverse('anahtarlik:kullanici_paneli'))
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual(yanit.context['evcil_hayvanlar'].paginator.count, 3)
+        self.assertContains(yanit, 'Duman')
+
+
+class SaglikHatirlatmasiTests(TestCase):
+    def setUp(self):
+        il = Il.objects.create(ad='Antalya')
+        tur = Tur.objects.create(ad='Kedi')
+        self.sahip = Sahip.objects.create(
+            kullanici=User.objects.create_user('hatirlat', email='sahip@example.com'),
+            il=il, ilce=Ilce.objects.create(il=il, ad='Muratpaşa'),
+        )
+        self.hayvan = EvcilHayvan.objects.create(
+            ad='Tekir', tur=tur, irk=Irk.objects.create(tur=tur, ad='Van'), sahip=self.sahip
+        )
+        self.bugun = timezone.localdate()
+
+    def test_indeks_guncellenir_ve_tek_kez_gonderilir(self):
+        asi = AsiTakvimi.objects.create(
+            evcil_hayvan=self.hayvan, asi_turu='Kuduz', planlanan_tarih=self.bugun + timedelta(days=3)
+        )
+        IlacKaydi.objects.create(
+            evcil_hayvan=self.hayvan, ilac_adi='Antibiyotik', baslangic_tarihi=self.bugun,
+            bitis_tarihi=self.bugun + timedelta(days=30),  # henüz hatırlatma zamanı değil
+        )
+        tamamlanan = AsiTakvimi.objects.create(
+            evcil_hayvan=self.hayvan, asi_turu='Karma', planlanan_tarih=self.bugun
+        )
+        tamamlanan.tamamlandi = True
+        tamamlanan.save()
+        self.assertEqual(SaglikHatirlatmasi.objects.count(), 2)
+
+        rapor = hatirlatmalari_gonder(bugun=self.bugun, parti_boyutu=1)
+        self.assertEqual((rapor['hatirlatma'], rapor['eposta'], rapor['tamamlandi']), (1, 1, True))
+        self.assertEqual(Bildirim.objects.filter(sahip=self.sahip).count(), 1)
+        # E-posta işaretle aynı transaction'da giden kutusuna yazılır; gönderimi outbox yapar
+        self.assertIn('Kuduz', GidenEposta.objects.get(alici='sahip@example.com').mesaj)
+        bekleyen_epostalari_gonder()
+        self.assertIn('Kuduz', mail.outbox[0].body)
+
+        # Tekrar çalıştırma göndermez; tarih değişirse yeni vade için tekrar hatırlatılır
+        self.assertEqual(hatirlatmalari_gonder(bugun=self.bugun)['hatirlatma'], 0)
+        asi.planlanan_tarih = self.bugun + timedelta(days=5)
+        asi.save()
+        self.assertEqual(hatirlatmalari_gonder(bugun=self.bugun)['hatirlatma'], 1)
+
+        asi.delete()
+        self.assertEqual(SaglikHatirlatmasi.objects.count(), 1)
+
+    def test_sure_butcesi(self):
+        for i in range(3):
+            AsiTakvimi.objects.create(evcil_hayvan=self.hayvan, asi_turu=f'Aşı {i}', planlanan_tarih=self.bugun)
+        rapor = hatirlatmalari_gonder(bugun=self.bugun, sure_butcesi=0)
+        self.assertFalse(rapor['tamamlandi'])
+        self.assertFalse(Bildirim.objects.exists())
+
+
+class SaglikZamanCizelgesiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='cizelge', password='x')
+        il = Il.objects.create(ad='Eskişehir')
+        sahip = Sahip.objects.create(kullanici=self.user, il=il, ilce=Ilce.objects.create(il=il, ad='Odunpazarı'))
+        tur = Tur.objects.create(ad='Köpek')
+        self.hayvan = EvcilHayvan.objects.create(
+            ad='Zeytin', tur=tur, irk=Irk.objects.create(tur=tur, ad='Golden'), sahip=sahip
+        )
+        bugun = timezone.localdate()
+        AsiTakvimi.objects.create(
+            evcil_hayvan=self.hayvan, asi_turu='Kuduz', planlanan_tarih=bugun - timedelta(days=10),
+            tamamlandi=True, tamamlanma_tarihi=bugun - timedelta(days=9),
+        )
+        SaglikKaydi.objects.create(evcil_hayvan=self.hayvan, asi_turu='Karma', asi_tarihi=bugun - timedelta(days=40))
+        Alerji.objects.create(evcil_hayvan=self.hayvan, alerji_turu='Polen')
+        KiloKaydi.objects.create(evcil_hayvan=self.hayvan, kilo='21.50', tarih=bugun)
+        KiloKaydi.objects.create(evcil_hayvan=self.hayvan, kilo='20.00', tarih=bugun - timedelta(days=30))
+
+    def _hayvan(self):
+        return rapor_queryset().get(pk=self.hayvan.pk)
+
+    def test_tek_sorgu_ve_cache(self):
+        cache.clear()
+        self.hayvan = self._hayvan()
+        with CaptureQueriesContext(connection) as ctx:
+            cizelge = saglik_zaman_cizelgesi(self.hayvan)
+            list(self.hayvan.alerjiler.all())  # prefetch önbelleğinden
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        asi = cizelge.asi_takvimi[0]
+        self.assertIs(asi.tamamlandi, True)
+        self.assertEqual(asi.tamamlanma_tarihi, timezone.localdate() - timedelta(days=9))
+        self.assertEqual([str(k.kilo) for k in cizelge.kilo_kayitlari], ['20.00', '21.50'])
+        self.assertEqual(
+            [olay['tur'] for olay in cizelge.olaylar],
+            ['alerjiler', 'kilo_kayitlari', 'asi_takvimi', 'kilo_kayitlari', 'saglik_kayitlari'],
+        )
+
+        with self.assertNumQueries(0):
+            saglik_zaman_cizelgesi(self.hayvan)
+        with self.captureOnCommitCallbacks(execute=True):
+            KiloKaydi.objects.create(evcil_hayvan=self.hayvan, kilo='22.00', tarih=timezone.localdate())
+        self.assertEqual(len(saglik_zaman_cizelgesi(self._hayvan()).kilo_kayitlari), 3)
+
+    def test_surum_veritabaninda(self):
+        """Başka bir süreçteki değişiklik (yalnızca veritabanındaki sürüm artar) önbelleği geçersiz kılar."""
+        self.assertEqual(len(saglik_zaman_cizelgesi(self._hayvan()).alerjiler), 1)
+        Alerji.objects.filter(evcil_hayvan=self.hayvan).update(alerji_turu='Toz')  # sinyalsiz, yerel önbelleğe dokunmaz
+        saglik_surumunu_artir(self.hayvan.pk)
+        self.assertEqual(saglik_zaman_cizelgesi(self._hayvan()).alerjiler[0].alerji_turu, 'Toz')
+
+    def test_detay_sayfasi(self):
+        self.client.force_login(self.user)
+        yanit = self.client.get(reverse('anahtarlik:pet_detail', args=[self.hayvan.pk]))
+        self.assertContains(yanit, 'Polen')
+        self.assertContains(yanit, 'Karma')
+        self.assertIn('"kilo": 21.5', yanit.context['kilo_data_json'])
+
+
+class KiloSerisiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='kilo', password='x')
+        il = Il.objects.create(ad='Konya')
+        sahip = Sahip.objects.create(kullanici=self.user, il=il, ilce=Ilce.objects.create(il=il, ad='Selçuklu'))
+        tur = Tur.objects.create(ad='Köpek')
+        self.hayvan = EvcilHayvan.objects.create(
+            ad='Paşa', tur=tur, irk=Irk.objects.create(tur=tur, ad='Akbaş'), sahip=sahip
+        )
+        self.ilk_gun = timezone.localdate() - timedelta(days=999)
+        KiloKaydi.objects.bulk_create([
+            KiloKaydi(evcil_hayvan=self.hayvan, tarih=self.ilk_gun + timedelta(days=i), kilo=30 + (i % 7) / 10)
+            for i in range(1000)
+        ])
+
+    def test_lttb_uclari_ve_tepeyi_korur(self):
+        x = list(range(100))
+        y = [0.0] * 100
+        y[57] = 9.0
+        secilen = lttb_indeksleri(x, y, 10)
+        self.assertEqual(len(secilen), 10)
+        self.assertEqual((secilen[0], secilen[-1]), (0, 99))
+        self.assertIn(57, secilen)
+
+    def test_ornekleme_aralik_ve_artimli_ekleme(self):
+        veri = kilo_grafik_verisi(self.hayvan.pk, nokta=50)
+        self.assertEqual((len(veri['noktalar']), veri['toplam'], veri['ornekleme']), (50, 1000, True))
+
+        aralik = kilo_grafik_verisi(
+            self.hayvan.pk, nokta=500, baslangic=self.ilk_gun, bitis=self.ilk_gun + timedelta(days=9)
+        )
+        self.assertEqual((aralik['toplam'], aralik['ornekleme']), (10, False))
+
+        # Geri alınan ölçüm seriye girmez
+        with self.captureOnCommitCallbacks(execute=True) as geri_cagrilar, transaction.atomic():
+            KiloKaydi.objects.create(evcil_hayvan=self.hayvan, tarih=timezone.localdate(), kilo=99)
+            transaction.set_rollback(True)
+        self.assertEqual(geri_cagrilar, [])
+        self.assertEqual(kilo_grafik_verisi(self.hayvan.pk, nokta=50)['toplam'], 1000)
+
+        # Yeni ölçüm commit'ten sonra seriyi yeniden okumadan eklenir (yalnızca sürüm okunur)
+        with self.captureOnCommitCallbacks(execute=True):
+            KiloKaydi.objects.create(evcil_hayvan=self.hayvan, tarih=timezone.localdate(), kilo=35)
+        with self.assertNumQueries(1):
+            veri = kilo_grafik_verisi(self.hayvan.pk, nokta=50)
+        self.assertEqual(veri['toplam'], 1001)
+        self.assertEqual(veri['noktalar'][-1], {'tarih': timezone.localdate().isoformat(), 'kilo': 35.0})
+
+    def test_surum_veritabaninda(self):
+        """Başka bir süreçteki düzenleme (yalnızca veritabanındaki sürüm artar) önbellekteki seriyi geçersiz kılar."""
+        self.assertEqual(kilo_grafik_verisi(self.hayvan.pk, nokta=50)['noktalar'][0]['kilo'], 30.0)
+        KiloKaydi.objects.filter(evcil_hayvan=self.hayvan, tarih=self.ilk_gun).update(kilo=12)  # sinyalsiz
+        kilo_surumunu_artir(self.hayvan.pk)
+        self.assertEqual(kilo_grafik_verisi(self.hayvan.pk, nokta=50)['noktalar'][0]['kilo'], 12.0)
+
+    def test_api(self):
+        self.client.force_login(self.user)
+        url = reverse('anahtarlik:kilo_serisi', args=[self.hayvan.pk])
+        self.assertEqual(len(self.client.get(url, {'nokta': 20}).json()['noktalar']), 20)
+        self.assertEqual(self.client.get(url, {'baslangic': 'dun'}).status_code, 400)
+
+
+class AdminListeSorgulariTests(TestCase):
+    """Sayaç sütunlu admin listeleri satır sayısından bağımsız, sabit sayıda sorgu atar."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('liste_admin', 'admin@example.com', 'x')
+        self.client.force_login(self.admin)
+        self.eklenen = 0
+
+    def _veri_ekle(self, adet):
+        for _ in range(adet):
+            i = self.eklenen = self.eklenen + 1
+            tur = Tur.objects.create(ad=f'Tür {i}')
+            irk = Irk.objects.create(tur=tur, ad=f'Irk {i}')
+            il = Il.objects.create(ad=f'İl {i}')
+            ilce = Ilce.objects.create(il=il, ad=f'İlçe {i}')
+            sahip = Sahip.objects.create(kullanici=User.objects.create_user(f'liste{i}'), il=il, ilce=ilce)
+            EvcilHayvan.objects.create(ad=f'Hayvan {i}', tur=tur, irk=irk, sahip=sahip)
+
+    def test_sayac_sutunlari_sabit_sorgu(self):
+        # oturum, kullanıcı, rol sürümü, sayfalama COUNT'ları, filtre seçenekleri ve tek liste sorgusu
+        sayfalar = {
+            'admin:anahtarlik_tur_changelist': 10,
+            'admin:anahtarlik_irk_changelist': 11,
+            'admin:anahtarlik_il_changelist': 10,
+            'admin:anahtarlik_ilce_changelist': 11,
+            'admin:auth_user_changelist': 11,
+        }
+        self.client.get(reverse('admin:index'))  # ilk istekteki ContentType önbelleği vb.
+        for adet in (3, 30):
+            self._veri_ekle(adet)
+            for ad, sorgu in sayfalar.items():
+                with self.subTest(sayfa=ad, satir=self.eklenen), self.assertNumQueries(sorgu):
+                    self.assertEqual(self.client.get(reverse(ad)).status_code, 200)
+
+    def test_sayac_sutunlarina_gore_siralama(self):
+        self._veri_ekle(2)
+        Irk.objects.create(tur=Tur.objects.get(ad='Tür 2'), ad='Ek ırk')
+        yanit = self.client.get(reverse('admin:anahtarlik_tur_changelist'), {'o': '-2'})
+        self.assertEqual([t.ad for t in yanit.context['cl'].result_list][:1], ['Tür 2'])
+        self.assertEqual(yanit.context['cl'].result_list[0].irk_adedi, 2)
+
+        yanit = self.client.get(reverse('admin:auth_user_changelist'), {'o': '6'})
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual(yanit.context['cl'].result_list[0].kullanici_turu_adi, 'QR Sahibi')
@@ -0,0 +1,198 @@
+# anahtarlik/timeline.py
+"""
+Evcil hayvan sağlık zaman çizelgesi.
+
+Yedi sağlık ilişkisinin (aşı takvimi, sağlık kaydı, ilaç, ameliyat, alerji,
+beslenme, kilo) tamamı tek bir UNION ALL sorgusuyla okunur. Her satır ortak
+kolonlara (metin olarak) yerleştirilir ve Python'da tekrar model nesnesine
+çevrilir. Nesneler hayvanın prefetch önbelleğine de yazılır; böylece
+`hayvan.alerjiler.all` gibi template erişimleri yeni sorgu atmaz.
+
+Sonuç hayvanın sağlık sürümüyle (EvcilHayvanSurumu, veritabanında) anahtarlanarak
+önbelleklenir. Kayıtlardan biri değişince sürüm commit'ten sonra F() ile artırılır;
+önbellek süreç içi (LocMem) olsa da her worker yeni sürümü veritabanından görür ve
+eski anahtarı bir daha okumaz. Commit'ten önce okuyan bir istek eski veriyi ancak
+eski sürümün anahtarına yazabilir. Kilo grafiği verisi ayrı, örneklenmiş seriden
+gelir (anahtarlik/weight_series.py).
+"""
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BooleanField, CharField, DateTimeField, DecimalField, F, TextField, Value
+from django.db.models.functions import Cast, TruncDate
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from courseapp.constants import SAGLIK_ZAMAN_CIZELGESI_CACHE_SURESI
+
+from .models import (
+    AmeliyatKaydi, Alerji, AsiTakvimi, BeslenmeKaydi, EvcilHayvan, EvcilHayvanSurumu, IlacKaydi, KiloKaydi,
+    SaglikKaydi,
+)
+
+# İlişki adı -> (model, zaman çizelgesi tarihi, sıralama alanı, azalan mı)
+KAYIT_TURLERI = {
+    'asi_takvimi': (AsiTakvimi, 'planlanan_tarih', 'planlanan_tarih', True),
+    'saglik_kayitlari': (SaglikKaydi, 'asi_tarihi', 'asi_tarihi', True),
+    'ilac_kayitlari': (IlacKaydi, 'baslangic_tarihi', 'baslangic_tarihi', True),
+    'ameliyat_kayitlari': (AmeliyatKaydi, 'tarih', 'tarih', True),
+    'alerjiler': (Alerji, 'kaydedilme_tarihi', 'kaydedilme_tarihi', True),
+    'beslenme_kayitlari': (BeslenmeKaydi, 'tarih', 'tarih', True),
+    'kilo_kayitlari': (KiloKaydi, 'tarih', 'tarih', False),  # Grafik için eskiden yeniye
+}
+
+
+def _veri_alanlari(model):
+    return [f for f in model._meta.concrete_fields if not f.primary_key and f.name != 'evcil_hayvan']
+
+
+_KOLON_SAYISI = max(len(_veri_alanlari(model)) for model, *_ in KAYIT_TURLERI.values())
+
+
+def _cache_anahtari(hayvan_id, surum):
+    return f'saglik_zaman_cizelgesi_{hayvan_id}_{surum}'
+
+
+def saglik_surumu(hayvan):
+    """Hayvanın sağlık kayıtları sürümü (satır yoksa kayıtlar hiç değişmemiştir: 0). select_related('surum') ile sorgusuz."""
+    try:
+        return hayvan.surum.saglik_surumu
+    except EvcilHayvan.surum.RelatedObjectDoesNotExist:
+        return 0
+
+
+def _birlesik_sorgu(hayvan_id):
+    """Tüm kayıt türlerini aynı kolon düzeninde döndüren tek UNION ALL sorgusu."""
+    parcalar = []
+    for ad, (model, tarih_alani, _, _) in KAYIT_TURLERI.items():
+        alanlar = _veri_alanlari(model)
+        tarih = model._meta.get_field(tarih_alani)
+        kolonlar = {
+            'kayit_turu': Value(ad, output_field=CharField()),
+            'olay_tarihi': TruncDate(tarih_alani) if isinstance(tarih, DateTimeField) else F(tarih_alani),
+        }
+        for i in range(_KOLON_SAYISI):
+            kolonlar[f'k{i}'] = (
+                Cast(alanlar[i].attname, output_field=TextField()) if i < len(alanlar)
+                else Value(None, output_field=TextField())
+            )
+        parcalar.append(
+            model.objects.filter(evcil_hayvan_id=hayvan_id).order_by()
+            .annotate(**kolonlar)
+            .values_list('kayit_turu', 'pk', 'olay_tarihi', *(f'k{i}' for i in range(_KOLON_SAYISI)))
+        )
+    return parcalar[0].union(*parcalar[1:], all=True)
+
+
+def _python_degeri(alan, deger):
+    if deger is None:
+        return None
+    if isinstance(alan, BooleanField):
+        return str(deger).lower() in ('1', 't', 'true')
+    deger = alan.to_python(deger)
+    if isinstance(alan, DecimalField):
+        return deger.quantize(Decimal(1).scaleb(-alan.decimal_places))
+    if isinstance(alan, DateTimeField) and settings.USE_TZ and timezone.is_naive(deger):
+        return timezone.make_aware(deger, dt_timezone.utc)
+    return deger
+
+
+def _kayitlari_oku(hayvan_id):
+    """{ilişki adı: [(pk, {attname: değer}), ...]} - önbelleğe yazılabilir düz veri."""
+    kayitlar = {ad: [] for ad in KAYIT_TURLERI}
+    for satir in _birlesik_sorgu(hayvan_id):
+        ad, pk, degerler = satir[0], satir[1], satir[3:]
+        alanlar = _veri_alanlari(KAYIT_TURLERI[ad][0])
+        kayitlar[ad].append((pk, {
+            alan.attname: _python_degeri(alan, deger) for alan, deger in zip(alanlar, degerler)
+        }))
+    for ad, (_, _, siralama, azalan) in KAYIT_TURLERI.items():
+        kayitlar[ad].sort(key=lambda kayit: (kayit[1][siralama], kayit[0]), reverse=azalan)
+    return kayitlar
+
+
+class SaglikZamanCizelgesi:
+    """Tür bazlı kayıt listeleri ve birleşik tarih sıralı olay listesi."""
+
+    def __init__(self, hayvan, kayitlar):
+        self.turler = {}
+        for ad, satirlar in kayitlar.items():
+            model = KAYIT_TURLERI[ad][0]
+            nesneler = []
+            for pk, veri in satirlar:
+                nesne = model(pk=pk, evcil_hayvan_id=hayvan.pk, **veri)
+                nesne._state.adding = False
+                nesne._state.db = connection.alias
+                nesne.evcil_hayvan = hayvan
+                nesneler.append(nesne)
+            self.turler[ad] = nesneler
+
+    def __getattr__(self, ad):
+        try:
+            return self.__dict__['turler'][ad]
+        except KeyError:
+            raise AttributeError(ad) from None
+
+    @property
+    def olaylar(self):
+        """Tüm kayıtlar, yeniden eskiye: [{'tur', 'tarih', 'kayit'}, ...]"""
+        olaylar = []
+        for ad, (_, tarih_alani, _, _) in KAYIT_TURLERI.items():
+            for kayit in self.turler[ad]:
+                tarih = getattr(kayit, tarih_alani)
+                if isinstance(tarih, datetime):
+                    tarih = timezone.localtime(tarih).date() if timezone.is_aware(tarih) else tarih.date()
+                olaylar.append({'tur': ad, 'tarih': tarih, 'kayit': kayit})
+        olaylar.sort(key=lambda olay: olay['tarih'], reverse=True)
+        return olaylar
+
+    def prefetch_onbellegine_yaz(self, hayvan):
+        """`hayvan.<ilişki>.all()` çağrılarını bu listelerden karşılar."""
+        onbellek = getattr(hayvan, '_prefetched_objects_cache', None)
+        if onbellek is None:
+            onbellek = hayvan._prefetched_objects_cache = {}
+        for ad, nesneler in self.turler.items():
+            qs = getattr(hayvan, ad).get_queryset()
+            qs._result_cache = nesneler
+            qs._prefetch_done = True
+            onbellek[ad] = qs
+
+
+def saglik_zaman_cizelgesi(hayvan):
+    """Hayvanın tüm sağlık kayıtları: önbellekte yoksa tek sorgu."""
+    anahtar = _cache_anahtari(hayvan.pk, saglik_surumu(hayvan))
+    kayitlar = cache.get(anahtar)
+    if kayitlar is None:
+        kayitlar = _kayitlari_oku(hayvan.pk)
+        cache.set(anahtar, kayitlar, SAGLIK_ZAMAN_CIZELGESI_CACHE_SURESI)
+    cizelge = SaglikZamanCizelgesi(hayvan, kayitlar)
+    cizelge.prefetch_onbellegine_yaz(hayvan)
+    return cizelge
+
+
+def saglik_surumunu_artir(hayvan_id):
+    """Sağlık sürümünü artırır; tüm süreçlerde önbellekteki zaman çizelgesi bir daha okunmaz."""
+    if EvcilHayvanSurumu.objects.filter(evcil_hayvan_id=hayvan_id).update(saglik_surumu=F('saglik_surumu') + 1):
+        return
+    try:
+        with transaction.atomic():
+            EvcilHayvanSurumu.objects.create(evcil_hayvan_id=hayvan_id, saglik_surumu=1)
+    except IntegrityError:
+        # Eşzamanlı ilk artırma satırı oluşturdu (ya da hayvan silindi)
+        EvcilHayvanSurumu.objects.filter(evcil_hayvan_id=hayvan_id).update(saglik_surumu=F('saglik_surumu') + 1)
+
+
+@receiver([post_save, post_delete], sender=AsiTakvimi)
+@receiver([post_save, post_delete], sender=SaglikKaydi)
+@receiver([post_save, post_delete], sender=IlacKaydi)
+@receiver([post_save, post_delete], sender=AmeliyatKaydi)
+@receiver([post_save, post_delete], sender=Alerji)
+@receiver([post_save, post_delete], sender=BeslenmeKaydi)
+@receiver([post_save, post_delete], sender=KiloKaydi)
+def _saglik_kaydi_degisti(sender, instance, **kwargs):
+    hayvan_id = instance.evcil_hayvan_id
+    transaction.on_commit(lambda: saglik_surumunu_artir(hayvan_id))
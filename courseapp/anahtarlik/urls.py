@@ -19,6 +19,7 @@ urlpatterns = [
     path('panel/add-pet/', views.add_pet, name='add_pet'),
     path('panel/pet/<int:pet_id>/', views.pet_detail, name='pet_detail'),
     path('panel/pet/<int:pet_id>/pdf/', views.hayvan_pdf_indir, name='hayvan_pdf_indir'),
+    path('panel/pet/<int:pet_id>/kilo/', views.kilo_serisi, name='kilo_serisi'),
     path('panel/profil-duzenle/', views.profil_duzenle, name='profil_duzenle'),
     path('panel/hesap-ayarlari/', views.hesap_ayarlari, name='hesap_ayarlari'),
     path("panel/found/<int:evcil_hayvan_id>/", views.hayvan_bulundu, name="mark_found"),
@@ -2,6 +2,7 @@
 
 import logging
 import os
+from datetime import date
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -12,12 +13,20 @@ from django.core.paginator import Paginator
 from django.db import transaction
 from .models import Sahip, EvcilHayvan, SaglikKaydi, BeslenmeKaydi, Alerji, AsiTakvimi, IlacKaydi, AmeliyatKaydi, KiloKaydi, SahipProPaket, SahipProAbonelik, Bildirim
 from etiket.models import Etiket
+from etiket.serial_lookup import SeriAramaLimitiAsildi, seri_ile_etiket_bul
+from accaunt.roles import get_user_role
 from .forms import EtiketForm, EvcilHayvanForm, HesapAyarlariForm
 from .dictionaries import Il, Ilce
 
-from django.http import HttpResponse, JsonResponse
-from django.template.loader import get_template
-from xhtml2pdf import pisa
+from django.http import FileResponse, HttpResponse, JsonResponse, Http404
+from django.core.files.storage import default_storage
+from courseapp.constants import KILO_GRAFIK_MAKS_NOKTA, KILO_GRAFIK_NOKTA, SAGLIK_RAPORU_YOKLAMA_SURESI, YAKLASAN_ASI_GUN
+from .dashboard import danisman_atamasini_kuyruga_al, gecerli_hayvan_filtresi, sahip_panel_ozeti, sahip_panel_ozeti_sil
+from .timeline import saglik_zaman_cizelgesi
+from .weight_series import kilo_grafik_json, kilo_grafik_verisi
+from .health_report import (
+    rapor_hatali_mi, rapor_hazir_mi, rapor_kuyruga_al, rapor_parmak_izi, rapor_queryset, rapor_yolu,
+)
 
 from django.urls import reverse  # <-- eklendi
 
@@ -51,6 +60,7 @@ def bildirimler(request):
     # AJAX isteği ise sadece okunmamışları okundu yap
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         Bildirim.objects.filter(sahip=sahip, okundu=False).update(okundu=True)
+        sahip_panel_ozeti_sil(sahip.pk)
         okunmamis_sayi = 0
     
     context = {
@@ -83,6 +93,7 @@ def bildirim_oku(request, bildirim_id):
 def tum_bildirimleri_oku(request):
     """Tüm bildirimleri okundu olarak işaretle"""
     Bildirim.objects.filter(sahip=request.user.sahip, okundu=False).update(okundu=True)
+    sahip_panel_ozeti_sil(request.user.sahip.pk)
     return redirect('anahtarlik:bildirimler')
 
 
@@ -201,10 +212,6 @@ def profil_duzenle_eski(request):
                 # Veteriner kullanıcı
                 veteriner = request.user.veteriner_profili
                 
-                # Eski il/ilçe bilgilerini sakla
-                eski_il = veteriner.il
-                eski_ilce = veteriner.ilce
-                
                 veteriner.ad = request.POST.get('ad')
                 veteriner.soyad = request.POST.get('soyad')
                 veteriner.telefon = request.POST.get('telefon')
@@ -224,14 +231,8 @@ def profil_duzenle_eski(request):
                 
                 veteriner.save()
                 
-                # İl/ilçe değiştiyse danışman olduğu sahipleri güncelle
-                if (eski_il != veteriner.il or eski_ilce != veteriner.ilce):
-                    # Eski ilçedeki sahipleri yeni danışman ata
-                    for sahip in veteriner.danisman_oldugu_sahipler.all():
-                        if sahip.ilce != veteriner.ilce:
-                            yeni_danisman = sahip.danisman_veteriner_ata(force_update=True)
-                            if yeni_danisman:
-                                messages.info(request, f"Sahip {sahip.ad} {sahip.soyad} için yeni danışman veteriner atandı.")
+                # İl/ilçe değiştiyse yeni ilçe dışındaki sahipler Veteriner.save içinde
+                # bırakılır ve arka planda toplu olarak yeniden atanır (veteriner/advisors.py)
                 
                 # User modelini de güncelle
                 request.user.first_name = request.POST.get('ad')
@@ -332,49 +333,76 @@ def hesap_ayarlari(request):
 
 @login_required
 def hayvan_pdf_indir(request, pet_id):
-    evcil_hayvan = get_object_or_404(EvcilHayvan, id=pet_id, sahip__kullanici=request.user)
-    template = get_template("anahtarlik/pdf_template.html")
-    html = template.render({"hayvan": evcil_hayvan})
-
-    response = HttpResponse(content_type="application/pdf")
-    response['Content-Disposition'] = f'attachment; filename="{evcil_hayvan.ad}_rapor.pdf"'
-    pisa.CreatePDF(html, dest=response)
-    return response
-
+    """
+    Sağlık raporunu indirir. Rapor kayıtların parmak izine göre depolamada
+    saklanır; hazır değilse arka planda üretilir ve istemci aynı adresi yoklar (202).
+    Üretim başarısız olduysa 500 döner.
+    """
+    evcil_hayvan = get_object_or_404(rapor_queryset(), id=pet_id, sahip__kullanici=request.user)
+    parmak_izi = rapor_parmak_izi(evcil_hayvan)
+
+    if rapor_hazir_mi(evcil_hayvan.id, parmak_izi):
+        return FileResponse(
+            default_storage.open(rapor_yolu(evcil_hayvan.id, parmak_izi), 'rb'),
+            as_attachment=True,
+            filename=f"{evcil_hayvan.ad}_rapor.pdf",
+            content_type="application/pdf",
+        )
+
+    rapor_kuyruga_al(evcil_hayvan.id, parmak_izi)
+    hata = rapor_hatali_mi(evcil_hayvan.id, parmak_izi)
+    durum_kodu = 500 if hata else 202
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('accept', ''):
+        return JsonResponse({'durum': 'hata' if hata else 'hazirlaniyor', 'url': request.path}, status=durum_kodu)
+    return render(request, 'anahtarlik/pdf_hazirlaniyor.html', {
+        'hayvan': evcil_hayvan,
+        'hata': hata,
+        'yoklama_suresi': SAGLIK_RAPORU_YOKLAMA_SURESI,
+    }, status=durum_kodu)
 
-import json
-from django.core.serializers.json import DjangoJSONEncoder
 
 @login_required
 def pet_detail(request, pet_id):
-    evcil_hayvan = get_object_or_404(EvcilHayvan, id=pet_id, sahip__kullanici=request.user)
-
-    asi_takvimi = evcil_hayvan.asi_takvimi.all().order_by('-planlanan_tarih')
-    saglik_kayitlari = evcil_hayvan.saglik_kayitlari.all().order_by('-asi_tarihi')
-    ilac_kayitlari = evcil_hayvan.ilac_kayitlari.all().order_by('-baslangic_tarihi')
-    ameliyat_kayitlari = evcil_hayvan.ameliyat_kayitlari.all().order_by('-tarih')
-    alerjiler = evcil_hayvan.alerjiler.all().order_by('-kaydedilme_tarihi')
-    beslenme_kayitlari = evcil_hayvan.beslenme_kayitlari.all().order_by('-tarih')
-    kilo_kayitlari = evcil_hayvan.kilo_kayitlari.all().order_by('tarih')
-
-    # ✅ JSON’a çevir
-    kilo_data = list(kilo_kayitlari.values("tarih", "kilo"))
-    kilo_data_json = json.dumps(kilo_data, cls=DjangoJSONEncoder)
+    evcil_hayvan = get_object_or_404(
+        EvcilHayvan.objects.select_related('tur', 'irk', 'sahip__kullanici', 'surum'),
+        id=pet_id, sahip__kullanici=request.user,
+    )
+    # Tüm sağlık kayıtları tek sorguda (veya cache'ten); hayvan.<ilişki>.all da buradan okunur
+    cizelge = saglik_zaman_cizelgesi(evcil_hayvan)
 
     context = {
         'hayvan': evcil_hayvan,
-        'asi_takvimi': asi_takvimi,
-        'saglik_kayitlari': saglik_kayitlari,
-        'ilac_kayitlari': ilac_kayitlari,
-        'ameliyat_kayitlari': ameliyat_kayitlari,
-        'alerjiler': alerjiler,
-        'beslenme_kayitlari': beslenme_kayitlari,
-        'kilo_kayitlari': kilo_kayitlari,
-        'kilo_data_json': kilo_data_json,   # ✅ Template’e JSON gönderiyoruz
+        'zaman_cizelgesi': cizelge.olaylar,
+        'asi_takvimi': cizelge.asi_takvimi,
+        'saglik_kayitlari': cizelge.saglik_kayitlari,
+        'ilac_kayitlari': cizelge.ilac_kayitlari,
+        'ameliyat_kayitlari': cizelge.ameliyat_kayitlari,
+        'alerjiler': cizelge.alerjiler,
+        'beslenme_kayitlari': cizelge.beslenme_kayitlari,
+        'kilo_kayitlari': cizelge.kilo_kayitlari,
+        # Binlerce ölçümlü hayvanlarda da sayfa küçük kalsın: örneklenmiş seri
+        'kilo_data_json': kilo_grafik_json(evcil_hayvan.id),
     }
     return render(request, 'anahtarlik/pet_detail.html', context)
 
 
+@login_required
+def kilo_serisi(request, pet_id):
+    """
+    Kilo geçmişi (JSON), grafik için örneklenmiş.
+    Parametreler: nokta (varsayılan 200), baslangic / bitis (YYYY-AA-GG).
+    """
+    evcil_hayvan = get_object_or_404(EvcilHayvan, id=pet_id, sahip__kullanici=request.user)
+    try:
+        nokta = int(request.GET.get('nokta', KILO_GRAFIK_NOKTA))
+        baslangic = date.fromisoformat(request.GET['baslangic']) if request.GET.get('baslangic') else None
+        bitis = date.fromisoformat(request.GET['bitis']) if request.GET.get('bitis') else None
+    except ValueError:
+        return JsonResponse({'hata': 'Geçersiz parametre'}, status=400)
+    nokta = max(2, min(nokta, KILO_GRAFIK_MAKS_NOKTA))
+    return JsonResponse(kilo_grafik_verisi(evcil_hayvan.id, nokta, baslangic, bitis))
+
+
 def ev(request):
     """Ana sayfa view'ı - Dinamik içerik ile"""
     from .models import HeroSlide, HizmetKarti, AnaSayfaAyar, EvcilHayvan
@@ -448,152 +476,70 @@ def qr_kunye_nasil_calisir(request):
 def kullanici_paneli(request):
     # Rol bazlı yönlendirme: veteriner/petshop kullanıcıları kendi panellerine gitsin
     user = request.user
-    vet = getattr(user, 'veteriner_profili', None)
-    if vet is not None:
-        if not vet.il or not vet.adres_detay:
+    rol = get_user_role(request)
+    if rol.veteriner_mi:
+        if not rol.veteriner_profil_tamam:
             return redirect('veteriner:veteriner_profil_tamamla')
         return redirect('veteriner:veteriner_paneli')
 
-    shop = getattr(user, 'petshop_profili', None)
-    if shop is not None:
+    if rol.petshop_mi:
         try:
             return redirect('petshop:petshop_paneli')
         except Exception:
             return redirect('petshop:petshop_profil_tamamla')
 
-    sahip = get_object_or_404(Sahip, kullanici=user)
-    
-    # Query optimization
-    evcil_hayvanlar = sahip.evcil_hayvanlar.select_related('tur', 'irk').prefetch_related('etiket').all()
-    
-    # Künye tarihi geçmiş olanları filtrele (görünmesin)
-    now = timezone.now()
-    from datetime import timedelta
-    gecerli_hayvanlar = []
-    kayip_hayvanlar = []
-    kunye_suresi_dolmak_uzere = []
-    
-    for hayvan in evcil_hayvanlar:
-        # Kayıp hayvan kontrolü
-        if hayvan.kayip_durumu:
-            kayip_hayvanlar.append(hayvan)
-        
-        # Etiket yoksa göster
-        if not hayvan.etiket:
-            gecerli_hayvanlar.append(hayvan)
-        # Etiket varsa ve son kullanma tarihi geçmemişse göster
-        elif hayvan.etiket.son_kullanma_tarihi is None or hayvan.etiket.son_kullanma_tarihi > now:
-            gecerli_hayvanlar.append(hayvan)
-            
-            # Künye süresi dolmak üzere kontrolü (30 gün içinde)
-            if hayvan.etiket.son_kullanma_tarihi:
-                kalan_gun = (hayvan.etiket.son_kullanma_tarihi - now).days
-                if 0 < kalan_gun <= 30:
-                    kunye_suresi_dolmak_uzere.append({
-                        'hayvan': hayvan,
-                        'kalan_gun': kalan_gun
-                    })
-        # Etiket varsa ama son kullanma tarihi geçmişse gösterme
-    
-    # Liste sıralaması
-    gecerli_hayvanlar.sort(key=lambda x: x.id, reverse=True)
-    
+    if not rol.sahip_mi:
+        raise Http404("Sahip profili bulunamadı")
+    sahip = user.sahip
+
+    # Tüm sayaçlar ve uyarılar tek özet üzerinden (cache'li)
+    ozet = sahip_panel_ozeti(sahip)
+
+    # Künyesi süresi dolmuş hayvanlar listede gösterilmez
+    gecerli_hayvanlar = sahip.evcil_hayvanlar.filter(
+        gecerli_hayvan_filtresi()
+    ).select_related('tur', 'irk', 'etiket').order_by('-id')
+
     paginator = Paginator(gecerli_hayvanlar, 6)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    
-    # Künye sayısını hesapla (sadece geçerli künyeler)
-    kunye_sayisi = len([h for h in gecerli_hayvanlar if h.etiket])
-    
-    # İlan sayısını hesapla
-    from ilan.models import Ilan
-    sahip_ilan_sayisi = Ilan.objects.filter(hayvan_profili__kullanici=user, aktif=True).count()
-    
-    # Kayıp hayvan sayısı
-    kayip_hayvan_sayisi = len(kayip_hayvanlar)
-    
-    # Toplam evcil hayvan sayısı (tüm hayvanlar - kayıp dahil)
-    toplam_evcil_hayvan_sayisi = len(gecerli_hayvanlar)
-    
+
     # Son bildirimler (5 adet)
     son_bildirimler = Bildirim.objects.filter(
         sahip=sahip
     ).select_related('tarama').order_by('-olusturma_zamani')[:5]
-    
-    # Okunmamış bildirim sayısı
-    okunmamis_bildirim_sayisi = Bildirim.objects.filter(sahip=sahip, okundu=False).count()
-    
-    # Yaklaşan aşılar (30 gün içinde, tamamlanmamış)
-    yakin_tarih = now.date() + timedelta(days=30)
-    yaklasan_asilar = AsiTakvimi.objects.filter(
-        evcil_hayvan__sahip=sahip,
-        planlanan_tarih__lte=yakin_tarih,
-        planlanan_tarih__gte=now.date(),
-        tamamlandi=False
-    ).select_related('evcil_hayvan').order_by('planlanan_tarih')[:5]
-    
-    # Danışman veteriner bilgileri - eğer yoksa ve aktif künye varsa otomatik ata
+
+    # Yaklaşan aşılar (30 gün içinde, tamamlanmamış) - sayaç özetten, liste sadece varsa
+    yaklasan_asilar = []
+    if ozet['yaklasan_asi_sayisi']:
+        from datetime import timedelta
+        bugun = timezone.localdate()
+        yaklasan_asilar = AsiTakvimi.objects.filter(
+            evcil_hayvan__sahip=sahip,
+            planlanan_tarih__lte=bugun + timedelta(days=YAKLASAN_ASI_GUN),
+            planlanan_tarih__gte=bugun,
+            tamamlandi=False
+        ).select_related('evcil_hayvan').order_by('planlanan_tarih')[:5]
+
+    # Danışman veteriner yoksa ve aktif künye varsa atama arka planda yapılır
     danisman_veteriner = sahip.danisman_veteriner
-    if not danisman_veteriner and kunye_sayisi > 0:
-        # Aktif künye varsa otomatik atama yap
-        danisman_veteriner = sahip.danisman_veteriner_ata()
-    
-    # Veteriner çalışma saatlerini JSON olarak hazırla (randevu formu için)
-    calisma_saatleri_json = None
-    if danisman_veteriner:
-        import json
-        calisma_saatleri_json = json.dumps({
-            0: {  # Pazartesi
-                "baslangic": danisman_veteriner.pazartesi_baslangic.strftime('%H:%M') if danisman_veteriner.pazartesi_baslangic else None,
-                "bitis": danisman_veteriner.pazartesi_bitis.strftime('%H:%M') if danisman_veteriner.pazartesi_bitis else None,
-                "kapali": danisman_veteriner.pazartesi_kapali
-            },
-            1: {  # Salı
-                "baslangic": danisman_veteriner.sali_baslangic.strftime('%H:%M') if danisman_veteriner.sali_baslangic else None,
-                "bitis": danisman_veteriner.sali_bitis.strftime('%H:%M') if danisman_veteriner.sali_bitis else None,
-                "kapali": danisman_veteriner.sali_kapali
-            },
-            2: {  # Çarşamba
-                "baslangic": danisman_veteriner.carsamba_baslangic.strftime('%H:%M') if danisman_veteriner.carsamba_baslangic else None,
-                "bitis": danisman_veteriner.carsamba_bitis.strftime('%H:%M') if danisman_veteriner.carsamba_bitis else None,
-                "kapali": danisman_veteriner.carsamba_kapali
-            },
-            3: {  # Perşembe
-                "baslangic": danisman_veteriner.persembe_baslangic.strftime('%H:%M') if danisman_veteriner.persembe_baslangic else None,
-                "bitis": danisman_veteriner.persembe_bitis.strftime('%H:%M') if danisman_veteriner.persembe_bitis else None,
-                "kapali": danisman_veteriner.persembe_kapali
-            },
-            4: {  # Cuma
-                "baslangic": danisman_veteriner.cuma_baslangic.strftime('%H:%M') if danisman_veteriner.cuma_baslangic else None,
-                "bitis": danisman_veteriner.cuma_bitis.strftime('%H:%M') if danisman_veteriner.cuma_bitis else None,
-                "kapali": danisman_veteriner.cuma_kapali
-            },
-            5: {  # Cumartesi
-                "baslangic": danisman_veteriner.cumartesi_baslangic.strftime('%H:%M') if danisman_veteriner.cumartesi_baslangic else None,
-                "bitis": danisman_veteriner.cumartesi_bitis.strftime('%H:%M') if danisman_veteriner.cumartesi_bitis else None,
-                "kapali": danisman_veteriner.cumartesi_kapali
-            },
-            6: {  # Pazar
-                "baslangic": danisman_veteriner.pazar_baslangic.strftime('%H:%M') if danisman_veteriner.pazar_baslangic else None,
-                "bitis": danisman_veteriner.pazar_bitis.strftime('%H:%M') if danisman_veteriner.pazar_bitis else None,
-                "kapali": danisman_veteriner.pazar_kapali
-            },
-        })
-    
+    if not danisman_veteriner and ozet['kunye_sayisi'] > 0:
+        danisman_atamasini_kuyruga_al(sahip)
+
     return render(request, 'anahtarlik/kullanici_paneli.html', {
         'evcil_hayvanlar': page_obj,
         'danisman_veteriner': danisman_veteriner,
         'sahip': sahip,
-        'kunye_sayisi': kunye_sayisi,
-        'sahip_ilan_sayisi': sahip_ilan_sayisi,
-        'kayip_hayvan_sayisi': kayip_hayvan_sayisi,
-        'toplam_evcil_hayvan_sayisi': toplam_evcil_hayvan_sayisi,
-        'kayip_hayvanlar': kayip_hayvanlar,
-        'kunye_suresi_dolmak_uzere': kunye_suresi_dolmak_uzere,
+        'kunye_sayisi': ozet['kunye_sayisi'],
+        'sahip_ilan_sayisi': ozet['sahip_ilan_sayisi'],
+        'kayip_hayvan_sayisi': ozet['kayip_hayvan_sayisi'],
+        'toplam_evcil_hayvan_sayisi': ozet['toplam_evcil_hayvan_sayisi'],
+        'kayip_hayvanlar': ozet['kayip_hayvanlar'],
+        'kunye_suresi_dolmak_uzere': ozet['kunye_suresi_dolmak_uzere'],
         'son_bildirimler': son_bildirimler,
-        'okunmamis_bildirim_sayisi': okunmamis_bildirim_sayisi,
+        'okunmamis_bildirim_sayisi': ozet['okunmamis_bildirim_sayisi'],
         'yaklasan_asilar': yaklasan_asilar,
-        'calisma_saatleri_json': calisma_saatleri_json,
+        'calisma_saatleri_json': danisman_veteriner.calisma_saatleri_json() if danisman_veteriner else None,
     })
 
 @login_required
@@ -677,54 +623,12 @@ def sahip_profilim(request):
     # Son eklenen evcil hayvanlar (3 adet)
     son_evcil_hayvanlar = sahip.evcil_hayvanlar.all().order_by('-id')[:3]
     
-    # Danışman veteriner bilgileri - eğer yoksa ve aktif künye varsa otomatik ata
+    # Danışman veteriner yoksa ve aktif künye varsa atama arka planda yapılır
     danisman_veteriner = sahip.danisman_veteriner
     if not danisman_veteriner and aktif_etiket_sayisi > 0:
-        # Aktif künye varsa otomatik atama yap
-        danisman_veteriner = sahip.danisman_veteriner_ata()
-    
-    # Veteriner çalışma saatlerini JSON olarak hazırla (randevu formu için)
-    calisma_saatleri_json = None
-    if danisman_veteriner:
-        import json
-        calisma_saatleri_json = json.dumps({
-            0: {  # Pazartesi
-                "baslangic": danisman_veteriner.pazartesi_baslangic.strftime('%H:%M') if danisman_veteriner.pazartesi_baslangic else None,
-                "bitis": danisman_veteriner.pazartesi_bitis.strftime('%H:%M') if danisman_veteriner.pazartesi_bitis else None,
-                "kapali": danisman_veteriner.pazartesi_kapali
-            },
-            1: {  # Salı
-                "baslangic": danisman_veteriner.sali_baslangic.strftime('%H:%M') if danisman_veteriner.sali_baslangic else None,
-                "bitis": danisman_veteriner.sali_bitis.strftime('%H:%M') if danisman_veteriner.sali_bitis else None,
-                "kapali": danisman_veteriner.sali_kapali
-            },
-            2: {  # Çarşamba
-                "baslangic": danisman_veteriner.carsamba_baslangic.strftime('%H:%M') if danisman_veteriner.carsamba_baslangic else None,
-                "bitis": danisman_veteriner.carsamba_bitis.strftime('%H:%M') if danisman_veteriner.carsamba_bitis else None,
-                "kapali": danisman_veteriner.carsamba_kapali
-            },
-            3: {  # Perşembe
-                "baslangic": danisman_veteriner.persembe_baslangic.strftime('%H:%M') if danisman_veteriner.persembe_baslangic else None,
-                "bitis": danisman_veteriner.persembe_bitis.strftime('%H:%M') if danisman_veteriner.persembe_bitis else None,
-                "kapali": danisman_veteriner.persembe_kapali
-            },
-            4: {  # Cuma
-                "baslangic": danisman_veteriner.cuma_baslangic.strftime('%H:%M') if danisman_veteriner.cuma_baslangic else None,
-                "bitis": danisman_veteriner.cuma_bitis.strftime('%H:%M') if danisman_veteriner.cuma_bitis else None,
-                "kapali": danisman_veteriner.cuma_kapali
-            },
-            5: {  # Cumartesi
-                "baslangic": danisman_veteriner.cumartesi_baslangic.strftime('%H:%M') if danisman_veteriner.cumartesi_baslangic else None,
-                "bitis": danisman_veteriner.cumartesi_bitis.strftime('%H:%M') if danisman_veteriner.cumartesi_bitis else None,
-                "kapali": danisman_veteriner.cumartesi_kapali
-            },
-            6: {  # Pazar
-                "baslangic": danisman_veteriner.pazar_baslangic.strftime('%H:%M') if danisman_veteriner.pazar_baslangic else None,
-                "bitis": danisman_veteriner.pazar_bitis.strftime('%H:%M') if danisman_veteriner.pazar_bitis else None,
-                "kapali": danisman_veteriner.pazar_kapali
-            },
-        })
-    
+        danisman_atamasini_kuyruga_al(sahip)
+    calisma_saatleri_json = danisman_veteriner.calisma_saatleri_json() if danisman_veteriner else None
+
     context = {
         'sahip': sahip,
         'evcil_hayvan_sayisi': evcil_hayvan_sayisi,
@@ -764,15 +668,18 @@ def add_pet(request):
             if form.is_valid():
                 seri = form.cleaned_data['seri_numarasi']
                 try:
-                    etiket = Etiket.objects.get(seri_numarasi=seri)
-                    if etiket.aktif:
+                    etiket = seri_ile_etiket_bul(seri, request=request)
+                except SeriAramaLimitiAsildi as exc:
+                    messages.error(request, exc.mesaj)
+                else:
+                    if etiket is None:
+                        messages.error(request, "Bu seri numarası sistemde bulunamadı.")
+                    elif etiket.aktif:
                         messages.error(request, "Bu etiket zaten aktif!")
                     else:
                         request.session['etiket_id'] = etiket.id
                         request.session['add_pet_step'] = 2
                         return redirect('anahtarlik:add_pet')
-                except Etiket.DoesNotExist:
-                    messages.error(request, "Bu seri numarası sistemde bulunamadı.")
         else:
             form = EtiketForm()
         return render(request, 'anahtarlik/add_pet.html', {'form': form, 'step': 1})
@@ -844,7 +751,16 @@ def kayip_bildir(request, evcil_hayvan_id):
         evcil_hayvan.save()
         messages.success(request, 'Kayıp bildirimi yapıldı!')
         return redirect('anahtarlik:kullanici_paneli')
-    return render(request, 'anahtarlik/kayip_bildir.html', {'evcil_hayvan': evcil_hayvan})
+    # Sahibin konumuna en yakın, şu an açık klinikler (kayıp hayvan bulunursa başvurulacak yerler)
+    yakin_klinikler = []
+    sahip = evcil_hayvan.sahip
+    if sahip.latitude is not None and sahip.longitude is not None:
+        from veteriner.nearby import en_yakin_klinikler
+        yakin_klinikler = en_yakin_klinikler(sahip.latitude, sahip.longitude, k=3, acik=True)
+    return render(request, 'anahtarlik/kayip_bildir.html', {
+        'evcil_hayvan': evcil_hayvan,
+        'yakin_klinikler': yakin_klinikler,
+    })
 
 def hayvan_bulundu(request, evcil_hayvan_id):
     hayvan = get_object_or_404(EvcilHayvan, id=evcil_hayvan_id)
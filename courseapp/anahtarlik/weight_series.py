@@ -0,0 +1,223 @@
+# anahtarlik/weight_series.py
+"""
+Kilo zaman serisi ve grafik için örnekleme (downsampling).
+
+Hayvanın kilo kayıtları tarih sıralı kompakt dizilere (kayıt kimliği, gün
+sırası, kilo) çevrilip önbellekte tutulur. Önbellek anahtarı hayvanın kilo sürümünü
+(EvcilHayvanSurumu.kilo_surumu, veritabanında) içerir. Kayıt eklenince,
+değişince veya silinince sürüm commit'ten sonra F() ile artırılır; önbellek
+süreç içi (LocMem) olsa da her worker yeni sürümü veritabanından okur ve eski
+seriyi kullanmaz. Seri, sürümle birlikte tek sorguda okunur.
+
+Yeni kilo kaydı eklendiğinde, kaydı yapan süreç seriyi baştan okumaz: önceki
+sürümün serisi önbellekteyse nokta sıralı olarak eklenip yeni sürüme yazılır.
+Seri kayıt kimliklerini de tuttuğundan önceki sürümü okuyan bir istek noktayı
+zaten gördüyse tekrar eklenmez. Diğer süreçler yeni sürümü bir kez
+veritabanından okur.
+
+Grafik verisi istenen tarih aralığına kesilip Largest-Triangle-Three-Buckets
+(LTTB) ile istenen nokta sayısına indirilir; şeklin tepe ve dipleri korunur.
+NumPy kuruluysa hesap vektörel yapılır, değilse aynı algoritma saf Python ile çalışır.
+"""
+import json
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courseapp.constants import KILO_GRAFIK_NOKTA, KILO_SERISI_CACHE_SURESI
+
+from .models import EvcilHayvan, EvcilHayvanSurumu, KiloKaydi
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opsiyonel
+    np = None
+
+
+def _seri_anahtari(hayvan_id, surum):
+    return f'kilo_serisi_{hayvan_id}_{surum}'
+
+
+def _kilo_surumu(hayvan_id):
+    """Hayvanın geçerli kilo sürümü (satır yoksa kayıtlar sinyalle hiç değişmemiştir: 0)."""
+    surum = EvcilHayvanSurumu.objects.filter(evcil_hayvan_id=hayvan_id).values_list('kilo_surumu', flat=True)[:1]
+    return next(iter(surum), 0)
+
+
+def _seri_oku(hayvan_id):
+    """Sürüm ve ölçümler tek sorguda (LEFT JOIN): sürüm, okunan satırlarla aynı anın verisidir."""
+    pkler, gunler, kilolar, surum = array('l'), array('l'), array('d'), 0
+    satirlar = (
+        EvcilHayvan.objects.filter(pk=hayvan_id)
+        .order_by('kilo_kayitlari__tarih', 'kilo_kayitlari__pk')
+        .values_list('surum__kilo_surumu', 'kilo_kayitlari__pk', 'kilo_kayitlari__tarih', 'kilo_kayitlari__kilo')
+    )
+    for surum, pk, tarih, kilo in satirlar.iterator():
+        if pk is not None:
+            pkler.append(pk)
+            gunler.append(tarih.toordinal())
+            kilolar.append(float(kilo))
+    return {'pkler': pkler, 'gunler': gunler, 'kilolar': kilolar, 'surum': surum or 0}
+
+
+def kilo_serisi(hayvan_id):
+    """{'pkler': array('l'), 'gunler': array('l') (date.toordinal), 'kilolar': array('d'), 'surum': int}"""
+    seri = cache.get(_seri_anahtari(hayvan_id, _kilo_surumu(hayvan_id)))
+    if seri is None:
+        seri = _seri_oku(hayvan_id)
+        cache.set(_seri_anahtari(hayvan_id, seri['surum']), seri, KILO_SERISI_CACHE_SURESI)
+    return seri
+
+
+def _artir_ve_oku(hayvan_id):
+    """Var olan sürüm satırını artırır ve yeni değeri aynı transaction'da okur (satır yoksa None)."""
+    with transaction.atomic():
+        if EvcilHayvanSurumu.objects.filter(evcil_hayvan_id=hayvan_id).update(kilo_surumu=F('kilo_surumu') + 1):
+            return EvcilHayvanSurumu.objects.filter(evcil_hayvan_id=hayvan_id).values_list('kilo_surumu', flat=True).get()
+    return None
+
+
+def kilo_surumunu_artir(hayvan_id):
+    """Kilo sürümünü artırır; tüm süreçlerde önbellekteki seri bir daha okunmaz. Yeni sürümü döndürür (hayvan silindiyse None)."""
+    surum = _artir_ve_oku(hayvan_id)
+    if surum is not None:
+        return surum
+    try:
+        with transaction.atomic():
+            EvcilHayvanSurumu.objects.create(evcil_hayvan_id=hayvan_id, kilo_surumu=1)
+        return 1
+    except IntegrityError:
+        # Eşzamanlı ilk artırma satırı oluşturdu (ya da hayvan silindi)
+        return _artir_ve_oku(hayvan_id)
+
+
+def _seriye_ekle(hayvan_id, surum, pk, tarih, kilo):
+    """Önceki sürümün serisi bu süreçte önbellekteyse noktayı ekleyip yeni sürüme yazar (tam okuma yapmadan)."""
+    if surum is None:
+        return
+    seri = cache.get(_seri_anahtari(hayvan_id, surum - 1))
+    if seri is None:
+        return  # Önbellekte yoksa ilk istekte zaten okunacak
+    if pk not in seri['pkler']:
+        gun = tarih.toordinal() if isinstance(tarih, date) else date.fromisoformat(str(tarih)).toordinal()
+        konum = bisect_right(seri['gunler'], gun)
+        seri['pkler'].insert(konum, pk)
+        seri['gunler'].insert(konum, gun)
+        seri['kilolar'].insert(konum, float(kilo))
+    seri['surum'] = surum
+    cache.set(_seri_anahtari(hayvan_id, surum), seri, KILO_SERISI_CACHE_SURESI)
+
+
+# --- LTTB ---
+
+def _lttb_python(x, y, hedef):
+    n = len(x)
+    adim = (n - 2) / (hedef - 2)
+    secilen = [0]
+    a = 0
+    for i in range(hedef - 2):
+        # Sonraki kovanın ortalaması (üçgenin üçüncü köşesi)
+        ort_bas = int((i + 1) * adim) + 1
+        ort_son = min(int((i + 2) * adim) + 1, n)
+        ort_x = sum(x[ort_bas:ort_son]) / (ort_son - ort_bas)
+        ort_y = sum(y[ort_bas:ort_son]) / (ort_son - ort_bas)
+
+        bas, son = int(i * adim) + 1, int((i + 1) * adim) + 1
+        en_iyi, en_buyuk = bas, -1.0
+        for j in range(bas, son):
+            alan = abs((x[a] - ort_x) * (y[j] - y[a]) - (x[a] - x[j]) * (ort_y - y[a]))
+            if alan > en_buyuk:
+                en_iyi, en_buyuk = j, alan
+        secilen.append(en_iyi)
+        a = en_iyi
+    secilen.append(n - 1)
+    return secilen
+
+
+def _lttb_numpy(x, y, hedef):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    sinirlar = (np.arange(hedef - 1) * ((n - 2) / (hedef - 2))).astype(np.int64) + 1
+    sinirlar[-1] = n - 1
+    secilen = np.empty(hedef, dtype=np.int64)
+    secilen[0], secilen[-1] = 0, n - 1
+    a = 0
+    for i in range(hedef - 2):
+        bas, son = sinirlar[i], sinirlar[i + 1]
+        ort_son = sinirlar[i + 2] if i + 2 < len(sinirlar) else n
+        ort_x = x[son:ort_son].mean() if ort_son > son else x[-1]
+        ort_y = y[son:ort_son].mean() if ort_son > son else y[-1]
+        alanlar = np.abs((x[a] - ort_x) * (y[bas:son] - y[a]) - (x[a] - x[bas:son]) * (ort_y - y[a]))
+        a = bas + int(alanlar.argmax())
+        secilen[i + 1] = a
+    return secilen.tolist()
+
+
+def lttb_indeksleri(x, y, hedef):
+    """LTTB ile seçilen noktaların indeksleri (artan sırada)."""
+    n = len(x)
+    if hedef >= n or n <= 2:
+        return list(range(n))
+    if hedef < 3:
+        return [0, n - 1]
+    return (_lttb_numpy if np is not None else _lttb_python)(x, y, hedef)
+
+
+def kilo_grafik_verisi(hayvan_id, nokta=KILO_GRAFIK_NOKTA, baslangic=None, bitis=None):
+    """
+    Tarih aralığına kesilmiş ve `nokta` sayısına indirilmiş seri.
+    Dönüş: {'noktalar': [{'tarih', 'kilo'}], 'toplam': aralıktaki kayıt sayısı, 'ornekleme': bool}
+    """
+    seri = kilo_serisi(hayvan_id)
+    anahtar = f"{_seri_anahtari(hayvan_id, seri['surum'])}_{nokta}_{baslangic}_{bitis}"
+    sonuc = cache.get(anahtar)
+    if sonuc is not None:
+        return sonuc
+
+    gunler, kilolar = seri['gunler'], seri['kilolar']
+    bas = bisect_left(gunler, baslangic.toordinal()) if baslangic else 0
+    son = bisect_right(gunler, bitis.toordinal()) if bitis else len(gunler)
+    x, y = gunler[bas:son], kilolar[bas:son]
+
+    indeksler = lttb_indeksleri(x, y, nokta)
+    sonuc = {
+        'noktalar': [
+            {'tarih': date.fromordinal(x[i]).isoformat(), 'kilo': round(y[i], 2)} for i in indeksler
+        ],
+        'toplam': len(x),
+        'ornekleme': len(indeksler) < len(x),
+    }
+    cache.set(anahtar, sonuc, KILO_SERISI_CACHE_SURESI)
+    return sonuc
+
+
+def kilo_grafik_json(hayvan_id, nokta=KILO_GRAFIK_NOKTA):
+    """Sayfaya gömülen varsayılan grafik verisi (JSON metni)."""
+    return json.dumps(kilo_grafik_verisi(hayvan_id, nokta)['noktalar'], cls=DjangoJSONEncoder)
+
+
+# Sürüm commit'ten sonra artırılır: geri alınan kayıt seriye girmez, commit'ten
+# önce okuyan istek de eski veriyi yalnızca eski sürümün anahtarına yazabilir.
+
+@receiver(post_save, sender=KiloKaydi)
+def _kilo_kaydedildi(sender, instance, created, raw=False, **kwargs):
+    hayvan_id = instance.evcil_hayvan_id
+    if created and not raw:
+        pk, tarih, kilo = instance.pk, instance.tarih, instance.kilo
+        transaction.on_commit(lambda: _seriye_ekle(hayvan_id, kilo_surumunu_artir(hayvan_id), pk, tarih, kilo))
+    else:
+        transaction.on_commit(lambda: kilo_surumunu_artir(hayvan_id))
+
+
+@receiver(post_delete, sender=KiloKaydi)
+def _kilo_silindi(sender, instance, **kwargs):
+    hayvan_id = instance.evcil_hayvan_id
+    transaction.on_commit(lambda: kilo_surumunu_artir(hayvan_id))
@@ -1,8 +1,49 @@
 from django.contrib import admin
-from .models import OnlineSatis
+from .models import GidenEposta, OdemeOlayi, OnlineSatis
 
 
 @admin.register(OnlineSatis)
 class OnlineSatisAdmin(admin.ModelAdmin):
     list_display = ("id", "satis_sayisi")
 
+
+@admin.register(OdemeOlayi)
+class OdemeOlayiAdmin(admin.ModelAdmin):
+    list_display = ("olay_id", "tur", "durum", "deneme_sayisi", "sonuc", "alinma_zamani", "islenme_zamani")
+    list_filter = ("durum", "tur")
+    search_fields = ("olay_id", "nesne_id", "sonuc")
+    readonly_fields = [f.name for f in OdemeOlayi._meta.fields]
+    actions = ["yeniden_isle"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Seçili olayları yeniden işle (bekleyen/hatalı)")
+    def yeniden_isle(self, request, queryset):
+        from .payments import olayi_isle
+
+        islenen = sum(1 for pk in queryset.values_list("pk", flat=True) if olayi_isle(pk))
+        self.message_user(request, f"{islenen} olay işlendi.")
+
+
+@admin.register(GidenEposta)
+class GidenEpostaAdmin(admin.ModelAdmin):
+    list_display = ("alici", "konu", "kampanya", "durum", "deneme_sayisi", "olusturma_zamani", "gonderilme_zamani")
+    list_filter = ("durum",)
+    search_fields = ("alici", "konu", "kampanya")
+    readonly_fields = [f.name for f in GidenEposta._meta.fields]
+    actions = ["yeniden_gonder"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Seçili hatalı e-postaları yeniden gönderime al")
+    def yeniden_gonder(self, request, queryset):
+        from .outbox import bekleyen_epostalari_gonder
+        from courseapp.background import arka_planda_calistir
+
+        guncellenen = queryset.filter(durum=GidenEposta.DURUM_HATALI).update(
+            durum=GidenEposta.DURUM_BEKLIYOR, deneme_sayisi=0, sonraki_deneme_zamani=None
+        )
+        arka_planda_calistir(bekleyen_epostalari_gonder, anahtar='giden_eposta')
+        self.message_user(request, f"{guncellenen} e-posta yeniden gönderime alındı.")
@@ -5,3 +5,7 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
+    def ready(self):
+        # Görsel türevlerini yükleme sonrası üreten sinyaller
+        from .images import sinyalleri_bagla
+        sinyalleri_bagla()
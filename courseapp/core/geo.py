@@ -0,0 +1,166 @@
+# core/geo.py
+"""
+Ortak konum yardımcıları: geohash, mesafe ve yakınlık sorguları.
+
+Konumlu modeller (EtiketTarama, Veteriner, PetShop) enlem/boylamın yanında
+kayıt sırasında hesaplanan indeksli bir `geohash` alanı tutar. Yarıçap
+sorguları, yarıçapı kapsayan en fazla 9 geohash hücresinin önek eşleşmesiyle
+adayları indeksten bulur; kesin mesafe sadece adaylar için, NumPy varsa
+vektörel olarak hesaplanır. En yakın k kayıt, yarıçap ikiye katlanarak
+genişletilen aynı sorguyla bulunur.
+"""
+import math
+import re
+
+from django.db.models import Q
+
+from courseapp.constants import GEOHASH_HASSASIYETI
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opsiyonel
+    np = None
+
+DUNYA_YARICAPI_M = 6371000
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_METRE_BASINA_DERECE = 1 / 111320
+_KOORDINAT = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*[,;\s]\s*(-?\d+(?:\.\d+)?)\s*$')
+
+
+def koordinat_ayristir(metin):
+    """Google Maps biçimindeki "38.231952, 42.428070" metnini (lat, lon) yapar; geçersizse (None, None)."""
+    eslesme = _KOORDINAT.match(metin or '')
+    if not eslesme:
+        return None, None
+    lat, lon = float(eslesme.group(1)), float(eslesme.group(2))
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None, None
+    return lat, lon
+
+
+# --- Geohash ---
+
+def geohash_kodla(lat, lon, hassasiyet=GEOHASH_HASSASIYETI):
+    lat_aralik, lon_aralik = [-90.0, 90.0], [-180.0, 180.0]
+    kod, bitler, bit, boylam_sirasi = [], 0, 0, True
+    while len(kod) < hassasiyet:
+        aralik, deger = (lon_aralik, lon) if boylam_sirasi else (lat_aralik, lat)
+        orta = (aralik[0] + aralik[1]) / 2
+        bitler <<= 1
+        if deger >= orta:
+            bitler |= 1
+            aralik[0] = orta
+        else:
+            aralik[1] = orta
+        boylam_sirasi = not boylam_sirasi
+        bit += 1
+        if bit == 5:
+            kod.append(_BASE32[bitler])
+            bitler, bit = 0, 0
+    return ''.join(kod)
+
+
+def _hucre_boyutu(hassasiyet):
+    """(enlem derecesi, boylam derecesi) cinsinden hücre boyutu."""
+    toplam_bit = 5 * hassasiyet
+    return 180 / 2 ** (toplam_bit // 2), 360 / 2 ** ((toplam_bit + 1) // 2)
+
+
+def kapsayan_hucreler(lat, lon, yaricap_m):
+    """
+    Merkez etrafındaki yarıçapı kapsayan geohash hücreleri (en fazla 9).
+    Hücre kenarı yarıçaptan büyük seçildiği için merkez, köşe ve kenar
+    ortası noktalarının hücreleri kutuyu tamamen kapsar. Yarıçap en kaba
+    hücreden de büyükse boş liste döner (önek filtresi uygulanmaz).
+    """
+    d_lat = yaricap_m * _METRE_BASINA_DERECE
+    d_lon = d_lat / max(math.cos(math.radians(lat)), 0.01)
+    hassasiyet = 0
+    for aday in range(GEOHASH_HASSASIYETI, 0, -1):
+        hucre_lat, hucre_lon = _hucre_boyutu(aday)
+        if hucre_lat >= d_lat and hucre_lon >= d_lon:
+            hassasiyet = aday
+            break
+    if not hassasiyet:
+        return []
+    return sorted({
+        geohash_kodla(max(-90.0, min(90.0, lat + i * d_lat)), ((lon + j * d_lon + 180) % 360) - 180, hassasiyet)
+        for i in (-1, 0, 1) for j in (-1, 0, 1)
+    })
+
+
+# --- Mesafe ---
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """İki GPS koordinatı arası mesafe (metre)."""
+    lat1_rad, lat2_rad = math.radians(lat1), math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+    a = math.sin(delta_lat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2
+    return DUNYA_YARICAPI_M * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def mesafeler_m(lat, lon, enlemler, boylamlar):
+    """Bir noktanın çok sayıda noktaya mesafesi (metre); NumPy varsa tek vektörel işlem."""
+    if np is None:
+        return [haversine_m(lat, lon, e, b) for e, b in zip(enlemler, boylamlar)]
+    enlemler = np.radians(np.asarray(enlemler, dtype=np.float64))
+    boylamlar = np.radians(np.asarray(boylamlar, dtype=np.float64))
+    lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+    a = (
+        np.sin((enlemler - lat_rad) / 2) ** 2
+        + math.cos(lat_rad) * np.cos(enlemler) * np.sin((boylamlar - lon_rad) / 2) ** 2
+    )
+    return (DUNYA_YARICAPI_M * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))).tolist()
+
+
+# --- Sorgular ---
+
+def yaricap_filtresi(lat, lon, yaricap_m, geohash_alani='geohash', lat_alani='latitude'):
+    """Yarıçaptaki kayıtları kapsayan (fazlasını da içerebilen) indeksli aday filtresi."""
+    hucreler = kapsayan_hucreler(lat, lon, yaricap_m)
+    if not hucreler:
+        d_lat = yaricap_m * _METRE_BASINA_DERECE
+        return Q(**{f'{lat_alani}__range': (lat - d_lat, lat + d_lat)})
+    onek = Q()
+    for hucre in hucreler:
+        onek |= Q(**{f'{geohash_alani}__startswith': hucre})
+    return onek
+
+
+def yaricaptakiler(qs, lat, lon, yaricap_m, lat_alani='latitude', lon_alani='longitude', geohash_alani='geohash'):
+    """
+    `qs` içinden noktaya `yaricap_m` mesafedeki kayıtlar, yakından uzağa.
+    Her kayda `mesafe_m` özniteliği eklenir.
+    """
+    adaylar = list(qs.filter(
+        yaricap_filtresi(lat, lon, yaricap_m, geohash_alani, lat_alani),
+        **{f'{lat_alani}__isnull': False, f'{lon_alani}__isnull': False},
+    ))
+    mesafeler = mesafeler_m(
+        lat, lon, [getattr(a, lat_alani) for a in adaylar], [getattr(a, lon_alani) for a in adaylar]
+    )
+    sonuc = []
+    for nesne, mesafe in zip(adaylar, mesafeler):
+        if mesafe <= yaricap_m:
+            nesne.mesafe_m = mesafe
+            sonuc.append(nesne)
+    sonuc.sort(key=lambda nesne: nesne.mesafe_m)
+    return sonuc
+
+
+def en_yakinlar(qs, lat, lon, k, maks_mesafe_m, baslangic_m=2000, filtre=None, **alanlar):
+    """
+    `qs` içinden noktaya en yakın `k` kayıt (en fazla `maks_mesafe_m` uzaklıkta).
+    Yarıçap `baslangic_m`'den başlayıp ikiye katlanır; r yarıçapında k uygun
+    kayıt bulunduğunda daha uzaktakiler bunlardan yakın olamayacağı için durulur.
+    `filtre` verilirse (ör. şu an açık mı) sadece True dönen kayıtlar sayılır.
+    """
+    yaricap = min(baslangic_m, maks_mesafe_m)
+    while True:
+        bulunan = yaricaptakiler(qs, lat, lon, yaricap, **alanlar)
+        if filtre is not None:
+            bulunan = [nesne for nesne in bulunan if filtre(nesne)]
+        if len(bulunan) >= k or yaricap >= maks_mesafe_m:
+            return bulunan[:k]
+        yaricap = min(yaricap * 2, maks_mesafe_m)
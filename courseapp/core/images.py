@@ -0,0 +1,138 @@
+# core/images.py
+"""
+Yüklenen görseller için türev (thumbnail) üretimi.
+
+Her orijinal görselin yanına sabit genişlikli türevler (thumb/card/full) modern
+formatlarda (AVIF, WebP) yazılır. Türevler piksel verisinden yeniden üretildiği
+için EXIF (konum dahil) bilgisi taşımaz; yön bilgisi üretim sırasında uygulanır.
+Dosya adları orijinalden türetilir:
+
+    evcil_hayvanlar/pamuk.jpg
+    evcil_hayvanlar/pamuk__card.webp
+    evcil_hayvanlar/pamuk__turevler.json   (üretilen boyutlar ve formatlar)
+
+Üretim, kayıt sonrası arka plan havuzunda (courseapp/background.py) yapılır;
+mevcut dosyalar için `resim_turevleri` yönetim komutu kullanılır.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps, features
+
+from courseapp.background import arka_planda_calistir
+from courseapp.constants import RESIM_TUREV_BOYUTLARI, RESIM_TUREV_KALITE
+
+logger = logging.getLogger(__name__)
+
+# Türev üretilen görsel alanları (app_label.Model -> alanlar)
+RESIM_ALANLARI = {
+    'anahtarlik.EvcilHayvan': ('resim',),
+    'anahtarlik.HeroSlide': ('arka_plan_resim', 'arka_plan_resim_mobil'),
+    'ilan.HayvanProfili': ('profil_fotografi',),
+    'ilan.HayvanResmi': ('resim',),
+    'shop.UrunResim': ('resim',),
+    'etiket.EtiketKategoriFotografi': ('fotograf',),
+    'veteriner.Veteriner': ('logo', 'web_resim1', 'web_resim2', 'web_resim3'),
+    'petshop.PetShop': ('logo', 'web_resim1', 'web_resim2', 'web_resim3'),
+}
+
+# Tercih sırasına göre formatlar; Pillow AVIF desteği olmadan kurulduysa sadece WebP
+TUREV_FORMATLARI = tuple(f for f in ('avif', 'webp') if features.check(f))
+MIME_TIPLERI = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+_MANIFEST_CACHE_SURESI = 3600
+_YOK_CACHE_SURESI = 60
+
+
+def _kok(orijinal):
+    return os.path.splitext(orijinal)[0]
+
+
+def turev_yolu(orijinal, boyut, bicim):
+    return f'{_kok(orijinal)}__{boyut}.{bicim}'
+
+
+def manifest_yolu(orijinal):
+    return f'{_kok(orijinal)}__turevler.json'
+
+
+def _cache_anahtari(orijinal):
+    # Dosya adları boşluk/Türkçe karakter içerebilir; cache anahtarı özetten üretilir
+    return f'resim_turev_{hashlib.md5(orijinal.encode("utf-8")).hexdigest()}'
+
+
+def turev_manifesti(orijinal):
+    """
+    Orijinal görselin türev bilgisi: {'formatlar': [...], 'boyutlar': {boyut: [genislik, yukseklik]}}.
+    Türevler henüz üretilmediyse None.
+    """
+    if not orijinal:
+        return None
+    anahtar = _cache_anahtari(orijinal)
+    manifest = cache.get(anahtar)
+    if manifest is None:
+        try:
+            with default_storage.open(manifest_yolu(orijinal), 'rb') as dosya:
+                manifest = json.loads(dosya.read())
+        except (FileNotFoundError, OSError, ValueError):
+            manifest = False
+        cache.set(anahtar, manifest, _MANIFEST_CACHE_SURESI if manifest else _YOK_CACHE_SURESI)
+    return manifest or None
+
+
+def _kaydet(yol, veri):
+    if default_storage.exists(yol):
+        default_storage.delete(yol)
+    default_storage.save(yol, ContentFile(veri))
+
+
+def turevleri_olustur(orijinal):
+    """Orijinal görselden tüm türevleri üretir ve manifesti yazar."""
+    with default_storage.open(orijinal, 'rb') as dosya:
+        resim = Image.open(dosya)
+        resim.load()
+    resim = ImageOps.exif_transpose(resim)
+    resim = resim.convert('RGBA' if resim.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    manifest = {'formatlar': list(TUREV_FORMATLARI), 'boyutlar': {}}
+    for boyut, genislik in RESIM_TUREV_BOYUTLARI.items():
+        turev = resim.copy()
+        # Oran korunur, küçük görseller büyütülmez
+        turev.thumbnail((genislik, genislik), Image.LANCZOS)
+        manifest['boyutlar'][boyut] = list(turev.size)
+        for bicim in TUREV_FORMATLARI:
+            cikti = io.BytesIO()
+            turev.save(cikti, format=bicim.upper(), quality=RESIM_TUREV_KALITE[bicim])
+            _kaydet(turev_yolu(orijinal, boyut, bicim), cikti.getvalue())
+
+    _kaydet(manifest_yolu(orijinal), json.dumps(manifest).encode('utf-8'))
+    cache.set(_cache_anahtari(orijinal), manifest, _MANIFEST_CACHE_SURESI)
+    return manifest
+
+
+def turevleri_kuyruga_al(orijinal):
+    return arka_planda_calistir(turevleri_olustur, orijinal, anahtar=_cache_anahtari(orijinal))
+
+
+def _resim_kaydedildi(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    for alan in RESIM_ALANLARI[sender._meta.label]:
+        if update_fields is not None and alan not in update_fields:
+            continue
+        dosya = getattr(instance, alan)
+        if dosya and dosya.name and turev_manifesti(dosya.name) is None:
+            turevleri_kuyruga_al(dosya.name)
+
+
+def sinyalleri_bagla():
+    for etiket in RESIM_ALANLARI:
+        post_save.connect(_resim_kaydedildi, sender=apps.get_model(etiket), dispatch_uid=f'resim_turev_{etiket}')
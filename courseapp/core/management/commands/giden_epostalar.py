@@ -0,0 +1,33 @@
+"""
+Giden e-posta kutusundaki bekleyen ve hatalı e-postaları gönderir (cron ile de çalıştırılabilir).
+Kullanım: python manage.py giden_epostalar [--limit 1000] [--parti 100] [--kampanya AD]
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import GidenEposta
+from core.outbox import bekleyen_epostalari_gonder
+from courseapp.constants import GIDEN_EPOSTA_MAKS_DENEME, GIDEN_EPOSTA_PARTI_BOYUTU
+
+
+class Command(BaseCommand):
+    help = 'Giden e-posta kutusundaki bekleyen e-postaları partiler halinde gönderir'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='En fazla bu kadar e-posta gönder')
+        parser.add_argument(
+            '--parti', type=int, default=GIDEN_EPOSTA_PARTI_BOYUTU,
+            help=f'SMTP bağlantısı başına e-posta (varsayılan: {GIDEN_EPOSTA_PARTI_BOYUTU})'
+        )
+        parser.add_argument('--kampanya', help='Yalnızca bu kampanyanın e-postalarını gönder')
+
+    def handle(self, *args, **options):
+        rapor = bekleyen_epostalari_gonder(
+            parti_boyutu=options['parti'], limit=options['limit'], kampanya=options['kampanya']
+        )
+        vazgecilen = GidenEposta.objects.filter(
+            durum=GidenEposta.DURUM_HATALI, deneme_sayisi__gte=GIDEN_EPOSTA_MAKS_DENEME
+        ).count()
+        self.stdout.write(self.style.SUCCESS(
+            f"{rapor['gonderilen']} e-posta gönderildi, {rapor['hatali']} hatalı "
+            f"({rapor['parti']} parti); deneme sınırını aşan: {vazgecilen}"
+        ))
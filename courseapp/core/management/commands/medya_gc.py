@@ -0,0 +1,61 @@
+"""
+İçerik adresli depodaki (media/cas) referanssız blob'ları ve türevlerini siler.
+Kullanım: python manage.py medya_gc [--saat 24] [--kuru]
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.storage import CAS_KLASORU, blob_mu, blob_referans_sayilari, icerik_depolama
+
+
+class Command(BaseCommand):
+    help = 'Hiçbir model alanından referans almayan içerik adresli medya dosyalarını temizler'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--saat', type=float, default=24,
+            help='Bu süreden yeni blob\'lara dokunma (henüz kaydedilmemiş yüklemeler için, varsayılan: 24)'
+        )
+        parser.add_argument('--kuru', action='store_true', help='Silmeden sadece raporla')
+
+    def handle(self, *args, **options):
+        referanslar = blob_referans_sayilari()
+        sinir = time.time() - options['saat'] * 3600
+        kok = icerik_depolama.path(CAS_KLASORU)
+
+        silinen = korunan = bayt = 0
+        for klasor, _, dosyalar in os.walk(kok):
+            for dosya in dosyalar:
+                tam_yol = os.path.join(klasor, dosya)
+                ad = os.path.relpath(tam_yol, icerik_depolama.location).replace(os.sep, '/')
+                if ad.startswith(f'{CAS_KLASORU}/_gecici/'):
+                    # Yarım kalmış yüklemeler
+                    if os.path.getmtime(tam_yol) < sinir and not options['kuru']:
+                        os.remove(tam_yol)
+                    continue
+                if not blob_mu(ad):
+                    continue  # Türevler blob'larıyla birlikte işlenir
+                if referanslar.get(ad) or os.path.getmtime(tam_yol) > sinir:
+                    korunan += 1
+                    continue
+
+                # Blob ve yanındaki türevler (<ozet>__*.webp, manifest)
+                kok_ad = os.path.splitext(dosya)[0]
+                silinecekler = [tam_yol] + [
+                    os.path.join(klasor, d) for d in dosyalar if d.startswith(f'{kok_ad}__')
+                ]
+                for yol in silinecekler:
+                    if not os.path.exists(yol):
+                        continue
+                    bayt += os.path.getsize(yol)
+                    if not options['kuru']:
+                        os.remove(yol)
+                silinen += 1
+
+        eylem = 'silinecek' if options['kuru'] else 'silindi'
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(referanslar)} blob referanslı, {korunan} korundu, {silinen} blob {eylem} "
+            f"({bayt / (1024 * 1024):.1f} MB)"
+        ))
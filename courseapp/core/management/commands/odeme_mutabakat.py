@@ -0,0 +1,42 @@
+"""
+Stripe'taki son olayları ödeme defteriyle karşılaştırır; kaçırılan webhook'ları kaydedip işler.
+Kullanım: python manage.py odeme_mutabakat [--saat 72]
+"""
+from datetime import timedelta
+
+import stripe
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.payments import OLAY_ISLEYICILERI, mutabakat
+
+
+def stripe_olaylari(baslangic):
+    """Belirtilen zamandan sonraki, işleyicisi olan Stripe olaylarını sayfalayarak döndürür."""
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    sayfa = stripe.Event.list(
+        created={'gte': int(baslangic.timestamp())},
+        types=list(OLAY_ISLEYICILERI),
+        limit=100,
+    )
+    yield from sayfa.auto_paging_iter()
+
+
+class Command(BaseCommand):
+    help = 'Stripe olaylarını ödeme defteriyle karşılaştırır (kaçırılan webhook mutabakatı)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--saat', type=int, default=72, help='Kaç saat geriye bakılacak (varsayılan: 72)')
+
+    def handle(self, *args, **options):
+        baslangic = timezone.now() - timedelta(hours=options['saat'])
+        try:
+            rapor = mutabakat(stripe_olaylari(baslangic))
+        except stripe.StripeError as exc:
+            raise CommandError(f"Stripe olayları alınamadı: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{rapor['kontrol']} olay kontrol edildi, {rapor['eksik']} eksik olay kaydedildi, "
+            f"{rapor['islenen']} olay işlendi"
+        ))
@@ -0,0 +1,38 @@
+"""
+Ödeme olayı defterindeki bekleyen/hatalı olayları işler veya tek bir olayı yeniden oynatır.
+Kullanım: python manage.py odeme_olaylari [--limit 100] [--sadece-bekleyen]
+          python manage.py odeme_olaylari --olay-id evt_123 [--zorla]
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import OdemeOlayi
+from core.payments import bekleyen_olaylari_isle, olayi_isle
+
+
+class Command(BaseCommand):
+    help = 'Bekleyen ve hatalı ödeme olaylarını (Stripe webhook) işler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, help='En fazla bu kadar olay işle')
+        parser.add_argument('--sadece-bekleyen', action='store_true', help='Hatalı olayları yeniden deneme')
+        parser.add_argument('--olay-id', help='Sadece bu olayı işle (deneme sınırına bakılmaz)')
+        parser.add_argument(
+            '--zorla', action='store_true',
+            help='--olay-id ile: işlenmiş/atlanmış olayı da yeniden oynat (çift uygulama riski!)'
+        )
+
+    def handle(self, *args, **options):
+        if options['olay_id']:
+            kayit = OdemeOlayi.objects.filter(olay_id=options['olay_id']).first()
+            if not kayit:
+                raise CommandError(f"Olay bulunamadı: {options['olay_id']}")
+            if not olayi_isle(kayit.pk, zorla=options['zorla']):
+                kayit.refresh_from_db()
+                raise CommandError(f"Olay işlenmedi (durum: {kayit.get_durum_display()}) {kayit.hata[-500:]}")
+            kayit.refresh_from_db()
+            self.stdout.write(self.style.SUCCESS(f"{kayit.olay_id}: {kayit.get_durum_display()} {kayit.sonuc}"))
+            return
+
+        islenen = bekleyen_olaylari_isle(limit=options['limit'], hatalilar=not options['sadece_bekleyen'])
+        hatali = OdemeOlayi.objects.filter(durum=OdemeOlayi.DURUM_HATALI).count()
+        self.stdout.write(self.style.SUCCESS(f"{islenen} olay işlendi, {hatali} hatalı olay bekliyor"))
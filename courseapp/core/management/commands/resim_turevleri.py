@@ -0,0 +1,48 @@
+"""
+Mevcut görseller için türevleri (thumb/card/full, AVIF/WebP) üretir.
+Kullanım: python manage.py resim_turevleri [--model ilan.HayvanProfili] [--zorla]
+"""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from core.images import RESIM_ALANLARI, turev_manifesti, turevleri_olustur
+
+
+class Command(BaseCommand):
+    help = 'Yüklenmiş görseller için eksik türevleri üretir (backfill)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', help='Sadece bu model (örn: anahtarlik.EvcilHayvan)')
+        parser.add_argument('--zorla', action='store_true', help='Türevi olan görselleri de yeniden üret')
+
+    def handle(self, *args, **options):
+        modeller = RESIM_ALANLARI
+        if options['model']:
+            if options['model'] not in RESIM_ALANLARI:
+                raise CommandError(f"Bilinmeyen model: {options['model']} (seçenekler: {', '.join(RESIM_ALANLARI)})")
+            modeller = {options['model']: RESIM_ALANLARI[options['model']]}
+
+        uretilen = atlanan = hatali = 0
+        islenen = set()
+        for etiket, alanlar in modeller.items():
+            model = apps.get_model(etiket)
+            for alan in alanlar:
+                adlar = model.objects.exclude(**{alan: ''}).exclude(**{f'{alan}__isnull': True}).values_list(alan, flat=True)
+                for ad in adlar.iterator():
+                    if ad in islenen:
+                        continue
+                    islenen.add(ad)
+                    if not options['zorla'] and turev_manifesti(ad):
+                        atlanan += 1
+                        continue
+                    try:
+                        turevleri_olustur(ad)
+                        uretilen += 1
+                    except Exception as exc:
+                        hatali += 1
+                        self.stderr.write(f"  {etiket}.{alan}: {ad} -> {exc}")
+            self.stdout.write(f"{etiket}: tamamlandı")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Türev üretimi bitti: {uretilen} üretildi, {atlanan} zaten vardı, {hatali} hatalı"
+        ))
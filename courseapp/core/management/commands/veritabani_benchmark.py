@@ -0,0 +1,147 @@
+"""
+QR açılış sayfasının eşzamanlı yazarlar altındaki gecikmesini ölçer (p50/p95/p99).
+Önce/sonra karşılaştırması için aynı veritabanı kopyasında iki profille çalıştırın:
+    VERITABANI_PROFILI=gelistirme python manage.py veritabani_benchmark
+    VERITABANI_PROFILI=uretim python manage.py veritabani_benchmark
+Kullanım: python manage.py veritabani_benchmark [--seri ABC1234] [--istek 300] [--okuyucu 4] [--yazici 4] [--yazma-hizi 25]
+
+WAL kipi dosyada kalıcıdır: "önce" ölçümünü, uretim profiliyle hiç açılmamış bir kopyada yapın.
+
+Ölçüm gerçek tarama ve bildirim kayıtları oluşturur; bunlar sonunda silinir.
+Yine de üretim veritabanının kendisinde değil, kopyasında çalıştırın.
+"""
+import statistics
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+from django.db.utils import OperationalError
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from anahtarlik.models import Bildirim
+from etiket.models import Etiket, EtiketTarama
+
+
+def yuzdelik(degerler, oran):
+    if not degerler:
+        return 0.0
+    sirali = sorted(degerler)
+    return sirali[min(int(len(sirali) * oran), len(sirali) - 1)]
+
+
+class Command(BaseCommand):
+    help = 'QR açılış sayfasının eşzamanlı yazma yükü altındaki gecikme dağılımını ölçer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seri', help='Kullanılacak aktif etiketin seri numarası (varsayılan: ilk uygun etiket)')
+        parser.add_argument('--istek', type=int, default=300, help='Toplam sayfa isteği (varsayılan: 300)')
+        parser.add_argument('--okuyucu', type=int, default=4, help='Eşzamanlı sayfa isteyen iş parçacığı')
+        parser.add_argument('--yazici', type=int, default=4, help='Eşzamanlı yazan iş parçacığı')
+        parser.add_argument(
+            '--yazma-hizi', type=float, default=25,
+            help='Yazıcı başına saniyede transaction (varsayılan: 25); iki profil aynı yükle karşılaştırılır'
+        )
+
+    def _etiket(self, seri):
+        qs = Etiket.objects.filter(aktif=True, evcil_hayvan__isnull=False).exclude(son_kullanma_tarihi__lt=timezone.now())
+        etiket = qs.filter(seri_numarasi=seri).first() if seri else qs.first()
+        if etiket is None:
+            raise CommandError('Evcil hayvana bağlı, aktif ve süresi dolmamış bir etiket bulunamadı')
+        return etiket
+
+    def _okuyucu(self, url, adet, baslangic_no, sureler, hatalar):
+        client = Client()
+        try:
+            for i in range(adet):
+                ip = f'10.{(baslangic_no + i) // 65536 % 256}.{(baslangic_no + i) // 256 % 256}.{(baslangic_no + i) % 256}'
+                cache.set(f'ip_location_{ip}', ('Benchmark', 'TR', 'Benchmark, TR'), 600)
+                bas = time.perf_counter()
+                try:
+                    yanit = client.get(url, REMOTE_ADDR=ip)
+                    if yanit.status_code != 200:
+                        hatalar.append(yanit.status_code)
+                except Exception as exc:
+                    hatalar.append(type(exc).__name__)
+                sureler.append((time.perf_counter() - bas) * 1000)
+        finally:
+            connections.close_all()
+
+    def _yazici(self, etiket_id, aralik, dur, sayac, hatalar):
+        """Önce okuyup sonra yazan kısa transaction'lar (sayaç/oturum yazmalarına benzer yük)."""
+        try:
+            while not dur.wait(aralik):
+                try:
+                    with transaction.atomic():
+                        EtiketTarama.objects.filter(etiket_id=etiket_id).exists()
+                        EtiketTarama.objects.create(etiket_id=etiket_id, ip_sehir='Benchmark', user_agent='benchmark')
+                    sayac.append(1)
+                except OperationalError as exc:
+                    hatalar.append(str(exc))
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        etiket = self._etiket(options['seri'])
+        url = reverse('etiket:qr_landing', args=[etiket.etiket_id])
+        okuyucu_sayisi = max(options['okuyucu'], 1)
+        istek_basina = max(options['istek'] // okuyucu_sayisi, 1)
+
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            gunluk = cursor.fetchone()[0]
+        son_tarama = EtiketTarama.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+        sureler, okuma_hatalari, yazma_hatalari, yazmalar = [], [], [], []
+        dur = threading.Event()
+        with override_settings(
+            ALLOWED_HOSTS=['testserver'], EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+        ):
+            yazicilar = [
+                threading.Thread(
+                    target=self._yazici, args=(etiket.pk, 1 / options['yazma_hizi'], dur, yazmalar, yazma_hatalari)
+                )
+                for _ in range(options['yazici'])
+            ]
+            okuyucular = [
+                threading.Thread(
+                    target=self._okuyucu, args=(url, istek_basina, n * istek_basina, sureler, okuma_hatalari)
+                )
+                for n in range(okuyucu_sayisi)
+            ]
+            baslangic = time.perf_counter()
+            for t in yazicilar + okuyucular:
+                t.start()
+            for t in okuyucular:
+                t.join()
+            dur.set()
+            for t in yazicilar:
+                t.join()
+            toplam_sure = time.perf_counter() - baslangic
+
+        # Ölçüm sırasında oluşan kayıtları temizle
+        yeni_taramalar = EtiketTarama.objects.filter(etiket=etiket, pk__gt=son_tarama)
+        # Sayfa, tarama kaydı yazılamazsa hatayı yutup sayfayı yine gösterir; bunu ayrıca say
+        kayitsiz = len(sureler) - yeni_taramalar.exclude(user_agent='benchmark').count()
+        Bildirim.objects.filter(tarama__in=yeni_taramalar).delete()
+        silinen = yeni_taramalar.delete()[0]
+
+        self.stdout.write(
+            f"Motor: {connection.settings_dict['ENGINE']} | journal_mode: {gunluk} | "
+            f"{okuyucu_sayisi} okuyucu, {options['yazici']} yazıcı, {len(sureler)} istek, {toplam_sure:.1f} sn"
+        )
+        self.stdout.write(
+            f"Gecikme (ms): p50={yuzdelik(sureler, 0.50):.1f} p95={yuzdelik(sureler, 0.95):.1f} "
+            f"p99={yuzdelik(sureler, 0.99):.1f} maks={max(sureler, default=0):.1f} "
+            f"ort={statistics.fmean(sureler) if sureler else 0:.1f}"
+        )
+        self.stdout.write(
+            f"Yazma: {len(yazmalar)} transaction ({len(yazmalar) / toplam_sure:.0f}/sn), "
+            f"{len(yazma_hatalari)} kilit hatası | Sayfa hatası: {len(okuma_hatalari)}, "
+            f"taraması kaydedilemeyen sayfa: {kayitsiz}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"[OK] Ölçüm bitti, {silinen} geçici kayıt silindi"))
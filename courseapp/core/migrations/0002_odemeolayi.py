@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OdemeOlayi',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('olay_id', models.CharField(max_length=255, unique=True, verbose_name='Olay ID')),
+                ('tur', models.CharField(db_index=True, max_length=100, verbose_name='Olay Türü')),
+                ('nesne_id', models.CharField(blank=True, db_index=True, max_length=255, verbose_name='Nesne ID')),
+                ('veri', models.JSONField(verbose_name='Olay Verisi')),
+                ('durum', models.CharField(choices=[('BEKLIYOR', 'Bekliyor'), ('ISLENDI', 'İşlendi'), ('ATLANDI', 'Atlandı'), ('HATALI', 'Hatalı')], default='BEKLIYOR', max_length=10, verbose_name='Durum')),
+                ('deneme_sayisi', models.PositiveIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('sonuc', models.CharField(blank=True, max_length=255, verbose_name='Sonuç')),
+                ('hata', models.TextField(blank=True, verbose_name='Hata')),
+                ('alinma_zamani', models.DateTimeField(auto_now_add=True, verbose_name='Alınma Zamanı')),
+                ('islenme_zamani', models.DateTimeField(blank=True, null=True, verbose_name='İşlenme Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Ödeme Olayı',
+                'verbose_name_plural': 'Ödeme Olayları',
+                'ordering': ['-alinma_zamani'],
+                'indexes': [models.Index(fields=['durum', 'alinma_zamani'], name='core_odemeo_durum_ed7629_idx')],
+            },
+        ),
+    ]
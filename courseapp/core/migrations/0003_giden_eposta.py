@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_odemeolayi'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GidenEposta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alici', models.EmailField(max_length=254, verbose_name='Alıcı')),
+                ('konu', models.CharField(max_length=255, verbose_name='Konu')),
+                ('mesaj', models.TextField(verbose_name='Mesaj')),
+                ('gonderen', models.CharField(blank=True, max_length=255, verbose_name='Gönderen')),
+                ('durum', models.CharField(choices=[('BEKLIYOR', 'Bekliyor'), ('GONDERILIYOR', 'Gönderiliyor'), ('GONDERILDI', 'Gönderildi'), ('HATALI', 'Hatalı')], default='BEKLIYOR', max_length=12, verbose_name='Durum')),
+                ('deneme_sayisi', models.PositiveIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('hata', models.TextField(blank=True, verbose_name='Hata')),
+                ('olusturma_zamani', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturma Zamanı')),
+                ('son_deneme_zamani', models.DateTimeField(blank=True, null=True, verbose_name='Son Deneme Zamanı')),
+                ('gonderilme_zamani', models.DateTimeField(blank=True, null=True, verbose_name='Gönderilme Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Giden E-posta',
+                'verbose_name_plural': 'Giden E-postalar',
+                'ordering': ['-olusturma_zamani'],
+                'indexes': [models.Index(fields=['durum', 'id'], name='core_gidene_durum_2e6486_idx')],
+            },
+        ),
+    ]
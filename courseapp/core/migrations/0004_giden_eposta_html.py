@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_giden_eposta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gideneposta',
+            name='html_mesaj',
+            field=models.TextField(blank=True, verbose_name='HTML Mesaj'),
+        ),
+    ]
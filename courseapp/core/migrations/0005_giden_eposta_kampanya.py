@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_giden_eposta_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gideneposta',
+            name='kampanya',
+            field=models.CharField(blank=True, db_index=True, max_length=100, verbose_name='Kampanya'),
+        ),
+        migrations.AddField(
+            model_name='gideneposta',
+            name='sonraki_deneme_zamani',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Sonraki Deneme Zamanı'),
+        ),
+    ]
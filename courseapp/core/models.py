@@ -16,3 +16,84 @@ class OnlineSatis(models.Model):
     def __str__(self) -> str:
         return f"Online satış sayısı: {self.satis_sayisi}"
 
+
+
+class OdemeOlayi(models.Model):
+    """
+    Ödeme sağlayıcısından (Stripe) gelen webhook olaylarının defteri.
+    Her olay kimliği bir kez kaydedilir ve arka planda tam bir kez uygulanır.
+    """
+
+    DURUM_BEKLIYOR = 'BEKLIYOR'
+    DURUM_ISLENDI = 'ISLENDI'
+    DURUM_ATLANDI = 'ATLANDI'
+    DURUM_HATALI = 'HATALI'
+
+    DURUM_SECENEKLERI = [
+        (DURUM_BEKLIYOR, 'Bekliyor'),
+        (DURUM_ISLENDI, 'İşlendi'),
+        (DURUM_ATLANDI, 'Atlandı'),
+        (DURUM_HATALI, 'Hatalı'),
+    ]
+
+    olay_id = models.CharField(max_length=255, unique=True, verbose_name="Olay ID")
+    tur = models.CharField(max_length=100, db_index=True, verbose_name="Olay Türü")
+    nesne_id = models.CharField(max_length=255, blank=True, db_index=True, verbose_name="Nesne ID")
+    veri = models.JSONField(verbose_name="Olay Verisi")
+    durum = models.CharField(max_length=10, choices=DURUM_SECENEKLERI, default=DURUM_BEKLIYOR, verbose_name="Durum")
+    deneme_sayisi = models.PositiveIntegerField(default=0, verbose_name="Deneme Sayısı")
+    sonuc = models.CharField(max_length=255, blank=True, verbose_name="Sonuç")
+    hata = models.TextField(blank=True, verbose_name="Hata")
+    alinma_zamani = models.DateTimeField(auto_now_add=True, verbose_name="Alınma Zamanı")
+    islenme_zamani = models.DateTimeField(null=True, blank=True, verbose_name="İşlenme Zamanı")
+
+    class Meta:
+        verbose_name = "Ödeme Olayı"
+        verbose_name_plural = "Ödeme Olayları"
+        ordering = ['-alinma_zamani']
+        indexes = [models.Index(fields=['durum', 'alinma_zamani'])]
+
+    def __str__(self) -> str:
+        return f"{self.tur} ({self.olay_id}) - {self.get_durum_display()}"
+
+
+class GidenEposta(models.Model):
+    """
+    Giden e-posta kutusu. E-postalar iş kaydıyla aynı transaction'da yazılır,
+    commit sonrası arka planda partiler halinde tek SMTP bağlantısıyla gönderilir.
+    """
+
+    DURUM_BEKLIYOR = 'BEKLIYOR'
+    DURUM_GONDERILIYOR = 'GONDERILIYOR'
+    DURUM_GONDERILDI = 'GONDERILDI'
+    DURUM_HATALI = 'HATALI'
+
+    DURUM_SECENEKLERI = [
+        (DURUM_BEKLIYOR, 'Bekliyor'),
+        (DURUM_GONDERILIYOR, 'Gönderiliyor'),
+        (DURUM_GONDERILDI, 'Gönderildi'),
+        (DURUM_HATALI, 'Hatalı'),
+    ]
+
+    alici = models.EmailField(verbose_name="Alıcı")
+    konu = models.CharField(max_length=255, verbose_name="Konu")
+    mesaj = models.TextField(verbose_name="Mesaj")
+    html_mesaj = models.TextField(blank=True, verbose_name="HTML Mesaj")
+    gonderen = models.CharField(max_length=255, blank=True, verbose_name="Gönderen")
+    kampanya = models.CharField(max_length=100, blank=True, db_index=True, verbose_name="Kampanya")
+    durum = models.CharField(max_length=12, choices=DURUM_SECENEKLERI, default=DURUM_BEKLIYOR, verbose_name="Durum")
+    deneme_sayisi = models.PositiveIntegerField(default=0, verbose_name="Deneme Sayısı")
+    hata = models.TextField(blank=True, verbose_name="Hata")
+    olusturma_zamani = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturma Zamanı")
+    son_deneme_zamani = models.DateTimeField(null=True, blank=True, verbose_name="Son Deneme Zamanı")
+    sonraki_deneme_zamani = models.DateTimeField(null=True, blank=True, verbose_name="Sonraki Deneme Zamanı")
+    gonderilme_zamani = models.DateTimeField(null=True, blank=True, verbose_name="Gönderilme Zamanı")
+
+    class Meta:
+        verbose_name = "Giden E-posta"
+        verbose_name_plural = "Giden E-postalar"
+        ordering = ['-olusturma_zamani']
+        indexes = [models.Index(fields=['durum', 'id'])]
+
+    def __str__(self) -> str:
+        return f"{self.alici}: {self.konu} - {self.get_durum_display()}"
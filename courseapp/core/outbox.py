@@ -0,0 +1,267 @@
+# core/outbox.py
+"""
+Giden e-posta kutusu (transactional outbox).
+
+E-postalar istek içinde SMTP'ye gönderilmez; iş kaydıyla aynı transaction'da
+GidenEposta satırı olarak yazılır. Transaction geri alınırsa e-posta da yazılmamış
+olur, commit edilirse arka plan işçisi kuyruğa alınır. İşçi bekleyen e-postaları
+partiler halinde alır ve her partiyi tek SMTP bağlantısıyla gönderir; tek bir
+alıcıdaki hata sadece o satırı "hatalı" yapar, partinin kalanı gönderilir.
+Sunucu parti ortasında bağlantıyı keserse bir kez yeniden bağlanılır.
+
+Geçici hatalar (bağlantı, zaman aşımı, 4xx yanıtlar) GIDEN_EPOSTA_MAKS_DENEME'ye
+kadar yeniden denenir; her denemeden sonra bekleme süresi ikiye katlanır
+(sonraki_deneme_zamani). Kalıcı hatalarda (5xx: alıcı reddedildi vb.) deneme
+hakkı hemen tükenir. `giden_epostalar` komutu kuyruğu elle (veya cron ile) boşaltır.
+
+Toplu gönderimler (kampanya) şablonu bir kez render eder: kişisel alanlar
+şablona yer tutucu olarak basılır ve alıcı başına değiştirilir. Her alıcının
+durumu kendi satırında izlenir (kampanya_durumu).
+"""
+import logging
+import smtplib
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.template import Context, Engine
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape
+
+from courseapp.background import arka_planda_calistir
+from courseapp.constants import (
+    GIDEN_EPOSTA_GERI_CEKILME_SANIYE,
+    GIDEN_EPOSTA_KAYIT_PARTI,
+    GIDEN_EPOSTA_KILIT_DAKIKA,
+    GIDEN_EPOSTA_MAKS_DENEME,
+    GIDEN_EPOSTA_PARTI_BOYUTU,
+)
+
+from .models import GidenEposta
+
+logger = logging.getLogger(__name__)
+
+
+# --- Kuyruğa alma ---
+
+def epostalari_kuyruga_al(epostalar):
+    """
+    Kaydedilmemiş GidenEposta nesnelerini tek sorguda yazar; commit sonrası
+    gönderimi arka planda başlatır. Alıcısı boş olanlar atlanır. Dönüş: yazılan sayı.
+    """
+    epostalar = [eposta for eposta in epostalar if eposta.alici]
+    if not epostalar:
+        return 0
+    GidenEposta.objects.bulk_create(epostalar, batch_size=GIDEN_EPOSTA_PARTI_BOYUTU)
+    arka_planda_calistir(bekleyen_epostalari_gonder, anahtar='giden_eposta')
+    return len(epostalar)
+
+
+def eposta_kuyruga_al(alici, konu, mesaj, gonderen='', html_mesaj=''):
+    return epostalari_kuyruga_al([
+        GidenEposta(alici=alici, konu=konu, mesaj=mesaj, gonderen=gonderen, html_mesaj=html_mesaj)
+    ])
+
+
+# --- Kampanya (toplu gönderim) ---
+
+def _yer_tutucu(alan):
+    # Kişisel alanlar şablonda filtresiz basılmalı ({{ ad }}); yer tutucu HTML kaçışından etkilenmez
+    return f'__KISISEL_{alan.upper()}__'
+
+
+def kampanya_epostalari(kampanya, alicilar, konu, html_sablon, baglam=None, metin='',
+                        kisisel_alanlar=(), gonderen=''):
+    """
+    Kaydedilmemiş GidenEposta üreteci.
+
+    `alicilar`: (e-posta, {alan: değer}) çiftleri. `kisisel_alanlar` şablonda,
+    konuda ve metinde alıcıya göre değişen alanlardır; eksik olanlar boş basılır.
+    Şablon, konu ve metin (Django şablon sözdizimi) bir kez render edilir.
+    """
+    yer_tutucular = {alan: _yer_tutucu(alan) for alan in kisisel_alanlar}
+    tam_baglam = {**(baglam or {}), **yer_tutucular}
+    html = render_to_string(html_sablon, tam_baglam)
+    motor = Engine.get_default()
+    konu = motor.from_string(konu).render(Context(tam_baglam, autoescape=False))
+    metin = motor.from_string(metin or konu).render(Context(tam_baglam, autoescape=False))
+
+    def kisisellestir(govde, degerler, kacis):
+        for alan, yer_tutucu in yer_tutucular.items():
+            deger = str(degerler.get(alan, '') or '')
+            govde = govde.replace(yer_tutucu, escape(deger) if kacis else deger)
+        return govde
+
+    for alici, degerler in alicilar:
+        if not alici:
+            continue
+        yield GidenEposta(
+            alici=alici,
+            konu=kisisellestir(konu, degerler, False),
+            mesaj=kisisellestir(metin, degerler, False),
+            html_mesaj=kisisellestir(html, degerler, True),
+            gonderen=gonderen,
+            kampanya=kampanya,
+        )
+
+
+def kampanya_kuyruga_al(kampanya, alicilar, konu, html_sablon, **kwargs):
+    """kampanya_epostalari'nı GIDEN_EPOSTA_KAYIT_PARTI'lik parçalar halinde yazar. Dönüş: yazılan sayı."""
+    epostalar = kampanya_epostalari(kampanya, alicilar, konu, html_sablon, **kwargs)
+    toplam = 0
+    while parca := list(islice(epostalar, GIDEN_EPOSTA_KAYIT_PARTI)):
+        toplam += epostalari_kuyruga_al(parca)
+    logger.info("Kampanya kuyruğa alındı: %s (%s alıcı)", kampanya, toplam)
+    return toplam
+
+
+def kampanya_durumu(kampanya):
+    """Kampanyadaki e-posta sayıları: {durum: adet}"""
+    return dict(
+        GidenEposta.objects.filter(kampanya=kampanya)
+        .values_list('durum').annotate(adet=Count('pk')).order_by()
+    )
+
+
+# --- Gönderim ---
+
+def _gonderilebilir(simdi):
+    return GidenEposta.objects.filter(
+        Q(durum=GidenEposta.DURUM_BEKLIYOR)
+        | Q(
+            Q(sonraki_deneme_zamani__isnull=True) | Q(sonraki_deneme_zamani__lte=simdi),
+            durum=GidenEposta.DURUM_HATALI, deneme_sayisi__lt=GIDEN_EPOSTA_MAKS_DENEME,
+        )
+        | Q(
+            durum=GidenEposta.DURUM_GONDERILIYOR,
+            son_deneme_zamani__lt=simdi - timedelta(minutes=GIDEN_EPOSTA_KILIT_DAKIKA),
+        )
+    )
+
+
+def _parti_al(son_id, parti_boyutu, kampanya=None):
+    """Bir partiyi "gönderiliyor" olarak işaretleyip döndürür (başka işçi aynı satırları almaz)."""
+    simdi = timezone.now()
+    bekleyenler = _gonderilebilir(simdi)
+    if kampanya is not None:
+        bekleyenler = bekleyenler.filter(kampanya=kampanya)
+    with transaction.atomic():
+        epostalar = list(
+            bekleyenler.select_for_update(skip_locked=True)
+            .filter(pk__gt=son_id).order_by('pk')[:parti_boyutu]
+        )
+        if epostalar:
+            GidenEposta.objects.filter(pk__in=[e.pk for e in epostalar]).update(
+                durum=GidenEposta.DURUM_GONDERILIYOR,
+                deneme_sayisi=F('deneme_sayisi') + 1,
+                son_deneme_zamani=simdi,
+            )
+    return epostalar
+
+
+def _kalici_hata(exc):
+    """5xx yanıtlar (alıcı / gönderen / içerik reddi) yeniden denemeyle düzelmez."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(kod >= 500 for kod, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return exc.smtp_code >= 500
+    return False
+
+
+def _mesaj(eposta, baglanti):
+    mesaj = EmailMultiAlternatives(
+        subject=eposta.konu,
+        body=eposta.mesaj,
+        from_email=eposta.gonderen or settings.DEFAULT_FROM_EMAIL,
+        to=[eposta.alici],
+        connection=baglanti,
+    )
+    if eposta.html_mesaj:
+        mesaj.attach_alternative(eposta.html_mesaj, "text/html")
+    return mesaj
+
+
+def _parti_gonder(epostalar):
+    """Partiyi tek SMTP bağlantısıyla gönderir. Dönüş: (gönderilen id'ler, {id: (hata, kalıcı mı)})."""
+    gonderilen, hatalar = [], {}
+    try:
+        baglanti = get_connection()
+        baglanti.open()
+    except Exception as exc:
+        logger.exception("SMTP bağlantısı açılamadı")
+        return gonderilen, {eposta.pk: (str(exc), False) for eposta in epostalar}
+    try:
+        for eposta in epostalar:
+            try:
+                try:
+                    _mesaj(eposta, baglanti).send()
+                except smtplib.SMTPServerDisconnected:
+                    # Sunucu bağlantıyı kapattı (ör. bağlantı başına ileti sınırı): yeniden bağlanıp bir kez dene
+                    baglanti.close()
+                    baglanti.open()
+                    _mesaj(eposta, baglanti).send()
+                gonderilen.append(eposta.pk)
+            except Exception as exc:
+                logger.warning("E-posta gönderilemedi (%s): %s", eposta.alici, exc)
+                hatalar[eposta.pk] = (str(exc), _kalici_hata(exc))
+    finally:
+        try:
+            baglanti.close()
+        except Exception:
+            logger.exception("SMTP bağlantısı kapatılamadı")
+    return gonderilen, hatalar
+
+
+def _hatalari_yaz(epostalar, hatalar):
+    """Kalıcı hatalarda deneme hakkını bitirir, geçicilerde bir sonraki denemeyi geri çekilmeyle erteler."""
+    simdi = timezone.now()
+    # Bağlantı hatasında tüm parti aynı hatayı alır; (hata, deneme) başına tek UPDATE
+    gruplar = defaultdict(list)
+    for eposta in epostalar:
+        if eposta.pk in hatalar:
+            hata, kalici = hatalar[eposta.pk]
+            deneme = eposta.deneme_sayisi + 1  # _parti_al'daki artış
+            gruplar[(hata[:1000], None if kalici else deneme)].append(eposta.pk)
+    for (hata, deneme), idler in gruplar.items():
+        if deneme is None:
+            alanlar = {'deneme_sayisi': GIDEN_EPOSTA_MAKS_DENEME, 'sonraki_deneme_zamani': None}
+        else:
+            bekleme = GIDEN_EPOSTA_GERI_CEKILME_SANIYE * 2 ** (deneme - 1)
+            alanlar = {'sonraki_deneme_zamani': simdi + timedelta(seconds=bekleme)}
+        GidenEposta.objects.filter(pk__in=idler).update(durum=GidenEposta.DURUM_HATALI, hata=hata, **alanlar)
+
+
+def bekleyen_epostalari_gonder(parti_boyutu=GIDEN_EPOSTA_PARTI_BOYUTU, limit=None, kampanya=None):
+    """
+    Bekleyen (ve beklemesi dolmuş hatalı) e-postaları gönderir; `kampanya`
+    verilirse yalnızca o kampanyanınkileri.
+    Dönüş: {'gonderilen': n, 'hatali': n, 'parti': n}
+    """
+    rapor = {'gonderilen': 0, 'hatali': 0, 'parti': 0}
+    son_id = 0
+    while limit is None or rapor['gonderilen'] + rapor['hatali'] < limit:
+        boyut = parti_boyutu if limit is None else min(parti_boyutu, limit - rapor['gonderilen'] - rapor['hatali'])
+        epostalar = _parti_al(son_id, boyut, kampanya)
+        if not epostalar:
+            break
+        son_id = epostalar[-1].pk
+
+        gonderilen, hatalar = _parti_gonder(epostalar)
+        if gonderilen:
+            GidenEposta.objects.filter(pk__in=gonderilen).update(
+                durum=GidenEposta.DURUM_GONDERILDI, gonderilme_zamani=timezone.now(), hata='',
+                sonraki_deneme_zamani=None,
+            )
+        _hatalari_yaz(epostalar, hatalar)
+
+        rapor['gonderilen'] += len(gonderilen)
+        rapor['hatali'] += len(hatalar)
+        rapor['parti'] += 1
+        if len(epostalar) < boyut:
+            break
+    return rapor
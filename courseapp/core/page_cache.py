@@ -0,0 +1,124 @@
+# core/page_cache.py
+"""
+Herkese açık web sayfaları (veteriner / petshop mini siteleri) için tam yanıt önbelleği.
+
+Anahtar işletme ve profilin revizyon sayacıyla sürümlenir: profil her
+kaydedildiğinde sayaç artar, eski sürümün anahtarı bir daha okunmaz ve süresi
+dolunca düşer. Kaydetme anında önbellekten silme gerekmez; revizyon
+veritabanından okunduğu için süreç başına önbellekler de eski sayfayı sunmaz.
+
+Önbellekte sayfa gövdesiyle birlikte gövdenin özeti (ETag) tutulur. İstek
+If-None-Match / If-Modified-Since taşıyorsa ve sayfa değişmemişse gövde
+gönderilmeden 304 döner.
+
+Önbellek boşken aynı sayfaya gelen eşzamanlı istekler tek render'a iner: kilidi
+alan istek sayfayı üretir, diğerleri önbelleği yoklayarak bekler. Bekleme süresi
+dolarsa (kilit sahibi hata verdiyse) sayfayı kendileri üretir. Kilit `cache.add`
+ile alınır; varsayılan süreç içi (LocMem) önbellekte bu birleştirme yalnızca aynı
+süreçteki istekler arasında geçerlidir, her worker sayfayı bir kez kendisi üretir.
+Süreçler arası birleştirme için paylaşımlı bir önbellek (Redis / Memcached) gerekir.
+
+CSRF jetonu ziyaretçiye özel olduğundan önbelleğe yer tutucu olarak yazılır ve
+her yanıtta isteğin jetonuyla değiştirilir. Form içeren sayfalarda ETag
+ziyaretçinin CSRF sırrına da bağlıdır ve If-Modified-Since tek başına 304
+döndürmez: giriş / jeton yenilemeden sonra tarayıcı elindeki eski jetonlu gövdeyi
+kullanmaz. Gövdede zamana bağlı değer (ör. bugünün tarihi) bulunmamalıdır;
+böyle değerler tarayıcıda doldurulur.
+"""
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from courseapp.constants import WEB_SAYFA_BEKLEME_SURESI, WEB_SAYFA_CACHE_SURESI, WEB_SAYFA_KILIT_SURESI
+
+logger = logging.getLogger(__name__)
+
+# {% csrf_token %} bu değeri basar; yanıt verilirken isteğin jetonuyla değiştirilir
+CSRF_YER_TUTUCU = 'csrf-yer-tutucu-7f3a9c'
+_YOKLAMA_ARALIGI = 0.05
+
+
+def sayfa_anahtari(tur, pk, revizyon):
+    return f'web_sayfa_{tur}_{pk}_{revizyon}'
+
+
+def _uret_ve_yaz(anahtar, uret):
+    govde = uret()
+    sayfa = {'govde': govde, 'etag': f'W/"{hashlib.md5(govde.encode()).hexdigest()}"'}
+    cache.set(anahtar, sayfa, WEB_SAYFA_CACHE_SURESI)
+    return sayfa
+
+
+def sayfa_getir(anahtar, uret):
+    """
+    Önbellekteki sayfayı döndürür; yoksa `uret()` (HTML string) ile bir kez üretir.
+    Dönüş: {'govde': str, 'etag': str}
+    """
+    sayfa = cache.get(anahtar)
+    if sayfa is not None:
+        return sayfa
+
+    kilit = f'{anahtar}_kilit'
+    if cache.add(kilit, 1, WEB_SAYFA_KILIT_SURESI):
+        try:
+            return _uret_ve_yaz(anahtar, uret)
+        finally:
+            cache.delete(kilit)
+
+    # Başka bir istek üretiyor: sonucunu bekle
+    bitis = time.monotonic() + WEB_SAYFA_BEKLEME_SURESI
+    while time.monotonic() < bitis:
+        time.sleep(_YOKLAMA_ARALIGI)
+        sayfa = cache.get(anahtar)
+        if sayfa is not None:
+            return sayfa
+    logger.warning("Web sayfası beklenirken süre doldu, yeniden üretiliyor: %s", anahtar)
+    return _uret_ve_yaz(anahtar, uret)
+
+
+def sablondan(sablon, baglam_uret):
+    """sayfa_getir için üretici: şablonu bağlamla, CSRF yer tutucusuyla render eder."""
+    return lambda: render_to_string(sablon, {**baglam_uret(), 'csrf_token': CSRF_YER_TUTUCU})
+
+
+def _csrf_etag(etag, csrf_sirri):
+    """Gövde özeti + ziyaretçinin CSRF sırrı: sır değişince (giriş, jeton yenileme) doğrulayıcı da değişir."""
+    return f'W/"{hashlib.md5(f"{etag}{csrf_sirri}".encode()).hexdigest()}"'
+
+
+def onbellekli_yanit(request, anahtar, uret, son_degisiklik=None):
+    """
+    Sayfayı önbellekten (gerekirse tek render ile) verir; ETag / Last-Modified
+    başlıklarını ekler, koşullu isteklerde değişiklik yoksa 304 döndürür.
+    """
+    sayfa = sayfa_getir(anahtar, uret)
+    son_degisiklik = int(son_degisiklik.timestamp()) if son_degisiklik else None
+
+    etag, jeton = sayfa['etag'], None
+    formlu = CSRF_YER_TUTUCU in sayfa['govde']
+    if formlu:
+        jeton = get_token(request)
+        etag = _csrf_etag(etag, request.META.get('CSRF_COOKIE', ''))
+
+    yanit = get_conditional_response(
+        request, etag=etag, last_modified=None if formlu else son_degisiklik,
+    )
+    if yanit is None:
+        govde = sayfa['govde']
+        if formlu:
+            govde = govde.replace(CSRF_YER_TUTUCU, jeton)
+        yanit = HttpResponse(govde)
+
+    yanit.headers['ETag'] = etag
+    if son_degisiklik:
+        yanit.headers['Last-Modified'] = http_date(son_degisiklik)
+    # Tarayıcı / proxy saklayabilir ama her seferinde doğrulamalı (profil her an değişebilir)
+    patch_cache_control(yanit, no_cache=True)
+    return yanit
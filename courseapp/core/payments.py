@@ -0,0 +1,217 @@
+# core/payments.py
+"""
+Ödeme olayları defteri (Stripe webhook'ları).
+
+Webhook isteği imzası doğrulandıktan sonra olay kimliğiyle (`OdemeOlayi.olay_id`,
+unique) kaydedilir ve hemen 200 döner. Uygulama (kredi yükleme, künye yenileme,
+sipariş ödeme) arka planda yapılır. Olay satırının durumu, uygulama ile aynı
+transaction içinde koşullu UPDATE ile "işlendi" yapılır; bu yüzden Stripe'ın
+tekrar gönderdiği veya aynı anda iki işçinin aldığı olay yalnızca bir kez uygulanır.
+Hatalı olaylar `odeme_olaylari` komutuyla yeniden oynatılır,
+`odeme_mutabakat` komutu Stripe'taki olayları defterle karşılaştırır.
+"""
+import logging
+import traceback
+
+import stripe
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from courseapp.background import arka_planda_calistir
+from courseapp.constants import ODEME_OLAYI_MAKS_DENEME, STRIPE_WEBHOOK_TOLERANCE
+
+from .models import OdemeOlayi
+
+logger = logging.getLogger(__name__)
+
+ISLENEBILIR_DURUMLAR = (OdemeOlayi.DURUM_BEKLIYOR, OdemeOlayi.DURUM_HATALI)
+
+
+class OdemeOlayiGecersiz(Exception):
+    """Webhook gövdesi veya imzası geçersiz."""
+
+
+# --- Kayıt ---
+
+def webhook_olayini_dogrula(payload, imza):
+    """Stripe imzasını doğrular ve olayı sözlük olarak döndürür."""
+    try:
+        olay = stripe.Webhook.construct_event(
+            payload, imza, settings.STRIPE_WEBHOOK_SECRET, tolerance=STRIPE_WEBHOOK_TOLERANCE
+        )
+    except (ValueError, stripe.SignatureVerificationError) as exc:
+        raise OdemeOlayiGecersiz(str(exc)) from exc
+    return olay.to_dict() if hasattr(olay, 'to_dict') else dict(olay)
+
+
+def olayi_kaydet(olay):
+    """
+    Olayı deftere yazar. Aynı olay daha önce geldiyse mevcut kaydı döndürür.
+    Dönüş: (OdemeOlayi, yeni_mi)
+    """
+    nesne = (olay.get('data') or {}).get('object') or {}
+    try:
+        with transaction.atomic():
+            kayit = OdemeOlayi.objects.create(
+                olay_id=olay['id'],
+                tur=olay.get('type', ''),
+                nesne_id=nesne.get('id') or '',
+                veri=olay,
+            )
+        return kayit, True
+    except IntegrityError:
+        return OdemeOlayi.objects.get(olay_id=olay['id']), False
+
+
+def olayi_kuyruga_al(olay_pk):
+    return arka_planda_calistir(olayi_isle, olay_pk, anahtar=f'odeme_olayi_{olay_pk}')
+
+
+# --- Uygulama ---
+
+def _kredi_yukle(nesne):
+    """payment_intent.succeeded: kredi paketi satın alma."""
+    metadata = nesne.get('metadata') or {}
+    if not metadata.get('kredi_adet'):
+        return None
+    from django.contrib.auth.models import User
+    from ilan.models import KrediHareketi
+
+    kullanici = User.objects.get(pk=int(metadata['kullanici_id']))
+    hareket = KrediHareketi.objects.create(
+        kullanici=kullanici,
+        hareket_turu=KrediHareketi.HAREKET_BAKIYE_EKLEME,
+        miktar=int(metadata['kredi_adet']),
+        aciklama=f"Kredi satın alma: {metadata.get('paket_adi', '')} - {nesne['id']}"[:200],
+    )
+    return f"KrediHareketi#{hareket.pk}"
+
+
+def yenileme_odendi(yenileme_id, payment_intent_id=''):
+    """
+    Künye yenilemesini ödendi yapar (etiket süresi EtiketYenileme.save içinde uzar).
+    Zaten ödenmişse hiçbir şey yapmaz; yenileme değiştiyse True döner.
+    """
+    from etiket.models import EtiketYenileme
+
+    with transaction.atomic():
+        yenileme = EtiketYenileme.objects.select_for_update().select_related('etiket').get(pk=yenileme_id)
+        if yenileme.odeme_durumu == 'ODENDI':
+            return False
+        yenileme.odeme_durumu = 'ODENDI'
+        if payment_intent_id:
+            yenileme.stripe_payment_intent_id = payment_intent_id
+        yenileme.save()
+    return True
+
+
+def _siparis_odendi(siparis_id):
+    from shop.models import Siparis
+    from shop.order_rollups import siparis_durumu_degisti
+
+    with transaction.atomic():
+        guncellenen = Siparis.objects.filter(pk=siparis_id, durum='bekliyor').update(durum='odendi')
+        if guncellenen:
+            siparis_durumu_degisti(Siparis.objects.filter(pk=siparis_id), 'bekliyor', 'odendi')
+    return f"Siparis#{siparis_id}" if guncellenen else None
+
+
+def _odeme_oturumu_tamamlandi(nesne):
+    """checkout.session.completed: künye yenileme veya sipariş ödemesi."""
+    if nesne.get('payment_status') != 'paid':
+        return None
+    metadata = nesne.get('metadata') or {}
+    if metadata.get('yenileme_id'):
+        yenileme_odendi(int(metadata['yenileme_id']), nesne.get('payment_intent') or '')
+        return f"EtiketYenileme#{metadata['yenileme_id']}"
+    if metadata.get('siparis_id'):
+        return _siparis_odendi(int(metadata['siparis_id']))
+    return None
+
+
+def _odeme_oturumu_sona_erdi(nesne):
+    """checkout.session.expired: bekleyen künye yenilemesini iptal et."""
+    from etiket.models import EtiketYenileme
+
+    yenileme_id = (nesne.get('metadata') or {}).get('yenileme_id')
+    if not yenileme_id:
+        return None
+    if EtiketYenileme.objects.filter(pk=int(yenileme_id), odeme_durumu='BEKLEMEDE').update(odeme_durumu='IPTAL'):
+        return f"EtiketYenileme#{yenileme_id}"
+    return None
+
+
+# Olay türü -> işleyici. İşleyici None dönerse olay "atlandı" sayılır.
+OLAY_ISLEYICILERI = {
+    'payment_intent.succeeded': _kredi_yukle,
+    'checkout.session.completed': _odeme_oturumu_tamamlandi,
+    'checkout.session.async_payment_succeeded': _odeme_oturumu_tamamlandi,
+    'checkout.session.expired': _odeme_oturumu_sona_erdi,
+}
+
+
+def olayi_isle(olay_pk, zorla=False):
+    """
+    Olayı tam bir kez uygular. Başka bir işçi aldıysa veya zaten işlendiyse False.
+    `zorla` verilirse atlanmış/işlenmiş olay da yeniden oynatılır (dikkatli kullanın).
+    """
+    durumlar = [d for d, _ in OdemeOlayi.DURUM_SECENEKLERI] if zorla else ISLENEBILIR_DURUMLAR
+    try:
+        with transaction.atomic():
+            # Koşullu UPDATE: satırı alan tek işçi devam eder
+            alindi = OdemeOlayi.objects.filter(pk=olay_pk, durum__in=durumlar).update(
+                durum=OdemeOlayi.DURUM_ISLENDI,
+                islenme_zamani=timezone.now(),
+                deneme_sayisi=F('deneme_sayisi') + 1,
+                hata='',
+            )
+            if not alindi:
+                return False
+            kayit = OdemeOlayi.objects.get(pk=olay_pk)
+            isleyici = OLAY_ISLEYICILERI.get(kayit.tur)
+            sonuc = isleyici((kayit.veri.get('data') or {}).get('object') or {}) if isleyici else None
+            kayit.sonuc = sonuc or ''
+            if not sonuc:
+                kayit.durum = OdemeOlayi.DURUM_ATLANDI
+            kayit.save(update_fields=['sonuc', 'durum'])
+        return True
+    except Exception:
+        logger.exception("Ödeme olayı işlenemedi (pk=%s)", olay_pk)
+        OdemeOlayi.objects.filter(pk=olay_pk).update(
+            durum=OdemeOlayi.DURUM_HATALI,
+            deneme_sayisi=F('deneme_sayisi') + 1,
+            hata=traceback.format_exc()[-4000:],
+        )
+        return False
+
+
+def bekleyen_olaylari_isle(limit=None, hatalilar=True):
+    """Bekleyen (ve deneme hakkı kalan hatalı) olayları sırayla işler; işlenen sayısını döndürür."""
+    durumlar = ISLENEBILIR_DURUMLAR if hatalilar else (OdemeOlayi.DURUM_BEKLIYOR,)
+    qs = OdemeOlayi.objects.filter(
+        durum__in=durumlar, deneme_sayisi__lt=ODEME_OLAYI_MAKS_DENEME
+    ).order_by('alinma_zamani').values_list('pk', flat=True)
+    if limit:
+        qs = qs[:limit]
+    return sum(1 for pk in list(qs) if olayi_isle(pk))
+
+
+def mutabakat(olaylar):
+    """
+    Sağlayıcıdaki olayları defterle karşılaştırır: eksik olanları kaydedip işler.
+    `olaylar` Stripe olay sözlüklerinin iterable'ı (testlerde yerel liste verilir).
+    Dönüş: {'kontrol': n, 'eksik': n, 'islenen': n}
+    """
+    rapor = {'kontrol': 0, 'eksik': 0, 'islenen': 0}
+    for olay in olaylar:
+        if hasattr(olay, 'to_dict'):
+            olay = olay.to_dict()
+        rapor['kontrol'] += 1
+        kayit, yeni = olayi_kaydet(olay)
+        if yeni:
+            rapor['eksik'] += 1
+        if kayit.durum in ISLENEBILIR_DURUMLAR and olayi_isle(kayit.pk):
+            rapor['islenen'] += 1
+    return rapor
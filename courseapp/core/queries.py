@@ -0,0 +1,18 @@
+# core/queries.py
+"""
+Ortak sorgu yardımcıları.
+
+`alt_sayac`, ilişkili tablodaki satır sayısını ana sorguya skaler alt sorgu
+olarak ekler. Birden fazla ilişki için Count + JOIN kullanmak satırları
+çarpar (her JOIN satır sayısını büyütür, distinct gerekir); alt sorgu her
+sayacı kendi indeksinden sayar ve ana sorgunun satır sayısını değiştirmez.
+Admin listeleri ve panel özetleri satır başına COUNT yerine bunu kullanır.
+"""
+from django.db.models import Count, IntegerField, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def alt_sayac(queryset):
+    """Queryset'in satır sayısını döndüren skaler alt sorgu (OuterRef ile ana satıra bağlanır)."""
+    sayac = queryset.order_by().annotate(_grup=Value(1)).values('_grup').annotate(adet=Count('pk')).values('adet')
+    return Coalesce(Subquery(sayac[:1], output_field=IntegerField()), 0)
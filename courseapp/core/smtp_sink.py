@@ -0,0 +1,102 @@
+# core/smtp_sink.py
+"""
+Yerel hata ayıklama SMTP sunucusu (testler ve toplu_eposta_benchmark komutu için).
+
+Gelen iletileri teslim etmez, bellekte toplar; açılan bağlantıları sayar.
+Belirli alıcılar kalıcı (550) veya geçici (451) hatayla reddedilebilir.
+`baglanti_gecikmesi` (sn) karşılamayı geciktirerek uzak sunucuya bağlanmanın
+(TCP + TLS + kimlik doğrulama) maliyetini taklit eder.
+Yalnızca düz SMTP konuşur (TLS / kimlik doğrulama yok): EMAIL_USE_TLS=False
+ve boş EMAIL_HOST_USER ile kullanılır.
+"""
+import socketserver
+import threading
+import time
+
+
+class _Isleyici(socketserver.StreamRequestHandler):
+    def _yaz(self, satir):
+        self.wfile.write(f'{satir}\r\n'.encode())
+
+    def handle(self):
+        sunucu = self.server.sink
+        with sunucu.kilit:
+            sunucu.baglanti_sayisi += 1
+        if sunucu.baglanti_gecikmesi:
+            time.sleep(sunucu.baglanti_gecikmesi)
+        self._yaz('220 smtp-sink hazir')
+        gonderen, alicilar = None, []
+        while True:
+            satir = self.rfile.readline()
+            if not satir:
+                return
+            komut = satir.decode('utf-8', 'replace').strip()
+            fiil = komut[:4].upper()
+            if fiil in ('EHLO', 'HELO'):
+                self._yaz('250 smtp-sink')
+            elif fiil == 'MAIL':
+                gonderen, alicilar = komut.split(':', 1)[1].strip(' <>'), []
+                self._yaz('250 OK')
+            elif fiil == 'RCPT':
+                alici = komut.split(':', 1)[1].strip(' <>')
+                if alici in sunucu.kalici_red:
+                    self._yaz('550 alici reddedildi')
+                elif alici in sunucu.gecici_red:
+                    self._yaz('451 daha sonra deneyin')
+                else:
+                    alicilar.append(alici)
+                    self._yaz('250 OK')
+            elif fiil == 'DATA':
+                self._yaz('354 devam')
+                govde = []
+                while (satir := self.rfile.readline()) not in (b'.\r\n', b''):
+                    govde.append(satir)
+                with sunucu.kilit:
+                    sunucu.mesajlar.append((gonderen, alicilar, b''.join(govde)))
+                self._yaz('250 OK')
+            elif fiil in ('RSET', 'NOOP'):
+                self._yaz('250 OK')
+            elif fiil == 'QUIT':
+                self._yaz('221 gule gule')
+                return
+            else:
+                self._yaz('502 desteklenmiyor')
+
+
+class _Sunucu(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class HataAyiklamaSMTP:
+    """
+    Kullanım:
+        with HataAyiklamaSMTP() as sink:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                                   EMAIL_HOST=sink.host, EMAIL_PORT=sink.port, EMAIL_USE_TLS=False): ...
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, kalici_red=(), gecici_red=(), baglanti_gecikmesi=0):
+        self.kalici_red, self.gecici_red = set(kalici_red), set(gecici_red)
+        self.baglanti_gecikmesi = baglanti_gecikmesi
+        self.mesajlar = []
+        self.baglanti_sayisi = 0
+        self.kilit = threading.Lock()
+        self._sunucu = _Sunucu((host, port), _Isleyici)
+        self._sunucu.sink = self
+        self.host, self.port = self._sunucu.server_address[:2]
+        self._is_parcacigi = threading.Thread(target=self._sunucu.serve_forever, daemon=True)
+
+    def baslat(self):
+        self._is_parcacigi.start()
+        return self
+
+    def durdur(self):
+        self._sunucu.shutdown()
+        self._sunucu.server_close()
+
+    def __enter__(self):
+        return self.baslat()
+
+    def __exit__(self, *exc):
+        self.durdur()
@@ -0,0 +1,119 @@
+# core/storage.py
+"""
+İçerik adresli (content-addressed) medya depolama.
+
+Yüklenen dosya diske akış halinde yazılırken SHA-256 özeti hesaplanır ve dosya
+özetine göre tek bir konuma taşınır:
+
+    cas/3f/a2/3fa2...e9.jpg
+
+Aynı içerik ikinci kez yüklendiğinde diske yeniden yazılmaz, mevcut blob'un adı
+döner ve değiştirilme zamanı yenilenir (medya_gc yeni yüklemeler gibi korur). Böylece ilan snapshot'ları dosya kopyalamak yerine aynı blob'a referans
+verir. Blob'lar alan silindiğinde silinmez; hiçbir model alanından referans
+almayan blob'lar `medya_gc` komutuyla temizlenir.
+"""
+import hashlib
+import os
+import uuid
+from collections import Counter
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db.models import Count, FileField
+from django.utils.deconstruct import deconstructible
+
+CAS_KLASORU = 'cas'
+_GECICI_KLASOR = f'{CAS_KLASORU}/_gecici'
+_OZET_UZUNLUGU = 64
+
+
+def blob_adi(ozet, uzanti=''):
+    return f'{CAS_KLASORU}/{ozet[:2]}/{ozet[2:4]}/{ozet}{uzanti.lower()}'
+
+
+def blob_mu(ad) -> bool:
+    """Ad içerik adresli bir blob'u mu gösteriyor?"""
+    if not ad or not ad.startswith(f'{CAS_KLASORU}/'):
+        return False
+    kok = os.path.splitext(os.path.basename(ad))[0]
+    return len(kok) == _OZET_UZUNLUGU and '__' not in kok
+
+
+@deconstructible
+class IcerikAdresliDepolama(FileSystemStorage):
+    """Dosyaları içerik özetine göre tek kopya olarak saklayan FileSystemStorage."""
+
+    def get_available_name(self, name, max_length=None):
+        # Hedef ad içerikten belirlenir (_save); çakışma kontrolüne gerek yok
+        return name
+
+    def _save(self, name, content):
+        gecici = self.path(f'{_GECICI_KLASOR}/{uuid.uuid4().hex}')
+        os.makedirs(os.path.dirname(gecici), exist_ok=True)
+
+        ozet = hashlib.sha256()
+        try:
+            with open(gecici, 'wb') as hedef:
+                for parca in content.chunks():
+                    ozet.update(parca)
+                    hedef.write(parca)
+
+            ad = blob_adi(ozet.hexdigest(), os.path.splitext(name)[1])
+            tam_yol = self.path(ad)
+            try:
+                # Aynı içerik zaten var: tekrar yazma, ama yeni yazılmış gibi medya_gc'nin
+                # bekleme süresini yeniden başlat (referans henüz kaydedilmedi)
+                os.utime(tam_yol)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(tam_yol), exist_ok=True)
+                os.replace(gecici, tam_yol)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tam_yol, self.file_permissions_mode)
+            else:
+                os.remove(gecici)
+        except BaseException:
+            if os.path.exists(gecici):
+                os.remove(gecici)
+            raise
+        return ad
+
+    def delete(self, name):
+        # Blob'lar başka kayıtlarca paylaşılabilir; silme işlemi medya_gc'ye bırakılır
+        if blob_mu(name):
+            return
+        super().delete(name)
+
+
+icerik_depolama = IcerikAdresliDepolama()
+
+
+def blob_referansi(dosya):
+    """
+    Dosya alanının içerik adresli karşılığını döndürür. Dosya zaten blob ise
+    kopyalama yapılmaz (O(1)); değilse akış halinde bir kez blob'a aktarılır.
+    """
+    if not dosya or not dosya.name:
+        return None
+    if blob_mu(dosya.name):
+        return dosya.name
+    dosya.open('rb')
+    try:
+        return icerik_depolama.save(dosya.name, dosya)
+    finally:
+        dosya.close()
+
+
+def blob_referans_sayilari():
+    """Tüm dosya alanlarındaki blob referanslarını sayar: {blob_adi: referans_sayisi}."""
+    sayilar = Counter()
+    for model in apps.get_models():
+        for alan in model._meta.concrete_fields:
+            if not isinstance(alan, FileField):
+                continue
+            satirlar = (
+                model._default_manager.filter(**{f'{alan.attname}__startswith': f'{CAS_KLASORU}/'})
+                .values(alan.attname).annotate(adet=Count('pk')).order_by()
+            )
+            for satir in satirlar:
+                sayilar[satir[alan.attname]] += satir['adet']
+    return sayilar
@@ -0,0 +1,75 @@
+"""
+Görsel türevleri için template etiketleri.
+
+    {% load resim %}
+    <img src="{{ urun.resim|resim_url:'card' }}" srcset="{% resim_srcset urun.resim %}" sizes="280px">
+    {% resim_picture urun.resim alt=urun.ad sinif="product-image" sizes="280px" %}
+
+Türevler henüz üretilmediyse orijinal görsel kullanılır.
+"""
+from django import template
+from django.core.files.storage import default_storage
+
+from core.images import MIME_TIPLERI, turev_manifesti, turev_yolu
+
+register = template.Library()
+
+# <img src> için tüm tarayıcıların desteklediği format
+VARSAYILAN_FORMAT = 'webp'
+
+
+def _ad(dosya):
+    return getattr(dosya, 'name', None) or ''
+
+
+def _srcset(orijinal, manifest, bicim):
+    return ', '.join(
+        f'{default_storage.url(turev_yolu(orijinal, boyut, bicim))} {genislik}w'
+        for boyut, (genislik, _) in manifest['boyutlar'].items()
+    )
+
+
+@register.filter
+def resim_url(dosya, boyut='card'):
+    """Türevin URL'si; türev yoksa orijinalin URL'si (dosya boşsa boş metin)."""
+    orijinal = _ad(dosya)
+    if not orijinal:
+        return ''
+    manifest = turev_manifesti(orijinal)
+    if manifest and boyut in manifest['boyutlar'] and VARSAYILAN_FORMAT in manifest['formatlar']:
+        return default_storage.url(turev_yolu(orijinal, boyut, VARSAYILAN_FORMAT))
+    return dosya.url
+
+
+@register.simple_tag
+def resim_srcset(dosya, bicim=VARSAYILAN_FORMAT):
+    """Türevlerin `srcset` değeri (genişlik tanımlayıcılarıyla); türev yoksa boş."""
+    orijinal = _ad(dosya)
+    manifest = turev_manifesti(orijinal)
+    if not manifest or bicim not in manifest['formatlar']:
+        return ''
+    return _srcset(orijinal, manifest, bicim)
+
+
+@register.inclusion_tag('core/resim_picture.html')
+def resim_picture(dosya, alt='', sinif='', boyut='card', sizes='', genislik=None, yukseklik=None):
+    """AVIF/WebP kaynaklı <picture>; türev yoksa orijinal ile düz <img>."""
+    orijinal = _ad(dosya)
+    manifest = turev_manifesti(orijinal)
+    kaynaklar = []
+    src = dosya.url if orijinal else ''
+    if manifest:
+        kaynaklar = [
+            {'tip': MIME_TIPLERI[bicim], 'srcset': _srcset(orijinal, manifest, bicim)}
+            for bicim in manifest['formatlar']
+        ]
+        src = resim_url(dosya, boyut)
+    return {
+        'kaynaklar': kaynaklar,
+        'src': src,
+        'alt': alt,
+        'sinif': sinif,
+        'sizes': sizes,
+        'genislik': genislik,
+        'yukseklik': yukseklik,
+    }
@@ -0,0 +1,279 @@
+import hashlib
+import hmac
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.db import connection
+from django.db.utils import OperationalError, load_backend
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from anahtarlik.dictionaries import Il, Ilce, Irk, Tur
+from anahtarlik.models import AnaSayfaAyar, EvcilHayvan, Sahip
+from courseapp.constants import GIDEN_EPOSTA_MAKS_DENEME
+from courseapp.write_queue import kuyrugu_bosalt, sayac_artir
+from ilan.models import KrediHareketi
+from core.models import GidenEposta, OdemeOlayi
+from core.outbox import bekleyen_epostalari_gonder, epostalari_kuyruga_al, kampanya_durumu, kampanya_kuyruga_al
+from core.payments import bekleyen_olaylari_isle, mutabakat
+from core.images import TUREV_FORMATLARI, turev_manifesti, turev_yolu, turevleri_olustur
+from core.smtp_sink import HataAyiklamaSMTP
+from core.storage import blob_mu, blob_referans_sayilari, blob_referansi, icerik_depolama
+from veteriner.models import Veteriner
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ResimTurevleriTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        resim = Image.new('RGB', (2000, 1000), 'orange')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: 90° döndürülmüş
+        exif[0x010F] = 'Kamera'
+        cikti = io.BytesIO()
+        resim.save(cikti, format='JPEG', exif=exif)
+        self.ad = default_storage.save('evcil_hayvanlar/pamuk.jpg', ContentFile(cikti.getvalue()))
+
+    def test_turevler_ve_srcset(self):
+        self.assertIsNone(turev_manifesti(self.ad))
+        manifest = turevleri_olustur(self.ad)
+
+        # Yön uygulanır (dikey), oran korunur, EXIF taşınmaz
+        self.assertEqual(manifest['boyutlar']['thumb'], [160, 320])
+        self.assertEqual(manifest['boyutlar']['full'], [800, 1600])
+        for bicim in TUREV_FORMATLARI:
+            with default_storage.open(turev_yolu(self.ad, 'card', bicim), 'rb') as dosya:
+                turev = Image.open(dosya)
+                self.assertEqual(turev.size, (320, 640))
+                self.assertFalse(turev.getexif())
+
+        cache.clear()
+        self.assertEqual(turev_manifesti(self.ad), manifest)
+
+        class Dosya:
+            name = self.ad
+            url = default_storage.url(self.ad)
+
+        html = Template("{% load resim %}{% resim_picture dosya alt='Pamuk' %}").render(Context({'dosya': Dosya()}))
+        self.assertIn('<picture>', html)
+        self.assertIn('pamuk__thumb.webp 160w', html)
+        self.assertIn('src="/media/evcil_hayvanlar/pamuk__card.webp"', html)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class IcerikAdresliDepolamaTests(TestCase):
+    def test_ayni_icerik_tek_blob_ve_gc(self):
+        ilk = icerik_depolama.save('a.JPG', ContentFile(b'ayni-icerik'))
+        ikinci = icerik_depolama.save('baska/b.jpg', ContentFile(b'ayni-icerik'))
+        self.assertEqual(ilk, ikinci)
+        self.assertTrue(blob_mu(ilk))
+        self.assertTrue(ilk.endswith('.jpg'))
+
+        il = Il.objects.create(ad='Bursa')
+        tur = Tur.objects.create(ad='Kuş')
+        sahip = Sahip.objects.create(
+            kullanici=User.objects.create_user('cas'), il=il, ilce=Ilce.objects.create(il=il, ad='Nilüfer')
+        )
+        hayvan = EvcilHayvan.objects.create(
+            ad='Maviş', tur=tur, irk=Irk.objects.create(tur=tur, ad='Muhabbet'), sahip=sahip, resim=ilk
+        )
+        # Snapshot kopya değil referans
+        self.assertEqual(blob_referansi(hayvan.resim), ilk)
+        self.assertEqual(blob_referans_sayilari()[ilk], 1)
+
+        sahipsiz = icerik_depolama.save('c.png', ContentFile(b'referanssiz'))
+        call_command('medya_gc', saat=0, stdout=io.StringIO())
+        self.assertTrue(icerik_depolama.exists(ilk))
+        self.assertFalse(icerik_depolama.exists(sahipsiz))
+
+    def test_eski_blob_yeniden_yuklenince_gc_silmez(self):
+        eski = icerik_depolama.save('eski.png', ContentFile(b'eski-sahipsiz'))
+        iki_gun_once = time.time() - 48 * 3600
+        os.utime(icerik_depolama.path(eski), (iki_gun_once, iki_gun_once))
+
+        # Aynı içerik yeniden yüklendi, referans henüz kaydedilmedi
+        self.assertEqual(icerik_depolama.save('yeni.png', ContentFile(b'eski-sahipsiz')), eski)
+        call_command('medya_gc', saat=24, stdout=io.StringIO())
+        self.assertTrue(icerik_depolama.exists(eski))
+
+        os.utime(icerik_depolama.path(eski), (iki_gun_once, iki_gun_once))
+        call_command('medya_gc', saat=24, stdout=io.StringIO())
+        self.assertFalse(icerik_depolama.exists(eski))
+
+
+def stripe_imzasi(payload):
+    """Stripe-Signature başlığını yerel olarak üretir (t=..,v1=HMAC-SHA256)."""
+    zaman = int(time.time())
+    imza = hmac.new(
+        settings.STRIPE_WEBHOOK_SECRET.encode(), f"{zaman}.{payload}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"t={zaman},v1={imza}"
+
+
+class OdemeOlayiTests(TestCase):
+    def setUp(self):
+        self.kullanici = User.objects.create_user('odeyen')
+        self.olay = {
+            'id': 'evt_test_1',
+            'object': 'event',
+            'type': 'payment_intent.succeeded',
+            'data': {'object': {
+                'id': 'pi_test_1',
+                'object': 'payment_intent',
+                'metadata': {'kullanici_id': str(self.kullanici.pk), 'kredi_adet': '10', 'paket_adi': 'Onlu'},
+            }},
+        }
+
+    def _gonder(self, olay, imza=None):
+        payload = json.dumps(olay)
+        return self.client.post(
+            reverse('ilan:kredi_odeme_webhook'), data=payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=imza or stripe_imzasi(payload),
+        )
+
+    def test_tekrarlanan_webhook_tek_kez_uygulanir(self):
+        self.assertEqual(self._gonder(self.olay, imza='t=1,v1=sahte').status_code, 400)
+
+        self.assertEqual(self._gonder(self.olay).status_code, 200)
+        self.assertEqual(self._gonder(self.olay).status_code, 200)
+        self.assertEqual(OdemeOlayi.objects.count(), 1)
+
+        self.assertEqual(bekleyen_olaylari_isle(), 1)
+        self.assertEqual(bekleyen_olaylari_isle(), 0)
+        # Mutabakat aynı olayı tekrar getirse de uygulanmaz
+        self.assertEqual(mutabakat([self.olay]), {'kontrol': 1, 'eksik': 0, 'islenen': 0})
+
+        self.assertEqual(KrediHareketi.objects.filter(kullanici=self.kullanici).count(), 1)
+        self.assertEqual(OdemeOlayi.objects.get().durum, OdemeOlayi.DURUM_ISLENDI)
+
+    def test_hatali_olay_yeniden_oynatilir(self):
+        self.olay['data']['object']['metadata']['kullanici_id'] = '999999'
+        self._gonder(self.olay)
+        self.assertEqual(bekleyen_olaylari_isle(), 0)
+        kayit = OdemeOlayi.objects.get()
+        self.assertEqual(kayit.durum, OdemeOlayi.DURUM_HATALI)
+        self.assertEqual(kayit.deneme_sayisi, 1)
+        self.assertFalse(KrediHareketi.objects.exists())
+
+        kayit.veri['data']['object']['metadata']['kullanici_id'] = str(self.kullanici.pk)
+        kayit.save(update_fields=['veri'])
+        call_command('odeme_olaylari', olay_id='evt_test_1', stdout=io.StringIO())
+        self.assertEqual(KrediHareketi.objects.count(), 1)
+
+
+class UretimVeritabaniProfiliTests(TestCase):
+    def setUp(self):
+        self.klasor = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.klasor, ignore_errors=True)
+
+    def _baglanti(self, alias):
+        ayar = {**connection.settings_dict, 'ENGINE': 'courseapp.db.sqlite', 'NAME': f'{self.klasor}/db.sqlite3'}
+        ayar['OPTIONS'] = {'timeout': 0}
+        baglanti = load_backend('courseapp.db.sqlite').DatabaseWrapper(ayar, alias)
+        self.addCleanup(baglanti.close)
+        return baglanti
+
+    def test_pragmalar_ve_begin_immediate(self):
+        birinci, ikinci = self._baglanti('birinci'), self._baglanti('ikinci')
+        with birinci.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('CREATE TABLE t (x INTEGER)')
+
+        # atomic'in kullandığı BEGIN yazma kilidini hemen alır; ikinci yazar "locked" görür
+        birinci._start_transaction_under_autocommit()
+        try:
+            with ikinci.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM t')  # WAL: okuyucu beklemez
+                with self.assertRaisesMessage(OperationalError, 'locked'):
+                    cursor.execute('BEGIN IMMEDIATE')
+        finally:
+            birinci.connection.rollback()
+
+    @override_settings(YAZMA_KUYRUGU_ISCI=False)
+    def test_yazma_kuyrugu_sayaclari_birlestirir(self):
+        veteriner = Veteriner.objects.create(ad='Sayaç')
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                sayac_artir(Veteriner, veteriner.pk, 'degerlendirme_sayisi')
+        with CaptureQueriesContext(connection) as sorgular:
+            self.assertEqual(kuyrugu_bosalt(), 3)
+        self.assertEqual(sum(s['sql'].startswith('UPDATE') for s in sorgular.captured_queries), 1)
+        veteriner.refresh_from_db()
+        self.assertEqual(veteriner.degerlendirme_sayisi, 3)
+
+    def test_ana_sayfa_ayari_onbellekten_okunur(self):
+        cache.clear()
+        AnaSayfaAyar.load()
+        with self.assertNumQueries(0):
+            AnaSayfaAyar.load()
+
+
+class TopluEpostaTests(TestCase):
+    def test_kampanya_kisisel_alanlari_alici_basina_degisir(self):
+        kampanya_kuyruga_al(
+            'bahar', [('ayse@example.com', {'ad': 'Ayşe'}), ('x@example.com', {'ad': '<b>X</b>'})],
+            '{{ ad }} için fırsat', 'shop/emails/toplu_duyuru.html',
+            baglam={'baslik': 'Bahar', 'icerik': 'İndirim başladı'}, kisisel_alanlar=('ad',),
+        )
+        rapor = bekleyen_epostalari_gonder()
+        self.assertEqual(rapor['gonderilen'], 2)
+        self.assertEqual(kampanya_durumu('bahar'), {GidenEposta.DURUM_GONDERILDI: 2})
+
+        ayse, x = sorted(mail.outbox, key=lambda m: m.to)
+        self.assertEqual(ayse.subject, 'Ayşe için fırsat')
+        self.assertIn('Merhaba Ayşe,', ayse.alternatives[0][0])
+        self.assertEqual(x.subject, '<b>X</b> için fırsat')
+        self.assertIn('Merhaba &lt;b&gt;X&lt;/b&gt;,', x.alternatives[0][0])
+
+    def test_smtp_parti_basina_tek_baglanti_ve_geri_cekilme(self):
+        alicilar = [f'alici{i}@example.com' for i in range(23)] + ['kalici@example.com', 'gecici@example.com']
+        epostalari_kuyruga_al([
+            GidenEposta(alici=alici, konu='Duyuru', mesaj='Merhaba', gonderen='noreply@example.com') for alici in alicilar
+        ])
+        with HataAyiklamaSMTP(kalici_red={'kalici@example.com'}, gecici_red={'gecici@example.com'}) as sink, \
+                override_settings(
+                    EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST=sink.host,
+                    EMAIL_PORT=sink.port, EMAIL_USE_TLS=False, EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+                ):
+            rapor = bekleyen_epostalari_gonder(parti_boyutu=10)
+            self.assertEqual((rapor['gonderilen'], rapor['hatali'], rapor['parti']), (23, 2, 3))
+            self.assertEqual(sink.baglanti_sayisi, 3)
+            self.assertEqual(len(sink.mesajlar), 23)
+
+            kalici = GidenEposta.objects.get(alici='kalici@example.com')
+            gecici = GidenEposta.objects.get(alici='gecici@example.com')
+            self.assertEqual(kalici.deneme_sayisi, GIDEN_EPOSTA_MAKS_DENEME)
+            self.assertGreater(gecici.sonraki_deneme_zamani, timezone.now())
+
+            # Bekleme dolmadan yeniden denenmez; dolunca gönderilir
+            self.assertEqual(bekleyen_epostalari_gonder()['parti'], 0)
+            sink.gecici_red.clear()
+            GidenEposta.objects.filter(pk=gecici.pk).update(sonraki_deneme_zamani=timezone.now() - timedelta(seconds=1))
+            self.assertEqual(bekleyen_epostalari_gonder()['gonderilen'], 1)
+        self.assertEqual(GidenEposta.objects.filter(durum=GidenEposta.DURUM_HATALI).count(), 1)
@@ -0,0 +1,64 @@
+# core/thread_race.py
+"""
+Eşzamanlılık testleri için yardımcı: aynı işi N iş parçacığında aynı anda başlatır.
+
+Test veritabanı (paylaşımlı önbellekli bellek içi SQLite) yazıcıları kilitle
+sıraya sokar; kilidi alamayan çağrı OperationalError alır. Bu çağrılar artan
+beklemeyle en fazla DENEME_SINIRI kez yeniden denenir. Sınır aşılırsa veya iş
+başka bir hata fırlatırsa test AssertionError ile başarısız olur (sonsuz döngü
+yerine).
+"""
+import threading
+import time
+
+from django.db import connections
+from django.db.utils import OperationalError
+
+DENEME_SINIRI = 50
+_ILK_BEKLEME = 0.001  # saniye
+_MAKS_BEKLEME = 0.05  # saniye
+
+
+def eszamanli_calistir(is_, adet, deneme_siniri=DENEME_SINIRI):
+    """
+    `is_()` fonksiyonunu `adet` iş parçacığında aynı anda çalıştırır ve dönüş
+    değerlerini (bitiş sırasıyla) listeler. Her iş parçacığı kendi veritabanı
+    bağlantısını kapatır.
+    """
+    baslat = threading.Barrier(adet)
+    kilit = threading.Lock()
+    sonuclar, hatalar = [], []
+
+    def calistir():
+        try:
+            baslat.wait()
+            bekleme = _ILK_BEKLEME
+            for deneme in range(1, deneme_siniri + 1):
+                try:
+                    sonuc = is_()
+                except OperationalError:
+                    if deneme == deneme_siniri:
+                        raise
+                    time.sleep(bekleme)
+                    bekleme = min(bekleme * 2, _MAKS_BEKLEME)
+                    continue
+                with kilit:
+                    sonuclar.append(sonuc)
+                return
+        except Exception as exc:
+            with kilit:
+                hatalar.append(exc)
+        finally:
+            connections.close_all()
+
+    threadler = [threading.Thread(target=calistir) for _ in range(adet)]
+    for t in threadler:
+        t.start()
+    for t in threadler:
+        t.join()
+
+    if hatalar:
+        raise AssertionError(
+            f"{len(hatalar)}/{adet} eşzamanlı çağrı başarısız (deneme sınırı {deneme_siniri}): {hatalar[0]!r}"
+        )
+    return sonuclar
@@ -0,0 +1,48 @@
+"""
+Süreç içi arka plan işleri.
+
+Projede ayrı bir görev kuyruğu (Celery vb.) olmadığı için isteği bekletmemesi
+gereken işler küçük bir iş parçacığı havuzunda çalıştırılır. İşler transaction
+commit edildikten sonra kuyruğa girer; aynı anahtarlı bir iş zaten bekliyorsa
+tekrar eklenmez (cache kilidi). Her iş sonunda iş parçacığının veritabanı
+bağlantısı kapatılır.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.db import connections, transaction
+
+from courseapp.constants import ARKA_PLAN_ISCI_SAYISI, ARKA_PLAN_KILIT_SURESI
+
+logger = logging.getLogger(__name__)
+
+_havuz = ThreadPoolExecutor(max_workers=ARKA_PLAN_ISCI_SAYISI, thread_name_prefix='arka-plan')
+
+
+def _kilit_anahtari(anahtar):
+    return f'arka_plan_is_{anahtar}'
+
+
+def _calistir(fonksiyon, args, anahtar):
+    try:
+        fonksiyon(*args)
+    except Exception:
+        logger.exception("Arka plan işi başarısız: %s", anahtar or getattr(fonksiyon, '__name__', fonksiyon))
+    finally:
+        if anahtar:
+            cache.delete(_kilit_anahtari(anahtar))
+        connections.close_all()
+
+
+def arka_planda_calistir(fonksiyon, *args, anahtar=None, kilit_suresi=ARKA_PLAN_KILIT_SURESI):
+    """
+    `fonksiyon(*args)` çağrısını commit sonrası arka plana alır.
+
+    `anahtar` verilirse aynı anahtarlı iş bitene (veya kilit süresi dolana) kadar
+    ikinci kez kuyruğa alınmaz. Kuyruğa yeni eklendiyse True döner.
+    """
+    if anahtar and not cache.add(_kilit_anahtari(anahtar), True, kilit_suresi):
+        return False
+    transaction.on_commit(lambda: _havuz.submit(_calistir, fonksiyon, args, anahtar))
+    return True
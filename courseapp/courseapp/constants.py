@@ -3,6 +3,7 @@ Proje Geneli Constants
 Hardcoded değerler burada tanımlanır
 """
 import logging
+from datetime import time
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +40,13 @@ IP_LOCATION_CACHE_DURATION = 86400  # 24 saat (saniye cinsinden)
 # E-posta gönderimi için timeout
 EMAIL_SEND_TIMEOUT = 5  # saniye
 
+# Giden e-posta kutusu (core/outbox.py)
+GIDEN_EPOSTA_PARTI_BOYUTU = 100  # Tek SMTP bağlantısıyla gönderilen en fazla e-posta
+GIDEN_EPOSTA_MAKS_DENEME = 5  # Hatalı e-posta otomatik yeniden deneme sınırı
+GIDEN_EPOSTA_KILIT_DAKIKA = 10  # Gönderim sırasında kalan (işçisi çökmüş) e-postaların yeniden alınma süresi
+GIDEN_EPOSTA_GERI_CEKILME_SANIYE = 60  # Geçici hatadan sonra ilk bekleme; her denemede ikiye katlanır
+GIDEN_EPOSTA_KAYIT_PARTI = 1000  # Kampanya e-postalarının tek sorguda yazılan en fazla satırı
+
 # ========== ETİKET SİSTEMİ ==========
 # Etiket yenileme ve süre ayarları
 ETIKET_YENILEME_SURE_GUN = 365  # 1 yıl
@@ -64,6 +72,12 @@ MIN_SIPARIS_TUTARI_DEFAULT = 0  # TL
 # Kargo ayarları
 UCRETSIZ_KARGO_LIMIT_DEFAULT = 0  # TL
 
+# Kuponun değişmeyen koşulları kod başına önbellekte tutulur (shop/coupons.py)
+KUPON_CACHE_SURESI = 300  # Kupon kaydedilince silinir; süre sadece kod değişikliği için üst sınır (saniye)
+
+# Stok uyarı özeti (shop/stock_alerts.py); eşikler STOK YÖNETİMİ bölümünde
+STOK_UYARI_TEKRAR_SAAT = 24  # Düşük kalan ürün en fazla bu aralıkla yeniden özete girer
+
 # ========== PAGINATION ==========
 # Sayfalama ayarları
 PAGINATION_SIZE = 20  # Sayfa başına öğe sayısı
@@ -76,6 +90,10 @@ QR_SERI_NUMARA_UZUNLUGU = 7
 # QR kod karakterleri (karışıklık yaratmayacak harfler)
 QR_SERI_KARAKTERLER = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
 
+# Seri numarası arama (etiket/serial_lookup.py)
+SERI_ARAMA_DAKIKA_LIMITI = 20  # IP başına dakikada arama
+GUVENILIR_PROXY_SAYISI = 0  # Uygulamanın önündeki ters proxy sayısı (0: X-Forwarded-For'a güvenilmez)
+
 # ========== SERIAL NUMBER GENERATION ==========
 # Seri numarası üretim max deneme sayısı
 MAX_SERIAL_GENERATION_TRIES = 1000
@@ -91,6 +109,60 @@ LOG_LEVEL_ERROR = 'ERROR'
 # Session ayarları
 SESSION_COOKIE_AGE = 86400 * 30  # 30 gün (saniye)
 
+# Kullanıcı rol özeti (accaunt/roles.py)
+KULLANICI_ROL_SESSION_KEY = 'kullanici_rolu'
+
+# ========== ARKA PLAN İŞLERİ ==========
+# Süreç içi iş parçacığı havuzu (courseapp/background.py)
+ARKA_PLAN_ISCI_SAYISI = 2  # Süreç başına eşzamanlı arka plan işi
+ARKA_PLAN_KILIT_SURESI = 300  # Aynı anahtarlı işin tekrar kuyruğa alınmasını engelleme süresi (saniye)
+# Ateşle-unut yazma kuyruğu (courseapp/write_queue.py)
+YAZMA_KUYRUGU_PARTI_BOYUTU = 500  # Tek transaction'da yazılan en fazla öğe
+YAZMA_KUYRUGU_BEKLEME_SURESI = 0.05  # İlk öğeden sonra partiyi doldurmak için bekleme (saniye)
+# Ana sayfa ayarları (AnaSayfaAyar.load)
+ANA_SAYFA_AYAR_CACHE_SURESI = 60  # Cache süreç içi; kaydetme sadece o süreçte siler, diğerleri en geç bu sürede yeniler (saniye)
+
+# ========== SAĞLIK RAPORU ==========
+# PDF sağlık raporu üretimi (anahtarlik/health_report.py)
+SAGLIK_RAPORU_KILIT_SURESI = 300  # Aynı raporun tekrar kuyruğa alınmasını engelleme süresi (saniye)
+SAGLIK_RAPORU_YOKLAMA_SURESI = 2  # Bekleme sayfasının yenilenme aralığı (saniye)
+
+# ========== SAHİP PANELİ ==========
+# Sahip paneli özet sayaçları (anahtarlik/dashboard.py)
+SAHIP_PANEL_CACHE_SURESI = 300  # Olaylarla geçersiz kılınır; süre sadece tarih bazlı sayaçlar için üst sınır
+KUNYE_BITIS_UYARI_GUN = 30  # Künye süresi dolmak üzere uyarısı (gün)
+YAKLASAN_ASI_GUN = 30  # Yaklaşan aşı penceresi (gün)
+
+# ========== SAĞLIK ZAMAN ÇİZELGESİ ==========
+# Hayvan detay sayfası ve PDF için birleşik sağlık kayıtları (anahtarlik/timeline.py)
+SAGLIK_ZAMAN_CIZELGESI_CACHE_SURESI = 3600  # Anahtar sağlık sürümüyle değişir; süre sadece eski sürümleri temizler (saniye)
+# Kilo grafiği (anahtarlik/weight_series.py)
+KILO_SERISI_CACHE_SURESI = 86400  # Anahtar kilo sürümüyle değişir; süre sadece eski sürümleri temizler (saniye)
+KILO_GRAFIK_NOKTA = 200  # Sayfaya gömülen grafikteki en fazla nokta
+KILO_GRAFIK_MAKS_NOKTA = 2000  # API'den istenebilecek en fazla nokta
+
+# ========== HERKESE AÇIK WEB SAYFALARI ==========
+# Veteriner / petshop mini site önbelleği (core/page_cache.py)
+WEB_SAYFA_CACHE_SURESI = 86400  # Anahtar profil revizyonuyla sürümlenir; süre sadece eski sürümleri temizler (saniye)
+WEB_SAYFA_KILIT_SURESI = 30  # Sayfayı üreten isteğin kilidi en fazla bu kadar tutar (saniye)
+WEB_SAYFA_BEKLEME_SURESI = 5  # Kilidi alamayan isteğin üretilen sayfayı bekleme süresi (saniye)
+
+# ========== SAĞLIK HATIRLATMALARI ==========
+# Aşı / ilaç hatırlatmaları (anahtarlik/reminders.py)
+ASI_HATIRLATMA_GUN = 7  # Planlanan aşıdan kaç gün önce hatırlatılır
+ILAC_HATIRLATMA_GUN = 3  # İlaç bitişinden kaç gün önce hatırlatılır
+HATIRLATMA_PARTI_BOYUTU = 500  # Tek transaction'da işlenen hatırlatma sayısı
+HATIRLATMA_SURE_BUTCESI = 120  # Günlük gönderim komutunun varsayılan süre sınırı (saniye)
+
+# ========== GÖRSEL TÜREVLERİ ==========
+# Yüklenen görsellerin türevleri (core/images.py) - en uzun kenar (piksel)
+RESIM_TUREV_BOYUTLARI = {
+    'thumb': 320,
+    'card': 640,
+    'full': 1600,
+}
+RESIM_TUREV_KALITE = {'avif': 55, 'webp': 80}
+
 # ========== FILE UPLOAD ==========
 # Maksimum dosya boyutu (byte)
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
@@ -124,10 +196,33 @@ GPS_ACCURACY_VERY_POOR = 500  # Çok kötü doğruluk (≥500m)
 GPS_MAX_SAMPLES = 5  # Maksimum örnek sayısı
 GPS_MAX_WAIT_MS = 25000  # Maksimum bekleme süresi (25 saniye)
 
+# Konum indeksi (core/geo.py)
+GEOHASH_HASSASIYETI = 9  # Saklanan geohash uzunluğu (~5m hücre)
+
+# En yakın klinik / petshop araması (veteriner/nearby.py)
+YAKIN_ISLETME_SAYISI = 5  # Varsayılan sonuç sayısı
+YAKIN_ISLETME_MAKS_SAYI = 20  # API'nin döndürebileceği en fazla sonuç
+YAKIN_ISLETME_MAKS_MESAFE_M = 50000  # Bu mesafeden uzaktakiler aranmaz
+DANISMAN_YAKINLIK_M = 15000  # İlçede veteriner yoksa bu mesafedeki en yakınlar aday olur
+DANISMAN_ATAMA_PARTI_BOYUTU = 500  # Toplu danışman atamasında parti başına sahip (veteriner/advisors.py)
+
+# Tarama anomali tespiti (etiket/geo.py)
+KONUM_ANOMALI_MESAFE_M = 100000  # Bir önceki konumdan bu kadar uzak...
+KONUM_ANOMALI_SURE_SAAT = 1  # ...ve bu süreden kısa sürede ise şüpheli
+
+# Tarama özetleri (etiket/scan_rollups.py)
+TARAMA_OZET_PARTI_BOYUTU = 5000  # Bir transaction'da özetlenen en fazla tarama
+TARAMA_OZET_GECIKME_DAKIKA = 60  # E-posta durumu netleşsin diye son taramalar bekletilir
+
 # ========== VETERINER RANDEVU ==========
+# Çalışma saati tanımlanmamış günler için varsayılan saatler
+VARSAYILAN_CALISMA_BASLANGIC = time(9, 0)
+VARSAYILAN_CALISMA_BITIS = time(18, 0)
+
 # Randevu ayarları
 RANDEVU_MINUTES_INTERVAL = 30  # dakika
 RANDEVU_ADVANCE_DAYS = 30  # Gün
+RANDEVU_SLOT_HARITASI_CACHE_SURESI = 86400  # Anahtar web_revizyon ile sürümlenir; süre sadece eski sürümleri temizler (saniye)
 
 # ========== PRO ABONELIK ==========
 # Pro abonelik süreleri (gün cinsinden)
@@ -139,6 +234,8 @@ PRO_FOTO_GALERI_LIMIT_DEFAULT = 50
 # ========== STRIPE AYARLARI ==========
 # Stripe webhook tolerance (saniye)
 STRIPE_WEBHOOK_TOLERANCE = 300  # 5 dakika
+# Hatalı ödeme olayı otomatik yeniden deneme sınırı (sonrası elle: odeme_olaylari --olay-id)
+ODEME_OLAYI_MAKS_DENEME = 5
 
 # ========== HIZLIMAN ==========
 # Hizmet kartları ayarları
@@ -3,6 +3,8 @@ from shop.models import Urun
 from django.urls import reverse
 from django.utils.functional import cached_property
 
+from accaunt.roles import get_user_role
+
 def user_panel_target(request):
     """
     Kullanıcı paneli menüsü için hedef URL'yi belirler:
@@ -15,28 +17,27 @@ def user_panel_target(request):
         if not user.is_authenticated:
             return { 'user_panel_url': reverse('user_login') }
 
+        rol = get_user_role(request)
+
         # Veteriner profili var mı?
-        vet = getattr(user, 'veteriner_profili', None)
-        if vet is not None:
-            if not vet.il or not vet.adres_detay:
+        if rol.veteriner_mi:
+            if not rol.veteriner_profil_tamam:
                 return { 'user_panel_url': reverse('veteriner:veteriner_profil_tamamla') }
             return { 'user_panel_url': reverse('veteriner:veteriner_paneli') }
 
         # Petshop profili var mı?
-        shop = getattr(user, 'petshop_profili', None)
-        if shop is not None:
+        if rol.petshop_mi:
             # Panel URL'i tanımlı değilse profil tamamlama sayfasına yönlendir.
             try:
                 return { 'user_panel_url': reverse('petshop:petshop_paneli') }
             except Exception:
                 return { 'user_panel_url': reverse('petshop:petshop_profil_tamamla') }
 
-        # Misafir kullan�c� m�?
-        guest = getattr(user, 'misafir_profili', None)
-        if guest is not None:
+        # Misafir kullanıcı mı?
+        if rol.misafir_mi:
             return { 'user_panel_url': reverse('guest_dashboard') }
 
-        # Son kullan�c� (Sahip)
+        # Son kullanıcı (Sahip)
         return { 'user_panel_url': reverse('kullanici_paneli') }
     except Exception:
         # Her ihtimale karşı, kullanıcı paneline veya girişe düş
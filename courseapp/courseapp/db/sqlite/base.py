@@ -0,0 +1,40 @@
+# courseapp/db/sqlite/base.py
+"""
+Üretim için ayarlanmış SQLite veritabanı arka ucu.
+
+ENGINE = 'courseapp.db.sqlite' olduğunda her yeni bağlantıda PRAGMA'lar uygulanır
+(WAL günlüğü, synchronous=NORMAL, mmap ve sayfa önbelleği). WAL'da okuyucular
+yazarı beklemez; synchronous=NORMAL WAL ile güvenlidir ve her commit'te fsync yapmaz.
+
+`transaction.atomic` blokları "BEGIN IMMEDIATE" ile açılır: yazma kilidi
+transaction başında alınır. Düz "BEGIN" ile iki transaction önce okuyup sonra
+yazmaya çalıştığında biri busy_timeout beklemeden "database is locked" alır
+(kilit yükseltme kilitlenmesi); IMMEDIATE ile ikinci transaction sırasını bekler.
+
+PRAGMA değerleri DATABASES['default']['OPTIONS']['pragmalar'] ile değiştirilebilir.
+"""
+from django.db.backends.sqlite3 import base
+
+VARSAYILAN_PRAGMALAR = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,  # bayt
+    'cache_size': -64 * 1024,  # Negatif değer KiB cinsinden (64 MB)
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmalar = {**VARSAYILAN_PRAGMALAR, **kwargs.pop('pragmalar', {})}
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for ad, deger in self.pragmalar.items():
+            conn.execute(f'PRAGMA {ad} = {deger}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
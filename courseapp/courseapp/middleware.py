@@ -1,6 +1,8 @@
 from django.shortcuts import redirect
 from django.urls import reverse, NoReverseMatch
 
+from accaunt.roles import get_user_role
+
 class ProfileCompletionMiddleware:
     """
     Kullanıcı giriş yapmışsa ama veteriner/petshop profili eksikse
@@ -22,26 +24,24 @@ class ProfileCompletionMiddleware:
                 request.path.startswith("/api/")):
                 return self.get_response(request)
             
+            rol = get_user_role(request)
+
             # Veteriner
-            if hasattr(u, "veteriner_profili"):
-                v = u.veteriner_profili
-                if not v.il or not v.adres_detay:
-                    try:
-                        url = reverse("veteriner:veteriner_profil_tamamla")
-                    except NoReverseMatch:
-                        url = "/veteriner/profil-tamamla/"
-                    if not request.path.startswith(url):
-                        return redirect(url)
+            if rol.veteriner_mi and not rol.veteriner_profil_tamam:
+                try:
+                    url = reverse("veteriner:veteriner_profil_tamamla")
+                except NoReverseMatch:
+                    url = "/veteriner/profil-tamamla/"
+                if not request.path.startswith(url):
+                    return redirect(url)
 
             # Petshop
-            if hasattr(u, "petshop_profili"):
-                s = u.petshop_profili
-                if not s.il or not s.adres_detay:
-                    try:
-                        url = reverse("petshop:petshop_profil_tamamla")
-                    except NoReverseMatch:
-                        url = "/petshop/profil-tamamla/"
-                    if not request.path.startswith(url):
-                        return redirect(url)
+            if rol.petshop_mi and not rol.petshop_profil_tamam:
+                try:
+                    url = reverse("petshop:petshop_profil_tamamla")
+                except NoReverseMatch:
+                    url = "/petshop/profil-tamamla/"
+                if not request.path.startswith(url):
+                    return redirect(url)
 
         return self.get_response(request)
@@ -104,6 +104,15 @@ DATABASES = {
     }
 }
 
+# Üretim profili: WAL + PRAGMA ayarları + BEGIN IMMEDIATE (courseapp/db/sqlite/base.py)
+# .env: VERITABANI_PROFILI=uretim
+VERITABANI_PROFILI = config('VERITABANI_PROFILI', default='gelistirme')
+if VERITABANI_PROFILI == 'uretim':
+    DATABASES['default']['ENGINE'] = 'courseapp.db.sqlite'
+
+# Ateşle-unut yazma kuyruğunun işçi iş parçacığı (courseapp/write_queue.py)
+YAZMA_KUYRUGU_ISCI = True
+
 # Şifre doğrulama
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -0,0 +1,127 @@
+# courseapp/write_queue.py
+"""
+Süreç içi yazma kuyruğu (ateşle-unut yazmalar için).
+
+SQLite'ta aynı anda tek yazar olabilir; görüntülenme sayacı gibi sonucu
+beklenmeyen küçük yazmaların her biri ayrı bir istekte kilit beklemesin diye
+bu yazmalar tek bir iş parçacığında toplanır. İşçi kuyruktaki öğeleri parti
+parti alır ve her partiyi tek transaction'da yazar; aynı satırın aynı sayacına
+gelen artışlar birleştirilip tek UPDATE ile uygulanır.
+
+Öğeler transaction commit edildikten sonra kuyruğa girer. Kuyruk bellekte
+tutulur; süreç kapanırken bekleyenler yazılmaya çalışılır, süreç çökerse
+kaybolabilir. Bu yüzden sadece kaybı tolere edilebilen yazmalar için kullanın.
+settings.YAZMA_KUYRUGU_ISCI = False ise işçi başlatılmaz, öğeler
+`kuyrugu_bosalt()` çağrılana kadar bekler (testler ve komutlar için).
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F
+
+from courseapp.constants import YAZMA_KUYRUGU_BEKLEME_SURESI, YAZMA_KUYRUGU_PARTI_BOYUTU
+
+logger = logging.getLogger(__name__)
+
+_kuyruk = queue.SimpleQueue()
+_isci = None
+_isci_kilidi = threading.Lock()
+_yazma_kilidi = threading.Lock()
+
+
+def _isciyi_baslat():
+    global _isci
+    if not getattr(settings, 'YAZMA_KUYRUGU_ISCI', True):
+        return
+    with _isci_kilidi:
+        if _isci is None or not _isci.is_alive():
+            _isci = threading.Thread(target=_isci_dongusu, name='yazma-kuyrugu', daemon=True)
+            _isci.start()
+
+
+def _kuyruga_koy(oge):
+    def koy():
+        _kuyruk.put(oge)
+        _isciyi_baslat()
+    transaction.on_commit(koy)
+
+
+def yazmayi_kuyruga_al(fonksiyon, *args):
+    """`fonksiyon(*args)` yazmasını commit sonrası yazma kuyruğuna alır."""
+    _kuyruga_koy(('is', fonksiyon, args))
+
+
+def sayac_artir(model, pk, alan, miktar=1):
+    """`model` satırının `alan` sayacını kuyruk üzerinden artırır (aynı satıra gelenler birleşir)."""
+    _kuyruga_koy(('sayac', (model, pk, alan), miktar))
+
+
+def _partiyi_yaz(ogeler):
+    sayaclar = defaultdict(int)
+    isler = []
+    for tur, hedef, deger in ogeler:
+        if tur == 'sayac':
+            sayaclar[hedef] += deger
+        else:
+            isler.append((hedef, deger))
+
+    # Aynı satırın sayaçları tek UPDATE'te
+    satirlar = defaultdict(dict)
+    for (model, pk, alan), miktar in sayaclar.items():
+        satirlar[(model, pk)][alan] = F(alan) + miktar
+
+    with transaction.atomic():
+        for (model, pk), guncelleme in satirlar.items():
+            model.objects.filter(pk=pk).update(**guncelleme)
+        for fonksiyon, args in isler:
+            fonksiyon(*args)
+
+
+def _bosalt(ogeler):
+    toplam = 0
+    with _yazma_kilidi:
+        while True:
+            while len(ogeler) < YAZMA_KUYRUGU_PARTI_BOYUTU:
+                try:
+                    ogeler.append(_kuyruk.get_nowait())
+                except queue.Empty:
+                    break
+            if not ogeler:
+                return toplam
+            try:
+                _partiyi_yaz(ogeler)
+            except Exception:
+                # Parti geri alındı; hatalı öğe diğerlerini kaybettirmesin diye tek tek dene
+                logger.exception("Yazma kuyruğu partisi yazılamadı, öğeler tek tek deneniyor")
+                for oge in ogeler:
+                    try:
+                        _partiyi_yaz([oge])
+                    except Exception:
+                        logger.exception("Yazma kuyruğu öğesi yazılamadı: %s", oge[1])
+            toplam += len(ogeler)
+            ogeler = []
+
+
+def kuyrugu_bosalt():
+    """Kuyruktaki tüm öğeleri partiler halinde yazar; yazılan öğe sayısını döndürür."""
+    return _bosalt([])
+
+
+def _isci_dongusu():
+    while True:
+        ilk = _kuyruk.get()
+        # Kısa bekleme: aynı anda gelen yazmalar aynı partiye girsin
+        time.sleep(YAZMA_KUYRUGU_BEKLEME_SURESI)
+        try:
+            _bosalt([ilk])
+        finally:
+            connections.close_all()
+
+
+atexit.register(kuyrugu_bosalt)
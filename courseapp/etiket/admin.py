@@ -6,7 +6,8 @@ from django.urls import path
 from django.shortcuts import redirect
 from django.utils.html import format_html
 from django.utils import timezone
-from .models import Etiket, EtiketKategori, EtiketKategoriFotografi, EtiketTarama, EtiketYenileme, EtiketYenilemeFiyati, KANAL_SECENEKLERI
+from datetime import timedelta
+from .models import Etiket, EtiketKategori, EtiketKategoriFotografi, EtiketTarama, EtiketTaramaGunluk, EtiketYenileme, EtiketYenilemeFiyati, KANAL_SECENEKLERI
 from veteriner.models import Veteriner
 from petshop.models import PetShop
 import qrcode
@@ -439,6 +440,36 @@ class EtiketTaramaAdmin(admin.ModelAdmin):
     harita_link.short_description = "Harita"
 
 
+@admin.register(EtiketTaramaGunluk)
+class EtiketTaramaGunlukAdmin(admin.ModelAdmin):
+    """Günlük tarama özetleri (tarama_ozetle komutu doldurur, salt okunur)."""
+    list_display = ('tarih', 'etiket', 'ip_sehir', 'konum_kaynagi', 'tarama_sayisi', 'eposta_gonderilen')
+    list_filter = ('konum_kaynagi', 'tarih')
+    search_fields = ('etiket__seri_numarasi', 'ip_sehir')
+    date_hierarchy = 'tarih'
+    list_select_related = ('etiket',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        """Listenin üstünde son 30 günün özeti"""
+        from .scan_rollups import eposta_basari_orani, kaynak_dagilimi, sehir_dagilimi
+
+        baslangic = timezone.localdate() - timedelta(days=30)
+        oran = eposta_basari_orani(baslangic)
+        extra_context = extra_context or {}
+        extra_context.update({
+            'sehir_dagilimi': sehir_dagilimi(baslangic),
+            'kaynak_dagilimi': kaynak_dagilimi(baslangic),
+            'eposta_orani': None if oran is None else round(oran * 100, 1),
+        })
+        return super().changelist_view(request, extra_context)
+
+
 # ============= KÜNYE YENİLEME ADMIN =============
 
 @admin.register(EtiketYenilemeFiyati)
@@ -0,0 +1,99 @@
+# etiket/geo.py
+"""
+Etiket taramaları için konum indeksi ve sorguları.
+
+Her GPS'li taramaya kayıt sırasında bir geohash (EtiketTarama.geohash) yazılır.
+Yarıçap sorguları ortak geohash indeksi yardımcılarını (core/geo.py) kullanır.
+
+Anomali tespiti her etiket için son konumu ve hızı tutan akan bir durum
+(EtiketKonumDurumu) üzerinden yapılır: her yeni konum sadece bir öncekiyle
+karşılaştırılır, geçmiş taramalar tekrar okunmaz (tarama başına O(1)).
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from core.geo import geohash_kodla, haversine_m, yaricaptakiler  # noqa: F401 (geohash_kodla: 0012 göçü buradan içe aktarır)
+from courseapp.constants import KONUM_ANOMALI_MESAFE_M, KONUM_ANOMALI_SURE_SAAT
+
+
+# --- Sorgular ---
+
+def _gps_taramalari(qs=None):
+    from .models import EtiketTarama
+
+    qs = EtiketTarama.objects.all() if qs is None else qs
+    return qs.filter(gps_latitude__isnull=False, gps_longitude__isnull=False)
+
+
+def kutu_icindeki_taramalar(min_lat, min_lon, max_lat, max_lon, qs=None):
+    """Enlem/boylam kutusundaki GPS'li taramalar (gps_latitude, gps_longitude indeksi)."""
+    return _gps_taramalari(qs).filter(
+        gps_latitude__range=(min_lat, max_lat), gps_longitude__range=(min_lon, max_lon)
+    )
+
+
+def yaricaptaki_taramalar(lat, lon, yaricap_m, qs=None, son_gun=None):
+    """
+    Noktaya `yaricap_m` mesafedeki taramalar, yakından uzağa. Her taramaya
+    `mesafe_m` özniteliği eklenir. `son_gun` verilirse sadece son N günün taramaları.
+    """
+    qs = _gps_taramalari(qs)
+    if son_gun is not None:
+        qs = qs.filter(tarama_zamani__gte=timezone.now() - timedelta(days=son_gun))
+    return yaricaptakiler(
+        qs, lat, lon, yaricap_m, lat_alani='gps_latitude', lon_alani='gps_longitude', geohash_alani='geohash'
+    )
+
+
+def sahip_evine_yakin_taramalar(sahip, yaricap_m=5000, son_gun=7):
+    """Sahibin kayıtlı konumuna yakın, sahibin etiketlerine ait taramalar."""
+    if sahip.latitude is None or sahip.longitude is None:
+        return []
+    from .models import EtiketTarama
+
+    qs = EtiketTarama.objects.filter(etiket__evcil_hayvan__sahip=sahip)
+    return yaricaptaki_taramalar(sahip.latitude, sahip.longitude, yaricap_m, qs=qs, son_gun=son_gun)
+
+
+# --- Akan anomali tespiti ---
+
+def konum_guncelle(tarama):
+    """
+    Taramanın GPS konumunu etiketin son konumuyla karşılaştırır ve durumu günceller.
+    Anomali listesi döndürür (check_location_anomalies ile aynı biçim).
+    """
+    from .models import EtiketKonumDurumu
+
+    if tarama.gps_latitude is None or tarama.gps_longitude is None:
+        return []
+
+    anomaliler = []
+    with transaction.atomic():
+        durum, _ = EtiketKonumDurumu.objects.select_for_update().get_or_create(etiket_id=tarama.etiket_id)
+        onceki_var = durum.son_latitude is not None and durum.son_tarama_id != tarama.pk
+        if onceki_var and durum.son_zaman and tarama.tarama_zamani < durum.son_zaman:
+            return []  # Sıra dışı gelen eski tarama durumu geri almasın
+
+        if onceki_var:
+            mesafe = haversine_m(durum.son_latitude, durum.son_longitude, tarama.gps_latitude, tarama.gps_longitude)
+            sure_saat = max((tarama.tarama_zamani - durum.son_zaman).total_seconds() / 3600, 0)
+            durum.son_hiz_kmh = (mesafe / 1000) / sure_saat if sure_saat else None
+            if mesafe > KONUM_ANOMALI_MESAFE_M and sure_saat < KONUM_ANOMALI_SURE_SAAT:
+                anomaliler.append({
+                    'type': 'DISTANCE_JUMP',
+                    'distance_km': mesafe / 1000,
+                    'time_hours': sure_saat,
+                    'message': f"Son taramadan {mesafe / 1000:.1f}km uzakta (sadece {sure_saat:.1f} saat sonra)",
+                })
+                durum.anomali_sayisi += 1
+
+        if durum.son_tarama_id != tarama.pk:
+            durum.tarama_sayisi += 1
+        durum.son_tarama_id = tarama.pk
+        durum.son_latitude = tarama.gps_latitude
+        durum.son_longitude = tarama.gps_longitude
+        durum.son_zaman = tarama.tarama_zamani
+        durum.save()
+    return anomaliler
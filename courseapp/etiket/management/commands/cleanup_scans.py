@@ -1,5 +1,6 @@
 """
 Eski tarama kayıtlarını otomatik temizleme komutu
+Silmeden önce taramalar günlük özetlere eklenir (tarama_ozetle); özetlenmemiş kayıt silinmez.
 Kullanım: python manage.py cleanup_scans
 Cron: 0 3 * * * cd /path/to/project && python manage.py cleanup_scans
 """
@@ -8,6 +9,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from datetime import timedelta
 from etiket.models import EtiketTarama
+from etiket.scan_rollups import son_ozetlenen_tarama_id, taramalari_ozetle
 
 
 class Command(BaseCommand):
@@ -33,8 +35,12 @@ class Command(BaseCommand):
         # Cutoff tarihi hesapla
         cutoff_date = timezone.now() - timedelta(days=days)
         
-        # Silinecek kayıtları bul
-        old_scans = EtiketTarama.objects.filter(tarama_zamani__lt=cutoff_date)
+        # Silinecek kayıtları bul (istatistikler günlük özetlerde kalır)
+        if not dry_run:
+            taramalari_ozetle()
+        old_scans = EtiketTarama.objects.filter(
+            tarama_zamani__lt=cutoff_date, pk__lte=son_ozetlenen_tarama_id()
+        )
         count = old_scans.count()
         
         if count == 0:
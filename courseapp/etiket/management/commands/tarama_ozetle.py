@@ -0,0 +1,27 @@
+"""
+Yeni etiket taramalarını günlük özet tablosuna ekler (saatlik cron, cleanup_scans'ten önce).
+Kullanım: python manage.py tarama_ozetle [--parti 5000] [--gecikme 60]
+Cron: 15 * * * * cd /path/to/project && python manage.py tarama_ozetle
+"""
+from django.core.management.base import BaseCommand
+
+from courseapp.constants import TARAMA_OZET_GECIKME_DAKIKA, TARAMA_OZET_PARTI_BOYUTU
+from etiket.scan_rollups import taramalari_ozetle
+
+
+class Command(BaseCommand):
+    help = 'Son çalıştırmadan bu yana gelen taramaları günlük özetlere ekler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parti', type=int, default=TARAMA_OZET_PARTI_BOYUTU, help='Parti boyutu')
+        parser.add_argument(
+            '--gecikme', type=int, default=TARAMA_OZET_GECIKME_DAKIKA,
+            help=f'Son kaç dakikanın taramaları bekletilsin (varsayılan: {TARAMA_OZET_GECIKME_DAKIKA})'
+        )
+
+    def handle(self, *args, **options):
+        rapor = taramalari_ozetle(parti_boyutu=options['parti'], gecikme_dakika=options['gecikme'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{rapor['tarama']} tarama özetlendi ({rapor['parti']} parti), "
+            f"son işlenen tarama: #{rapor['son_tarama_id']}"
+        ))
@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def geohash_doldur(apps, schema_editor):
+    from etiket.geo import geohash_kodla
+
+    EtiketTarama = apps.get_model('etiket', 'EtiketTarama')
+    taramalar = EtiketTarama.objects.filter(gps_latitude__isnull=False, gps_longitude__isnull=False)
+    parti = []
+    for tarama in taramalar.only('id', 'gps_latitude', 'gps_longitude').iterator(chunk_size=2000):
+        tarama.geohash = geohash_kodla(tarama.gps_latitude, tarama.gps_longitude)
+        parti.append(tarama)
+        if len(parti) >= 2000:
+            EtiketTarama.objects.bulk_update(parti, ['geohash'])
+            parti = []
+    if parti:
+        EtiketTarama.objects.bulk_update(parti, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('etiket', '0011_alter_etiket_evcil_hayvan'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etikettarama',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, help_text='GPS konumundan otomatik hesaplanır (yarıçap sorguları için)', max_length=12, verbose_name='Geohash'),
+        ),
+        migrations.CreateModel(
+            name='EtiketKonumDurumu',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('son_latitude', models.FloatField(blank=True, null=True, verbose_name='Son Enlem')),
+                ('son_longitude', models.FloatField(blank=True, null=True, verbose_name='Son Boylam')),
+                ('son_zaman', models.DateTimeField(blank=True, null=True, verbose_name='Son Konum Zamanı')),
+                ('son_hiz_kmh', models.FloatField(blank=True, null=True, verbose_name='Son Hız (km/s)')),
+                ('tarama_sayisi', models.PositiveIntegerField(default=0, verbose_name="GPS'li Tarama Sayısı")),
+                ('anomali_sayisi', models.PositiveIntegerField(default=0, verbose_name='Anomali Sayısı')),
+                ('etiket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='konum_durumu', to='etiket.etiket', verbose_name='Etiket')),
+                ('son_tarama', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='etiket.etikettarama', verbose_name='Son Tarama')),
+            ],
+            options={
+                'verbose_name': 'Etiket Konum Durumu',
+                'verbose_name_plural': 'Etiket Konum Durumları',
+            },
+        ),
+        migrations.RunPython(geohash_doldur, migrations.RunPython.noop),
+    ]
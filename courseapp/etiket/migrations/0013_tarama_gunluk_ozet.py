@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('etiket', '0012_tarama_geohash_konum_durumu'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaramaOzetIsareti',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('son_tarama_id', models.BigIntegerField(default=0, verbose_name='Son İşlenen Tarama ID')),
+                ('guncelleme_zamani', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Tarama Özet İşareti',
+                'verbose_name_plural': 'Tarama Özet İşareti',
+            },
+        ),
+        migrations.CreateModel(
+            name='EtiketTaramaGunluk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(verbose_name='Tarih')),
+                ('ip_sehir', models.CharField(blank=True, max_length=100, verbose_name='IP Şehir')),
+                ('konum_kaynagi', models.CharField(choices=[('GPS', 'GPS (Gerçek Konum)'), ('IP', 'IP (Tahmini Konum)'), ('MANUEL', 'Manuel (Kullanıcı Girdi)')], max_length=10, verbose_name='Konum Kaynağı')),
+                ('tarama_sayisi', models.PositiveIntegerField(default=0, verbose_name='Tarama Sayısı')),
+                ('eposta_gonderilen', models.PositiveIntegerField(default=0, verbose_name='E-posta Gönderilen')),
+                ('etiket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tarama_ozetleri', to='etiket.etiket', verbose_name='Etiket')),
+            ],
+            options={
+                'verbose_name': 'Günlük Tarama Özeti',
+                'verbose_name_plural': 'Günlük Tarama Özetleri',
+                'ordering': ['-tarih'],
+                'indexes': [models.Index(fields=['etiket', 'tarih'], name='etiket_etik_etiket__8fc54b_idx'), models.Index(fields=['tarih', 'ip_sehir'], name='etiket_etik_tarih_42bedd_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='etikettaramagunluk',
+            constraint=models.UniqueConstraint(fields=('tarih', 'etiket', 'ip_sehir', 'konum_kaynagi'), name='etiket_tarama_gunluk_tekil'),
+        ),
+    ]
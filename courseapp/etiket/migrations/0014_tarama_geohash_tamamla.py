@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:40
+
+from django.db import migrations
+
+# Göç anındaki geohash kodlayıcısının kopyası: canlı koddaki değişiklikler bu göçü etkilemez
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_HASSASIYET = 9
+
+
+def _geohash_kodla(lat, lon):
+    lat_aralik, lon_aralik = [-90.0, 90.0], [-180.0, 180.0]
+    kod, bitler, bit, boylam_sirasi = [], 0, 0, True
+    while len(kod) < _HASSASIYET:
+        aralik, deger = (lon_aralik, lon) if boylam_sirasi else (lat_aralik, lat)
+        orta = (aralik[0] + aralik[1]) / 2
+        bitler <<= 1
+        if deger >= orta:
+            bitler |= 1
+            aralik[0] = orta
+        else:
+            aralik[1] = orta
+        boylam_sirasi = not boylam_sirasi
+        bit += 1
+        if bit == 5:
+            kod.append(_BASE32[bitler])
+            bitler, bit = 0, 0
+    return ''.join(kod)
+
+
+def geohash_tamamla(apps, schema_editor):
+    """save() dışından (bulk_create / update) yazılmış, geohash'i boş GPS'li taramaları doldurur."""
+    EtiketTarama = apps.get_model('etiket', 'EtiketTarama')
+    taramalar = EtiketTarama.objects.filter(gps_latitude__isnull=False, gps_longitude__isnull=False, geohash='')
+    parti = []
+    for tarama in taramalar.only('id', 'gps_latitude', 'gps_longitude').iterator(chunk_size=2000):
+        tarama.geohash = _geohash_kodla(tarama.gps_latitude, tarama.gps_longitude)
+        parti.append(tarama)
+        if len(parti) >= 2000:
+            EtiketTarama.objects.bulk_update(parti, ['geohash'])
+            parti = []
+    if parti:
+        EtiketTarama.objects.bulk_update(parti, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('etiket', '0013_tarama_gunluk_ozet'),
+    ]
+
+    operations = [
+        migrations.RunPython(geohash_tamamla, migrations.RunPython.noop),
+    ]
@@ -6,7 +6,7 @@ from django.db.models import F
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.models import User
-from courseapp.constants import ETIKET_SATIS_KREDI
+from courseapp.constants import ETIKET_SATIS_KREDI, QR_SERI_KARAKTERLER, QR_SERI_NUMARA_UZUNLUGU
 import uuid
 import random
 import string
@@ -66,11 +66,11 @@ class EtiketKategoriFotografi(models.Model):
 
 def generate_serial_number():
     """7 karakterli benzersiz seri numarası üret (karışıklık yaratmayacak karakterler)"""
-    # Karışıklık yaratmayacak karakterler: 0, O, I, 1 hariç
-    chars = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+    # Karışıklık yaratmayacak karakterler: 0, O, I, 1 hariç (serial_lookup aynı alfabeyi kullanır)
+    chars = QR_SERI_KARAKTERLER
     
     while True:
-        serial = ''.join(random.choices(chars, k=7))
+        serial = ''.join(random.choices(chars, k=QR_SERI_NUMARA_UZUNLUGU))
         # Benzersizlik kontrolü
         if not Etiket.objects.filter(seri_numarasi=serial).exists():
             return serial
@@ -431,6 +431,8 @@ class EtiketTarama(models.Model):
     gps_longitude = models.FloatField(null=True, blank=True, verbose_name="GPS Boylam")
     gps_dogruluk = models.FloatField(null=True, blank=True, verbose_name="GPS Doğruluk (metre)", 
                                       help_text="Koordinatların doğruluk yarıçapı")
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, verbose_name="Geohash",
+                               help_text="GPS konumundan otomatik hesaplanır (yarıçap sorguları için)")
     
     # IP-based lokasyon (yedek - şu anda kullanılan)
     ip_adresi = models.GenericIPAddressField(null=True, blank=True, verbose_name="IP Adresi")
@@ -464,6 +466,18 @@ class EtiketTarama(models.Model):
             models.Index(fields=['gps_latitude', 'gps_longitude']), # GPS sorguları için
         ]
     
+    def save(self, *args, **kwargs):
+        from core.geo import geohash_kodla
+
+        if self.gps_latitude is not None and self.gps_longitude is not None:
+            self.geohash = geohash_kodla(self.gps_latitude, self.gps_longitude)
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'gps_latitude', 'gps_longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         lokasyon = self.get_lokasyon_kisa()
         return f"{self.etiket.seri_numarasi} - {self.tarama_zamani.strftime('%d.%m.%Y %H:%M')} ({lokasyon})"
@@ -499,6 +513,73 @@ class EtiketTarama(models.Model):
         return bool(self.bulan_isim or self.bulan_telefon or self.bulan_email)
 
 
+class EtiketKonumDurumu(models.Model):
+    """Etiketin son bilinen GPS konumu (anomali tespiti için akan durum, etiket başına tek satır)."""
+
+    etiket = models.OneToOneField(Etiket, on_delete=models.CASCADE, related_name='konum_durumu', verbose_name="Etiket")
+    son_tarama = models.ForeignKey(
+        EtiketTarama, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Son Tarama"
+    )
+    son_latitude = models.FloatField(null=True, blank=True, verbose_name="Son Enlem")
+    son_longitude = models.FloatField(null=True, blank=True, verbose_name="Son Boylam")
+    son_zaman = models.DateTimeField(null=True, blank=True, verbose_name="Son Konum Zamanı")
+    son_hiz_kmh = models.FloatField(null=True, blank=True, verbose_name="Son Hız (km/s)")
+    tarama_sayisi = models.PositiveIntegerField(default=0, verbose_name="GPS'li Tarama Sayısı")
+    anomali_sayisi = models.PositiveIntegerField(default=0, verbose_name="Anomali Sayısı")
+
+    class Meta:
+        verbose_name = "Etiket Konum Durumu"
+        verbose_name_plural = "Etiket Konum Durumları"
+
+    def __str__(self):
+        return f"{self.etiket.seri_numarasi} - {self.son_zaman or '-'}"
+
+
+class EtiketTaramaGunluk(models.Model):
+    """
+    Taramaların günlük özeti (etiket, şehir ve konum kaynağı kırılımında).
+    Ham taramalar cleanup_scans ile silinse de istatistikler buradan okunur.
+    """
+
+    tarih = models.DateField(verbose_name="Tarih")
+    etiket = models.ForeignKey(Etiket, on_delete=models.CASCADE, related_name='tarama_ozetleri', verbose_name="Etiket")
+    ip_sehir = models.CharField(max_length=100, blank=True, verbose_name="IP Şehir")
+    konum_kaynagi = models.CharField(max_length=10, choices=KONUM_KAYNAGI_SECENEKLERI, verbose_name="Konum Kaynağı")
+    tarama_sayisi = models.PositiveIntegerField(default=0, verbose_name="Tarama Sayısı")
+    eposta_gonderilen = models.PositiveIntegerField(default=0, verbose_name="E-posta Gönderilen")
+
+    class Meta:
+        verbose_name = "Günlük Tarama Özeti"
+        verbose_name_plural = "Günlük Tarama Özetleri"
+        ordering = ['-tarih']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tarih', 'etiket', 'ip_sehir', 'konum_kaynagi'], name='etiket_tarama_gunluk_tekil'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['etiket', 'tarih']),    # Etiket geçmişi için
+            models.Index(fields=['tarih', 'ip_sehir']),  # Şehir dağılımı için
+        ]
+
+    def __str__(self):
+        return f"{self.tarih} - {self.etiket_id} - {self.ip_sehir or '-'} ({self.tarama_sayisi})"
+
+
+class TaramaOzetIsareti(models.Model):
+    """Özete işlenmiş son tarama (high-water mark). Tek satır: pk=1."""
+
+    son_tarama_id = models.BigIntegerField(default=0, verbose_name="Son İşlenen Tarama ID")
+    guncelleme_zamani = models.DateTimeField(auto_now=True, verbose_name="Güncelleme Zamanı")
+
+    class Meta:
+        verbose_name = "Tarama Özet İşareti"
+        verbose_name_plural = "Tarama Özet İşareti"
+
+    def __str__(self):
+        return f"#{self.son_tarama_id}"
+
+
 # ============= KÜNYE YENİLEME SİSTEMİ =============
 
 class EtiketYenilemeFiyati(models.Model):
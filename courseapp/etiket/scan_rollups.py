@@ -0,0 +1,175 @@
+# etiket/scan_rollups.py
+"""
+Tarama istatistikleri için günlük özet tabloları.
+
+Ham taramalar (EtiketTarama) `tarama_ozetle` komutuyla gün, etiket, IP şehri
+ve konum kaynağı kırılımında EtiketTaramaGunluk tablosuna toplanır. İlerleme
+tek satırlık bir işaretle (TaramaOzetIsareti.son_tarama_id) tutulur: her
+çalıştırma sadece işaretten sonraki taramaları tek GROUP BY sorgusuyla okur ve
+özete ekler; işaret, özetle aynı transaction'da ilerletilir.
+
+E-posta bildirimi taramadan kısa süre sonra gönderildiği için son
+TARAMA_OZET_GECIKME_DAKIKA içindeki taramalar bir sonraki çalıştırmaya bırakılır.
+İstatistik okumaları özet tablodan yapılır; henüz özetlenmemiş taramalar ham
+tablodan eklenir. Böylece cleanup_scans ham satırları silse de geçmiş kaybolmaz.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from courseapp.constants import TARAMA_OZET_GECIKME_DAKIKA, TARAMA_OZET_PARTI_BOYUTU
+
+from .models import EtiketTarama, EtiketTaramaGunluk, TaramaOzetIsareti
+
+logger = logging.getLogger(__name__)
+
+_ANAHTAR_ALANLARI = ('tarih', 'etiket_id', 'ip_sehir', 'konum_kaynagi')
+
+
+def son_ozetlenen_tarama_id():
+    return TaramaOzetIsareti.objects.filter(pk=1).values_list('son_tarama_id', flat=True).first() or 0
+
+
+def _ozete_ekle(gruplar):
+    """GROUP BY sonuçlarını özet tablosuna ekler (varsa artırır, yoksa oluşturur)."""
+    gruplar = list(gruplar)
+    if not gruplar:
+        return
+    mevcut = {
+        tuple(getattr(ozet, alan) for alan in _ANAHTAR_ALANLARI): ozet
+        for ozet in EtiketTaramaGunluk.objects.filter(
+            tarih__in={g['tarih'] for g in gruplar}, etiket_id__in={g['etiket_id'] for g in gruplar}
+        )
+    }
+    guncellenecek, yeni = [], []
+    for grup in gruplar:
+        ozet = mevcut.get(tuple(grup[alan] for alan in _ANAHTAR_ALANLARI))
+        if ozet is None:
+            yeni.append(EtiketTaramaGunluk(
+                **{alan: grup[alan] for alan in _ANAHTAR_ALANLARI},
+                tarama_sayisi=grup['adet'], eposta_gonderilen=grup['eposta'],
+            ))
+        else:
+            ozet.tarama_sayisi += grup['adet']
+            ozet.eposta_gonderilen += grup['eposta']
+            guncellenecek.append(ozet)
+    EtiketTaramaGunluk.objects.bulk_update(guncellenecek, ['tarama_sayisi', 'eposta_gonderilen'], batch_size=500)
+    EtiketTaramaGunluk.objects.bulk_create(yeni, batch_size=500)
+
+
+def _parti_ozetle(esik, parti_boyutu):
+    """İşaretten sonraki bir partiyi özetler. Dönüş: işlenen tarama sayısı."""
+    with transaction.atomic():
+        isaret, _ = TaramaOzetIsareti.objects.select_for_update().get_or_create(pk=1)
+        idler = list(
+            EtiketTarama.objects.filter(pk__gt=isaret.son_tarama_id, tarama_zamani__lt=esik)
+            .order_by('pk').values_list('pk', flat=True)[:parti_boyutu]
+        )
+        if not idler:
+            return 0
+        gruplar = (
+            EtiketTarama.objects.filter(pk__gt=isaret.son_tarama_id, pk__lte=idler[-1])
+            .order_by()
+            .values('etiket_id', 'ip_sehir', 'konum_kaynagi', tarih=TruncDate('tarama_zamani'))
+            .annotate(adet=Count('id'), eposta=Count('id', filter=Q(email_gonderildi=True)))
+        )
+        _ozete_ekle(gruplar)
+        isaret.son_tarama_id = idler[-1]
+        isaret.save(update_fields=['son_tarama_id', 'guncelleme_zamani'])
+    return len(idler)
+
+
+def taramalari_ozetle(parti_boyutu=TARAMA_OZET_PARTI_BOYUTU, gecikme_dakika=TARAMA_OZET_GECIKME_DAKIKA, simdi=None):
+    """
+    Yeni taramaları partiler halinde özete ekler.
+    Dönüş: {'tarama': n, 'parti': n, 'son_tarama_id': n}
+    """
+    esik = (simdi or timezone.now()) - timedelta(minutes=gecikme_dakika)
+    rapor = {'tarama': 0, 'parti': 0}
+    while True:
+        adet = _parti_ozetle(esik, parti_boyutu)
+        if not adet:
+            break
+        rapor['tarama'] += adet
+        rapor['parti'] += 1
+        if adet < parti_boyutu:
+            break
+    rapor['son_tarama_id'] = son_ozetlenen_tarama_id()
+    return rapor
+
+
+# --- Okuma ---
+
+def etiket_tarama_sayilari(etiket_id, bugun=None):
+    """Etiketin toplam, bu ay, bu hafta ve bugünkü tarama sayıları (özet + özetlenmemiş ham satırlar)."""
+    bugun = bugun or timezone.localdate()
+    donemler = {
+        'aylik': bugun.replace(day=1),
+        'haftalik': bugun - timedelta(days=bugun.weekday()),
+        'gunluk': bugun,
+    }
+    ozet = EtiketTaramaGunluk.objects.filter(etiket_id=etiket_id).aggregate(
+        toplam=Sum('tarama_sayisi'),
+        **{ad: Sum('tarama_sayisi', filter=Q(tarih__gte=bas)) for ad, bas in donemler.items()},
+    )
+    ham = (
+        EtiketTarama.objects.filter(etiket_id=etiket_id, pk__gt=son_ozetlenen_tarama_id())
+        .annotate(tarih=TruncDate('tarama_zamani'))
+        .aggregate(
+            toplam=Count('id'),
+            **{ad: Count('id', filter=Q(tarih__gte=bas)) for ad, bas in donemler.items()},
+        )
+    )
+    return {ad: (ozet[ad] or 0) + (ham[ad] or 0) for ad in ('toplam', *donemler)}
+
+
+def _ozetler(baslangic=None, bitis=None, etiket_id=None):
+    qs = EtiketTaramaGunluk.objects.all()
+    if baslangic:
+        qs = qs.filter(tarih__gte=baslangic)
+    if bitis:
+        qs = qs.filter(tarih__lte=bitis)
+    if etiket_id:
+        qs = qs.filter(etiket_id=etiket_id)
+    return qs.order_by()
+
+
+def gunluk_tarama_serisi(baslangic=None, bitis=None, etiket_id=None):
+    """[{'tarih', 'tarama', 'eposta'}, ...] eskiden yeniye."""
+    return list(
+        _ozetler(baslangic, bitis, etiket_id).values('tarih')
+        .annotate(tarama=Sum('tarama_sayisi'), eposta=Sum('eposta_gonderilen'))
+        .order_by('tarih')
+    )
+
+
+def sehir_dagilimi(baslangic=None, bitis=None, limit=10):
+    """En çok tarama yapılan IP şehirleri: [{'ip_sehir', 'tarama'}, ...]"""
+    return list(
+        _ozetler(baslangic, bitis).values('ip_sehir')
+        .annotate(tarama=Sum('tarama_sayisi'))
+        .order_by('-tarama')[:limit]
+    )
+
+
+def kaynak_dagilimi(baslangic=None, bitis=None):
+    """{konum_kaynagi: tarama sayısı}"""
+    return dict(
+        _ozetler(baslangic, bitis).values('konum_kaynagi')
+        .annotate(tarama=Sum('tarama_sayisi'))
+        .values_list('konum_kaynagi', 'tarama')
+    )
+
+
+def eposta_basari_orani(baslangic=None, bitis=None, etiket_id=None):
+    """E-posta gönderilen taramaların oranı (0-1); tarama yoksa None."""
+    toplam = _ozetler(baslangic, bitis, etiket_id).aggregate(
+        tarama=Sum('tarama_sayisi'), eposta=Sum('eposta_gonderilen')
+    )
+    if not toplam['tarama']:
+        return None
+    return toplam['eposta'] / toplam['tarama']
@@ -0,0 +1,123 @@
+# etiket/serial_lookup.py
+"""
+Seri numarası arama servisi.
+
+Kullanıcı girdisi QR seri alfabesine göre normalize edilir (boşluk, tire, küçük harf,
+O/0 ve I/1 karışıklıkları). Tüm aday seriler benzersiz indeks üzerinden tek
+sorguda aranır; sonuç her zaman veritabanının güncel halidir. Süreç içi bir
+seri kopyası veya "bulunamadı" önbelleği tutulmaz: diğer worker'larda
+oluşturulan seriyi göremezler ve geçerliliklerini doğrulamak aramanın kendisi
+kadar sorguya mal olur. Seri numarası taramasını zorlaştırmak için IP başına
+deneme sayısı sınırlanır.
+
+İstemci IP'si REMOTE_ADDR'dır; uygulama GUVENILIR_PROXY_SAYISI kadar ters
+proxy arkasındaysa X-Forwarded-For'un sağdan o kadarıncı girdisi kullanılır
+(soldaki girdiler istemci tarafından uydurulabilir).
+"""
+import itertools
+import logging
+
+from django.core.cache import cache
+
+from courseapp.constants import GUVENILIR_PROXY_SAYISI, SERI_ARAMA_DAKIKA_LIMITI
+
+from .models import Etiket
+
+logger = logging.getLogger(__name__)
+
+# Alfabede olmayan, sık karıştırılan karakterlerin olası karşılıkları
+_BELIRSIZ_KARAKTERLER = {
+    'O': 'DQ',
+    '0': 'DQ',
+    'I': 'LJ',
+    '1': 'LJ',
+}
+_AYRACLAR = ' -_.\t'
+_MAKS_ADAY = 16
+
+
+class SeriAramaLimitiAsildi(Exception):
+    """IP başına dakikalık seri arama limiti aşıldı."""
+
+    mesaj = "Çok fazla deneme yaptınız. Lütfen bir dakika sonra tekrar deneyin."
+
+
+def seri_normalize(girdi):
+    """Boşluk/ayraçları temizler ve büyük harfe çevirir."""
+    if not girdi:
+        return ''
+    temiz = str(girdi).strip().upper()
+    for ayrac in _AYRACLAR:
+        temiz = temiz.replace(ayrac, '')
+    return temiz
+
+
+def seri_adaylari(girdi):
+    """
+    Normalize edilmiş girdi ve alfabe dışı karakterlerin olası karşılıklarıyla
+    üretilen aday seriler (ilk aday her zaman girdinin kendisidir).
+    """
+    normal = seri_normalize(girdi)
+    if not normal:
+        return []
+    adaylar = [normal]
+    secenekler = [_BELIRSIZ_KARAKTERLER.get(k, k) for k in normal]
+    if any(len(s) > 1 for s in secenekler):
+        for kombinasyon in itertools.islice(itertools.product(*secenekler), _MAKS_ADAY):
+            aday = ''.join(kombinasyon)
+            if aday not in adaylar:
+                adaylar.append(aday)
+    return adaylar
+
+
+def _limit_kontrol(ip):
+    if not ip:
+        return
+    anahtar = f'seri_arama_limit_{ip}'
+    if cache.add(anahtar, 1, 60):
+        return
+    try:
+        deneme = cache.incr(anahtar)
+    except ValueError:
+        cache.set(anahtar, 1, 60)
+        return
+    if deneme > SERI_ARAMA_DAKIKA_LIMITI:
+        logger.warning("Seri arama limiti aşıldı: ip=%s deneme=%s", ip, deneme)
+        raise SeriAramaLimitiAsildi()
+
+
+def istemci_ip(request):
+    """Limit anahtarı için istemci IP'si (yalnızca güvenilir proxy'lerin eklediği girdilere bakılır)."""
+    uzak = request.META.get('REMOTE_ADDR', '')
+    if not GUVENILIR_PROXY_SAYISI:
+        return uzak
+    girdiler = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if len(girdiler) < GUVENILIR_PROXY_SAYISI:
+        return uzak
+    return girdiler[-GUVENILIR_PROXY_SAYISI]
+
+
+def _tekil_eslesme(normal, eslesenler):
+    """Girdi birebir eşleşmiyorsa ve birden fazla düzeltme mümkünse tahmin yapma."""
+    if normal in eslesenler:
+        return [normal]
+    return eslesenler if len(eslesenler) == 1 else []
+
+
+def seri_ile_etiket_bul(girdi, request=None):
+    """
+    Kullanıcı girdisine karşılık gelen etiketi döndürür (yoksa veya belirsizse None).
+
+    request verilirse IP başına limit uygulanır ve limit aşımında
+    `SeriAramaLimitiAsildi` fırlatılır.
+    """
+    if request is not None:
+        _limit_kontrol(istemci_ip(request))
+
+    adaylar = seri_adaylari(girdi)
+    if not adaylar:
+        return None
+
+    etiketler = {etiket.seri_numarasi: etiket for etiket in Etiket.objects.filter(seri_numarasi__in=adaylar)}
+    eslesenler = _tekil_eslesme(adaylar[0], [aday for aday in adaylar if aday in etiketler])
+    return etiketler[eslesenler[0]] if eslesenler else None
@@ -1,3 +1,125 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from courseapp.constants import SERI_ARAMA_DAKIKA_LIMITI
+from core.geo import geohash_kodla, haversine_m, kapsayan_hucreler
+from etiket.geo import konum_guncelle, yaricaptaki_taramalar
+from etiket.models import Etiket, EtiketKonumDurumu, EtiketTarama, EtiketTaramaGunluk
+from etiket.scan_rollups import eposta_basari_orani, etiket_tarama_sayilari, sehir_dagilimi, taramalari_ozetle
+from etiket.serial_lookup import SeriAramaLimitiAsildi, seri_adaylari, seri_ile_etiket_bul
+
+
+class SeriAramaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.etiket = Etiket.objects.create(seri_numarasi='ABCD2QL')
+
+    def test_girdi_normalize_edilir(self):
+        self.assertEqual(seri_ile_etiket_bul(' abcd-2ql ').pk, self.etiket.pk)
+        # O/0 -> D/Q ve I/1 -> L/J karışıklıkları düzeltilir
+        self.assertEqual(seri_ile_etiket_bul('ABCD20I').pk, self.etiket.pk)
+        self.assertIn('ABCD2QL', seri_adaylari('abcd 2o1'))
+
+    def test_arama_tek_sorgu(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(seri_ile_etiket_bul('abcd 2o1').pk, self.etiket.pk)
+        with self.assertNumQueries(1):
+            self.assertIsNone(seri_ile_etiket_bul('ZZZZZZZ'))
+
+    def test_baska_surecte_duzenlenen_seri_bulunur(self):
+        seri_ile_etiket_bul('NEW2345')
+        # Sinyalsiz güncelleme (başka bir worker): bu süreçte geçersiz kılınacak bir şey yok
+        Etiket.objects.filter(pk=self.etiket.pk).update(seri_numarasi='NEW2345')
+        self.assertEqual(seri_ile_etiket_bul('new2345').pk, self.etiket.pk)
+        self.assertIsNone(seri_ile_etiket_bul('ABCD2QL'))
+
+    def test_yeni_etiket_hemen_bulunur(self):
+        self.assertIsNone(seri_ile_etiket_bul('XYZ2345'))
+        yeni = Etiket.objects.create(seri_numarasi='XYZ2345')
+        self.assertEqual(seri_ile_etiket_bul('xyz2345').pk, yeni.pk)
+
+    def test_ip_limiti(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        for _ in range(SERI_ARAMA_DAKIKA_LIMITI):
+            seri_ile_etiket_bul('ZZZZZZZ', request=request)
+        with self.assertRaises(SeriAramaLimitiAsildi):
+            seri_ile_etiket_bul('ABCD2QL', request=request)
+
+    def test_ip_limiti_x_forwarded_for_ile_atlatilamaz(self):
+        for n in range(SERI_ARAMA_DAKIKA_LIMITI):
+            request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR=f'192.0.2.{n}')
+            seri_ile_etiket_bul('ZZZZZZZ', request=request)
+        with self.assertRaises(SeriAramaLimitiAsildi):
+            seri_ile_etiket_bul('ZZZZZZZ', request=request)
+
+
+class TaramaKonumTests(TestCase):
+    def setUp(self):
+        self.etiket = Etiket.objects.create(seri_numarasi='GEO2QLX')
+
+    def _tarama(self, lat, lon, dakika_once=0):
+        tarama = EtiketTarama.objects.create(etiket=self.etiket, gps_latitude=lat, gps_longitude=lon)
+        EtiketTarama.objects.filter(pk=tarama.pk).update(
+            tarama_zamani=timezone.now() - timedelta(minutes=dakika_once)
+        )
+        tarama.refresh_from_db()
+        return tarama
+
+    def test_geohash_ve_yaricap_sorgusu(self):
+        self.assertEqual(geohash_kodla(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertLessEqual(len(kapsayan_hucreler(41.0, 29.0, 5000)), 9)
+
+        merkez = (41.0082, 28.9784)  # İstanbul
+        yakin = self._tarama(41.0172, 28.9784)  # ~1 km kuzey
+        self._tarama(41.0802, 28.9784)  # ~8 km
+        self._tarama(39.9334, 32.8597)  # Ankara
+        self.assertTrue(yakin.geohash.startswith(geohash_kodla(*merkez, 5)))
+
+        sonuc = yaricaptaki_taramalar(*merkez, 5000)
+        self.assertEqual([t.pk for t in sonuc], [yakin.pk])
+        self.assertAlmostEqual(sonuc[0].mesafe_m, haversine_m(*merkez, 41.0172, 28.9784), places=3)
+        self.assertEqual(len(yaricaptaki_taramalar(*merkez, 10000)), 2)
+        self.assertEqual(len(yaricaptaki_taramalar(*merkez, 500000)), 3)
+
+    def test_akan_anomali_tespiti(self):
+        self.assertEqual(konum_guncelle(self._tarama(41.0082, 28.9784, dakika_once=20)), [])
+        anomaliler = konum_guncelle(self._tarama(39.9334, 32.8597, dakika_once=0))
+        self.assertEqual([a['type'] for a in anomaliler], ['DISTANCE_JUMP'])
+
+        durum = EtiketKonumDurumu.objects.get(etiket=self.etiket)
+        self.assertEqual((durum.tarama_sayisi, durum.anomali_sayisi), (2, 1))
+        self.assertGreater(durum.son_hiz_kmh, 900)
+
+
+class TaramaOzetTests(TestCase):
+    def setUp(self):
+        self.etiket = Etiket.objects.create(seri_numarasi='OZT2QLX')
+
+    def _tarama(self, saat_once, sehir='Ankara', eposta=False):
+        tarama = EtiketTarama.objects.create(etiket=self.etiket, ip_sehir=sehir, email_gonderildi=eposta)
+        EtiketTarama.objects.filter(pk=tarama.pk).update(tarama_zamani=timezone.now() - timedelta(hours=saat_once))
+        return tarama
+
+    def test_sadece_yeni_taramalar_islenir(self):
+        for _ in range(3):
+            self._tarama(48, eposta=True)
+        self._tarama(48, sehir='İzmir')
+        taze = self._tarama(0)  # gecikme süresi dolmadı
+
+        rapor = taramalari_ozetle(parti_boyutu=2)
+        self.assertEqual((rapor['tarama'], rapor['parti']), (4, 2))
+        self.assertEqual(rapor['son_tarama_id'], taze.pk - 1)
+        self.assertEqual(taramalari_ozetle()['tarama'], 0)
+
+        ozet = EtiketTaramaGunluk.objects.get(etiket=self.etiket, ip_sehir='Ankara')
+        self.assertEqual((ozet.tarama_sayisi, ozet.eposta_gonderilen), (3, 3))
+        self.assertEqual(sehir_dagilimi()[0], {'ip_sehir': 'Ankara', 'tarama': 3})
+        self.assertEqual(eposta_basari_orani(), 0.75)
+
+        # Ham satırlar silinse de sayılar özetten gelir; özetlenmemiş tarama ham tablodan eklenir
+        EtiketTarama.objects.filter(pk__lt=taze.pk).delete()
+        self.assertEqual(etiket_tarama_sayilari(self.etiket.pk)['toplam'], 5)
+        self.assertEqual(etiket_tarama_sayilari(self.etiket.pk)['gunluk'], 1)
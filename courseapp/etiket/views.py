@@ -10,6 +10,9 @@ from .models import Etiket, EtiketTarama, EtiketYenileme, EtiketYenilemeFiyati
 from anahtarlik.models import Bildirim
 from django.contrib.auth.decorators import login_required
 from .forms import SeriNumaraForm, EtiketYenilemeForm
+from .serial_lookup import SeriAramaLimitiAsildi, seri_ile_etiket_bul, seri_normalize
+from core.payments import yenileme_odendi
+from .geo import konum_guncelle
 from courseapp.constants import GPS_ACCURACY_IDEAL, GPS_ACCURACY_ACCEPTABLE, GPS_ACCURACY_POOR
 from django.db import transaction
 from django.core.cache import cache
@@ -20,7 +23,6 @@ import io
 import logging
 import requests
 import stripe
-import math
 import re
 
 logger = logging.getLogger(__name__)
@@ -48,12 +50,15 @@ def tarama_detay(request, tarama_id):
         gps_lat_str = f"{tarama.gps_latitude:.6f}".replace(',', '.')
         gps_lng_str = f"{tarama.gps_longitude:.6f}".replace(',', '.')
     
+    from .scan_rollups import etiket_tarama_sayilari
+
     context = {
         'tarama': tarama,
         'hayvan': tarama.etiket.evcil_hayvan,
         'etiket': tarama.etiket,
         'gps_lat_str': gps_lat_str,
         'gps_lng_str': gps_lng_str,
+        'tarama_sayilari': etiket_tarama_sayilari(tarama.etiket_id),
     }
     return render(request, 'etiket/tarama_detay.html', context)
 
@@ -78,59 +83,15 @@ def create_notification(sahip, baslik, mesaj, tur='GENEL', tarama=None, url=None
         return None
 
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    """İki GPS koordinatı arası mesafeyi hesapla (Haversine formula - metre cinsinden)"""
-    R = 6371000  # Dünya yarıçapı (metre)
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = math.sin(delta_lat/2) * math.sin(delta_lat/2) + \
-        math.cos(lat1_rad) * math.cos(lat2_rad) * \
-        math.sin(delta_lon/2) * math.sin(delta_lon/2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-    
-    return R * c
-
-
 def check_location_anomalies(tarama):
-    """GPS/IP uyumsuzluğu ve anomali tespiti"""
-    anomalies = []
-    
-    # GPS ve IP lokasyon karşılaştırması
+    """GPS/IP uyumsuzluğu ve anomali tespiti (etiketin son konumuyla, O(1))"""
     if tarama.gps_latitude and tarama.gps_longitude and tarama.ip_sehir:
-        # IP lokasyonundan koordinat tahmin (basit)
-        # Bu gerçek uygulamada geocoding API ile yapılmalı
-        # Şimdilik sadece log
+        # IP lokasyonundan koordinat tahmini gerçek uygulamada geocoding API ile yapılmalı; şimdilik sadece log
         logger.info(f"🔍 GPS/IP karşılaştırma: GPS={tarama.gps_latitude:.6f},{tarama.gps_longitude:.6f} - IP={tarama.ip_sehir}")
-        
-        # Önceki taramalar ile mesafe kontrolü
-        recent_scans = EtiketTarama.objects.filter(
-            etiket=tarama.etiket,
-            tarama_zamani__lt=tarama.tarama_zamani
-        ).order_by('-tarama_zamani')[:3]
-        
-        if recent_scans.exists():
-            for prev_scan in recent_scans:
-                if prev_scan.gps_latitude and prev_scan.gps_longitude:
-                    distance = calculate_distance(
-                        tarama.gps_latitude, tarama.gps_longitude,
-                        prev_scan.gps_latitude, prev_scan.gps_longitude
-                    )
-                    time_diff = (tarama.tarama_zamani - prev_scan.tarama_zamani).total_seconds() / 3600  # saat
-                    
-                    # 100km'den fazla mesafe ve 1 saatten kısa süre = şüpheli
-                    if distance > 100000 and time_diff < 1:
-                        anomalies.append({
-                            'type': 'DISTANCE_JUMP',
-                            'distance_km': distance / 1000,
-                            'time_hours': time_diff,
-                            'message': f"Son taramadan {distance/1000:.1f}km uzakta (sadece {time_diff:.1f} saat sonra)"
-                        })
-                        logger.warning(f"⚠️ ŞÜPHELİ KONUM: Son taramadan {distance/1000:.1f}km uzakta")
-    
+
+    anomalies = konum_guncelle(tarama)
+    for anomaly in anomalies:
+        logger.warning(f"⚠️ ŞÜPHELİ KONUM: {anomaly['message']}")
     return anomalies
 
 
@@ -895,11 +856,14 @@ def location_test_view(request):
 # 2. SERİ NUMARASIYLA YÖNLENDİRME
 def qr_by_serial_view(request, serial_number):
     try:
-        etiket = Etiket.objects.get(seri_numarasi=serial_number)
-        return redirect('etiket:qr_landing', tag_id=etiket.etiket_id)
-    except Etiket.DoesNotExist:
+        etiket = seri_ile_etiket_bul(serial_number, request=request)
+    except SeriAramaLimitiAsildi as exc:
+        messages.error(request, f"❌ {exc.mesaj}")
+        return redirect('etiket:lookup')
+    if etiket is None:
         messages.error(request, "❌ Bu seri numarasına ait etiket bulunamadı.")
         return redirect('etiket:lookup')
+    return redirect('etiket:qr_landing', tag_id=etiket.etiket_id)
 
 
 # 3. QR KODUNU OLUŞTUR VE İNDİR
@@ -934,8 +898,10 @@ def serial_number_lookup_view(request):
 
     if request.method == "POST":
         if form.is_valid():
-            serial_number = form.cleaned_data['seri_numarasi']
-            return redirect('etiket:qr_by_serial', serial_number=serial_number)
+            serial_number = seri_normalize(form.cleaned_data['seri_numarasi'])
+            if serial_number:
+                return redirect('etiket:qr_by_serial', serial_number=serial_number)
+            form.add_error('seri_numarasi', "Geçerli bir künye numarası girin.")
 
     return render(request, 'etiket/serial_lookup_form.html', {'form': form})
 
@@ -1098,10 +1064,9 @@ def etiket_yenileme_basarili(request, yenileme_id):
         session = stripe.checkout.Session.retrieve(yenileme.stripe_session_id)
         
         if session.payment_status == 'paid':
-            # Ödeme başarılı
-            yenileme.odeme_durumu = 'ODENDI'
-            yenileme.stripe_payment_intent_id = session.payment_intent
-            yenileme.save()  # save() metodu otomatik olarak etiket süresini uzatacak
+            # Ödeme başarılı - webhook ile aynı idempotent yol (süre iki kez uzamaz)
+            yenileme_odendi(yenileme.id, session.payment_intent or '')
+            yenileme.refresh_from_db()
             
             messages.success(request, f"Künye başarıyla yenilendi! Yeni bitiş tarihi: {yenileme.yeni_bitis_tarihi.strftime('%d.%m.%Y')}")
         else:
@@ -5,6 +5,7 @@ from django.utils.html import format_html
 from django.urls import reverse
 from django.utils import timezone
 from .models import HayvanProfili, HayvanResmi, Ilan, IlanKategori, KrediHareketi, KrediPaketi
+from .moderation import ilanlari_onayla, ilanlari_reddet
 
 
 class HayvanResmiInline(admin.TabularInline):
@@ -201,6 +202,10 @@ class IlanAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related(
             'hayvan_profili', 
             'hayvan_profili__kullanici',
+            # kullanici_bilgisi'ndeki profil kontrolleri satır başına sorgu atmasın
+            'hayvan_profili__kullanici__sahip',
+            'hayvan_profili__kullanici__veteriner_profili',
+            'hayvan_profili__kullanici__petshop_profili',
             'hayvan_profili__tur',
             'hayvan_profili__irk',
             'hayvan_profili__il'
@@ -244,7 +249,7 @@ class IlanAdmin(admin.ModelAdmin):
             user_type = "🏠 Sahip"
         elif hasattr(user, 'veteriner_profili'):
             user_type = "⚕️ Veteriner"
-        elif hasattr(user, 'petshop'):
+        elif hasattr(user, 'petshop_profili'):
             user_type = "🏪 Pet Shop"
         
         return format_html(
@@ -402,127 +407,13 @@ class IlanAdmin(admin.ModelAdmin):
     
     def onayla_ilanlar(self, request, queryset):
         """Seçili ilanları onayla ve kullanıcılara bildirim gönder"""
-        from anahtarlik.models import Bildirim
-        from django.conf import settings
-        from django.core.mail import send_mail
-        
-        updated_count = 0
-        
-        for ilan in queryset:
-            # İlanı onayla ve aktif et
-            ilan.onaylandi = True
-            ilan.aktif = True
-            ilan.save()
-            updated_count += 1
-            
-            # Kullanıcıya bildirim gönder
-            try:
-                kullanici = ilan.hayvan_profili.kullanici
-                
-                # E-posta gönder
-                try:
-                    subject = f"✅ İlanınız Onaylandı - {ilan.baslik}"
-                    message = f"""Merhaba {kullanici.first_name or kullanici.username}, 
-
-İlanınız başarıyla onaylandı ve yayına alındı!
-
-📋 İlan Detayları:
-- Hayvan: {ilan.hayvan_profili.hayvan_adi}
-- Tür: {ilan.hayvan_profili.tur.ad}
-- Başlık: {ilan.baslik}
-- İlan Türü: {ilan.get_ilan_turu_display()}
-
-İlanınız artık sitede görünür durumda. Sahiplendirme sürecinde başarılar dileriz!
-
-Sevgiler,
-PetSafe Hub Ekibi"""
-                    recipient_list = [kullanici.email]
-                    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list, fail_silently=True)
-                except Exception as e:
-                    print(f"E-posta gönderme hatası: {e}")
-                
-                # Sahip kullanıcısı için bildirim oluştur
-                if hasattr(kullanici, 'sahip'):
-                    try:
-                        bildirim_url = f"/ilanlar/ilan/{ilan.id}/"
-                        Bildirim.objects.create(
-                            sahip=kullanici.sahip,
-                            baslik=f"✅ İlanınız Onaylandı",
-                            mesaj=f"{ilan.baslik} başlıklı ilanınız onaylandı ve yayına alındı!",
-                            tur='GENEL',
-                            oncelik='NORMAL',
-                            url=bildirim_url,
-                            okundu=False
-                        )
-                    except Exception as e:
-                        print(f"Bildirim oluşturma hatası: {e}")
-                
-            except Exception as e:
-                print(f"Bildirim hatası: {e}")
-        
+        updated_count = ilanlari_onayla(queryset)
         self.message_user(request, f'✅ {updated_count} ilan onaylandı ve aktif edildi.', 'success')
     onayla_ilanlar.short_description = "✅ Seçili ilanları onayla"
     
     def reddet_ilanlar(self, request, queryset):
         """Seçili ilanları reddet ve kullanıcılara bildirim gönder"""
-        from anahtarlik.models import Bildirim
-        from django.conf import settings
-        from django.core.mail import send_mail
-        
-        updated_count = 0
-        
-        for ilan in queryset:
-            # İlanı reddet ve pasif et
-            ilan.onaylandi = False
-            ilan.aktif = False
-            ilan.save()
-            updated_count += 1
-            
-            # Kullanıcıya bildirim gönder
-            try:
-                kullanici = ilan.hayvan_profili.kullanici
-                
-                # E-posta gönder
-                try:
-                    subject = f"❌ İlanınız Reddedildi - {ilan.baslik}"
-                    message = f"""Merhaba {kullanici.first_name or kullanici.username},
-
-Maalesef ilanınız yayın kurallarına uymadığı için reddedilmiştir.
-
-📋 İlan Detayları:
-- Hayvan: {ilan.hayvan_profili.hayvan_adi}
-- Tür: {ilan.hayvan_profili.tur.ad}
-- Başlık: {ilan.baslik}
-- İlan Türü: {ilan.get_ilan_turu_display()}
-
-İlanınızı düzenleyip tekrar gönderebilirsiniz. Sorularınız için destek ekibimizle iletişime geçebilirsiniz.
-
-Sevgiler,
-PetSafe Hub Ekibi"""
-                    recipient_list = [kullanici.email]
-                    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list, fail_silently=True)
-                except Exception as e:
-                    print(f"E-posta gönderme hatası: {e}")
-                
-                # Sahip kullanıcısı için bildirim oluştur
-                if hasattr(kullanici, 'sahip'):
-                    try:
-                        bildirim_url = f"/ilanlar/"
-                        Bildirim.objects.create(
-                            sahip=kullanici.sahip,
-                            baslik=f"❌ İlanınız Reddedildi",
-                            mesaj=f"{ilan.baslik} başlıklı ilanınız reddedildi. Lütfen ilanınızı düzenleyip tekrar gönderin.",
-                            tur='GENEL',
-                            oncelik='NORMAL',
-                            url=bildirim_url,
-                            okundu=False
-                        )
-                    except Exception as e:
-                        print(f"Bildirim oluşturma hatası: {e}")
-                
-            except Exception as e:
-                print(f"Bildirim hatası: {e}")
-        
+        updated_count = ilanlari_reddet(queryset)
         self.message_user(request, f'❌ {updated_count} ilan reddedildi ve pasif edildi.', 'warning')
     reddet_ilanlar.short_description = "❌ Seçili ilanları reddet"
     
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:40
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ilan', '0018_alter_hayvanprofili_telefon'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hayvanprofili',
+            name='profil_fotografi',
+            field=models.ImageField(storage=core.storage.IcerikAdresliDepolama(), upload_to='hayvan_profilleri/', verbose_name='Profil Fotoğrafı'),
+        ),
+        migrations.AlterField(
+            model_name='hayvanresmi',
+            name='resim',
+            field=models.ImageField(storage=core.storage.IcerikAdresliDepolama(), upload_to='hayvan_resimleri/', verbose_name='Resim'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
 
+from core.storage import icerik_depolama
+
 # İlan türleri
 ILAN_SAHIPLENDIRME = 'SAHIPLENDIRME'
 ILAN_SATIS = 'SATIS'
@@ -80,7 +82,7 @@ class HayvanProfili(models.Model):
     
     # Açıklama ve medya
     aciklama = models.TextField(verbose_name="Açıklama", blank=True)
-    profil_fotografi = models.ImageField(upload_to='hayvan_profilleri/', verbose_name="Profil Fotoğrafı")
+    profil_fotografi = models.ImageField(upload_to='hayvan_profilleri/', storage=icerik_depolama, verbose_name="Profil Fotoğrafı")
     
     # Sistem bilgileri
     aktif = models.BooleanField(default=True, verbose_name="Aktif")
@@ -143,7 +145,7 @@ class HayvanResmi(models.Model):
     """Hayvan profili için çoklu resim yükleme (maksimum 3 resim)"""
     
     hayvan_profili = models.ForeignKey(HayvanProfili, on_delete=models.CASCADE, related_name='resimler')
-    resim = models.ImageField(upload_to='hayvan_resimleri/', verbose_name="Resim")
+    resim = models.ImageField(upload_to='hayvan_resimleri/', storage=icerik_depolama, verbose_name="Resim")
     sira = models.PositiveIntegerField(default=0, verbose_name="Sıra")
     olusturulma_tarihi = models.DateTimeField(auto_now_add=True)
     
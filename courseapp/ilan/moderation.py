@@ -0,0 +1,151 @@
+# ilan/moderation.py
+"""
+Toplu ilan moderasyonu (admin onay/ret aksiyonları).
+
+Seçili ilanlar tek tek save() edilmez; durum değişikliği küme halinde UPDATE ile
+yapılır, sahip bildirimleri tek bulk_create ile yazılır ve e-postalar giden
+e-posta kutusuna (core/outbox.py) alınır. Hepsi tek transaction'dadır: SMTP
+hatası partiyi yarıda kesmez, e-postalar commit sonrası arka planda gönderilir.
+
+Ilan.save()'in onay anındaki yan etkileri burada da uygulanır: yeni onaylanan
+ilanın 30 günlük süresi başlar ve hayvan profilinin evcil hayvan bağlantısı
+kaldırılır (snapshot). bulk_create/update sinyal tetiklemediği için sahip panel
+özetleri elle silinir.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from anahtarlik.dashboard import sahip_panel_ozeti_sil
+from anahtarlik.models import Bildirim
+from core.models import GidenEposta
+from core.outbox import epostalari_kuyruga_al
+
+from .models import HayvanProfili, Ilan
+
+ONAY_EPOSTASI = """Merhaba {ad},
+
+İlanınız başarıyla onaylandı ve yayına alındı!
+
+📋 İlan Detayları:
+- Hayvan: {hayvan}
+- Tür: {tur}
+- Başlık: {baslik}
+- İlan Türü: {ilan_turu}
+
+İlanınız artık sitede görünür durumda. Sahiplendirme sürecinde başarılar dileriz!
+
+Sevgiler,
+PetSafe Hub Ekibi"""
+
+RET_EPOSTASI = """Merhaba {ad},
+
+Maalesef ilanınız yayın kurallarına uymadığı için reddedilmiştir.
+
+📋 İlan Detayları:
+- Hayvan: {hayvan}
+- Tür: {tur}
+- Başlık: {baslik}
+- İlan Türü: {ilan_turu}
+
+İlanınızı düzenleyip tekrar gönderebilirsiniz. Sorularınız için destek ekibimizle iletişime geçebilirsiniz.
+
+Sevgiler,
+PetSafe Hub Ekibi"""
+
+
+def _ilanlar(idler):
+    return list(
+        Ilan.objects.filter(pk__in=idler)
+        .select_related('hayvan_profili__kullanici__sahip', 'hayvan_profili__tur')
+        .order_by('pk')
+    )
+
+
+def _bildir(ilanlar, konu, sablon, bildirim_basligi, bildirim_mesaji, bildirim_url):
+    """Her ilan sahibine e-posta (kutuya) ve Sahip ise panel bildirimi; ikisi de tek sorgu."""
+    epostalar, bildirimler, sahip_idleri = [], [], set()
+    for ilan in ilanlar:
+        kullanici = ilan.hayvan_profili.kullanici
+        epostalar.append(GidenEposta(
+            alici=kullanici.email,
+            konu=konu.format(baslik=ilan.baslik),
+            mesaj=sablon.format(
+                ad=kullanici.first_name or kullanici.username,
+                hayvan=ilan.hayvan_profili.hayvan_adi,
+                tur=ilan.hayvan_profili.tur.ad,
+                baslik=ilan.baslik,
+                ilan_turu=ilan.get_ilan_turu_display(),
+            ),
+            gonderen=settings.DEFAULT_FROM_EMAIL,
+        ))
+        if hasattr(kullanici, 'sahip'):
+            sahip_idleri.add(kullanici.sahip.pk)
+            bildirimler.append(Bildirim(
+                sahip=kullanici.sahip,
+                baslik=bildirim_basligi,
+                mesaj=bildirim_mesaji.format(baslik=ilan.baslik),
+                tur='GENEL',
+                oncelik='NORMAL',
+                url=bildirim_url.format(pk=ilan.pk),
+                okundu=False,
+            ))
+    Bildirim.objects.bulk_create(bildirimler, batch_size=500)
+    epostalari_kuyruga_al(epostalar)
+    transaction.on_commit(lambda: [sahip_panel_ozeti_sil(sahip_id) for sahip_id in sahip_idleri])
+
+
+def ilanlari_onayla(queryset):
+    """Seçili ilanları onaylayıp aktif eder, sahiplerine bildirir. Dönüş: onaylanan ilan sayısı."""
+    idler = list(queryset.values_list('pk', flat=True))
+    if not idler:
+        return 0
+    simdi = timezone.now()
+    with transaction.atomic():
+        ilanlar = Ilan.objects.filter(pk__in=idler)
+        yeni_onaylanan = list(ilanlar.filter(onaylandi=False).values_list('pk', flat=True))
+        ilanlar.update(
+            onaylandi=True,
+            # Onaydan sonra 30 günlük süre başlar; zaten onaylı olanın süresi değişmez
+            bitis_tarihi=Case(
+                When(onaylandi=False, then=Value(simdi + timedelta(days=30))),
+                default=F('bitis_tarihi'),
+            ),
+        )
+        # Süresi dolmuş ilanlar aktif edilmez (Ilan.save ile aynı kural)
+        ilanlar.update(aktif=Case(When(bitis_tarihi__lt=simdi, then=Value(False)), default=Value(True)))
+        if yeni_onaylanan:
+            HayvanProfili.objects.filter(
+                ilanlar__pk__in=yeni_onaylanan, evcil_hayvan__isnull=False
+            ).update(evcil_hayvan=None)
+
+        _bildir(
+            _ilanlar(idler),
+            konu="✅ İlanınız Onaylandı - {baslik}",
+            sablon=ONAY_EPOSTASI,
+            bildirim_basligi="✅ İlanınız Onaylandı",
+            bildirim_mesaji="{baslik} başlıklı ilanınız onaylandı ve yayına alındı!",
+            bildirim_url="/ilanlar/ilan/{pk}/",
+        )
+    return len(idler)
+
+
+def ilanlari_reddet(queryset):
+    """Seçili ilanları reddedip pasif eder, sahiplerine bildirir. Dönüş: reddedilen ilan sayısı."""
+    idler = list(queryset.values_list('pk', flat=True))
+    if not idler:
+        return 0
+    with transaction.atomic():
+        Ilan.objects.filter(pk__in=idler).update(onaylandi=False, aktif=False)
+        _bildir(
+            _ilanlar(idler),
+            konu="❌ İlanınız Reddedildi - {baslik}",
+            sablon=RET_EPOSTASI,
+            bildirim_basligi="❌ İlanınız Reddedildi",
+            bildirim_mesaji="{baslik} başlıklı ilanınız reddedildi. Lütfen ilanınızı düzenleyip tekrar gönderin.",
+            bildirim_url="/ilanlar/",
+        )
+    return len(idler)
@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from anahtarlik.dictionaries import Il, Ilce, Irk, Tur
+from anahtarlik.models import Bildirim, Sahip
+from core.models import GidenEposta
+from core.outbox import bekleyen_epostalari_gonder
+from ilan.models import CINSIYET_ERKEK, ILAN_SAHIPLENDIRME, HayvanProfili, Ilan
+
+
+class TopluModerasyonTests(TestCase):
+    ILAN_SAYISI = 500
+
+    @classmethod
+    def setUpTestData(cls):
+        tur = Tur.objects.create(ad="Kedi")
+        irk = Irk.objects.create(tur=tur, ad="Tekir")
+        il = Il.objects.create(ad="İzmir")
+        ilce = Ilce.objects.create(il=il, ad="Bornova")
+
+        profiller = []
+        for i in range(10):
+            kullanici = User.objects.create_user(f"moderasyon{i}", email=f"m{i}@example.com")
+            if i % 2 == 0:
+                Sahip.objects.create(kullanici=kullanici, il=il, ilce=ilce)
+            profiller.append(HayvanProfili(
+                kullanici=kullanici, hayvan_adi=f"Tekir {i}", tur=tur, irk=irk,
+                dogum_tarihi=date(2022, 1, 1), cinsiyet=CINSIYET_ERKEK, il=il, ilce=ilce,
+            ))
+        HayvanProfili.objects.bulk_create(profiller)
+
+        dun = timezone.now() - timedelta(days=1)
+        Ilan.objects.bulk_create([
+            Ilan(
+                hayvan_profili=profiller[i % 10], baslik=f"İlan {i}", ilan_turu=ILAN_SAHIPLENDIRME,
+                onaylandi=False, aktif=False, bitis_tarihi=dun,
+            )
+            for i in range(cls.ILAN_SAYISI)
+        ])
+        cls.admin = User.objects.create_superuser("moderator", "mod@example.com", "x")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _aksiyon(self, aksiyon):
+        idler = [str(pk) for pk in Ilan.objects.values_list('pk', flat=True)]
+        with CaptureQueriesContext(connection) as sorgular:
+            yanit = self.client.post(
+                reverse('admin:ilan_ilan_changelist'), {'action': aksiyon, '_selected_action': idler}
+            )
+        self.assertEqual(yanit.status_code, 302)
+        return len(sorgular)
+
+    def test_500_ilan_sinirli_sorguyla_onaylanir(self):
+        sorgu_sayisi = self._aksiyon('onayla_ilanlar')
+        self.assertLess(sorgu_sayisi, 30)
+
+        self.assertEqual(Ilan.objects.filter(onaylandi=True, aktif=True).count(), self.ILAN_SAYISI)
+        # Onayla 30 günlük süre yeniden başlar
+        self.assertFalse(Ilan.objects.filter(bitis_tarihi__lt=timezone.now() + timedelta(days=29)).exists())
+        # Sahip olan 5 kullanıcının 250 ilanı için panel bildirimi, herkese e-posta
+        self.assertEqual(Bildirim.objects.count(), self.ILAN_SAYISI // 2)
+        self.assertEqual(GidenEposta.objects.filter(durum=GidenEposta.DURUM_BEKLIYOR).count(), self.ILAN_SAYISI)
+        self.assertEqual(len(mail.outbox), 0)
+
+        rapor = bekleyen_epostalari_gonder(parti_boyutu=200)
+        self.assertEqual(rapor, {'gonderilen': self.ILAN_SAYISI, 'hatali': 0, 'parti': 3})
+        self.assertEqual(len(mail.outbox), self.ILAN_SAYISI)
+        self.assertIn("İlanınız Onaylandı", mail.outbox[0].subject)
+
+    def test_ret_ve_sure_dolmus_onayli_ilan(self):
+        self._aksiyon('onayla_ilanlar')
+        Ilan.objects.filter(pk=Ilan.objects.first().pk).update(bitis_tarihi=timezone.now() - timedelta(days=1))
+
+        # Zaten onaylı ilanın süresi değişmez; süresi dolmuşsa aktif edilmez
+        self._aksiyon('onayla_ilanlar')
+        self.assertEqual(Ilan.objects.filter(aktif=False).count(), 1)
+
+        self.assertLess(self._aksiyon('reddet_ilanlar'), 30)
+        self.assertFalse(Ilan.objects.filter(onaylandi=True).exists())
+        self.assertEqual(Bildirim.objects.filter(baslik__contains="Reddedildi").count(), self.ILAN_SAYISI // 2)
@@ -4,8 +4,10 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
-from django.db.models import Q, F, Sum, Count
+from django.db.models import Q, Sum, Count
 from django.utils import timezone
 from django.db import transaction
 from datetime import timedelta
@@ -18,6 +20,7 @@ from .forms import HayvanProfiliForm, IlanForm, IlanAramaForm
 from anahtarlik.dictionaries import Il, Ilce, Tur, Irk
 from anahtarlik.models import SahipProAbonelik
 from collections import defaultdict
+from courseapp.write_queue import sayac_artir
 
 
 def get_kullanici_kredi_bakiye(user):
@@ -214,10 +217,8 @@ def ilan_detay(request, ilan_id):
 
     ilan = get_object_or_404(queryset, filtre)
     
-    # Görüntülenme sayısını artır
-    Ilan.objects.filter(id=ilan_id).update(
-        goruntulenme_sayisi=F('goruntulenme_sayisi') + 1
-    )
+    # Görüntülenme sayısını artır (yazma kuyruğu: istek kilit beklemez)
+    sayac_artir(Ilan, ilan_id, 'goruntulenme_sayisi')
     
     # Benzer ilanlar (aynı tür)
     benzer_ilanlar = Ilan.objects.filter(
@@ -489,20 +490,16 @@ def ilan_olustur(request):
                 
                 # Geçici profil fotoğrafını oku
                 from django.core.files.storage import default_storage
-                from django.core.files.base import ContentFile
-                import uuid
+                from core.storage import icerik_depolama
                 
                 temp_path = request.session['hayvan_profili_profil_foto']
                 if not default_storage.exists(temp_path):
                     messages.error(request, 'Profil fotoğrafı bulunamadı. Lütfen tekrar yükleyin.')
                     return redirect('ilan:hayvan_profili_olustur')
                 
-                # Geçici dosyayı oku ve profil fotoğrafı için hazırla
+                # Geçici dosyayı içerik adresli depoya akış halinde aktar (belleğe okumadan)
                 with default_storage.open(temp_path, 'rb') as temp_file:
-                    temp_filename = temp_path.split('/')[-1]
-                    safe_filename = f"profile_{uuid.uuid4().hex}_{temp_filename}"
-                    profil_fotografi = ContentFile(temp_file.read())
-                    profil_fotografi.name = safe_filename
+                    profil_fotografi = icerik_depolama.save(temp_path.split('/')[-1], temp_file)
                 
                 hayvan_profili = HayvanProfili.objects.create(
                     kullanici=request.user,
@@ -893,50 +890,23 @@ def kredi_satin_al(request):
     return render(request, 'ilan/kredi_satin_al.html', context)
 
 
+@csrf_exempt
+@require_POST
 def kredi_odeme_webhook(request):
-    """Stripe webhook - ödeme başarılı olduğunda kredi ekleme"""
-    import json
-    
-    stripe.api_key = settings.STRIPE_SECRET_KEY
-    endpoint_secret = getattr(settings, 'STRIPE_WEBHOOK_SECRET', None)
-    
-    payload = request.body
-    sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
-    
+    """
+    Stripe webhook - olay doğrulanıp deftere yazılır ve hemen 200 döner.
+    Kredi ekleme arka planda, olay başına bir kez yapılır (bkz. core.payments).
+    """
+    from core.payments import OdemeOlayiGecersiz, olayi_kaydet, olayi_kuyruga_al, webhook_olayini_dogrula
+
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, endpoint_secret
-        )
-    except ValueError:
+        event = webhook_olayini_dogrula(request.body, request.META.get('HTTP_STRIPE_SIGNATURE', ''))
+    except OdemeOlayiGecersiz:
         return HttpResponse(status=400)
-    except stripe.error.SignatureVerificationError:
-        return HttpResponse(status=400)
-    
-    # Ödeme başarılı olduğunda
-    if event['type'] == 'payment_intent.succeeded':
-        payment_intent = event['data']['object']
-        metadata = payment_intent.get('metadata', {})
-        
-        try:
-            kullanici_id = int(metadata.get('kullanici_id'))
-            kredi_adet = int(metadata.get('kredi_adet'))
-            
-            from django.contrib.auth.models import User
-            user = User.objects.get(id=kullanici_id)
-            
-            # Kredi hareketi oluştur
-            KrediHareketi.objects.create(
-                kullanici=user,
-                hareket_turu=KrediHareketi.HAREKET_BAKIYE_EKLEME,
-                miktar=kredi_adet,
-                aciklama=f"Kredi satın alma: {metadata.get('paket_adi', '')} - {payment_intent['id']}"
-            )
-            
-            print(f"Kredi eklendi: {user.username} - {kredi_adet} kredi")
-            
-        except Exception as e:
-            print(f"Webhook hatası: {e}")
-    
+
+    kayit, yeni = olayi_kaydet(event)
+    if yeni:
+        olayi_kuyruga_al(kayit.pk)
     return HttpResponse(status=200)
 
 
@@ -1019,8 +989,7 @@ def sahip_ilan_olustur(request, evcil_hayvan_id):
     if request.method == 'POST':
         # EvcilHayvan'dan HayvanProfili oluştur - SNAPSHOT MEKANİZMASI
         from django.db import transaction
-        from django.core.files.storage import default_storage
-        from django.core.files.base import ContentFile
+        from core.storage import blob_referansi, icerik_depolama
         import uuid
         import os
 
@@ -1047,40 +1016,20 @@ def sahip_ilan_olustur(request, evcil_hayvan_id):
                 profil_fotografi = None
                 
                 # Yeni fotoğraf yüklendi mi kontrol et
+                # Fotoğraflar içerik adresli saklanır: aynı içerik tek kopya, snapshot sadece referans
                 if 'profil_fotografi' in request.FILES:
-                    # Kullanıcı yeni fotoğraf yükledi
+                    # Kullanıcı yeni fotoğraf yükledi (akış halinde yazılır)
                     yeni_foto = request.FILES['profil_fotografi']
                     try:
-                        # Yeni dosya adı oluştur
-                        file_extension = os.path.splitext(yeni_foto.name)[1] or '.jpg'
-                        new_filename = f"hayvan_profilleri/snapshot_{uuid.uuid4().hex}{file_extension}"
-                        
-                        # Yeni fotoğrafı kaydet
-                        profil_fotografi = default_storage.save(
-                            new_filename,
-                            ContentFile(yeni_foto.read())
-                        )
+                        profil_fotografi = icerik_depolama.save(yeni_foto.name, yeni_foto)
                     except Exception as e:
                         messages.error(request, f'Fotoğraf yüklenirken hata oluştu: {str(e)}')
                         return redirect('ilan:sahip_hayvan_secimi')
                 elif evcil_hayvan.resim:
-                    # Yeni fotoğraf yok, EvcilHayvan'dan snapshot al
+                    # Yeni fotoğraf yok, EvcilHayvan'ın fotoğrafına referans ver (kopya yok)
                     try:
-                        # Orijinal fotoğrafı oku
-                        with evcil_hayvan.resim.open('rb') as source_file:
-                            # Yeni dosya adı oluştur
-                            original_name = evcil_hayvan.resim.name
-                            file_extension = os.path.splitext(original_name)[1] or '.jpg'
-                            new_filename = f"hayvan_profilleri/snapshot_{uuid.uuid4().hex}{file_extension}"
-                            
-                            # Fotoğrafı yeni konuma kopyala (fiziksel kopya)
-                            file_content = source_file.read()
-                            profil_fotografi = default_storage.save(
-                                new_filename,
-                                ContentFile(file_content)
-                            )
+                        profil_fotografi = blob_referansi(evcil_hayvan.resim)
                     except Exception as e:
-                        # Fotoğraf kopyalanamazsa hata ver
                         messages.error(request, f'Fotoğraf kopyalanırken hata oluştu: {str(e)}')
                         return redirect('ilan:sahip_hayvan_secimi')
                 
@@ -1159,7 +1108,7 @@ def sahip_ilan_olustur(request, evcil_hayvan_id):
                     telefon=telefon,  # Snapshot: POST'tan veya Sahip'ten
                     # Açıklama - POST'tan al veya EvcilHayvan'dan snapshot
                     aciklama=hayvan_profili_aciklama,
-                    profil_fotografi=profil_fotografi  # Fiziksel kopya
+                    profil_fotografi=profil_fotografi  # İçerik adresli blob referansı
                 )
                 
                 # Ek resimleri kaydet (maksimum 3)
@@ -1177,7 +1126,7 @@ def sahip_ilan_olustur(request, evcil_hayvan_id):
                             )
                             
                             # Resim kaydet
-                            hayvan_resmi.resim.save(safe_filename, ContentFile(resim.read()), save=True)
+                            hayvan_resmi.resim.save(safe_filename, resim, save=True)
                         except Exception as e:
                             # Resim kaydedilemezse devam et
                             print(f"Ek resim kaydetme hatası: {e}")
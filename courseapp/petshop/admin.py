@@ -138,7 +138,7 @@ class PetShopAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ("Genel Bilgiler", {
-            "fields": ("ad", "telefon", "email", "il", "ilce", "adres_detay")
+            "fields": ("ad", "telefon", "email", "il", "ilce", "adres_detay", "konum_koordinat")
         }),
         ("Mağaza Bilgileri", {
             "fields": ("magaza_tipi", "magaza_buyuklugu", "calisan_sayisi", "kurulus_yili")
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petshop', '0010_petshop_ilk_giris_sifre_degistirildi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petshop',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='petshop',
+            name='konum_koordinat',
+            field=models.CharField(blank=True, help_text='Google Maps formatında: 38.231952, 42.428070', max_length=40, null=True, verbose_name='Koordinat'),
+        ),
+        migrations.AddField(
+            model_name='petshop',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='petshop',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+    ]
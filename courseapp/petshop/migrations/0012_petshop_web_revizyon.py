@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('petshop', '0011_petshop_konum_indeksi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petshop',
+            name='web_guncelleme',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='petshop',
+            name='web_revizyon',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -5,6 +5,8 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 
+from veteriner.models import calisma_saatinde_mi, konum_alanlarini_guncelle
+
 # Ödeme modeli (kurum)
 ODEME_PESIN = 'PESIN'
 ODEME_KONSINYE = 'KONSINYE'
@@ -199,6 +201,19 @@ class PetShop(models.Model):
     
     # Durum
     web_aktif = models.BooleanField(default=False, help_text="Web sayfası aktif mi?")
+    # Web sayfası önbelleğinin sürümü (core/page_cache.py); her kayıtta artar
+    web_revizyon = models.PositiveIntegerField(default=0, editable=False)
+    web_guncelleme = models.DateTimeField(null=True, blank=True, editable=False)
+
+    konum_koordinat = models.CharField(
+        max_length=40, blank=True, null=True,
+        verbose_name="Koordinat",
+        help_text="Google Maps formatında: 38.231952, 42.428070"
+    )
+    # konum_koordinat'tan kayıt sırasında hesaplanır (en yakın petshop aramaları için)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
 
     def __str__(self):
         return self.ad
@@ -206,6 +221,16 @@ class PetShop(models.Model):
     def save(self, *args, **kwargs):
         # NOT: web_slug artık otomatik oluşturulmuyor
         # Kullanıcı "Web Sayfamı Düzenle" sayfasından manuel oluşturur
+
+        konum_alanlarini_guncelle(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'konum_koordinat' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geohash'}
+
+        self.web_revizyon = (self.web_revizyon or 0) + 1
+        self.web_guncelleme = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'web_revizyon', 'web_guncelleme'}
         
         # SEO başlık ve açıklama otomatik oluştur (eğer yoksa)
         if not self.web_seo_baslik and self.web_baslik:
@@ -216,6 +241,9 @@ class PetShop(models.Model):
         
         super().save(*args, **kwargs)
 
+    def calisiyor_mu(self, tarih, saat):
+        return calisma_saatinde_mi(self, tarih, saat)
+
     @property
     def kalan_envanter(self) -> int:
         return max((self.tahsis_sayisi or 0) - (self.satis_sayisi or 0), 0)
@@ -308,8 +308,7 @@ def districts_for_city(request):
 
 # ==================== WEB SAYFASI ====================
 
-def web_sayfasi_gorunum(request, slug):
-    petshop = get_object_or_404(PetShop, web_slug=slug, web_aktif=True)
+def _web_sayfasi_baglami(petshop):
     resimler = []
     if petshop.web_resim1: resimler.append(petshop.web_resim1)
     if petshop.web_resim2: resimler.append(petshop.web_resim2)
@@ -330,12 +329,28 @@ def web_sayfasi_gorunum(request, slug):
         else:
             facebook_url = f"https://facebook.com/{petshop.facebook}"
     
-    return render(request, 'petshop/web_public.html', {
+    return {
         "petshop": petshop, 
         "resimler": resimler,
         "instagram_url": instagram_url,
         "facebook_url": facebook_url,
-    })
+    }
+
+def web_sayfasi_gorunum(request, slug):
+    from core.page_cache import onbellekli_yanit, sablondan, sayfa_anahtari
+
+    # Önbellekteki sayfanın geçerliliği için sadece revizyon okunur
+    sayfa = get_object_or_404(
+        PetShop.objects.values('pk', 'web_revizyon', 'web_guncelleme'), web_slug=slug, web_aktif=True
+    )
+    return onbellekli_yanit(
+        request,
+        sayfa_anahtari('petshop', sayfa['pk'], sayfa['web_revizyon']),
+        sablondan('petshop/web_public.html', lambda: _web_sayfasi_baglami(
+            PetShop.objects.select_related('il', 'ilce').get(pk=sayfa['pk'])
+        )),
+        son_degisiklik=sayfa['web_guncelleme'],
+    )
 
 def web_sayfasi_gorunum_legacy(request, petshop_id):
     petshop = get_object_or_404(PetShop, id=petshop_id, web_aktif=True)
@@ -7,7 +7,7 @@ from django.utils.safestring import mark_safe
 from .models import (
     Kategori, Urun, UrunResim, Siparis, SiparisKalemi, MagazaKarti, MagazaKartiResim,
     UrunVaryant, Sepet, SepetKalemi, Adres, UrunYorum, Favori,
-    Kupon, KuponKullanim, KargoFirma, SiparisDurum
+    Kupon, KuponKullanim, KargoFirma, SiparisDurum, SiparisGunluk, UrunSatisGunluk
 )
 
 # ============================================
@@ -37,7 +37,7 @@ class KategoriAdmin(admin.ModelAdmin):
 class UrunAdmin(admin.ModelAdmin):
     list_display = ('ad', 'urun_tipi_badge', 'kategoriler_display', 'hayvan_turu_display', 'marka', 'fiyat', 'petshop_veteriner_fiyat_badge', 'stok', 'one_cikan', 'yeni_urun', 'indirimli', 'aktif', 'olusturulma_tarihi')
     search_fields = ('ad', 'aciklama', 'kisa_aciklama', 'marka', 'model')
-    list_filter = ('urun_tipi', 'kategoriler', 'etiket_kategori', 'hayvan_turu', 'tavsiye_edilen_tur', 'marka', 'renk', 'one_cikan', 'yeni_urun', 'indirimli', 'aktif', 'olusturulma_tarihi')
+    list_filter = ('urun_tipi', 'kategoriler', 'etiket_kategori', 'hayvan_turu', 'tavsiye_edilen_tur', 'marka', 'renk', 'one_cikan', 'yeni_urun', 'indirimli', 'aktif', 'dusuk_stok', 'olusturulma_tarihi')
     filter_horizontal = ('kategoriler', 'hayvan_turu', 'tavsiye_edilen_tur')
     inlines = [UrunResimInline, UrunVaryantInline]
     list_editable = ('one_cikan', 'yeni_urun', 'indirimli', 'aktif')
@@ -162,6 +162,32 @@ class SiparisKalemiAdmin(admin.ModelAdmin):
     list_display = ('siparis', 'urun', 'miktar', 'fiyat')  # Listede göster
     search_fields = ('urun__ad',)  # Arama
 
+
+class SaltOkunurOzetAdmin(admin.ModelAdmin):
+    """Günlük özetler siparişlerden türetilir (shop/order_rollups.py), elle düzenlenmez."""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SiparisGunluk)
+class SiparisGunlukAdmin(SaltOkunurOzetAdmin):
+    list_display = ('tarih', 'durum', 'siparis_sayisi', 'ciro', 'kupon_indirimi', 'kargo_ucreti')
+    list_filter = ('durum',)
+    date_hierarchy = 'tarih'
+
+
+@admin.register(UrunSatisGunluk)
+class UrunSatisGunlukAdmin(SaltOkunurOzetAdmin):
+    list_display = ('tarih', 'urun', 'durum', 'adet', 'tutar')
+    list_filter = ('durum',)
+    search_fields = ('urun__ad',)
+    date_hierarchy = 'tarih'
+    list_select_related = ('urun',)
+
 @admin.register(UrunResim)
 class UrunResimAdmin(admin.ModelAdmin):
     list_display = ('urun', 'resim')  # Listede göster
@@ -435,13 +461,15 @@ class KuponAdmin(admin.ModelAdmin):
     list_filter = ('kupon_tipi', 'aktif', 'baslangic_tarihi', 'bitis_tarihi')
     search_fields = ('kod', 'aciklama')
     list_editable = ('aktif',)
+    # Sayaç sipariş anında koşullu UPDATE ile artar (shop/coupons.py); formdan yazılmaz
+    readonly_fields = ('kullanim_sayisi',)
 
     fieldsets = (
         ('Kupon Bilgileri', {
             'fields': ('kod', 'aciklama', 'kupon_tipi', 'indirim_degeri')
         }),
         ('Kullanım Koşulları', {
-            'fields': ('minimum_tutar', 'maksimum_kullanim', 'kullanici_basina_limit')
+            'fields': ('minimum_tutar', 'maksimum_indirim', 'kullanim_limiti', 'kullanici_basina_limit', 'kullanim_sayisi')
         }),
         ('Geçerlilik', {
             'fields': ('baslangic_tarihi', 'bitis_tarihi', 'aktif')
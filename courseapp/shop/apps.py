@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'shop'
+
+    def ready(self):
+        # Günlük sipariş özeti artımlı güncelleme sinyalleri
+        from . import order_rollups  # noqa: F401
+        # Kupon önbelleği geçersiz kılma sinyalleri
+        from . import coupons  # noqa: F401
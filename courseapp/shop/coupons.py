@@ -0,0 +1,120 @@
+# shop/coupons.py
+"""
+Kupon doğrulama ve kullanım.
+
+Kuponun sayaçlardan bağımsız koşulları (aktiflik, tarih aralığı, minimum tutar,
+indirim tanımı) kod başına önbellekte tutulur; ödeme sayfası kuponu gösterirken
+veritabanına gitmez. Önbellek süreç içidir: kaydeden süreçte hemen, diğerlerinde
+en geç KUPON_CACHE_SURESI sonra yenilenir. Bu yüzden yalnızca gösterim içindir.
+
+Sipariş anında (kuponu_al) önbellek kullanılmaz. Kullanım limiti tek koşullu
+UPDATE ile alınır: kullanim_sayisi < kullanim_limiti ise sayaç 1 artar. Aynı
+anda gelen siparişlerden yalnızca limit kadarı satırı günceller, diğerleri
+KuponGecersiz alır. UPDATE kupon satırını transaction sonuna kadar kilitler;
+indirim tanımı ve minimum tutar kilitli satırdan yeniden okunur, kullanıcı
+başına limit de bu kilit altında sayılır. Aynı kuponu kullanan eşzamanlı
+siparişler bu noktada sıraya girer, aynı kullanıcının iki siparişi limiti
+birlikte aşamaz.
+
+kuponu_al sipariş transaction'ı içinde çağrılmalı, kullanim_kaydet aynı
+transaction'da yapılmalıdır. KuponGecersiz alınınca transaction geri alınır;
+sayaç artışı da geri alınır.
+"""
+import logging
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from courseapp.constants import KUPON_CACHE_SURESI
+
+from .models import Kupon, KuponKullanim
+
+logger = logging.getLogger(__name__)
+
+_YOK = 'yok'  # Bilinmeyen kodlar da önbelleğe alınır
+
+
+class KuponGecersiz(Exception):
+    """Kupon bu sipariş için kullanılamaz (mesaj kullanıcıya gösterilebilir)."""
+
+
+def _cache_anahtari(kod):
+    return f'kupon_{kod}'
+
+
+def kupon_bilgisi(kod):
+    """Koda ait kupon (kullanım sayacı güncel olmayabilir) ya da None."""
+    kod = (kod or '').strip()
+    if not kod:
+        return None
+    kupon = cache.get(_cache_anahtari(kod))
+    if kupon is None:
+        kupon = Kupon.objects.filter(kod=kod).first() or _YOK
+        cache.set(_cache_anahtari(kod), kupon, KUPON_CACHE_SURESI)
+    return None if kupon == _YOK else kupon
+
+
+def indirim_tutari(kupon, ara_toplam, kargo_ucreti=Decimal('0')):
+    """Kuponun ara toplama (ücretsiz kargo kuponunda kargoya) uygulanan indirimi."""
+    if kupon.kupon_tipi == 'ucretsiz_kargo':
+        return kargo_ucreti
+    return min(Decimal(kupon.indirim_hesapla(ara_toplam)), ara_toplam).quantize(Decimal('0.01'))
+
+
+def kupon_dogrula(kod, ara_toplam, kargo_ucreti=Decimal('0')):
+    """
+    Ödeme sayfası için veritabanına gitmeden doğrulama.
+    Dönüş: (kupon ya da None, indirim, mesaj)
+    """
+    kupon = kupon_bilgisi(kod)
+    if kupon is None:
+        return None, Decimal('0'), "Kupon bulunamadı"
+    gecerli, mesaj = kupon.gecerlilik_kontrolu(ara_toplam)
+    if not gecerli:
+        return None, Decimal('0'), mesaj
+    return kupon, indirim_tutari(kupon, ara_toplam, kargo_ucreti), mesaj
+
+
+def kuponu_al(kod, kullanici, ara_toplam, kargo_ucreti=Decimal('0')):
+    """
+    Kupon kullanımını atomik olarak alır ve indirimi güncel kupon satırından hesaplar.
+    Dönüş: (kupon, indirim). Kullanılamıyorsa KuponGecersiz yükseltir.
+    Siparişten sonra kullanim_kaydet çağrılır.
+    """
+    kod = (kod or '').strip()
+    simdi = timezone.now()
+    alindi = Kupon.objects.filter(
+        Q(kullanim_limiti__isnull=True) | Q(kullanim_limiti=0) | Q(kullanim_sayisi__lt=F('kullanim_limiti')),
+        kod=kod, aktif=True, baslangic_tarihi__lte=simdi, bitis_tarihi__gte=simdi,
+    ).update(kullanim_sayisi=F('kullanim_sayisi') + 1) if kod else 0
+
+    kupon = Kupon.objects.filter(kod=kod).first() if kod else None
+    if kupon is None:
+        raise KuponGecersiz("Kupon bulunamadı")
+    gecerli, mesaj = kupon.gecerlilik_kontrolu(ara_toplam)
+    if not gecerli:
+        raise KuponGecersiz(mesaj)
+    if not alindi:
+        raise KuponGecersiz("Kupon kullanım limiti dolmuş")
+
+    # Satır bu transaction'da kilitli: aynı kullanıcının eşzamanlı siparişi bu sayımı commit'ten sonra yapar
+    if kullanici and kupon.kullanici_basina_limit:
+        onceki = KuponKullanim.objects.filter(kupon_id=kupon.pk, siparis__kullanici=kullanici).count()
+        if onceki >= kupon.kullanici_basina_limit:
+            raise KuponGecersiz("Bu kuponu daha önce kullandınız")
+    return kupon, indirim_tutari(kupon, ara_toplam, kargo_ucreti)
+
+
+def kullanim_kaydet(kupon, siparis, indirim):
+    return KuponKullanim.objects.create(kupon_id=kupon.pk, siparis=siparis, indirim_tutari=indirim)
+
+
+# --- Cache geçersiz kılma ---
+
+@receiver([post_save, post_delete], sender=Kupon)
+def _kupon_degisti(sender, instance, **kwargs):
+    cache.delete(_cache_anahtari(instance.kod))
@@ -1,199 +1,200 @@
 # shop/email_utils.py - Email bildirim sistemi
-from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from django.urls import reverse
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _onay_epostasi_hazirla(siparis):
+    """Sipariş onayı: (alıcı, konu, metin, html); email adresi yoksa None"""
+    recipient_email, recipient_name = _alici_bilgisi(siparis)
+    if not recipient_email:
+        logger.warning(f"Sipariş {siparis.id} için email adresi bulunamadı")
+        return None
+
+    context = {
+        'siparis': siparis,
+        'recipient_name': recipient_name,
+        'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
+        'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
+    }
+    return (
+        recipient_email,
+        f"✅ Sipariş Onayı - #{siparis.id} - PetSafe Hub",
+        f"Siparişiniz onaylandı. Sipariş numaranız: #{siparis.id}",
+        render_to_string('shop/emails/siparis_onay.html', context),
+    )
+
+
 def send_order_confirmation_email(siparis):
     """
-    Sipariş onay email'i gönder
+    Sipariş onay email'ini giden e-posta kutusuna yazar (sipariş transaction'ıyla
+    birlikte commit edilir, arka planda gönderilir)
     """
     try:
-        # Email alıcısını belirle
-        if siparis.kullanici:
-            recipient_email = siparis.kullanici.email
-            recipient_name = siparis.kullanici.get_full_name() or siparis.kullanici.username
-        else:
-            recipient_email = siparis.misafir_email
-            recipient_name = siparis.misafir_ad_soyad or "Değerli Müşterimiz"
-        
-        if not recipient_email:
-            logger.warning(f"Sipariş {siparis.id} için email adresi bulunamadı")
+        hazir = _onay_epostasi_hazirla(siparis)
+        if hazir is None:
             return False
 
-        # Context hazırla
-        context = {
-            'siparis': siparis,
-            'recipient_name': recipient_name,
-            'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
-            'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
-        }
+        _hazir_epostalari_kuyruga_al([hazir])
+        logger.info(f"Sipariş onay email'i kuyruğa alındı: {hazir[0]} - Sipariş #{siparis.id}")
+        return True
 
-        # HTML template'i render et
-        html_content = render_to_string('shop/emails/siparis_onay.html', context)
-        
-        # Email oluştur
-        subject = f"✅ Sipariş Onayı - #{siparis.id} - PetSafe Hub"
-        
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=f"Siparişiniz onaylandı. Sipariş numaranız: #{siparis.id}",
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@petsafehub.com'),
-            to=[recipient_email]
-        )
-        
-        email.attach_alternative(html_content, "text/html")
-        
-        # Email gönder
-        result = email.send()
-        
-        if result:
-            logger.info(f"Sipariş onay email'i gönderildi: {recipient_email} - Sipariş #{siparis.id}")
-            return True
-        else:
-            logger.error(f"Sipariş onay email'i gönderilemedi: {recipient_email} - Sipariş #{siparis.id}")
-            return False
-            
     except Exception as e:
         logger.error(f"Sipariş onay email hatası: {str(e)} - Sipariş #{siparis.id}")
         return False
 
+def _alici_bilgisi(siparis):
+    """Siparişin bildirim alıcısı: (email, ad)"""
+    if siparis.kullanici:
+        return siparis.kullanici.email, siparis.kullanici.get_full_name() or siparis.kullanici.username
+    return siparis.misafir_email, siparis.misafir_ad_soyad or "Değerli Müşterimiz"
+
+
+def _kargo_epostasi_hazirla(siparis, kargo_tarihi=None):
+    """Kargo bildirimi: (alıcı, konu, metin, html); email adresi yoksa None"""
+    recipient_email, recipient_name = _alici_bilgisi(siparis)
+    if not recipient_email:
+        logger.warning(f"Sipariş {siparis.id} için email adresi bulunamadı")
+        return None
+
+    context = {
+        'siparis': siparis,
+        'recipient_name': recipient_name,
+        'kargo_tarihi': kargo_tarihi or timezone.now(),
+        'tahmini_teslimat': "2-3 iş günü",  # Bu değer kargo firmasına göre değişebilir
+        'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
+        'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
+    }
+    return (
+        recipient_email,
+        f"📦 Siparişiniz Kargoya Verildi - #{siparis.id} - PetSafe Hub",
+        f"Siparişiniz kargoya verildi. Takip numaranız: {siparis.kargo_takip_no or 'Henüz atanmadı'}",
+        render_to_string('shop/emails/kargo_gonderildi.html', context),
+    )
+
+
+def _iptal_epostasi_hazirla(siparis, iptal_nedeni=None, iade_yontemi=None, iade_takip_no=None):
+    """Sipariş iptal bildirimi: (alıcı, konu, metin, html); email adresi yoksa None"""
+    recipient_email, recipient_name = _alici_bilgisi(siparis)
+    if not recipient_email:
+        logger.warning(f"Sipariş {siparis.id} için email adresi bulunamadı")
+        return None
+
+    context = {
+        'siparis': siparis,
+        'recipient_name': recipient_name,
+        'iptal_tarihi': timezone.now(),
+        'iptal_nedeni': iptal_nedeni or "Stok yetersizliği",
+        'iade_yontemi': iade_yontemi or "Orijinal ödeme yöntemine",
+        'iade_suresi': "3-5 iş günü",
+        'iade_takip_no': iade_takip_no,
+        'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
+        'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
+    }
+    return (
+        recipient_email,
+        f"❌ Sipariş İptal Edildi - #{siparis.id} - PetSafe Hub",
+        f"Siparişiniz iptal edildi. Sipariş numaranız: #{siparis.id}",
+        render_to_string('shop/emails/siparis_iptal.html', context),
+    )
+
+
+def _hazir_epostalari_kuyruga_al(hazirlar):
+    """(alıcı, konu, metin, html) dörtlülerini giden e-posta kutusuna yazar. Dönüş: yazılan sayı."""
+    from core.models import GidenEposta
+    from core.outbox import epostalari_kuyruga_al
+
+    # Savepoint: yazma hatası (çağıranlar yakalar) sipariş transaction'ını bozmasın
+    with transaction.atomic():
+        return epostalari_kuyruga_al([
+            GidenEposta(
+                alici=recipient_email,
+                konu=subject,
+                mesaj=body,
+                html_mesaj=html_content,
+                gonderen=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@petsafehub.com'),
+            )
+            for recipient_email, subject, body, html_content in hazirlar
+        ])
+
+
 def send_shipping_notification_email(siparis, kargo_tarihi=None):
     """
-    Kargo gönderildi email'i gönder
+    Kargo gönderildi email'ini giden e-posta kutusuna yazar
     """
     try:
-        # Email alıcısını belirle
-        if siparis.kullanici:
-            recipient_email = siparis.kullanici.email
-            recipient_name = siparis.kullanici.get_full_name() or siparis.kullanici.username
-        else:
-            recipient_email = siparis.misafir_email
-            recipient_name = siparis.misafir_ad_soyad or "Değerli Müşterimiz"
-        
-        if not recipient_email:
-            logger.warning(f"Sipariş {siparis.id} için email adresi bulunamadı")
+        hazir = _kargo_epostasi_hazirla(siparis, kargo_tarihi)
+        if hazir is None:
             return False
 
-        # Kargo tarihi belirle
-        if not kargo_tarihi:
-            kargo_tarihi = timezone.now()
-
-        # Context hazırla
-        context = {
-            'siparis': siparis,
-            'recipient_name': recipient_name,
-            'kargo_tarihi': kargo_tarihi,
-            'tahmini_teslimat': "2-3 iş günü",  # Bu değer kargo firmasına göre değişebilir
-            'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
-            'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
-        }
+        _hazir_epostalari_kuyruga_al([hazir])
+        logger.info(f"Kargo bildirim email'i kuyruğa alındı: {hazir[0]} - Sipariş #{siparis.id}")
+        return True
 
-        # HTML template'i render et
-        html_content = render_to_string('shop/emails/kargo_gonderildi.html', context)
-        
-        # Email oluştur
-        subject = f"📦 Siparişiniz Kargoya Verildi - #{siparis.id} - PetSafe Hub"
-        
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=f"Siparişiniz kargoya verildi. Takip numaranız: {siparis.kargo_takip_no or 'Henüz atanmadı'}",
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@petsafehub.com'),
-            to=[recipient_email]
-        )
-        
-        email.attach_alternative(html_content, "text/html")
-        
-        # Email gönder
-        result = email.send()
-        
-        if result:
-            logger.info(f"Kargo bildirim email'i gönderildi: {recipient_email} - Sipariş #{siparis.id}")
-            return True
-        else:
-            logger.error(f"Kargo bildirim email'i gönderilemedi: {recipient_email} - Sipariş #{siparis.id}")
-            return False
-            
     except Exception as e:
         logger.error(f"Kargo bildirim email hatası: {str(e)} - Sipariş #{siparis.id}")
         return False
 
 def send_order_cancellation_email(siparis, iptal_nedeni=None, iade_yontemi=None, iade_takip_no=None):
     """
-    Sipariş iptal email'i gönder
+    Sipariş iptal email'ini giden e-posta kutusuna yazar
     """
     try:
-        # Email alıcısını belirle
-        if siparis.kullanici:
-            recipient_email = siparis.kullanici.email
-            recipient_name = siparis.kullanici.get_full_name() or siparis.kullanici.username
-        else:
-            recipient_email = siparis.misafir_email
-            recipient_name = siparis.misafir_ad_soyad or "Değerli Müşterimiz"
-        
-        if not recipient_email:
-            logger.warning(f"Sipariş {siparis.id} için email adresi bulunamadı")
+        hazir = _iptal_epostasi_hazirla(siparis, iptal_nedeni, iade_yontemi, iade_takip_no)
+        if hazir is None:
             return False
 
-        # Context hazırla
-        context = {
-            'siparis': siparis,
-            'recipient_name': recipient_name,
-            'iptal_tarihi': timezone.now(),
-            'iptal_nedeni': iptal_nedeni or "Stok yetersizliği",
-            'iade_yontemi': iade_yontemi or "Orijinal ödeme yöntemine",
-            'iade_suresi': "3-5 iş günü",
-            'iade_takip_no': iade_takip_no,
-            'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
-            'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
-        }
+        _hazir_epostalari_kuyruga_al([hazir])
+        logger.info(f"Sipariş iptal email'i kuyruğa alındı: {hazir[0]} - Sipariş #{siparis.id}")
+        return True
 
-        # HTML template'i render et
-        html_content = render_to_string('shop/emails/siparis_iptal.html', context)
-        
-        # Email oluştur
-        subject = f"❌ Sipariş İptal Edildi - #{siparis.id} - PetSafe Hub"
-        
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=f"Siparişiniz iptal edildi. Sipariş numaranız: #{siparis.id}",
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@petsafehub.com'),
-            to=[recipient_email]
-        )
-        
-        email.attach_alternative(html_content, "text/html")
-        
-        # Email gönder
-        result = email.send()
-        
-        if result:
-            logger.info(f"Sipariş iptal email'i gönderildi: {recipient_email} - Sipariş #{siparis.id}")
-            return True
-        else:
-            logger.error(f"Sipariş iptal email'i gönderilemedi: {recipient_email} - Sipariş #{siparis.id}")
-            return False
-            
     except Exception as e:
         logger.error(f"Sipariş iptal email hatası: {str(e)} - Sipariş #{siparis.id}")
         return False
 
+def siparis_bildirimlerini_kuyruga_al(siparisler, durum, aciklama=''):
+    """
+    Durum değişikliği e-postalarını (kargoda / iptal) giden e-posta kutusuna yazar.
+    Siparişlerin kullanici, kargo_firma ve kalemler__urun ile önceden yüklenmiş
+    olması beklenir. Dönüş: kuyruğa alınan e-posta sayısı.
+    """
+    hazirlar = []
+    for siparis in siparisler:
+        try:
+            if durum == 'kargoda':
+                hazir = _kargo_epostasi_hazirla(siparis)
+            elif durum == 'iptal':
+                hazir = _iptal_epostasi_hazirla(siparis, aciklama or None)
+            else:
+                return 0
+        except Exception as e:
+            # Tek siparişin şablon hatası diğer bildirimleri engellemesin
+            logger.error(f"Sipariş bildirim email hatası: {str(e)} - Sipariş #{siparis.id}")
+            continue
+        if hazir is not None:
+            hazirlar.append(hazir)
+    return _hazir_epostalari_kuyruga_al(hazirlar)
+
+def _stok_uyari_alicilari():
+    """Stok uyarılarının alıcıları: ADMIN_EMAILS, yoksa superuser email'leri"""
+    # Admin email'lerini al
+    admin_emails = getattr(settings, 'ADMIN_EMAILS', [])
+    if not admin_emails:
+        # Django admin kullanıcılarından email al
+        from django.contrib.auth.models import User
+        admin_emails = list(User.objects.filter(is_superuser=True).values_list('email', flat=True))
+        admin_emails = [email for email in admin_emails if email]
+    return admin_emails
+
 def send_stock_warning_email(urun, min_stok_seviyesi=5, uyari_seviyesi=10):
     """
-    Stok uyarı email'i gönder (admin'lere)
+    Stok uyarı email'ini admin'ler için giden e-posta kutusuna yazar
     """
     try:
-        # Admin email'lerini al
-        admin_emails = getattr(settings, 'ADMIN_EMAILS', [])
-        if not admin_emails:
-            # Django admin kullanıcılarından email al
-            from django.contrib.auth.models import User
-            admin_emails = list(User.objects.filter(is_superuser=True).values_list('email', flat=True))
-            admin_emails = [email for email in admin_emails if email]
-        
+        admin_emails = _stok_uyari_alicilari()
         if not admin_emails:
             logger.warning("Admin email adresi bulunamadı")
             return False
@@ -209,108 +210,99 @@ def send_stock_warning_email(urun, min_stok_seviyesi=5, uyari_seviyesi=10):
 
         # HTML template'i render et
         html_content = render_to_string('shop/emails/stok_uyari.html', context)
-        
-        # Email oluştur
         subject = f"⚠️ Stok Uyarısı - {urun.ad} - PetSafe Hub"
-        
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=f"Ürün stokları azaldı: {urun.ad} - Kalan stok: {urun.stok}",
-            from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@petsafehub.com'),
-            to=admin_emails
-        )
-        
-        email.attach_alternative(html_content, "text/html")
-        
-        # Email gönder
-        result = email.send()
-        
-        if result:
-            logger.info(f"Stok uyarı email'i gönderildi: {urun.ad} - Kalan stok: {urun.stok}")
-            return True
-        else:
-            logger.error(f"Stok uyarı email'i gönderilemedi: {urun.ad}")
-            return False
-            
+        body = f"Ürün stokları azaldı: {urun.ad} - Kalan stok: {urun.stok}"
+
+        # Her admin kendi satırında izlenir
+        _hazir_epostalari_kuyruga_al([(email, subject, body, html_content) for email in admin_emails])
+        logger.info(f"Stok uyarı email'i kuyruğa alındı: {urun.ad} - Kalan stok: {urun.stok}")
+        return True
+
     except Exception as e:
         logger.error(f"Stok uyarı email hatası: {str(e)} - Ürün: {urun.ad}")
         return False
 
-def send_bulk_email(recipients, subject, template_name, context=None):
+def send_bulk_email(recipients, subject, template_name, context=None, kampanya=None):
     """
-    Toplu email gönder
+    Toplu email'i kampanya olarak giden e-posta kutusuna yazar.
+
+    recipients: email adresleri ya da (email, {alan: değer}) çiftleri. Alanlar
+    şablonda ve konuda {{ alan }} olarak kullanılır; şablon bir kez render edilir,
+    alanlar alıcı başına değiştirilir. Gönderim durumu core.outbox.kampanya_durumu
+    ile izlenir. Dönüş: kuyruğa alınan email sayısı
     """
+    from core.outbox import kampanya_kuyruga_al
+
     try:
-        if context is None:
-            context = {}
-        
-        # Site bilgilerini context'e ekle
-        context.update({
+        context = {
+            **(context or {}),
+            # Site bilgilerini context'e ekle
             'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
             'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
-        })
+        }
+        alicilar = [
+            (recipient, {}) if isinstance(recipient, str) else recipient
+            for recipient in recipients if recipient
+        ]
+        kisisel_alanlar = sorted({alan for _, degerler in alicilar for alan in degerler})
+        kampanya = kampanya or f"toplu-{timezone.now():%Y%m%d%H%M%S}"
+
+        kuyruga_alinan = kampanya_kuyruga_al(
+            kampanya, alicilar, subject, template_name,
+            baglam=context,
+            kisisel_alanlar=kisisel_alanlar,
+            gonderen=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@petsafehub.com'),
+        )
+        logger.info(f"Toplu email kuyruğa alındı ({kampanya}): {kuyruga_alinan}/{len(recipients)}")
+        return kuyruga_alinan
 
-        # HTML template'i render et
-        html_content = render_to_string(template_name, context)
-        
-        # Her alıcı için ayrı email gönder
-        success_count = 0
-        for recipient_email in recipients:
-            if not recipient_email:
-                continue
-                
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=subject,  # Basit text versiyonu
-                from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@petsafehub.com'),
-                to=[recipient_email]
-            )
-            
-            email.attach_alternative(html_content, "text/html")
-            
-            if email.send():
-                success_count += 1
-        
-        logger.info(f"Toplu email gönderildi: {success_count}/{len(recipients)} başarılı")
-        return success_count
-        
     except Exception as e:
         logger.error(f"Toplu email hatası: {str(e)}")
         return 0
 
+def send_stock_digest_email(urunler):
+    """
+    Düşük stoklu ürünlerin özetini her admin'e tek email olarak giden e-posta
+    kutusuna yazar (shop/stock_alerts.py). Dönüş: kuyruğa alınan email sayısı
+    """
+    from courseapp.constants import STOK_KRITIK_SEVIYE, STOK_UYARI_SEVIYESI
+
+    try:
+        admin_emails = _stok_uyari_alicilari()
+        if not admin_emails:
+            logger.warning("Admin email adresi bulunamadı")
+            return 0
+
+        tukenen = sum(1 for urun in urunler if urun.stok <= 0)
+        context = {
+            'urunler': urunler,
+            'tukenen_sayisi': tukenen,
+            'min_stok_seviyesi': STOK_KRITIK_SEVIYE,
+            'uyari_seviyesi': STOK_UYARI_SEVIYESI,
+            'site_url': getattr(settings, 'SITE_URL', 'http://127.0.0.1:8000'),
+            'contact_email': getattr(settings, 'CONTACT_EMAIL', 'info@petsafehub.com'),
+        }
+        html_content = render_to_string('shop/emails/stok_uyari_ozeti.html', context)
+        subject = f"⚠️ Stok Uyarı Özeti - {len(urunler)} ürün ({tukenen} tükendi) - PetSafe Hub"
+        body = "Düşük stoklu ürünler:\n" + "\n".join(f"- {urun.ad}: {urun.stok} adet" for urun in urunler)
+
+        return _hazir_epostalari_kuyruga_al([(email, subject, body, html_content) for email in admin_emails])
+
+    except Exception as e:
+        logger.error(f"Stok uyarı özeti email hatası: {str(e)}")
+        return 0
+
 def check_and_send_stock_warnings():
     """
-    Stok seviyelerini kontrol et ve uyarı gönder
+    Düşük stok bayraklı ürünler için uyarı özetini gönder (tüm ürünleri taramaz)
     """
-    from .models import Urun
-    
+    from .stock_alerts import stok_uyari_ozeti_gonder
+
     try:
-        # Düşük stoklu ürünleri bul
-        min_stok = 5
-        uyari_stok = 10
-        
-        dusuk_stok_urunler = Urun.objects.filter(
-            aktif=True,
-            stok__lte=uyari_stok,
-            stok__gt=0  # Stok tükenmiş olanları hariç tut
-        )
-        
-        tükenen_urunler = Urun.objects.filter(
-            aktif=True,
-            stok=0
-        )
-        
-        # Uyarı gönder
-        for urun in dusuk_stok_urunler:
-            send_stock_warning_email(urun, min_stok, uyari_stok)
-        
-        for urun in tükenen_urunler:
-            send_stock_warning_email(urun, min_stok, uyari_stok)
-        
-        logger.info(f"Stok kontrolü tamamlandı: {dusuk_stok_urunler.count()} düşük stok, {tükenen_urunler.count()} tükenen")
+        rapor = stok_uyari_ozeti_gonder()
+        logger.info(f"Stok kontrolü tamamlandı: {rapor['urun']} ürün, {rapor['alici']} alıcı")
         return True
-        
+
     except Exception as e:
         logger.error(f"Stok kontrolü hatası: {str(e)}")
         return False
-
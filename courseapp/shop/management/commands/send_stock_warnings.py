@@ -1,48 +1,27 @@
 # shop/management/commands/send_stock_warnings.py
+"""
+Düşük stok bayraklı ürünler için admin'lere tek özet email'i kuyruğa alır
+(shop/stock_alerts.py). Yalnızca bayraklı ürünleri okur; cron ile (ör. saatlik) çalıştırılır.
+Kullanım: python manage.py send_stock_warnings
+"""
 from django.core.management.base import BaseCommand
-from shop.email_utils import check_and_send_stock_warnings
+
+from courseapp.constants import STOK_UYARI_SEVIYESI, STOK_UYARI_TEKRAR_SAAT
+from shop.stock_alerts import stok_uyari_ozeti_gonder
 
 class Command(BaseCommand):
-    help = 'Stok seviyelerini kontrol eder ve düşük stoklu ürünler için admin\'lere email gönderir'
+    help = 'Düşük stoklu ürünler için admin\'lere özet email gönderir'
 
     def add_arguments(self, parser):
-        parser.add_argument(
-            '--min-stok',
-            type=int,
-            default=5,
-            help='Minimum stok seviyesi (varsayılan: 5)'
-        )
-        parser.add_argument(
-            '--uyari-stok',
-            type=int,
-            default=10,
-            help='Uyarı stok seviyesi (varsayılan: 10)'
-        )
+        # Eski cron satırları kırılmasın diye kabul edilir; eşikler courseapp/constants.py'den okunur
+        parser.add_argument('--min-stok', type=int, help='Kullanılmıyor (STOK_KRITIK_SEVIYE)')
+        parser.add_argument('--uyari-stok', type=int, help='Kullanılmıyor (STOK_UYARI_SEVIYESI)')
 
     def handle(self, *args, **options):
-        min_stok = options['min_stok']
-        uyari_stok = options['uyari_stok']
-        
         self.stdout.write(
-            self.style.SUCCESS(f'Stok kontrolü başlatılıyor...')
+            f'Uyarı stok seviyesi: {STOK_UYARI_SEVIYESI}, aynı ürün için tekrar aralığı: {STOK_UYARI_TEKRAR_SAAT} saat'
         )
-        self.stdout.write(f'Minimum stok seviyesi: {min_stok}')
-        self.stdout.write(f'Uyarı stok seviyesi: {uyari_stok}')
-        
-        try:
-            success = check_and_send_stock_warnings()
-            
-            if success:
-                self.stdout.write(
-                    self.style.SUCCESS('Stok kontrolü başarıyla tamamlandı!')
-                )
-            else:
-                self.stdout.write(
-                    self.style.ERROR('Stok kontrolü sırasında hata oluştu!')
-                )
-                
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'Stok kontrolü hatası: {str(e)}')
-            )
-
+        rapor = stok_uyari_ozeti_gonder()
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] {rapor['urun']} ürün için özet {rapor['alici']} alıcıya kuyruğa alındı"
+        ))
@@ -0,0 +1,28 @@
+"""
+Günlük sipariş ve ürün satış özetlerini siparişlerden yeniden oluşturur.
+Özetler normalde sipariş oluşturma / durum değişikliklerinde artımlı güncellenir;
+bu komut ilk kurulumda, toplu içe aktarma sonrasında veya tutarsızlık şüphesinde çalıştırılır.
+Kullanım: python manage.py siparis_ozetle [--gun 30]
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from shop.order_rollups import ozetleri_yeniden_olustur
+
+
+class Command(BaseCommand):
+    help = 'Günlük sipariş özetlerini siparişlerden yeniden oluşturur'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gun', type=int, help='Sadece son N günü yeniden oluştur (varsayılan: tümü)')
+
+    def handle(self, *args, **options):
+        baslangic = None
+        if options['gun']:
+            baslangic = timezone.localdate() - timedelta(days=options['gun'] - 1)
+        rapor = ozetleri_yeniden_olustur(baslangic=baslangic)
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] {rapor['siparis_ozeti']} günlük sipariş özeti, {rapor['urun_ozeti']} ürün satış özeti yazıldı"
+        ))
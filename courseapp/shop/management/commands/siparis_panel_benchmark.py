@@ -0,0 +1,138 @@
+"""
+Sipariş yönetim panelinin (admin_siparis_yonet) büyük sipariş tablosundaki
+sorgu sayısını ve süresini ölçer; aynı rakamları tüm tabloyu tarayan canlı
+aggregate'lerle hesaplamanın süresini de karşılaştırma için yazdırır.
+Kullanım: python manage.py siparis_panel_benchmark [--siparis 200000] [--gun 365] [--tekrar 5]
+
+Siparişler tek transaction içinde üretilir ve ölçüm sonunda geri alınır;
+veritabanında kalıcı değişiklik bırakmaz. Yine de üretim veritabanının kopyasında çalıştırın.
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from shop.models import Siparis, SiparisKalemi, Urun
+from shop.order_rollups import SATIS_DURUMLARI, ozetleri_yeniden_olustur
+
+DURUMLAR = ['bekliyor', 'odendi', 'hazirlaniyor', 'kargoda', 'teslim_edildi', 'iptal', 'iade']
+
+
+class _GeriAl(Exception):
+    pass
+
+
+def _sure(fonksiyon):
+    bas = time.perf_counter()
+    sonuc = fonksiyon()
+    return sonuc, (time.perf_counter() - bas) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Sipariş yönetim panelini büyük sipariş tablosunda ölçer (veriler sonunda geri alınır)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--siparis', type=int, default=200000, help='Üretilecek sipariş sayısı (varsayılan: 200000)')
+        parser.add_argument('--gun', type=int, default=365, help='Siparişlerin dağıtılacağı gün sayısı')
+        parser.add_argument('--tekrar', type=int, default=5, help='Panel isteği tekrar sayısı')
+
+    def _uret(self, adet, gun_sayisi):
+        rastgele = random.Random(42)
+        urunler = Urun.objects.bulk_create([
+            Urun(ad=f'Benchmark Ürün {i}', aciklama='-', fiyat=Decimal(10 + i), stok=1000,
+                 urun_tipi='etiket' if i % 4 == 0 else 'normal')
+            for i in range(20)
+        ])
+        User.objects.bulk_create([User(username=f'siparis_benchmark_{i}') for i in range(500)])
+        kullanicilar = list(User.objects.filter(username__startswith='siparis_benchmark_'))
+
+        bugun = timezone.now()
+        gun_basina = max(adet // gun_sayisi, 1)
+        uretilen = 0
+        while uretilen < adet:
+            parti = min(5000, adet - uretilen)
+            siparisler = Siparis.objects.bulk_create([
+                Siparis(
+                    kullanici=rastgele.choice(kullanicilar) if rastgele.random() < 0.7 else None,
+                    toplam_fiyat=Decimal(rastgele.randint(50, 2000)),
+                    kargo_ucreti=Decimal(rastgele.choice([0, 29, 49])),
+                    adres='benchmark',
+                    durum=rastgele.choice(DURUMLAR),
+                )
+                for _ in range(parti)
+            ])
+            SiparisKalemi.objects.bulk_create([
+                SiparisKalemi(siparis=siparis, urun=urun, miktar=rastgele.randint(1, 3), fiyat=urun.fiyat)
+                for siparis in siparisler
+                for urun in rastgele.sample(urunler, rastgele.randint(1, 2))
+            ], batch_size=5000)
+            uretilen += parti
+
+        # auto_now_add'i geçersiz kılmak için oluşturulma tarihleri gün gün dağıtılır
+        idler = list(Siparis.objects.filter(adres='benchmark').order_by('pk').values_list('pk', flat=True))
+        for gun, bas in enumerate(range(0, len(idler), gun_basina)):
+            parca = idler[bas:bas + gun_basina]
+            Siparis.objects.filter(pk__gte=parca[0], pk__lte=parca[-1]).update(
+                olusturulma_tarihi=bugun - timedelta(days=min(gun, gun_sayisi - 1))
+            )
+        return User.objects.create_user(username='siparis_benchmark_yonetici', is_staff=True)
+
+    def _canli_istatistikler(self):
+        """Özetten önceki yöntem: durum, dönem ve ürün tipi başına tüm tabloda ayrı aggregate."""
+        bugun = timezone.now().date()
+        return [
+            Siparis.objects.count(),
+            *[Siparis.objects.filter(durum=durum).count() for durum in ('bekliyor', 'odendi', 'kargoda', 'teslim_edildi')],
+            Siparis.objects.filter(kalemler__urun__urun_tipi='normal').distinct().count(),
+            Siparis.objects.filter(kalemler__urun__urun_tipi='etiket').distinct().count(),
+            Siparis.objects.filter(olusturulma_tarihi__date=bugun, durum__in=SATIS_DURUMLARI).aggregate(t=Sum('toplam_fiyat')),
+            Siparis.objects.filter(
+                olusturulma_tarihi__date__gte=bugun - timedelta(days=7), durum__in=SATIS_DURUMLARI
+            ).aggregate(t=Sum('toplam_fiyat')),
+        ]
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                yonetici, uretim_suresi = _sure(lambda: self._uret(options['siparis'], options['gun']))
+                rapor, ozet_suresi = _sure(ozetleri_yeniden_olustur)
+                self.stdout.write(
+                    f"{options['siparis']} sipariş üretildi ({uretim_suresi / 1000:.1f} sn); "
+                    f"özet yeniden oluşturma: {ozet_suresi:.0f} ms, {rapor['siparis_ozeti']} günlük satır"
+                )
+
+                _, canli_sure = _sure(self._canli_istatistikler)
+                self.stdout.write(f"Canlı aggregate'ler (eski yöntem, 9 sorgu): {canli_sure:.0f} ms")
+
+                client = Client()
+                client.force_login(yonetici)
+                url = reverse('shop:admin_siparis_yonet')
+                sureler, sorgu_sayilari = [], []
+                with override_settings(ALLOWED_HOSTS=['testserver']):
+                    client.get(url)  # Isınma
+                    for _ in range(max(options['tekrar'], 1)):
+                        with CaptureQueriesContext(connection) as sorgular:
+                            yanit, sure = _sure(lambda: client.get(url))
+                        if yanit.status_code != 200:
+                            self.stderr.write(f"Panel {yanit.status_code} döndü")
+                        sureler.append(sure)
+                        sorgu_sayilari.append(len(sorgular))
+
+                self.stdout.write(
+                    f"Panel: {max(sorgu_sayilari)} sorgu, süre (ms) medyan={statistics.median(sureler):.0f} "
+                    f"maks={max(sureler):.0f}"
+                )
+                raise _GeriAl
+        except _GeriAl:
+            pass
+        self.stdout.write(self.style.SUCCESS("[OK] Ölçüm bitti, üretilen veriler geri alındı"))
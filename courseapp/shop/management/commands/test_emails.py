@@ -1,6 +1,7 @@
 # shop/management/commands/test_emails.py
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
+from core.outbox import bekleyen_epostalari_gonder
 from shop.models import Urun, Siparis, SiparisKalemi
 from shop.email_utils import (
     send_order_confirmation_email,
@@ -63,6 +64,10 @@ class Command(BaseCommand):
             if test_type in ['all', 'stock']:
                 self.test_stock_warning()
             
+            # Bildirimler giden e-posta kutusuna yazılır; testte hemen gönder
+            rapor = bekleyen_epostalari_gonder()
+            self.stdout.write(f"Kuyruktan gönderilen: {rapor['gonderilen']}, hatalı: {rapor['hatali']}")
+            
             self.stdout.write(
                 self.style.SUCCESS('Email testleri tamamlandı!')
             )
@@ -117,9 +122,9 @@ class Command(BaseCommand):
         success = send_order_confirmation_email(test_siparis)
         
         if success:
-            self.stdout.write(self.style.SUCCESS('✅ Sipariş onay email\'i başarıyla gönderildi!'))
+            self.stdout.write(self.style.SUCCESS('✅ Sipariş onay email\'i kuyruğa alındı!'))
         else:
-            self.stdout.write(self.style.ERROR('❌ Sipariş onay email\'i gönderilemedi!'))
+            self.stdout.write(self.style.ERROR('❌ Sipariş onay email\'i kuyruğa alınamadı!'))
         
         # Test verilerini temizle
         test_siparis.delete()
@@ -150,9 +155,9 @@ class Command(BaseCommand):
         success = send_shipping_notification_email(test_siparis)
         
         if success:
-            self.stdout.write(self.style.SUCCESS('✅ Kargo bildirim email\'i başarıyla gönderildi!'))
+            self.stdout.write(self.style.SUCCESS('✅ Kargo bildirim email\'i kuyruğa alındı!'))
         else:
-            self.stdout.write(self.style.ERROR('❌ Kargo bildirim email\'i gönderilemedi!'))
+            self.stdout.write(self.style.ERROR('❌ Kargo bildirim email\'i kuyruğa alınamadı!'))
         
         # Test verilerini temizle
         test_siparis.delete()
@@ -184,9 +189,9 @@ class Command(BaseCommand):
         )
         
         if success:
-            self.stdout.write(self.style.SUCCESS('✅ Sipariş iptal email\'i başarıyla gönderildi!'))
+            self.stdout.write(self.style.SUCCESS('✅ Sipariş iptal email\'i kuyruğa alındı!'))
         else:
-            self.stdout.write(self.style.ERROR('❌ Sipariş iptal email\'i gönderilemedi!'))
+            self.stdout.write(self.style.ERROR('❌ Sipariş iptal email\'i kuyruğa alınamadı!'))
         
         # Test verilerini temizle
         test_siparis.delete()
@@ -211,9 +216,9 @@ class Command(BaseCommand):
         success = send_stock_warning_email(test_urun, min_stok_seviyesi=5, uyari_seviyesi=10)
         
         if success:
-            self.stdout.write(self.style.SUCCESS('✅ Stok uyarı email\'i başarıyla gönderildi!'))
+            self.stdout.write(self.style.SUCCESS('✅ Stok uyarı email\'i kuyruğa alındı!'))
         else:
-            self.stdout.write(self.style.ERROR('❌ Stok uyarı email\'i gönderilemedi!'))
+            self.stdout.write(self.style.ERROR('❌ Stok uyarı email\'i kuyruğa alınamadı!'))
         
         # Test verilerini temizle
         if created:
@@ -0,0 +1,120 @@
+"""
+Toplu e-posta gönderim hızını ölçer: kampanyayı kuyruğa alır (şablon bir kez
+render edilir, ad alıcı başına değiştirilir) ve giden e-posta kutusundan
+partiler halinde, parti başına tek SMTP bağlantısıyla gönderir. Karşılaştırma
+için eski yöntemi (alıcı başına render ve yeni bağlantı) bir örneklemde ölçer.
+Kullanım: python manage.py toplu_eposta_benchmark [--alici 10000] [--parti 100] [--eski-ornek 1000]
+        [--baglanti-gecikmesi 0] [--smtp HOST:PORT]
+
+--smtp verilmezse süreç içinde yerel hata ayıklama SMTP sunucusu (core/smtp_sink.py)
+başlatılır; --baglanti-gecikmesi (ms) yerel sunucuda bağlantı kurma maliyetini
+(TLS + kimlik doğrulama) taklit eder. Gerçek bir SMTP sunucusu vermeyin: alıcılar
+örnek adreslerdir.
+Kuyruk satırları ölçüm sonunda geri alınır.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test.utils import override_settings
+
+from core.models import GidenEposta
+from core.outbox import bekleyen_epostalari_gonder, kampanya_durumu, kampanya_epostalari
+from core.smtp_sink import HataAyiklamaSMTP
+from courseapp.constants import GIDEN_EPOSTA_KAYIT_PARTI, GIDEN_EPOSTA_PARTI_BOYUTU
+
+KAMPANYA = 'toplu-eposta-benchmark'
+SABLON = 'shop/emails/toplu_duyuru.html'
+GONDEREN = 'noreply@petsafehub.com'
+BAGLAM = {
+    'baslik': 'Bahar kampanyası',
+    'icerik': 'Tüm mama ürünlerinde indirim başladı.\nKampanya ay sonuna kadar sürer.',
+    'site_url': 'http://127.0.0.1:8000',
+    'contact_email': 'info@petsafehub.com',
+}
+
+
+class _GeriAl(Exception):
+    pass
+
+
+def _sure(fonksiyon):
+    bas = time.perf_counter()
+    sonuc = fonksiyon()
+    return sonuc, time.perf_counter() - bas
+
+
+class Command(BaseCommand):
+    help = 'Toplu e-posta kuyruğa alma ve gönderim hızını ölçer (kuyruk satırları sonunda geri alınır)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--alici', type=int, default=10000, help='Alıcı sayısı (varsayılan: 10000)')
+        parser.add_argument('--parti', type=int, default=GIDEN_EPOSTA_PARTI_BOYUTU, help='SMTP bağlantısı başına e-posta')
+        parser.add_argument('--eski-ornek', type=int, default=1000, help='Eski yöntemle gönderilecek örnek sayısı (0: atla)')
+        parser.add_argument('--baglanti-gecikmesi', type=int, default=0, help='Yerel sunucuda bağlantı başına gecikme (ms)')
+        parser.add_argument('--smtp', help='HOST:PORT (varsayılan: süreç içi hata ayıklama sunucusu)')
+
+    def _eski_yontem(self, alicilar):
+        """send_bulk_email'in önceki hali: alıcı başına render ve her ileti için yeni bağlantı."""
+        for alici, degerler in alicilar:
+            html = render_to_string(SABLON, {**BAGLAM, **degerler})
+            mesaj = EmailMultiAlternatives(BAGLAM['baslik'], BAGLAM['baslik'], GONDEREN, [alici])
+            mesaj.attach_alternative(html, "text/html")
+            mesaj.send()
+
+    def _olc(self, options, sink):
+        adet = options['alici']
+        alicilar = [(f'alici{i}@example.com', {'ad': f'Alıcı {i}'}) for i in range(adet)]
+
+        def kuyruga_al():
+            epostalar = kampanya_epostalari(
+                KAMPANYA, alicilar, BAGLAM['baslik'], SABLON, baglam=BAGLAM, kisisel_alanlar=('ad',), gonderen=GONDEREN,
+            )
+            GidenEposta.objects.bulk_create(epostalar, batch_size=GIDEN_EPOSTA_KAYIT_PARTI)
+
+        _, kuyruk_suresi = _sure(kuyruga_al)
+        self.stdout.write(f"Kuyruğa alma (tek render + {adet} satır): {kuyruk_suresi:.2f} sn")
+
+        baglanti_oncesi = sink.baglanti_sayisi if sink else None
+        rapor, gonderim_suresi = _sure(
+            lambda: bekleyen_epostalari_gonder(parti_boyutu=options['parti'], kampanya=KAMPANYA)
+        )
+        baglanti = f", {sink.baglanti_sayisi - baglanti_oncesi} bağlantı" if sink else ''
+        self.stdout.write(
+            f"Outbox gönderimi: {rapor['gonderilen']} gönderildi, {rapor['hatali']} hatalı, "
+            f"{rapor['parti']} parti{baglanti}; {gonderim_suresi:.2f} sn "
+            f"({rapor['gonderilen'] / gonderim_suresi:.0f} ileti/sn)"
+        )
+        self.stdout.write(f"Kampanya durumu: {kampanya_durumu(KAMPANYA)}")
+
+        ornek = alicilar[:options['eski_ornek']]
+        if ornek:
+            _, eski_sure = _sure(lambda: self._eski_yontem(ornek))
+            self.stdout.write(
+                f"Eski yöntem ({len(ornek)} örnek): {eski_sure:.2f} sn ({len(ornek) / eski_sure:.0f} ileti/sn)"
+            )
+
+    def handle(self, *args, **options):
+        sink = None
+        if options['smtp']:
+            host, port = options['smtp'].rsplit(':', 1)
+        else:
+            sink = HataAyiklamaSMTP(baglanti_gecikmesi=options['baglanti_gecikmesi'] / 1000).baslat()
+            host, port = sink.host, sink.port
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                EMAIL_HOST=host, EMAIL_PORT=int(port), EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+                EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+            ):
+                with transaction.atomic():
+                    self._olc(options, sink)
+                    raise _GeriAl
+        except _GeriAl:
+            pass
+        finally:
+            if sink:
+                sink.durdur()
+        self.stdout.write(self.style.SUCCESS("[OK] Ölçüm bitti, kuyruk satırları geri alındı"))
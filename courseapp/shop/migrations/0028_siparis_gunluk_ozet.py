@@ -0,0 +1,79 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0027_remove_petshopsayfaayar_aktif_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiparisGunluk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(verbose_name='Tarih')),
+                ('durum', models.CharField(choices=[('bekliyor', 'Ödeme Bekleniyor'), ('odendi', 'Ödeme Alındı'), ('hazirlaniyor', 'Hazırlanıyor'), ('kargoda', 'Kargoya Verildi'), ('teslim_edildi', 'Teslim Edildi'), ('iptal', 'İptal Edildi'), ('iade', 'İade Edildi')], max_length=20, verbose_name='Durum')),
+                ('siparis_sayisi', models.IntegerField(default=0, verbose_name='Sipariş Sayısı')),
+                ('ciro', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ciro')),
+                ('kupon_indirimi', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Kupon İndirimi')),
+                ('kargo_ucreti', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Kargo Ücreti')),
+                ('normal_urunlu_siparis', models.IntegerField(default=0, verbose_name='Pet Ürünlü Sipariş')),
+                ('etiket_urunlu_siparis', models.IntegerField(default=0, verbose_name='Etiket Ürünlü Sipariş')),
+            ],
+            options={
+                'verbose_name': 'Günlük Sipariş Özeti',
+                'verbose_name_plural': 'Günlük Sipariş Özetleri',
+                'ordering': ['-tarih', 'durum'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UrunSatisGunluk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarih', models.DateField(verbose_name='Tarih')),
+                ('durum', models.CharField(choices=[('bekliyor', 'Ödeme Bekleniyor'), ('odendi', 'Ödeme Alındı'), ('hazirlaniyor', 'Hazırlanıyor'), ('kargoda', 'Kargoya Verildi'), ('teslim_edildi', 'Teslim Edildi'), ('iptal', 'İptal Edildi'), ('iade', 'İade Edildi')], max_length=20, verbose_name='Durum')),
+                ('adet', models.IntegerField(default=0, verbose_name='Adet')),
+                ('tutar', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Tutar')),
+            ],
+            options={
+                'verbose_name': 'Günlük Ürün Satışı',
+                'verbose_name_plural': 'Günlük Ürün Satışları',
+                'ordering': ['-tarih'],
+            },
+        ),
+        migrations.AddField(
+            model_name='siparis',
+            name='kargo_ucreti',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Kargo Ücreti'),
+        ),
+        migrations.AddField(
+            model_name='siparis',
+            name='kupon_indirimi',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Kupon İndirimi'),
+        ),
+        migrations.AddIndex(
+            model_name='siparis',
+            index=models.Index(fields=['olusturulma_tarihi'], name='shop_sipari_olustur_943fe1_idx'),
+        ),
+        migrations.AddField(
+            model_name='urunsatisgunluk',
+            name='urun',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gunluk_satislar', to='shop.urun', verbose_name='Ürün'),
+        ),
+        migrations.AddConstraint(
+            model_name='siparisgunluk',
+            constraint=models.UniqueConstraint(fields=('tarih', 'durum'), name='siparis_gunluk_tekil'),
+        ),
+        migrations.AddIndex(
+            model_name='urunsatisgunluk',
+            index=models.Index(fields=['urun', 'tarih'], name='shop_urunsa_urun_id_587346_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='urunsatisgunluk',
+            constraint=models.UniqueConstraint(fields=('tarih', 'urun', 'durum'), name='urun_satis_gunluk_tekil'),
+        ),
+    ]
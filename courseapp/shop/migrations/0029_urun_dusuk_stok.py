@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:00
+
+from django.db import migrations, models
+
+
+def bayraklari_doldur(apps, schema_editor):
+    from courseapp.constants import STOK_UYARI_SEVIYESI
+
+    Urun = apps.get_model('shop', 'Urun')
+    Urun.objects.filter(aktif=True, stok__lte=STOK_UYARI_SEVIYESI).update(dusuk_stok=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0028_siparis_gunluk_ozet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='urun',
+            name='dusuk_stok',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Düşük Stok'),
+        ),
+        migrations.AddField(
+            model_name='urun',
+            name='stok_uyari_tarihi',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Son Stok Uyarısı'),
+        ),
+        migrations.AddIndex(
+            model_name='urun',
+            index=models.Index(condition=models.Q(('dusuk_stok', True)), fields=['stok_uyari_tarihi'], name='urun_dusuk_stok_idx'),
+        ),
+        migrations.RunPython(bayraklari_doldur, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,12 @@
 # shop/models.py
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from decimal import Decimal
 from anahtarlik.models import EvcilHayvan
+from courseapp.constants import STOK_KRITIK_SEVIYE, STOK_UYARI_SEVIYESI
 
 class Kategori(models.Model):
     ad = models.CharField(max_length=100)
@@ -66,6 +69,9 @@ class Urun(models.Model):
     fiyat = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Normal Müşteri Fiyatı")
     indirimli_fiyat = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     stok = models.IntegerField(default=0)
+    # Stokla birlikte güncellenir (shop/stock_alerts.py); uyarı özeti yalnızca bayraklı satırları okur
+    dusuk_stok = models.BooleanField(default=False, editable=False, verbose_name="Düşük Stok")
+    stok_uyari_tarihi = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Son Stok Uyarısı")
     
     # Bayi (Petshop/Veteriner) fiyatları
     petshop_veteriner_fiyat_aktif = models.BooleanField(
@@ -219,10 +225,25 @@ class Urun(models.Model):
         verbose_name = "Ürün"
         verbose_name_plural = "Ürünler"
         ordering = ['-olusturulma_tarihi']
+        indexes = [
+            # Kısmi indeks: yalnızca düşük stoklu ürünler; özet sorgusu katalog boyutundan bağımsız
+            models.Index(fields=['stok_uyari_tarihi'], name='urun_dusuk_stok_idx', condition=models.Q(dusuk_stok=True)),
+        ]
 
     def __str__(self):
         return self.ad
 
+    def save(self, *args, **kwargs):
+        from .stock_alerts import dusuk_stok_mu
+
+        self.dusuk_stok = dusuk_stok_mu(self.aktif, self.stok)
+        if not self.dusuk_stok:
+            self.stok_uyari_tarihi = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'stok', 'aktif'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'dusuk_stok', 'stok_uyari_tarihi'}
+        super().save(*args, **kwargs)
+
     @property
     def indirim_orani(self):
         if self.indirimli_fiyat and self.fiyat:
@@ -247,9 +268,9 @@ class Urun(models.Model):
         # Kullanıcı tipi kontrolü
         is_bayi = False
         if user and user.is_authenticated:
-            # Petshop veya Veteriner kontrolü
-            if hasattr(user, 'veteriner_profili') or hasattr(user, 'petshop_profili'):
-                is_bayi = True
+            # Petshop veya Veteriner kontrolü (rol user üzerinde memo'lanır)
+            from accaunt.roles import resolve_user_role
+            is_bayi = resolve_user_role(user).bayi_mi
         
         # Bayi fiyatı aktif ve kullanıcı bayi ise
         if is_bayi and self.petshop_veteriner_fiyat_aktif and self.petshop_veteriner_fiyat:
@@ -290,47 +311,37 @@ class Urun(models.Model):
             raise ValidationError("Normal ürünler için en az bir kategori seçilmelidir.")
     
     def stok_azalt(self, miktar):
-        """Stok azalt ve uyarı kontrolü yap"""
-        if self.stok >= miktar:
-            self.stok -= miktar
-            self.save()
-            
-            # Stok uyarı kontrolü
-            self.check_stock_warning()
-            return True
-        return False
+        """
+        Stoğu tek koşullu UPDATE ile azaltır; yetersizse False. Düşük stok bayrağı
+        aynı sorguda güncellenir, e-posta gönderilmez (uyarılar özetle gider).
+        """
+        from .stock_alerts import bayrak_alanlari
+
+        guncellenen = Urun.objects.filter(pk=self.pk, stok__gte=miktar).update(
+            stok=F('stok') - miktar, guncelleme_tarihi=timezone.now(), **bayrak_alanlari(-miktar)
+        )
+        if guncellenen:
+            self.refresh_from_db(fields=['stok', 'dusuk_stok', 'stok_uyari_tarihi'])
+        return bool(guncellenen)
     
     def stok_artir(self, miktar):
         """Stok artır"""
-        self.stok += miktar
-        self.save()
+        from .stock_alerts import bayrak_alanlari
+
+        Urun.objects.filter(pk=self.pk).update(
+            stok=F('stok') + miktar, guncelleme_tarihi=timezone.now(), **bayrak_alanlari(miktar)
+        )
+        self.refresh_from_db(fields=['stok', 'dusuk_stok', 'stok_uyari_tarihi'])
         return True
     
-    def check_stock_warning(self):
-        """Stok uyarı kontrolü yap"""
-        try:
-            from .email_utils import send_stock_warning_email
-            
-            min_stok = 5
-            uyari_stok = 10
-            
-            # Stok uyarı seviyesinde mi kontrol et
-            if self.stok <= uyari_stok and self.stok > 0:
-                send_stock_warning_email(self, min_stok, uyari_stok)
-            elif self.stok == 0:
-                send_stock_warning_email(self, min_stok, uyari_stok)
-        except Exception as e:
-            # Email hatası stok işlemini etkilemesin
-            print(f"Stok uyarı email hatası: {str(e)}")
-    
     @property
     def stok_durumu(self):
         """Stok durumu string'i"""
         if self.stok == 0:
             return "Tükendi"
-        elif self.stok <= 5:
+        elif self.stok <= STOK_KRITIK_SEVIYE:
             return "Kritik"
-        elif self.stok <= 10:
+        elif self.stok <= STOK_UYARI_SEVIYESI:
             return "Azalıyor"
         else:
             return "Yeterli"
@@ -369,6 +380,11 @@ class Siparis(models.Model):
     # Kargo bilgileri
     kargo_firma = models.ForeignKey('KargoFirma', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Kargo Firması")
     kargo_takip_no = models.CharField(max_length=100, blank=True, verbose_name="Kargo Takip No")
+    kargo_ucreti = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Kargo Ücreti")
+    kupon_indirimi = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Kupon İndirimi")
+
+    class Meta:
+        indexes = [models.Index(fields=['olusturulma_tarihi'])]  # Günlük özet ve "bugün" istatistikleri için
 
     def __str__(self):
         if self.kullanici:
@@ -748,8 +764,8 @@ class Kupon(models.Model):
     def __str__(self):
         return f"{self.kod} - {self.get_kupon_tipi_display()}"
 
-    def kullanilabilir_mi(self, kullanici, siparis_tutari):
-        """Kupon kullanılabilir mi kontrol et"""
+    def gecerlilik_kontrolu(self, siparis_tutari):
+        """Sayaçlardan bağımsız koşullar: aktiflik, tarih aralığı, minimum tutar."""
         from django.utils import timezone
 
         # Aktif mi?
@@ -767,6 +783,14 @@ class Kupon(models.Model):
         if siparis_tutari < self.minimum_tutar:
             return False, f"Minimum {self.minimum_tutar} TL olmalı"
 
+        return True, "Kupon geçerli"
+
+    def kullanilabilir_mi(self, kullanici, siparis_tutari):
+        """Kupon kullanılabilir mi kontrol et"""
+        gecerli, mesaj = self.gecerlilik_kontrolu(siparis_tutari)
+        if not gecerli:
+            return False, mesaj
+
         # Kullanım limiti
         if self.kullanim_limiti and self.kullanim_sayisi >= self.kullanim_limiti:
             return False, "Kupon kullanım limiti dolmuş"
@@ -875,4 +899,54 @@ class SiparisDurum(models.Model):
         ordering = ['-olusturulma_tarihi']
 
     def __str__(self):
-        return f"Sipariş #{self.siparis.id} - {self.get_durum_display()}"
\ No newline at end of file
+        return f"Sipariş #{self.siparis.id} - {self.get_durum_display()}"
+
+
+class SiparisGunluk(models.Model):
+    """
+    Siparişlerin günlük özeti (oluşturulma günü ve güncel durum kırılımında).
+    Sipariş oluşturma ve durum değişikliklerinde artımlı güncellenir (shop/order_rollups.py);
+    siparis_ozetle komutu ile yeniden oluşturulabilir.
+    """
+
+    tarih = models.DateField(verbose_name="Tarih")
+    durum = models.CharField(max_length=20, choices=SiparisDurum.DURUM_CHOICES, verbose_name="Durum")
+    siparis_sayisi = models.IntegerField(default=0, verbose_name="Sipariş Sayısı")
+    ciro = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Ciro")
+    kupon_indirimi = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Kupon İndirimi")
+    kargo_ucreti = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Kargo Ücreti")
+    normal_urunlu_siparis = models.IntegerField(default=0, verbose_name="Pet Ürünlü Sipariş")
+    etiket_urunlu_siparis = models.IntegerField(default=0, verbose_name="Etiket Ürünlü Sipariş")
+
+    class Meta:
+        verbose_name = "Günlük Sipariş Özeti"
+        verbose_name_plural = "Günlük Sipariş Özetleri"
+        ordering = ['-tarih', 'durum']
+        constraints = [
+            models.UniqueConstraint(fields=['tarih', 'durum'], name='siparis_gunluk_tekil'),
+        ]
+
+    def __str__(self):
+        return f"{self.tarih} - {self.durum} ({self.siparis_sayisi})"
+
+
+class UrunSatisGunluk(models.Model):
+    """Ürün başına günlük satılan adet ve tutar (sipariş günü ve durum kırılımında)."""
+
+    tarih = models.DateField(verbose_name="Tarih")
+    urun = models.ForeignKey(Urun, on_delete=models.CASCADE, related_name='gunluk_satislar', verbose_name="Ürün")
+    durum = models.CharField(max_length=20, choices=SiparisDurum.DURUM_CHOICES, verbose_name="Durum")
+    adet = models.IntegerField(default=0, verbose_name="Adet")
+    tutar = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Tutar")
+
+    class Meta:
+        verbose_name = "Günlük Ürün Satışı"
+        verbose_name_plural = "Günlük Ürün Satışları"
+        ordering = ['-tarih']
+        constraints = [
+            models.UniqueConstraint(fields=['tarih', 'urun', 'durum'], name='urun_satis_gunluk_tekil'),
+        ]
+        indexes = [models.Index(fields=['urun', 'tarih'])]
+
+    def __str__(self):
+        return f"{self.tarih} - {self.urun_id} ({self.adet})"
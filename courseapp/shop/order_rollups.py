@@ -0,0 +1,274 @@
+# shop/order_rollups.py
+"""
+Sipariş ve ciro istatistikleri için günlük özet tabloları.
+
+SiparisGunluk, siparişleri oluşturulma günü ve güncel durum kırılımında tutar
+(sipariş sayısı, ciro, kupon indirimi, kargo ücreti, pet/etiket ürünlü sipariş
+sayısı); UrunSatisGunluk ürün başına adet ve tutarı tutar. Tablolar artımlı
+güncellenir:
+  - sipariş oluşturulunca (post_save) siparişin katkısı eklenir,
+  - kalem eklenince (post_save) ürün adedi ve ürün tipi sayacı eklenir,
+  - durum değişince katkı eski durumdan düşülüp yeni duruma eklenir
+    (instance save'de sinyalle; queryset.update yapan yerler
+    siparis_durumu_degisti'yi kendisi çağırır),
+  - sipariş silinince katkısı düşülür.
+Artışlar F() ile tek UPDATE'te uygulanır, eşzamanlı siparişler birbirini ezmez.
+Durum dışındaki alan düzenlemeleri (ör. admin'de tutar değişikliği) izlenmez;
+`siparis_ozetle` komutu tabloları siparişlerden yeniden oluşturur.
+
+Yönetim paneli geçmiş günleri özetten, bugünü canlı siparişlerden okur.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, Exists, F, IntegerField, OuterRef, Q, Sum, Value, When
+from django.db.models.signals import post_init, post_save, pre_delete
+from django.db.models.functions import TruncDate
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Siparis, SiparisGunluk, SiparisKalemi, UrunSatisGunluk
+
+logger = logging.getLogger(__name__)
+
+# Ciroya sayılan durumlar
+SATIS_DURUMLARI = ('odendi', 'hazirlaniyor', 'kargoda', 'teslim_edildi')
+
+SIPARIS_ALANLARI = (
+    'siparis_sayisi', 'ciro', 'kupon_indirimi', 'kargo_ucreti', 'normal_urunlu_siparis', 'etiket_urunlu_siparis',
+)
+URUN_ALANLARI = ('adet', 'tutar')
+
+# Tek UPDATE'teki anahtar sayısı (CASE ifadesinin boyutu)
+_GUNCELLEME_PARTISI = 100
+
+
+def _gun_baslangici(tarih):
+    return timezone.make_aware(datetime.combine(tarih, time.min))
+
+
+def _urun_tipi_var(tip):
+    return Exists(SiparisKalemi.objects.filter(siparis=OuterRef('pk'), urun__urun_tipi=tip))
+
+
+def _siparis_gruplari(siparisler):
+    """Siparişlerin (tarih, durum) grupları ve SIPARIS_ALANLARI toplamları; tek sorgu."""
+    return (
+        siparisler.order_by()
+        .annotate(normal_var=_urun_tipi_var('normal'), etiket_var=_urun_tipi_var('etiket'))
+        .values('durum', tarih=TruncDate('olusturulma_tarihi'))
+        .annotate(
+            siparis_sayisi=Count('pk'),
+            ciro=Sum('toplam_fiyat'),
+            kupon_indirimi=Sum('kupon_indirimi'),
+            kargo_ucreti=Sum('kargo_ucreti'),
+            normal_urunlu_siparis=Count('pk', filter=Q(normal_var=True)),
+            etiket_urunlu_siparis=Count('pk', filter=Q(etiket_var=True)),
+        )
+    )
+
+
+def _urun_gruplari(kalemler):
+    """Kalemlerin (tarih, ürün, durum) grupları ve adet/tutar toplamları; tek sorgu."""
+    return (
+        kalemler.order_by()
+        .values('urun_id', durum=F('siparis__durum'), tarih=TruncDate('siparis__olusturulma_tarihi'))
+        .annotate(adet=Sum('miktar'), tutar=Sum(F('miktar') * F('fiyat'), output_field=DecimalField()))
+    )
+
+
+def _ozete_ekle(model, anahtar_alanlari, deltalar):
+    """
+    deltalar: {anahtar: {alan: artış}}. Eksik özet satırları oluşturulur, artışlar
+    CASE ifadeli tek UPDATE ile F() üzerine eklenir.
+    """
+    deltalar = {anahtar: d for anahtar, d in deltalar.items() if any(d.values())}
+    if not deltalar:
+        return
+    model.objects.bulk_create(
+        [model(**dict(zip(anahtar_alanlari, anahtar))) for anahtar in deltalar], ignore_conflicts=True, batch_size=500
+    )
+    alanlar = {alan for d in deltalar.values() for alan in d}
+    ogeler = list(deltalar.items())
+    for i in range(0, len(ogeler), _GUNCELLEME_PARTISI):
+        parti = ogeler[i:i + _GUNCELLEME_PARTISI]
+        kosullar = [Q(**dict(zip(anahtar_alanlari, anahtar))) for anahtar, _ in parti]
+        guncelleme = {}
+        for alan in alanlar:
+            ondalik = isinstance(model._meta.get_field(alan), DecimalField)
+            cikti = DecimalField(max_digits=14, decimal_places=2) if ondalik else IntegerField()
+            guncelleme[alan] = F(alan) + Case(
+                *[When(kosul, then=Value(d.get(alan, 0))) for kosul, (_, d) in zip(kosullar, parti)],
+                default=Value(0), output_field=cikti,
+            )
+        model.objects.filter(reduce(or_, kosullar)).update(**guncelleme)
+
+
+def _katkilari_ekle(siparisler, isaretler):
+    """
+    Siparişlerin özet katkısını uygular. isaretler: [(işaret, durum), ...]; durum None ise
+    siparişin kendi durumu kullanılır. Örn. durum değişikliği: [(-1, eski), (+1, yeni)].
+    """
+    siparis_deltalari = defaultdict(lambda: defaultdict(int))
+    for grup in _siparis_gruplari(siparisler):
+        for isaret, durum in isaretler:
+            delta = siparis_deltalari[(grup['tarih'], durum or grup['durum'])]
+            for alan in SIPARIS_ALANLARI:
+                delta[alan] += isaret * (grup[alan] or 0)
+
+    urun_deltalari = defaultdict(lambda: defaultdict(int))
+    for grup in _urun_gruplari(SiparisKalemi.objects.filter(siparis__in=siparisler)):
+        for isaret, durum in isaretler:
+            delta = urun_deltalari[(grup['tarih'], grup['urun_id'], durum or grup['durum'])]
+            for alan in URUN_ALANLARI:
+                delta[alan] += isaret * (grup[alan] or 0)
+
+    _ozete_ekle(SiparisGunluk, ('tarih', 'durum'), siparis_deltalari)
+    _ozete_ekle(UrunSatisGunluk, ('tarih', 'urun_id', 'durum'), urun_deltalari)
+
+
+def siparis_durumu_degisti(siparisler, eski_durum, yeni_durum):
+    """
+    queryset.update ile eski_durum'dan yeni_durum'a geçirilen siparişlerin katkısını taşır.
+    Güncellemeden önce veya sonra, aynı transaction'da çağrılabilir.
+    """
+    if eski_durum != yeni_durum:
+        _katkilari_ekle(siparisler, [(-1, eski_durum), (1, yeni_durum)])
+
+
+# --- Sinyaller (instance kayıtları) ---
+
+@receiver(post_init, sender=Siparis)
+def _siparis_yuklendi(sender, instance, **kwargs):
+    # Ertelenmiş (only/defer) alan için sorgu atmamak adına __dict__'ten okunur
+    instance._ozet_durum = instance.__dict__.get('durum')
+
+
+@receiver(post_save, sender=Siparis)
+def _siparis_kaydedildi(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        _katkilari_ekle(Siparis.objects.filter(pk=instance.pk), [(1, None)])
+    elif instance._ozet_durum and instance._ozet_durum != instance.durum:
+        siparis_durumu_degisti(Siparis.objects.filter(pk=instance.pk), instance._ozet_durum, instance.durum)
+    instance._ozet_durum = instance.durum
+
+
+@receiver(pre_delete, sender=Siparis)
+def _siparis_siliniyor(sender, instance, **kwargs):
+    _katkilari_ekle(Siparis.objects.filter(pk=instance.pk), [(-1, None)])
+
+
+@receiver(post_save, sender=SiparisKalemi)
+def _kalem_eklendi(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    siparis = Siparis.objects.filter(pk=instance.siparis_id).values('durum', 'olusturulma_tarihi').first()
+    if siparis is None:
+        return
+    tarih, durum = timezone.localdate(siparis['olusturulma_tarihi']), siparis['durum']
+    _ozete_ekle(UrunSatisGunluk, ('tarih', 'urun_id', 'durum'), {
+        (tarih, instance.urun_id, durum): {'adet': instance.miktar, 'tutar': instance.miktar * instance.fiyat},
+    })
+    # Siparişin bu tipteki ilk kalemi ise ürün tipi sayacı artar
+    tip = instance.urun.urun_tipi
+    if tip in ('normal', 'etiket') and not SiparisKalemi.objects.filter(
+        siparis_id=instance.siparis_id, urun__urun_tipi=tip
+    ).exclude(pk=instance.pk).exists():
+        _ozete_ekle(SiparisGunluk, ('tarih', 'durum'), {(tarih, durum): {f'{tip}_urunlu_siparis': 1}})
+
+
+# --- Yeniden oluşturma ---
+
+def ozetleri_yeniden_olustur(baslangic=None, bitis=None):
+    """
+    [baslangic, bitis] günlerinin (verilmezse tümünün) özetini siparişlerden yeniden yazar.
+    Dönüş: {'siparis_ozeti': n, 'urun_ozeti': n}
+    """
+    siparisler = Siparis.objects.all()
+    siparis_ozetleri, urun_ozetleri = SiparisGunluk.objects.all(), UrunSatisGunluk.objects.all()
+    if baslangic:
+        siparisler = siparisler.filter(olusturulma_tarihi__gte=_gun_baslangici(baslangic))
+        siparis_ozetleri = siparis_ozetleri.filter(tarih__gte=baslangic)
+        urun_ozetleri = urun_ozetleri.filter(tarih__gte=baslangic)
+    if bitis:
+        siparisler = siparisler.filter(olusturulma_tarihi__lt=_gun_baslangici(bitis + timedelta(days=1)))
+        siparis_ozetleri = siparis_ozetleri.filter(tarih__lte=bitis)
+        urun_ozetleri = urun_ozetleri.filter(tarih__lte=bitis)
+
+    with transaction.atomic():
+        siparis_ozetleri.delete()
+        urun_ozetleri.delete()
+        yeni_siparis = SiparisGunluk.objects.bulk_create(
+            [
+                SiparisGunluk(
+                    tarih=grup['tarih'], durum=grup['durum'],
+                    **{alan: grup[alan] or 0 for alan in SIPARIS_ALANLARI},
+                )
+                for grup in _siparis_gruplari(siparisler)
+            ],
+            batch_size=500,
+        )
+        yeni_urun = UrunSatisGunluk.objects.bulk_create(
+            [
+                UrunSatisGunluk(
+                    tarih=grup['tarih'], urun_id=grup['urun_id'], durum=grup['durum'],
+                    adet=grup['adet'] or 0, tutar=grup['tutar'] or 0,
+                )
+                for grup in _urun_gruplari(SiparisKalemi.objects.filter(siparis__in=siparisler))
+            ],
+            batch_size=500,
+        )
+    return {'siparis_ozeti': len(yeni_siparis), 'urun_ozeti': len(yeni_urun)}
+
+
+# --- Okuma ---
+
+def panel_istatistikleri(bugun=None):
+    """
+    Sipariş yönetim paneli rakamları: geçmiş günler özetten, bugün canlı siparişlerden.
+    Sipariş sayısından bağımsız olarak iki sorgu.
+    """
+    bugun = bugun or timezone.localdate()
+    hafta_baslangic = bugun - timedelta(days=7)
+
+    durum_sayilari = defaultdict(int)
+    toplam = {'normal': 0, 'etiket': 0, 'haftalik_satis': Decimal('0'), 'bugun_satis': Decimal('0')}
+    gecmis = (
+        SiparisGunluk.objects.filter(tarih__lt=bugun).values('durum').order_by()
+        .annotate(
+            adet=Sum('siparis_sayisi'),
+            normal=Sum('normal_urunlu_siparis'),
+            etiket=Sum('etiket_urunlu_siparis'),
+            haftalik_ciro=Sum('ciro', filter=Q(tarih__gte=hafta_baslangic)),
+        )
+    )
+    for grup in gecmis:
+        durum_sayilari[grup['durum']] += grup['adet'] or 0
+        toplam['normal'] += grup['normal'] or 0
+        toplam['etiket'] += grup['etiket'] or 0
+        if grup['durum'] in SATIS_DURUMLARI:
+            toplam['haftalik_satis'] += grup['haftalik_ciro'] or 0
+
+    for grup in _siparis_gruplari(Siparis.objects.filter(olusturulma_tarihi__gte=_gun_baslangici(bugun))):
+        durum_sayilari[grup['durum']] += grup['siparis_sayisi']
+        toplam['normal'] += grup['normal_urunlu_siparis']
+        toplam['etiket'] += grup['etiket_urunlu_siparis']
+        if grup['durum'] in SATIS_DURUMLARI:
+            toplam['bugun_satis'] += grup['ciro'] or 0
+            toplam['haftalik_satis'] += grup['ciro'] or 0
+
+    return {
+        'toplam_siparis': sum(durum_sayilari.values()),
+        'durum_sayilari': dict(durum_sayilari),
+        'bugun_satis': toplam['bugun_satis'],
+        'haftalik_satis': toplam['haftalik_satis'],
+        'pet_urun_siparisleri': toplam['normal'],
+        'qr_urun_siparisleri': toplam['etiket'],
+    }
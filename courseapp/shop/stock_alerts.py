@@ -0,0 +1,86 @@
+# shop/stock_alerts.py
+"""
+Düşük stok bayrağı ve stok uyarı özeti.
+
+Urun.dusuk_stok, ürün aktif ve stoğu STOK_UYARI_SEVIYESI veya altındayken
+True'dur. Bayrak stokla aynı yazımda güncellenir: Urun.save, stok_azalt /
+stok_artir (koşullu UPDATE'in içinde) ve toplu stok iadesi (bayraklari_guncelle).
+Bayraklı satırlar kısmi indekste tutulur; özet sorgusu yalnızca onları okur,
+süresi katalog boyutuna değil düşük stoklu ürün sayısına bağlıdır.
+
+Stok düşerken e-posta gönderilmez. `send_stock_warnings` komutu (cron ile, ör.
+saatlik) hiç uyarılmamış ya da son uyarısının üzerinden STOK_UYARI_TEKRAR_SAAT
+geçmiş bayraklı ürünleri toplar ve her alıcıya tek özet e-postası yazar (giden
+e-posta kutusu, core/outbox.py). Ürünlerin uyarı tarihi e-postalarla aynı
+transaction'da işlenir. Stok eşiğin üstüne çıkınca tarih sıfırlanır; ürün bir
+sonraki düşüşte yeniden özete girer.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from courseapp.constants import STOK_UYARI_SEVIYESI, STOK_UYARI_TEKRAR_SAAT
+
+logger = logging.getLogger(__name__)
+
+
+def dusuk_stok_mu(aktif, stok):
+    return bool(aktif) and stok <= STOK_UYARI_SEVIYESI
+
+
+def bayrak_alanlari(fark=0):
+    """
+    UPDATE için dusuk_stok / stok_uyari_tarihi ifadeleri. `fark`: aynı UPDATE'te
+    stoğa eklenen miktar (SET ifadeleri satırın eski stoğunu görür).
+    """
+    dusuk = Q(aktif=True, stok__lte=STOK_UYARI_SEVIYESI - fark)
+    return {
+        'dusuk_stok': Case(When(dusuk, then=Value(True)), default=Value(False), output_field=models.BooleanField()),
+        'stok_uyari_tarihi': Case(
+            When(dusuk, then=F('stok_uyari_tarihi')), default=Value(None), output_field=models.DateTimeField()
+        ),
+    }
+
+
+def bayraklari_guncelle(urun_idleri):
+    """Toplu stok değişikliğinden sonra (ör. iptal edilen siparişlerin stok iadesi) bayrakları tek UPDATE ile yeniler."""
+    from .models import Urun
+
+    return Urun.objects.filter(pk__in=urun_idleri).update(**bayrak_alanlari())
+
+
+def uyarilacak_urunler(simdi=None):
+    """Bayraklı ve bu dönemde henüz uyarılmamış ürünler (kısmi indeksten okunur)."""
+    from .models import Urun
+
+    simdi = simdi or timezone.now()
+    return Urun.objects.filter(dusuk_stok=True).filter(
+        Q(stok_uyari_tarihi__isnull=True)
+        | Q(stok_uyari_tarihi__lte=simdi - timedelta(hours=STOK_UYARI_TEKRAR_SAAT))
+    )
+
+
+def stok_uyari_ozeti_gonder():
+    """
+    Uyarılacak ürünleri her alıcıya tek özet e-postası olarak kuyruğa alır ve
+    uyarı tarihlerini işler. Alıcı yoksa ürünler işaretlenmez.
+    Dönüş: {'urun': n, 'alici': n}
+    """
+    from .email_utils import send_stock_digest_email
+    from .models import Urun
+
+    simdi = timezone.now()
+    with transaction.atomic():
+        urunler = list(uyarilacak_urunler(simdi).select_for_update().order_by('stok', 'pk'))
+        if not urunler:
+            return {'urun': 0, 'alici': 0}
+        alici = send_stock_digest_email(urunler)
+        if alici:
+            Urun.objects.filter(pk__in=[urun.pk for urun in urunler]).update(stok_uyari_tarihi=simdi)
+
+    rapor = {'urun': len(urunler), 'alici': alici}
+    logger.info("Stok uyarı özeti: %s", rapor)
+    return rapor
@@ -1,12 +1,23 @@
+from datetime import timedelta
 from decimal import Decimal
 
 from django.contrib.auth.models import User
-from django.db import connection
-from django.test import TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from shop.models import Kategori, Urun, Siparis
+from core.models import GidenEposta
+from core.outbox import bekleyen_epostalari_gonder
+from core.thread_race import eszamanli_calistir
+from shop.coupons import KuponGecersiz, kullanim_kaydet, kupon_dogrula, kuponu_al
+from shop.models import Kategori, Kupon, KuponKullanim, Siparis, SiparisDurum, SiparisGunluk, SiparisKalemi, Urun, UrunSatisGunluk
+from shop.order_rollups import ozetleri_yeniden_olustur, panel_istatistikleri
+from shop.stock_alerts import stok_uyari_ozeti_gonder, uyarilacak_urunler
+from shop.transitions import siparis_durumlarini_guncelle
 
 
 class PetshopListViewTests(TestCase):
@@ -114,3 +125,293 @@ class AdminOrderListTests(TestCase):
 
         guest_order = next(order for order in orders if order.id == self.guest_order.id)
         self.assertEqual(guest_order.user_order_count, 1)
+
+
+class TopluSiparisDurumuTests(TestCase):
+    SIPARIS_SAYISI = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.urunler = [
+            Urun.objects.create(ad=f'Ürün {i}', aciklama='-', fiyat=Decimal('10'), stok=0, urun_tipi='normal')
+            for i in range(3)
+        ]
+        kullanici = User.objects.create_user(username='musteri', email='musteri@example.com')
+        Siparis.objects.bulk_create([
+            Siparis(
+                kullanici=kullanici if i % 2 else None,
+                misafir_email=f'misafir{i}@example.com',
+                toplam_fiyat=Decimal('20'),
+                adres='Adres',
+                durum='teslim_edildi' if i % 10 == 0 else 'odendi',
+            )
+            for i in range(cls.SIPARIS_SAYISI)
+        ])
+        SiparisKalemi.objects.bulk_create([
+            SiparisKalemi(siparis_id=pk, urun=cls.urunler[pk % 3], miktar=2, fiyat=Decimal('10'))
+            for pk in Siparis.objects.values_list('pk', flat=True)
+        ])
+        cls.staff = User.objects.create_user(username='yonetici', is_staff=True)
+
+    def _idler(self):
+        return list(Siparis.objects.values_list('pk', flat=True))
+
+    def test_1000_siparis_iptali_sabit_sorgu(self):
+        with CaptureQueriesContext(connection) as sorgular:
+            sonuc = siparis_durumlarini_guncelle(self._idler(), 'iptal')
+        self.assertLess(len(sorgular), 40, msg=f"Sorgu sayısı: {len(sorgular)}")
+
+        # Teslim edilmiş siparişler iptal edilemez
+        self.assertEqual(len(sonuc['guncellenen']), 900)
+        self.assertEqual(len(sonuc['atlanan']), 100)
+        self.assertEqual(Siparis.objects.filter(durum='iptal').count(), 900)
+        self.assertEqual(SiparisDurum.objects.filter(durum='iptal').count(), 900)
+
+        # Her ürün için iptal edilen kalemlerin toplamı stoka döner
+        iptal = set(sonuc['guncellenen'])
+        for n, urun in enumerate(self.urunler):
+            urun.refresh_from_db()
+            self.assertEqual(urun.stok, 2 * sum(1 for pk in iptal if pk % 3 == n))
+
+        # E-postalar satır içinde gönderilmez, kutuya alınır
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(GidenEposta.objects.count(), 900)
+        bekleyen_epostalari_gonder()
+        self.assertIn("İptal Edildi", mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+
+    def test_toplu_islem_view(self):
+        self.client.force_login(self.staff)
+        idler = self._idler()[:50]
+        yanit = self.client.post(
+            reverse('shop:admin_siparis_yonet'),
+            {'bulk_action': 'kargoda', 'selected_orders': ','.join(map(str, idler))},
+        )
+        self.assertEqual(yanit.status_code, 302)
+        self.assertEqual(Siparis.objects.filter(pk__in=idler, durum='kargoda').count(), 45)
+        self.assertEqual(GidenEposta.objects.filter(konu__contains='Kargoya Verildi').count(), 45)
+
+        # Kargodaki sipariş tekrar "odendi" yapılamaz
+        siparis_durumlarini_guncelle(idler, 'odendi')
+        self.assertFalse(Siparis.objects.filter(pk__in=idler, durum='odendi').exists())
+
+
+class SiparisOzetiTests(TestCase):
+    def setUp(self):
+        self.mama = Urun.objects.create(ad='Mama', aciklama='-', fiyat=Decimal('50'), stok=100, urun_tipi='normal')
+        self.kunye = Urun.objects.create(ad='Künye', aciklama='-', fiyat=Decimal('200'), stok=100, urun_tipi='etiket')
+
+    def _siparis(self, *kalemler, durum='bekliyor'):
+        siparis = Siparis.objects.create(
+            toplam_fiyat=sum(urun.fiyat * miktar for urun, miktar in kalemler) + 30,
+            kargo_ucreti=Decimal('30'), adres='Adres', durum=durum,
+        )
+        for urun, miktar in kalemler:
+            SiparisKalemi.objects.create(siparis=siparis, urun=urun, miktar=miktar, fiyat=urun.fiyat)
+        return siparis
+
+    def _ozet(self):
+        return (
+            sorted(SiparisGunluk.objects.exclude(siparis_sayisi=0).values_list(
+                'tarih', 'durum', 'siparis_sayisi', 'ciro', 'kargo_ucreti', 'normal_urunlu_siparis', 'etiket_urunlu_siparis',
+            )),
+            sorted(UrunSatisGunluk.objects.exclude(adet=0).values_list('tarih', 'urun_id', 'durum', 'adet', 'tutar')),
+        )
+
+    def test_artimli_ozet_yeniden_olusturulanla_ayni(self):
+        bugun = timezone.localdate()
+        birinci = self._siparis((self.mama, 2), (self.kunye, 1))
+        ikinci = self._siparis((self.mama, 1), (self.mama, 3))
+        ucuncu = self._siparis((self.kunye, 5))
+
+        ozet = SiparisGunluk.objects.get(tarih=bugun, durum='bekliyor')
+        self.assertEqual(
+            (ozet.siparis_sayisi, ozet.normal_urunlu_siparis, ozet.etiket_urunlu_siparis, ozet.kargo_ucreti),
+            (3, 2, 2, Decimal('90')),
+        )
+        self.assertEqual(UrunSatisGunluk.objects.get(urun=self.mama, durum='bekliyor').adet, 6)
+
+        # Tekil kayıt, toplu geçiş ve silme özeti taşır
+        birinci.durum = 'odendi'
+        birinci.save()
+        siparis_durumlarini_guncelle([ikinci.pk, ucuncu.pk], 'iptal')
+        Siparis.objects.create(toplam_fiyat=Decimal('10'), adres='Adres').delete()
+        self.assertEqual(SiparisGunluk.objects.get(tarih=bugun, durum='iptal').siparis_sayisi, 2)
+        self.assertEqual(UrunSatisGunluk.objects.get(urun=self.mama, durum='odendi').tutar, Decimal('100'))
+
+        artimli = self._ozet()
+        ozetleri_yeniden_olustur()
+        self.assertEqual(artimli, self._ozet())
+
+    def test_panel_gecmis_ozet_ve_bugun_canli(self):
+        eski = self._siparis((self.mama, 1), durum='teslim_edildi')
+        Siparis.objects.filter(pk=eski.pk).update(olusturulma_tarihi=timezone.now() - timedelta(days=3))
+        ozetleri_yeniden_olustur()
+        self._siparis((self.kunye, 1), durum='odendi')
+
+        istatistik = panel_istatistikleri()
+        self.assertEqual(istatistik['toplam_siparis'], 2)
+        self.assertEqual(istatistik['durum_sayilari'], {'teslim_edildi': 1, 'odendi': 1})
+        self.assertEqual(istatistik['bugun_satis'], Decimal('230'))
+        self.assertEqual(istatistik['haftalik_satis'], Decimal('310'))
+        self.assertEqual((istatistik['pet_urun_siparisleri'], istatistik['qr_urun_siparisleri']), (1, 1))
+
+    def test_panel_sorgu_sayisi_siparis_sayisindan_bagimsiz(self):
+        yonetici = User.objects.create_user(username='panel', is_staff=True)
+        self.client.force_login(yonetici)
+        url = reverse('shop:admin_siparis_yonet')
+
+        def sorgu_sayisi():
+            with CaptureQueriesContext(connection) as sorgular:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            return len(sorgular)
+
+        self._siparis((self.mama, 1))
+        ozetleri_yeniden_olustur()
+        sorgu_sayisi()  # İlk istekteki oturum / context processor cache sorguları
+        az = sorgu_sayisi()
+
+        siparisler = Siparis.objects.bulk_create([
+            Siparis(toplam_fiyat=Decimal('50'), adres='Adres', durum='odendi') for _ in range(300)
+        ])
+        SiparisKalemi.objects.bulk_create([
+            SiparisKalemi(siparis=siparis, urun=self.mama, miktar=1, fiyat=Decimal('50')) for siparis in siparisler
+        ])
+        Siparis.objects.update(olusturulma_tarihi=timezone.now() - timedelta(days=2))
+        ozetleri_yeniden_olustur()
+        self.assertEqual(sorgu_sayisi(), az)
+
+
+def _kupon(**kwargs):
+    simdi = timezone.now()
+    return Kupon.objects.create(**{
+        'kod': 'YUZDE10', 'aciklama': 'Test', 'kupon_tipi': 'yuzde', 'indirim_degeri': Decimal('10'),
+        'baslangic_tarihi': simdi - timedelta(days=1), 'bitis_tarihi': simdi + timedelta(days=1), **kwargs,
+    })
+
+
+class KuponDogrulamaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_dogrulama_onbellekten_ve_kayitta_yenilenir(self):
+        kupon = _kupon()
+        self.assertEqual(kupon_dogrula('YUZDE10', Decimal('200'))[1], Decimal('20.00'))
+        self.assertIsNone(kupon_dogrula('YOK', Decimal('200'))[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(kupon_dogrula('YUZDE10', Decimal('200'))[0].pk, kupon.pk)
+            self.assertIsNone(kupon_dogrula('YOK', Decimal('200'))[0])
+
+        kupon.aktif = False
+        kupon.save()
+        self.assertEqual(kupon_dogrula('YUZDE10', Decimal('200')), (None, Decimal('0'), "Kupon aktif değil"))
+
+    def test_limit_dolunca_alinamaz(self):
+        _kupon(kullanim_limiti=1)
+        kuponu_al('YUZDE10', None, Decimal('100'))
+        with self.assertRaises(KuponGecersiz):
+            kuponu_al('YUZDE10', None, Decimal('100'))
+        self.assertEqual(Kupon.objects.get().kullanim_sayisi, 1)
+
+    def test_siparis_guncel_kupondan_hesaplanir(self):
+        kupon = _kupon()
+        kupon_dogrula('YUZDE10', Decimal('200'))  # önbelleğe al
+        # Başka bir worker'daki düzenleme: bu sürecin önbelleği silinmez
+        Kupon.objects.filter(pk=kupon.pk).update(indirim_degeri=Decimal('25'), minimum_tutar=Decimal('150'))
+        with self.assertRaises(KuponGecersiz):
+            kuponu_al('YUZDE10', None, Decimal('100'))
+        self.assertEqual(kuponu_al('YUZDE10', None, Decimal('200'))[1], Decimal('50.00'))
+
+
+class EszamanliKuponTests(TransactionTestCase):
+    ISTEK_SAYISI = 100
+    LIMIT = 10
+
+    def test_limit_10_kupona_100_siparis(self):
+        cache.clear()
+        _kupon(kod='SINIRLI', kullanim_limiti=self.LIMIT)
+        def istek():
+            try:
+                with transaction.atomic():
+                    kupon, indirim = kuponu_al('SINIRLI', None, Decimal('100'))
+                    siparis = Siparis.objects.create(
+                        toplam_fiyat=Decimal('100') - indirim, adres='Adres', kupon_indirimi=indirim,
+                    )
+                    kullanim_kaydet(kupon, siparis, indirim)
+                return 'alindi'
+            except KuponGecersiz:
+                return 'dolu'
+
+        sonuclar = eszamanli_calistir(istek, self.ISTEK_SAYISI)
+
+        self.assertEqual(sonuclar.count('alindi'), self.LIMIT)
+        self.assertEqual(sonuclar.count('dolu'), self.ISTEK_SAYISI - self.LIMIT)
+        self.assertEqual(Kupon.objects.get(kod='SINIRLI').kullanim_sayisi, self.LIMIT)
+        self.assertEqual(KuponKullanim.objects.count(), self.LIMIT)
+
+    def test_ayni_kullanicinin_eszamanli_siparisleri(self):
+        cache.clear()
+        kullanici = User.objects.create_user('kuponcu')
+        _kupon(kod='KISISEL', kullanici_basina_limit=1)
+        def istek():
+            try:
+                with transaction.atomic():
+                    kupon, indirim = kuponu_al('KISISEL', kullanici, Decimal('100'))
+                    siparis = Siparis.objects.create(
+                        kullanici=kullanici, toplam_fiyat=Decimal('100') - indirim, adres='Adres',
+                        kupon_indirimi=indirim,
+                    )
+                    kullanim_kaydet(kupon, siparis, indirim)
+                return 'alindi'
+            except KuponGecersiz:
+                return 'reddedildi'
+
+        sonuclar = eszamanli_calistir(istek, 10)
+
+        self.assertEqual(sonuclar.count('alindi'), 1)
+        self.assertEqual(Kupon.objects.get(kod='KISISEL').kullanim_sayisi, 1)
+        self.assertEqual(KuponKullanim.objects.count(), 1)
+
+
+@override_settings(ADMIN_EMAILS=['depo@example.com', 'yonetim@example.com'])
+class StokUyariOzetiTests(TestCase):
+    def _urun(self, ad, stok):
+        return Urun.objects.create(ad=ad, aciklama='-', fiyat=Decimal('10'), stok=stok, urun_tipi='normal')
+
+    def test_stok_azalt_bayraklar_eposta_gondermez(self):
+        urun = self._urun('Mama', 12)
+        self.assertFalse(urun.dusuk_stok)
+        self.assertTrue(urun.stok_azalt(3))
+        self.assertEqual((urun.stok, urun.dusuk_stok), (9, True))
+        self.assertFalse(urun.stok_azalt(10))
+        self.assertEqual(GidenEposta.objects.count(), 0)
+
+        urun.stok_artir(5)
+        self.assertFalse(Urun.objects.get(pk=urun.pk).dusuk_stok)
+
+    def test_ozet_alici_basina_tek_eposta_ve_donem_basina_bir_kez(self):
+        mama, kum = self._urun('Mama', 3), self._urun('Kum', 0)
+        self._urun('Tasma', 50)
+
+        self.assertEqual(stok_uyari_ozeti_gonder(), {'urun': 2, 'alici': 2})
+        epostalar = GidenEposta.objects.order_by('alici')
+        self.assertEqual([e.alici for e in epostalar], ['depo@example.com', 'yonetim@example.com'])
+        self.assertIn('Mama', epostalar[0].html_mesaj)
+        self.assertIn('Kum', epostalar[0].html_mesaj)
+        self.assertNotIn('Tasma', epostalar[0].html_mesaj)
+
+        # Aynı dönemde tekrar uyarılmaz
+        self.assertEqual(stok_uyari_ozeti_gonder(), {'urun': 0, 'alici': 0})
+
+        # Eşiğin üstüne çıkıp yeniden düşen ürün bir sonraki özete girer
+        mama.stok_artir(20)
+        mama.stok_azalt(15)
+        self.assertEqual(stok_uyari_ozeti_gonder()['urun'], 1)
+
+        Urun.objects.filter(pk=kum.pk).update(stok_uyari_tarihi=timezone.now() - timedelta(days=2))
+        self.assertEqual(stok_uyari_ozeti_gonder()['urun'], 1)
+
+    def test_ozet_sorgusu_kismi_indeksi_kullanir(self):
+        self._urun('Mama', 3)
+        plan = uyarilacak_urunler().explain()
+        self.assertIn('urun_dusuk_stok_idx', plan)
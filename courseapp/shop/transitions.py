@@ -0,0 +1,123 @@
+# shop/transitions.py
+"""
+Sipariş durum geçişleri.
+
+Toplu durum değişikliği sipariş başına save() yapmaz: hedef duruma geçebilecek
+siparişler tek UPDATE ile güncellenir, durum geçmişi tek bulk_create ile yazılır,
+günlük sipariş özeti (shop/order_rollups.py) kaynak durum başına bir kez taşınır.
+İptal edilen siparişlerin stokları ürün başına toplanıp tek UPDATE ile geri
+eklenir, düşük stok bayrakları (shop/stock_alerts.py) ardından tek UPDATE ile
+yenilenir. Kargo / iptal e-postaları giden e-posta kutusuna (core/outbox.py)
+alınır, ödenen siparişlerin QR etiketleri commit sonrası arka planda oluşturulur.
+
+IZINLI_GECISLER dışındaki geçişler (ör. teslim edilmiş siparişi "bekliyor"a
+almak) uygulanmaz, atlanan siparişler olarak raporlanır.
+"""
+import logging
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from courseapp.background import arka_planda_calistir
+
+from .email_utils import siparis_bildirimlerini_kuyruga_al
+from .models import Siparis, SiparisDurum, SiparisKalemi, Urun
+from .order_rollups import siparis_durumu_degisti
+from .stock_alerts import bayraklari_guncelle
+
+logger = logging.getLogger(__name__)
+
+IZINLI_GECISLER = {
+    'bekliyor': {'odendi', 'hazirlaniyor', 'iptal'},
+    'odendi': {'hazirlaniyor', 'kargoda', 'iptal', 'iade'},
+    'hazirlaniyor': {'kargoda', 'iptal', 'iade'},
+    'kargoda': {'teslim_edildi', 'iade'},
+    'teslim_edildi': {'iade'},
+    'iptal': set(),
+    'iade': set(),
+}
+
+# Sipariş oluşturulurken düşülen stok bu durumlara geçişte geri eklenir
+STOK_IADE_DURUMLARI = {'iptal'}
+BILDIRIM_DURUMLARI = {'kargoda', 'iptal'}
+
+
+class GecersizSiparisDurumu(Exception):
+    """Hedef durum sipariş durumlarından biri değil."""
+
+
+def _stoklari_geri_ekle(siparis_idleri):
+    """Siparişlerin kalemlerini ürün başına toplayıp stoklara tek UPDATE ile ekler."""
+    miktarlar = dict(
+        SiparisKalemi.objects.filter(siparis_id__in=siparis_idleri)
+        .values('urun').annotate(toplam=Sum('miktar')).values_list('urun', 'toplam')
+    )
+    if not miktarlar:
+        return 0
+    guncellenen = Urun.objects.filter(pk__in=miktarlar).update(
+        stok=F('stok') + Case(
+            *[When(pk=urun_id, then=Value(miktar)) for urun_id, miktar in miktarlar.items()],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    )
+    bayraklari_guncelle(miktarlar)
+    return guncellenen
+
+
+def _siparis_etiketlerini_olustur(siparis_idleri):
+    from .views import create_etiket_for_order
+
+    for siparis in (
+        Siparis.objects.filter(pk__in=siparis_idleri, kalemler__urun__urun_tipi='etiket')
+        .distinct().select_related('kullanici')
+    ):
+        create_etiket_for_order(siparis)
+
+
+def siparis_durumlarini_guncelle(siparis_idleri, hedef_durum, aciklama=''):
+    """
+    Siparişleri hedef_durum'a geçirir; sipariş sayısından bağımsız, sabit sayıda sorgu.
+    Dönüş: {'guncellenen': [id, ...], 'atlanan': [id, ...]}
+    """
+    if hedef_durum not in IZINLI_GECISLER:
+        raise GecersizSiparisDurumu(hedef_durum)
+    idler = set(siparis_idleri)
+    if not idler:
+        return {'guncellenen': [], 'atlanan': []}
+    gecmis_aciklamasi = aciklama or f'Toplu işlem ile {hedef_durum} olarak işaretlendi'
+
+    with transaction.atomic():
+        mevcut = dict(
+            Siparis.objects.select_for_update().filter(pk__in=idler).values_list('pk', 'durum')
+        )
+        guncellenen = sorted(pk for pk, durum in mevcut.items() if hedef_durum in IZINLI_GECISLER.get(durum, ()))
+        if guncellenen:
+            # Günlük özet: her kaynak durum için katkı hedef duruma taşınır
+            kaynaklar = defaultdict(list)
+            for pk in guncellenen:
+                kaynaklar[mevcut[pk]].append(pk)
+            for kaynak, pkler in kaynaklar.items():
+                siparis_durumu_degisti(Siparis.objects.filter(pk__in=pkler), kaynak, hedef_durum)
+            Siparis.objects.filter(pk__in=guncellenen).update(durum=hedef_durum)
+            SiparisDurum.objects.bulk_create(
+                [SiparisDurum(siparis_id=pk, durum=hedef_durum, aciklama=gecmis_aciklamasi) for pk in guncellenen]
+            )
+            if hedef_durum in STOK_IADE_DURUMLARI:
+                _stoklari_geri_ekle(guncellenen)
+            if hedef_durum in BILDIRIM_DURUMLARI:
+                siparis_bildirimlerini_kuyruga_al(
+                    Siparis.objects.filter(pk__in=guncellenen)
+                    .select_related('kullanici', 'kargo_firma')
+                    .prefetch_related('kalemler__urun'),
+                    hedef_durum,
+                    aciklama,
+                )
+            if hedef_durum == 'odendi':
+                arka_planda_calistir(_siparis_etiketlerini_olustur, guncellenen)
+
+    atlanan = sorted(idler - set(guncellenen))
+    if atlanan:
+        logger.info("%s sipariş %s durumuna geçirilemediği için atlandı", len(atlanan), hedef_durum)
+    return {'guncellenen': guncellenen, 'atlanan': atlanan}
@@ -1,14 +1,17 @@
 # shop/views.py
 from decimal import Decimal
+from urllib.parse import quote
 from django.shortcuts import render, get_object_or_404, redirect
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.contrib import messages
 from django.db import transaction
-from django.db.models import Count, Q, Sum
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.urls import reverse
 from .models import Urun, MagazaKarti, Sepet, SepetKalemi, Adres, Siparis, SiparisKalemi
 from etiket.models import Etiket, KANAL_ONLINE, KANAL_SHOP, KANAL_VET
+from accaunt.roles import get_user_role, resolve_user_role
 
 def create_etiket_for_order(siparis):
     """
@@ -45,16 +48,17 @@ def create_etiket_for_order(siparis):
         
         # Kullanıcı tipini belirle
         kanal = KANAL_ONLINE
-        satici_veteriner = None
-        satici_petshop = None
+        satici_veteriner_id = None
+        satici_petshop_id = None
         
         if siparis.kullanici:
-            if hasattr(siparis.kullanici, 'veteriner_profili'):
+            rol = resolve_user_role(siparis.kullanici)
+            if rol.veteriner_mi:
                 kanal = KANAL_VET
-                satici_veteriner = siparis.kullanici.veteriner_profili
-            elif hasattr(siparis.kullanici, 'petshop_profili'):
+                satici_veteriner_id = rol.veteriner_id
+            elif rol.petshop_mi:
                 kanal = KANAL_SHOP
-                satici_petshop = siparis.kullanici.petshop_profili
+                satici_petshop_id = rol.petshop_id
         
         # Her etiket ürünü için etiket oluştur
         for kalem in etiket_kalemler:
@@ -67,10 +71,10 @@ def create_etiket_for_order(siparis):
                 }
                 
                 # Kanal bilgilerini ekle
-                if kanal == KANAL_VET and satici_veteriner:
-                    etiket_data['satici_veteriner'] = satici_veteriner
-                elif kanal == KANAL_SHOP and satici_petshop:
-                    etiket_data['satici_petshop'] = satici_petshop
+                if kanal == KANAL_VET and satici_veteriner_id:
+                    etiket_data['satici_veteriner_id'] = satici_veteriner_id
+                elif kanal == KANAL_SHOP and satici_petshop_id:
+                    etiket_data['satici_petshop_id'] = satici_petshop_id
                 
                 # Müşteri bilgilerini ekle
                 if siparis.kullanici:
@@ -563,9 +567,10 @@ def sepet_goster(request):
     # Kullanıcı tipini belirle (JavaScript için)
     user_type = 'guest'
     if request.user.is_authenticated:
-        if hasattr(request.user, 'petshop_profili'):
+        rol = get_user_role(request)
+        if rol.petshop_mi:
             user_type = 'petshop'
-        elif hasattr(request.user, 'veteriner_profili'):
+        elif rol.veteriner_mi:
             user_type = 'veteriner'
         else:
             user_type = 'normal'
@@ -763,7 +768,7 @@ def checkout(request):
         sepet_adet = sepet.toplam_adet
         
         # BAYİLER (Petshop/Veteriner) için minimum 5 adet etiket ürünü kontrolü
-        is_bayi = hasattr(request.user, 'petshop_profili') or hasattr(request.user, 'veteriner_profili')
+        is_bayi = get_user_role(request).bayi_mi
         
         if is_bayi:
             etiket_toplam_adet = 0
@@ -870,6 +875,14 @@ def checkout(request):
     if secili_kargo_firmasi:
         kargo_ucreti = Decimal(str(secili_kargo_firmasi.kargo_ucreti_hesapla(sepet_toplam_decimal)))
         toplam_fiyat = sepet_toplam + kargo_ucreti
+
+    # Kupon (önbellekten doğrulanır; kullanım limiti sipariş anında alınır)
+    from .coupons import kupon_dogrula
+    kupon_kodu = (request.GET.get('kupon') or '').strip()
+    kupon, kupon_indirimi, kupon_mesaji = None, Decimal('0'), ''
+    if kupon_kodu:
+        kupon, kupon_indirimi, kupon_mesaji = kupon_dogrula(kupon_kodu, sepet_toplam_decimal, kargo_ucreti)
+        toplam_fiyat -= kupon_indirimi
     
     context = {
         'sepet': sepet,
@@ -883,6 +896,10 @@ def checkout(request):
         'secili_kargo_firmasi': secili_kargo_firmasi,
         'kargo_ucreti': kargo_ucreti,
         'toplam_fiyat': toplam_fiyat,
+        'kupon_kodu': kupon_kodu,
+        'kupon': kupon,
+        'kupon_indirimi': kupon_indirimi,
+        'kupon_mesaji': kupon_mesaji,
     }
     
     return render(request, 'shop/checkout.html', context)
@@ -948,9 +965,13 @@ def siparis_olustur(request):
         calculate_cargo_cost, get_default_cargo_company
     )
     
+    from .coupons import KuponGecersiz, kullanim_kaydet, kuponu_al
+    
     if request.method != 'POST':
         return redirect('shop:checkout')
     
+    kupon_kodu = (request.POST.get('kupon_kodu') or '').strip()
+    
     try:
         if request.user.is_authenticated:
             # Authenticated kullanıcı için DB sepetini kullan
@@ -963,7 +984,7 @@ def siparis_olustur(request):
                 return redirect('shop:checkout')
             
             # BAYİLER (Petshop/Veteriner) için minimum 5 adet etiket ürünü kontrolü
-            is_bayi = hasattr(request.user, 'petshop_profili') or hasattr(request.user, 'veteriner_profili')
+            is_bayi = get_user_role(request).bayi_mi
             
             if is_bayi:
                 etiket_toplam_adet = 0
@@ -994,8 +1015,10 @@ def siparis_olustur(request):
             if kargo_firmasi:
                 kargo_ucreti = Decimal(str(kargo_firmasi.kargo_ucreti_hesapla(sepet_toplam)))
             
-            # Toplam fiyat hesapla (sepet + kargo)
+            # Toplam fiyat hesapla (sepet + kargo - kupon)
             toplam_fiyat = sepet_toplam + kargo_ucreti
+            kupon, kupon_indirimi = kuponu_al(kupon_kodu, request.user, sepet_toplam, kargo_ucreti) if kupon_kodu else (None, Decimal('0'))
+            toplam_fiyat -= kupon_indirimi
             
             # Sipariş oluştur
             adres_metni = f"{adres.ad_soyad}\n{adres.telefon}\n{adres.il}, {adres.ilce}"
@@ -1014,13 +1037,19 @@ def siparis_olustur(request):
                 kullanici=request.user,
                 toplam_fiyat=toplam_fiyat,  # Kargo dahil toplam
                 adres=adres_metni,
-                kargo_firma=kargo_firmasi
+                kargo_firma=kargo_firmasi,
+                kargo_ucreti=kargo_ucreti,
+                kupon_indirimi=kupon_indirimi
             )
+            if kupon:
+                kullanim_kaydet(kupon, siparis, kupon_indirimi)
             
             # Sipariş kalemlerini oluştur ve stok azalt
             for item in sepet_items:
                 # Stok kontrolü ve azaltma
                 if not item.urun.stok_azalt(item.miktar):
+                    # Sipariş ve kupon kullanımı geri alınır
+                    transaction.set_rollback(True)
                     messages.error(request, f'{item.urun.ad} ürünü için yeterli stok yok!')
                     return redirect('shop:checkout')
                 
@@ -1067,8 +1096,10 @@ def siparis_olustur(request):
             if kargo_firmasi:
                 kargo_ucreti = Decimal(str(kargo_firmasi.kargo_ucreti_hesapla(sepet_toplam_decimal)))
             
-            # Toplam fiyat hesapla (sepet + kargo)
+            # Toplam fiyat hesapla (sepet + kargo - kupon)
             toplam_fiyat = sepet_toplam_decimal + kargo_ucreti
+            kupon, kupon_indirimi = kuponu_al(kupon_kodu, None, sepet_toplam_decimal, kargo_ucreti) if kupon_kodu else (None, Decimal('0'))
+            toplam_fiyat -= kupon_indirimi
             
             # Misafir adres bilgilerini birleştir
             adres_metni = f"{ad_soyad}\n{telefon}\n{il}, {ilce}"
@@ -1091,13 +1122,19 @@ def siparis_olustur(request):
                 misafir_email=email,
                 misafir_telefon=telefon,
                 misafir_ad_soyad=ad_soyad,
-                kargo_firma=kargo_firmasi
+                kargo_firma=kargo_firmasi,
+                kargo_ucreti=kargo_ucreti,
+                kupon_indirimi=kupon_indirimi
             )
+            if kupon:
+                kullanim_kaydet(kupon, siparis, kupon_indirimi)
             
             # Session sepet kalemlerini sipariş kalemlerine dönüştür ve stok azalt
             for item in guest_cart_items:
                 # Stok kontrolü ve azaltma
                 if not item['urun'].stok_azalt(item['miktar']):
+                    # Sipariş ve kupon kullanımı geri alınır
+                    transaction.set_rollback(True)
                     messages.error(request, f'{item["urun"].ad} ürünü için yeterli stok yok!')
                     return redirect('shop:checkout')
                 
@@ -1127,7 +1164,12 @@ def siparis_olustur(request):
         messages.success(request, f'Siparişiniz başarıyla oluşturuldu! Sipariş No: #{siparis.id}')
         return redirect('shop:siparis_detay', siparis_id=siparis.id)
         
+    except KuponGecersiz as e:
+        transaction.set_rollback(True)
+        messages.error(request, str(e))
+        return redirect(f"{reverse('shop:checkout')}?kupon={quote(kupon_kodu)}")
     except Exception as e:
+        transaction.set_rollback(True)
         import traceback
         print(f"ERROR: {str(e)}")
         print(f"TRACEBACK: {traceback.format_exc()}")
@@ -1340,12 +1382,13 @@ def get_user_type(user):
     if not user or not user.is_authenticated:
         return 'misafir'
     
-    # Kullanıcı tiplerini kontrol et
-    if hasattr(user, 'sahip'):
+    # Kullanıcı tiplerini kontrol et (tek sorguda çözülür)
+    rol = resolve_user_role(user)
+    if rol.sahip_mi:
         return 'sahip'
-    elif hasattr(user, 'veteriner_profili'):
+    elif rol.veteriner_mi:
         return 'veteriner'
-    elif hasattr(user, 'petshop_profili'):
+    elif rol.petshop_mi:
         return 'petshop'
     else:
         return 'normal'
@@ -1372,9 +1415,15 @@ def admin_siparis_yonet(request):
     # Siparişleri getir
     siparisler = (
         Siparis.objects
-        .select_related('kullanici')
+        # Şablon kullanıcı tipini satır başına sahip / veteriner / petshop profilinden okur
+        .select_related('kullanici__sahip', 'kullanici__veteriner_profili', 'kullanici__petshop_profili')
         .prefetch_related('kalemler__urun', 'durum_gecmisi')
-        .annotate(user_order_count=Count('kullanici__siparis', distinct=True))
+        # Self-join + COUNT(DISTINCT) tüm tabloyu gruplar; ilişkili alt sorgu yalnızca sayfadaki satırlar için çalışır
+        .annotate(user_order_count=Subquery(
+            Siparis.objects.filter(kullanici=OuterRef('kullanici')).order_by()
+            .values('kullanici').annotate(adet=Count('pk')).values('adet'),
+            output_field=IntegerField(),
+        ))
     )
     
     # Filtreleme
@@ -1434,21 +1483,18 @@ def admin_siparis_yonet(request):
         else:
             siparis.user_order_count = 1
     
-    # İstatistikler
-    toplam_siparis = Siparis.objects.count()
-    bekleyen_siparis = Siparis.objects.filter(durum='bekliyor').count()
-    odendi_siparis = Siparis.objects.filter(durum='odendi').count()
-    kargoda_siparis = Siparis.objects.filter(durum='kargoda').count()
-    teslim_edildi_siparis = Siparis.objects.filter(durum='teslim_edildi').count()
+    # İstatistikler: geçmiş günler günlük özetten, bugün canlı (shop/order_rollups.py)
+    from .order_rollups import panel_istatistikleri
+    istatistikler = panel_istatistikleri()
+    toplam_siparis = istatistikler['toplam_siparis']
+    bekleyen_siparis = istatistikler['durum_sayilari'].get('bekliyor', 0)
+    odendi_siparis = istatistikler['durum_sayilari'].get('odendi', 0)
+    kargoda_siparis = istatistikler['durum_sayilari'].get('kargoda', 0)
+    teslim_edildi_siparis = istatistikler['durum_sayilari'].get('teslim_edildi', 0)
     
     # Ürün tipi istatistikleri
-    pet_urun_siparisleri = Siparis.objects.filter(
-        kalemler__urun__urun_tipi='normal'
-    ).distinct().count()
-    
-    qr_urun_siparisleri = Siparis.objects.filter(
-        kalemler__urun__urun_tipi='etiket'
-    ).distinct().count()
+    pet_urun_siparisleri = istatistikler['pet_urun_siparisleri']
+    qr_urun_siparisleri = istatistikler['qr_urun_siparisleri']
     
     # Aynı kullanıcıdan gelen çoklu siparişler
     coklu_siparis_kullanicilar = Siparis.objects.filter(
@@ -1468,18 +1514,9 @@ def admin_siparis_yonet(request):
         siparis_sayisi=Count('id')
     ).order_by('-siparis_sayisi')[:5]
     
-    # Günlük satış
-    bugun_satis = Siparis.objects.filter(
-        olusturulma_tarihi__date=timezone.now().date(),
-        durum__in=['odendi', 'hazirlaniyor', 'kargoda', 'teslim_edildi']
-    ).aggregate(total=Sum('toplam_fiyat'))['total'] or 0
-    
-    # Haftalık satış
-    hafta_baslangic = timezone.now().date() - timedelta(days=7)
-    haftalik_satis = Siparis.objects.filter(
-        olusturulma_tarihi__date__gte=hafta_baslangic,
-        durum__in=['odendi', 'hazirlaniyor', 'kargoda', 'teslim_edildi']
-    ).aggregate(total=Sum('toplam_fiyat'))['total'] or 0
+    # Günlük ve haftalık satış
+    bugun_satis = istatistikler['bugun_satis']
+    haftalik_satis = istatistikler['haftalik_satis']
     
     # Durum güncelleme
     if request.method == 'POST':
@@ -1488,35 +1525,22 @@ def admin_siparis_yonet(request):
         selected_orders = request.POST.get('selected_orders')
         
         if bulk_action and selected_orders:
-            # Toplu işlem
-            order_ids = selected_orders.split(',')
-            updated_count = 0
-            
-            for order_id in order_ids:
-                try:
-                    siparis = Siparis.objects.get(id=order_id)
-                    
-                    # Yeni durum kaydı oluştur
-                    durum_kaydi = SiparisDurum.objects.create(
-                        siparis=siparis,
-                        durum=bulk_action,
-                        aciklama=f'Toplu işlem ile {bulk_action} olarak işaretlendi'
-                    )
-                    
-                    # Sipariş durumunu güncelle
-                    siparis.durum = bulk_action
-                    siparis.save()
-                    
-                    # Eğer durum "ödendi" ise etiket oluştur
-                    if bulk_action == 'odendi':
-                        create_etiket_for_order(siparis)
-                    
-                    updated_count += 1
-                    
-                except Siparis.DoesNotExist:
-                    continue
-            
-            messages.success(request, f'{updated_count} sipariş başarıyla güncellendi!')
+            # Toplu işlem: tek UPDATE, stok iadesi ve bildirimler kuyrukla (shop/transitions.py)
+            from .transitions import GecersizSiparisDurumu, siparis_durumlarini_guncelle
+
+            order_ids = [int(pk) for pk in selected_orders.split(',') if pk.strip().isdigit()]
+            try:
+                sonuc = siparis_durumlarini_guncelle(order_ids, bulk_action)
+            except GecersizSiparisDurumu:
+                messages.error(request, f'Geçersiz sipariş durumu: {bulk_action}')
+                return redirect('shop:admin_siparis_yonet')
+
+            messages.success(request, f'{len(sonuc["guncellenen"])} sipariş başarıyla güncellendi!')
+            if sonuc['atlanan']:
+                messages.warning(
+                    request,
+                    f'{len(sonuc["atlanan"])} sipariş mevcut durumundan "{bulk_action}" durumuna geçirilemediği için atlandı.'
+                )
             return redirect('shop:admin_siparis_yonet')
         
         # Tekil işlem
@@ -78,11 +78,13 @@ class VeterinerAdmin(admin.ModelAdmin):
         "kalan_envanter_goster",
         "tahsis_sayisi_goster",
         "satis_sayisi_goster",
+        "kapasite_durumu_goster",
         "aktif"
     )
     list_filter = ("aktif", "odeme_modeli", "il", "ilce")
     search_fields = ("ad", "telefon", "email", "il__ad", "ilce__ad")
     ordering = ("-olusturulma",)
+    list_select_related = ("il", "ilce")
 
     # Sadece modelde gerçekten olan alanlar
     readonly_fields = ("olusturulma",)
@@ -106,6 +108,10 @@ class VeterinerAdmin(admin.ModelAdmin):
     class Media:
         js = ('admin/js/veteriner_admin.js',)
 
+    def get_queryset(self, request):
+        # Sayaç sütunları satır başına COUNT yerine alt sorgularla gelir
+        return super().get_queryset(request).sayaclarla()
+
     # ---------- Yardımcı metodlar ----------
     def il_display(self, obj):
         return obj.il.ad if obj.il else "-"
@@ -120,24 +126,29 @@ class VeterinerAdmin(admin.ModelAdmin):
     def danisman_sahip_sayisi_goster(self, obj):
         return obj.danisman_sahip_sayisi if obj.pk else "-"
     danisman_sahip_sayisi_goster.short_description = "Danışman Sahip"
+    danisman_sahip_sayisi_goster.admin_order_field = "danisman_sahip_adedi"
 
     def kalan_envanter_goster(self, obj):
         return obj.kalan_envanter if obj.pk else "-"
     kalan_envanter_goster.short_description = "Kalan Envanter"
+    kalan_envanter_goster.admin_order_field = "kalan_envanter_adedi"
 
     def tahsis_sayisi_goster(self, obj):
         return obj.tahsis_sayisi if obj.pk else "-"
     tahsis_sayisi_goster.short_description = "Tahsis Sayısı"
+    tahsis_sayisi_goster.admin_order_field = "tahsis_adedi"
 
     def satis_sayisi_goster(self, obj):
         return obj.satis_sayisi if obj.pk else "-"
     satis_sayisi_goster.short_description = "Satış Sayısı"
+    satis_sayisi_goster.admin_order_field = "satis_adedi"
 
     def kapasite_durumu_goster(self, obj):
         durum = obj.kapasite_durumu
         renk = {"Dolu": "red", "Doluya Yakın": "orange", "Orta": "green", "Boş": "gray"}.get(durum, "gray")
-        return format_html('<span style="color:{};font-weight:bold;">{} {}</span>', renk, "Circle", durum)
+        return format_html('<span style="color:{};font-weight:bold;">{} {}</span>', renk, "●", durum)
     kapasite_durumu_goster.short_description = "Kapasite"
+    kapasite_durumu_goster.admin_order_field = "danisman_sahip_adedi"
 
     # ---------- İl → İlçe dinamik ----------
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
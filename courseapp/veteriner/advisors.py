@@ -0,0 +1,208 @@
+# veteriner/advisors.py
+"""
+Toplu danışman veteriner ataması.
+
+Veteriner pasifleştiğinde veya bölgesi değiştiğinde danışmanı olduğu sahipler
+boşa çıkar; aktifleştiğinde bölgesindeki danışmansız sahipler ona atanabilir
+hale gelir. Bu sahipler Sahip.danisman_veteriner_ata ile tek tek (sahip başına
+aday, satış ve yük sorgularıyla) atanmaz:
+
+- Adaylar (aktif veterinerler, kapasite, yük, bölgedeki satış sayısı) ilçe ve
+  il başına bir kez, gruplu sorgularla okunur.
+- Sahipler partiler halinde okunur. Künyeyi satan veteriner önceliği ve skor
+  (satış × uyum − yük × 0.2, eşitlikte rastgele) tekil algoritmayla aynı
+  kurallarla bellekte uygulanır; atanan veterinerin yükü bellekte artar, dolan
+  veteriner sonraki sahiplere aday olmaz.
+- Her parti kendi transaction'ında tek bulk_update ile yazılır.
+
+İş yalnızca danışmanı boş sahipleri seçer; yarıda kesilirse aynı kapsamla
+yeniden çalıştırmak kaldığı yerden devam eder (`danisman_yeniden_ata` komutu).
+Konuma en yakın veteriner araması sahip başına sorgu olduğundan toplu işte
+yapılmaz: ilçede ve ilde kapasitesi olan aday yoksa sahip boş kalır, aktif
+künyesi varsa panel açılışındaki tekil atamayla (anahtarlik/dashboard.py) tamamlanır.
+"""
+import logging
+import random
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from courseapp.background import arka_planda_calistir
+from courseapp.constants import DANISMAN_ATAMA_PARTI_BOYUTU
+
+from .models import Veteriner
+
+logger = logging.getLogger(__name__)
+
+SAHIP_ALANLARI = ['danisman_veteriner', 'danisman_atanma_tarihi', 'danisman_atanma_sebebi']
+# Sahip.danisman_veteriner_ata ile aynı katsayılar
+ILCE_UYUMU = 1
+IL_UYUMU = 0.5
+YUK_KATSAYISI = 0.2
+
+
+class _Adaylar:
+    """Bir çalıştırma boyunca bölge adayları ve veteriner yükleri (bellekte)."""
+
+    def __init__(self):
+        self.vetler = {}  # vet_id -> {'kapasite': int, 'yuk': int}
+        self.bolgeler = {'ilce_id': {}, 'il_id': {}}  # bölge_id -> [(vet_id, satış), ...]
+
+    def _yukle(self, alan, bolge_idleri):
+        from etiket.models import KANAL_VET, Etiket
+
+        yeni = {b for b in bolge_idleri if b and b not in self.bolgeler[alan]}
+        if not yeni:
+            return
+        sahip_alani = f'evcil_hayvan__sahip__{alan}'
+        satislar = {
+            (satir['satici_veteriner_id'], satir[sahip_alani]): satir['adet']
+            for satir in Etiket.objects.filter(
+                kanal=KANAL_VET, aktif=True, first_activated_at__isnull=False,
+                satici_veteriner__aktif=True, **{f'satici_veteriner__{alan}__in': yeni, f'{sahip_alani}__in': yeni},
+            ).values('satici_veteriner_id', sahip_alani).annotate(adet=Count('pk')).order_by()
+        }
+        for bolge_id in yeni:
+            self.bolgeler[alan][bolge_id] = []
+        # Yük ve kapasite sayaclarla() alt sorgularından: veteriner başına sorgu yok
+        for vet in Veteriner.objects.filter(aktif=True, **{f'{alan}__in': yeni}).sayaclarla():
+            self.vetler.setdefault(vet.pk, {'kapasite': vet.dinamik_kapasite, 'yuk': vet.danisman_sahip_adedi})
+            bolge_id = getattr(vet, alan)
+            self.bolgeler[alan][bolge_id].append((vet.pk, satislar.get((vet.pk, bolge_id), 0)))
+
+    def hazirla(self, sahipler):
+        self._yukle('ilce_id', {sahip.ilce_id for sahip in sahipler})
+        self._yukle('il_id', {sahip.il_id for sahip in sahipler})
+
+    def _sec(self, adaylar, uyum):
+        en_iyi, secenekler = None, []
+        for vet_id, satis in adaylar:
+            durum = self.vetler[vet_id]
+            if durum['yuk'] >= durum['kapasite']:
+                continue
+            skor = satis * uyum - durum['yuk'] * YUK_KATSAYISI
+            if en_iyi is None or skor > en_iyi:
+                en_iyi, secenekler = skor, [vet_id]
+            elif skor == en_iyi:
+                secenekler.append(vet_id)
+        return random.choice(secenekler) if secenekler else None
+
+    def ata(self, sahip, kunye_veterineri):
+        """(vet_id, sebep); uygun aday yoksa (None, None)."""
+        vet_id, sebep = None, None
+        if kunye_veterineri:
+            # Künyeyi satan veteriner aktif ve aynı ildeyse kapasiteden bağımsız önceliklidir
+            kunye_vet_id, kunye_vet_aktif, kunye_vet_il_id = kunye_veterineri
+            if kunye_vet_aktif and kunye_vet_il_id == sahip.il_id:
+                vet_id, sebep = kunye_vet_id, 'KUNYE_ALIMI'
+        if vet_id is None:
+            vet_id, sebep = self._sec(self.bolgeler['ilce_id'].get(sahip.ilce_id, ()), ILCE_UYUMU), 'ILCE_ESLESME'
+        if vet_id is None:
+            vet_id, sebep = self._sec(self.bolgeler['il_id'].get(sahip.il_id, ()), IL_UYUMU), 'IL_ESLESME'
+        if vet_id is None:
+            return None, None
+        if vet_id in self.vetler:
+            self.vetler[vet_id]['yuk'] += 1
+        return vet_id, sebep
+
+
+def _kunye_veterinerleri(sahip_idleri):
+    """Sahip başına en son aktifleşen veteriner künyesinin satıcısı: (vet_id, aktif, il_id)."""
+    from etiket.models import KANAL_VET, Etiket
+
+    son = {}
+    for sahip_id, vet_id, vet_aktif, vet_il_id, ilk_aktivasyon, aktiflestirme in Etiket.objects.filter(
+        evcil_hayvan__sahip_id__in=sahip_idleri, kanal=KANAL_VET, aktif=True, satici_veteriner__isnull=False,
+    ).values_list(
+        'evcil_hayvan__sahip_id', 'satici_veteriner_id', 'satici_veteriner__aktif', 'satici_veteriner__il_id',
+        'first_activated_at', 'aktiflestirme_tarihi',
+    ):
+        tarih = ilk_aktivasyon or aktiflestirme
+        if tarih and (sahip_id not in son or tarih > son[sahip_id][0]):
+            son[sahip_id] = (tarih, (vet_id, vet_aktif, vet_il_id))
+    return {sahip_id: vet for sahip_id, (_, vet) in son.items()}
+
+
+def danismanlari_yeniden_ata(ilce_idleri=(), il_idleri=(), parti_boyutu=DANISMAN_ATAMA_PARTI_BOYUTU):
+    """
+    Kapsamdaki (ilçe veya il) danışmansız sahiplere danışman atar.
+    Dönüş: {'atanan': int, 'atanamayan': int, 'parti': int}
+    """
+    from anahtarlik.models import Sahip
+
+    bos_sahipler = (
+        Sahip.objects.filter(Q(ilce_id__in=ilce_idleri) | Q(il_id__in=il_idleri), danisman_veteriner__isnull=True)
+        .only('pk', 'il_id', 'ilce_id').order_by('pk')
+    )
+    adaylar = _Adaylar()
+    rapor = {'atanan': 0, 'atanamayan': 0, 'parti': 0}
+    son_pk = 0
+    while True:
+        parti = list(bos_sahipler.filter(pk__gt=son_pk)[:parti_boyutu])
+        if not parti:
+            break
+        son_pk = parti[-1].pk
+        rapor['parti'] += 1
+
+        adaylar.hazirla(parti)
+        kunye = _kunye_veterinerleri([sahip.pk for sahip in parti])
+        simdi = timezone.now()
+        atananlar = []
+        for sahip in parti:
+            vet_id, sebep = adaylar.ata(sahip, kunye.get(sahip.pk))
+            if vet_id is None:
+                rapor['atanamayan'] += 1
+                continue
+            sahip.danisman_veteriner_id = vet_id
+            sahip.danisman_atanma_tarihi = simdi
+            sahip.danisman_atanma_sebebi = sebep
+            atananlar.append(sahip)
+
+        with transaction.atomic():
+            # Bu arada tekil atamayla danışman almış sahiplerin üzerine yazılmaz
+            hala_bos = set(
+                Sahip.objects.select_for_update()
+                .filter(pk__in=[sahip.pk for sahip in atananlar], danisman_veteriner__isnull=True)
+                .values_list('pk', flat=True)
+            )
+            yazilacak = [sahip for sahip in atananlar if sahip.pk in hala_bos]
+            Sahip.objects.bulk_update(yazilacak, SAHIP_ALANLARI)
+        rapor['atanan'] += len(yazilacak)
+
+    logger.info("Toplu danışman ataması: %s", rapor)
+    return rapor
+
+
+def veteriner_degisti(veteriner, eski):
+    """
+    Veteriner.save sonrası çağrılır. `eski`: kayıt öncesi {'aktif', 'il_id', 'ilce_id'} ya da None.
+
+    Pasifleşen veya bölgesi değişen veterinerin (yeni bölgesi dışındaki) sahipleri
+    tek UPDATE ile bırakılır; yeniden atama commit sonrası arka planda yapılır.
+    """
+    from anahtarlik.models import Sahip
+
+    eski_aktif = bool(eski and eski['aktif'])
+    bolge_degisti = bool(eski) and (eski['il_id'], eski['ilce_id']) != (veteriner.il_id, veteriner.ilce_id)
+
+    birakilan = None
+    if eski_aktif and not veteriner.aktif:
+        birakilan = Sahip.objects.filter(danisman_veteriner=veteriner)
+    elif eski_aktif and bolge_degisti:
+        birakilan = Sahip.objects.filter(danisman_veteriner=veteriner).exclude(ilce_id=veteriner.ilce_id)
+
+    ilce_idleri, il_idleri = set(), set()
+    if birakilan is not None:
+        ilce_idleri.update(birakilan.values_list('ilce_id', flat=True).distinct().order_by())
+        birakilan.update(danisman_veteriner=None, danisman_atanma_tarihi=None, danisman_atanma_sebebi='')
+
+    # Aktifleşen (veya bölge değiştiren) veteriner bölgesindeki danışmansız sahiplere aday olur
+    if veteriner.aktif and veteriner.il_id and (not eski_aktif or bolge_degisti):
+        if veteriner.ilce_id:
+            ilce_idleri.add(veteriner.ilce_id)
+        else:
+            il_idleri.add(veteriner.il_id)
+
+    if ilce_idleri or il_idleri:
+        arka_planda_calistir(danismanlari_yeniden_ata, sorted(ilce_idleri), sorted(il_idleri))
@@ -0,0 +1,30 @@
+"""
+Danışmanı olmayan sahiplere toplu danışman veteriner atar (veteriner/advisors.py).
+Veteriner aktifleşme / pasifleşme sonrası arka plan işi yarıda kaldıysa aynı
+kapsamla yeniden çalıştırmak kaldığı yerden devam eder.
+Kullanım: python manage.py danisman_yeniden_ata [--il ID ...] [--ilce ID ...] [--parti 500]
+"""
+from django.core.management.base import BaseCommand
+
+from anahtarlik.dictionaries import Il
+from courseapp.constants import DANISMAN_ATAMA_PARTI_BOYUTU
+from veteriner.advisors import danismanlari_yeniden_ata
+
+
+class Command(BaseCommand):
+    help = 'Danışmanı olmayan sahiplere toplu danışman veteriner atar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--il', type=int, nargs='*', default=[], help='İl id (varsayılan: ilçe verilmediyse tüm iller)')
+        parser.add_argument('--ilce', type=int, nargs='*', default=[], help='İlçe id')
+        parser.add_argument('--parti', type=int, default=DANISMAN_ATAMA_PARTI_BOYUTU, help='Parti başına sahip sayısı')
+
+    def handle(self, *args, **options):
+        il_idleri, ilce_idleri = options['il'], options['ilce']
+        if not il_idleri and not ilce_idleri:
+            il_idleri = list(Il.objects.values_list('pk', flat=True))
+        rapor = danismanlari_yeniden_ata(ilce_idleri, il_idleri, parti_boyutu=options['parti'])
+        self.stdout.write(self.style.SUCCESS(
+            f"[OK] {rapor['atanan']} sahibe danışman atandı, {rapor['atanamayan']} sahip için uygun aday yok "
+            f"({rapor['parti']} parti)"
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-19 11:57
+
+from django.db import migrations, models
+
+
+def konum_doldur(apps, schema_editor):
+    from core.geo import geohash_kodla, koordinat_ayristir
+
+    Veteriner = apps.get_model('veteriner', 'Veteriner')
+    guncellenecek = []
+    for vet in Veteriner.objects.exclude(konum_koordinat__isnull=True).exclude(konum_koordinat='').only('id', 'konum_koordinat'):
+        vet.latitude, vet.longitude = koordinat_ayristir(vet.konum_koordinat)
+        if vet.latitude is not None:
+            vet.geohash = geohash_kodla(vet.latitude, vet.longitude)
+            guncellenecek.append(vet)
+    Veteriner.objects.bulk_update(guncellenecek, ['latitude', 'longitude', 'geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteriner', '0003_veteriner_aktif_default_false'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='veteriner',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='veteriner',
+            name='latitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='veteriner',
+            name='longitude',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(konum_doldur, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:18
+
+from django.db import migrations, models
+
+
+def gecersiz_durumu_duzelt(apps, schema_editor):
+    # Web sayfasından alınan randevular seçeneklerde olmayan 'BEKLIYOR' ile yazılıyordu
+    Randevu = apps.get_model('veteriner', 'Randevu')
+    Randevu.objects.filter(durum='BEKLIYOR').update(durum='BEKLENIYOR')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteriner', '0004_veteriner_konum_indeksi'),
+    ]
+
+    operations = [
+        migrations.RunPython(gecersiz_durumu_duzelt, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='randevu',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='randevu',
+            constraint=models.UniqueConstraint(condition=models.Q(('durum', 'IPTAL'), _negated=True), fields=('veteriner', 'tarih', 'saat'), name='randevu_aktif_slot_tekil'),
+        ),
+    ]
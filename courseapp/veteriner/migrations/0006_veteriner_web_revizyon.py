@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('veteriner', '0005_randevu_aktif_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='veteriner',
+            name='web_guncelleme',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='veteriner',
+            name='web_revizyon',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -3,8 +3,11 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
+from courseapp.constants import VARSAYILAN_CALISMA_BASLANGIC, VARSAYILAN_CALISMA_BITIS
+
 # Ödeme modeli (kurum)
 ODEME_PESIN = 'PESIN'
 ODEME_KONSINYE = 'KONSINYE'
@@ -75,8 +78,59 @@ RANDEVU_DURUM_SECENEKLERI = [
     (RANDEVU_TAMAMLANDI, 'Tamamlandı'),
 ]
 
+# Çalışma saati alanlarının gün önekleri (Pazartesi'den başlayarak)
+CALISMA_GUNLERI = ('pazartesi', 'sali', 'carsamba', 'persembe', 'cuma', 'cumartesi', 'pazar')
+
+
+def calisma_saatinde_mi(isletme, tarih, saat):
+    """
+    Veteriner veya petshop verilen gün ve saatte çalışıyor mu?
+    O gün için saat tanımlanmamışsa varsayılan olarak 09:00-18:00 kabul edilir.
+    """
+    gun = CALISMA_GUNLERI[tarih.weekday()]
+    if getattr(isletme, f'{gun}_kapali'):
+        return False
+    baslangic, bitis = getattr(isletme, f'{gun}_baslangic'), getattr(isletme, f'{gun}_bitis')
+    if baslangic and bitis:
+        return baslangic <= saat <= bitis
+    return VARSAYILAN_CALISMA_BASLANGIC <= saat <= VARSAYILAN_CALISMA_BITIS
+
+
+def konum_alanlarini_guncelle(isletme):
+    """konum_koordinat metninden latitude, longitude ve geohash alanlarını doldurur."""
+    from core.geo import geohash_kodla, koordinat_ayristir
+
+    isletme.latitude, isletme.longitude = koordinat_ayristir(isletme.konum_koordinat)
+    isletme.geohash = geohash_kodla(isletme.latitude, isletme.longitude) if isletme.latitude is not None else ''
+
+
+class VeterinerQuerySet(models.QuerySet):
+    def sayaclarla(self):
+        """
+        Danışman sahip, tahsis, satış, kalan envanter ve ilçe yüzdesini alt sorgularla ekler.
+        Aynı adlı property'ler bu değerleri kullanır; liste sayfaları satır başına sorgu atmaz.
+        """
+        from anahtarlik.models import Sahip
+        from core.queries import alt_sayac
+        from etiket.models import Etiket
+
+        etiketler = Etiket.objects.filter(satici_veteriner=models.OuterRef('pk'))
+        return self.annotate(
+            danisman_sahip_adedi=alt_sayac(Sahip.objects.filter(danisman_veteriner=models.OuterRef('pk'))),
+            tahsis_adedi=alt_sayac(etiketler),
+            satis_adedi=alt_sayac(etiketler.filter(aktif=True)),
+            ilce_yuzdesi=models.Subquery(
+                VeterinerYuzde.objects.filter(veteriner=models.OuterRef('pk'), ilce=models.OuterRef('ilce'))
+                .values('yuzde')[:1]
+            ),
+        ).annotate(
+            kalan_envanter_adedi=Greatest(models.F('tahsis_adedi') - models.F('satis_adedi'), 0),
+        )
+
 
 class Veteriner(models.Model):
+    objects = VeterinerQuerySet.as_manager()
+
     ad = models.CharField(max_length=150)
     telefon = models.CharField(max_length=30, blank=True)
     email = models.EmailField(blank=True)
@@ -201,6 +255,9 @@ class Veteriner(models.Model):
     
     # Durum
     web_aktif = models.BooleanField(default=False, help_text="Web sayfası aktif mi?")
+    # Web sayfası önbelleğinin sürümü (core/page_cache.py); her kayıtta artar
+    web_revizyon = models.PositiveIntegerField(default=0, editable=False)
+    web_guncelleme = models.DateTimeField(null=True, blank=True, editable=False)
 
     # ENLEM-BOYLAM YERINE KOMPOZIT ALAN
     konum_koordinat = models.CharField(
@@ -208,6 +265,10 @@ class Veteriner(models.Model):
         verbose_name="Koordinat",
         help_text="Google Maps formatında: 38.231952, 42.428070"
     )
+    # konum_koordinat'tan kayıt sırasında hesaplanır (en yakın klinik aramaları için)
+    latitude = models.FloatField(null=True, blank=True, editable=False)
+    longitude = models.FloatField(null=True, blank=True, editable=False)
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
 
     def __str__(self):
         return self.ad
@@ -215,17 +276,21 @@ class Veteriner(models.Model):
     def save(self, *args, **kwargs):
         # NOT: web_slug artık otomatik oluşturulmuyor
         # Kullanıcı "Web Sayfamı Düzenle" sayfasından manuel oluşturur
+
+        konum_alanlarini_guncelle(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'konum_koordinat' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geohash'}
+
+        self.web_revizyon = (self.web_revizyon or 0) + 1
+        self.web_guncelleme = timezone.now()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'web_revizyon', 'web_guncelleme'}
         
-        # Aktif durumu değişti mi kontrol et
-        aktif_oldu = False
-        if self.pk:  # Mevcut kayıt
-            try:
-                eski_veteriner = Veteriner.objects.get(pk=self.pk)
-                aktif_oldu = not eski_veteriner.aktif and self.aktif
-            except Veteriner.DoesNotExist:
-                aktif_oldu = self.aktif
-        else:  # Yeni kayıt
-            aktif_oldu = self.aktif
+        # Aktiflik / bölge değişikliği danışman atamasını etkiler (veteriner/advisors.py)
+        eski = None
+        if self.pk:
+            eski = Veteriner.objects.filter(pk=self.pk).values('aktif', 'il_id', 'ilce_id').first()
         
         # SEO başlık ve açıklama otomatik oluştur (eğer yoksa)
         if not self.web_seo_baslik and self.web_baslik:
@@ -236,23 +301,9 @@ class Veteriner(models.Model):
         
         super().save(*args, **kwargs)
         
-        # Aktif olunca ilgili sahiplere veteriner ata (mevcut algoritma kullanılır)
-        if aktif_oldu and self.il:
-            from anahtarlik.models import Sahip
-            
-            # Bu veterinerin il/ilçesindeki veterineri olmayan sahiplere ata
-            ilgili_sahipler = Sahip.objects.filter(
-                il=self.il,
-                danisman_veteriner__isnull=True
-            ).select_related('il', 'ilce')
-            
-            if self.ilce:
-                ilgili_sahipler = ilgili_sahipler.filter(ilce=self.ilce)
-            
-            # Her sahip için veteriner ata (mevcut algoritma kullanılır)
-            for sahip in ilgili_sahipler:
-                # danisman_veteriner_ata() metodu zaten aktif etiket kontrolü yapıyor
-                sahip.danisman_veteriner_ata()
+        # Boşa çıkan / aday olan sahipler commit sonrası toplu atanır
+        from .advisors import veteriner_degisti
+        veteriner_degisti(self, eski)
 
     @property
     def kalan_envanter(self) -> int:
@@ -266,18 +317,24 @@ class Veteriner(models.Model):
         """Danışman olduğu sahip sayısı - id yoksa 0 dön"""
         if not self.pk:
             return 0
+        if 'danisman_sahip_adedi' in self.__dict__:  # sayaclarla() ile geldiyse
+            return self.danisman_sahip_adedi
         return self.danisman_oldugu_sahipler.count()
 
     @property
     def tahsis_sayisi(self) -> int:
         if not self.pk:
             return 0
+        if 'tahsis_adedi' in self.__dict__:
+            return self.tahsis_adedi
         return self.sattigi_etiketler.count()
 
     @property
     def satis_sayisi(self) -> int:
         if not self.pk:
             return 0
+        if 'satis_adedi' in self.__dict__:
+            return self.satis_adedi
         return self.sattigi_etiketler.filter(aktif=True).count()
 
         
@@ -307,17 +364,20 @@ class Veteriner(models.Model):
         # İlçe içi yüzde bonusu
         yuzde_bonus = 0
         try:
-            yuzde_obj = VeterinerYuzde.objects.filter(
-                veteriner=self,
-                ilce=self.ilce
-            ).first()
-            if yuzde_obj:
+            if 'ilce_yuzdesi' in self.__dict__:  # sayaclarla() ile geldiyse
+                yuzde = self.ilce_yuzdesi
+            else:
+                yuzde = VeterinerYuzde.objects.filter(
+                    veteriner=self,
+                    ilce=self.ilce
+                ).values_list('yuzde', flat=True).first()
+            if yuzde is not None:
                 # Yüzde 20'den fazlaysa bonus
-                if yuzde_obj.yuzde >= 20:
+                if yuzde >= 20:
                     yuzde_bonus = 30
-                elif yuzde_obj.yuzde >= 10:
+                elif yuzde >= 10:
                     yuzde_bonus = 20
-                elif yuzde_obj.yuzde >= 5:
+                elif yuzde >= 5:
                     yuzde_bonus = 10
         except:
             pass  # Hata durumunda yuzde_bonus = 0 kalır
@@ -398,6 +458,24 @@ class Veteriner(models.Model):
         from etiket.models import Etiket
         return Etiket.objects.filter(satici_veteriner=self, kanal='VET', evcil_hayvan__sahip__il=il, aktif=True, first_activated_at__isnull=False).count()
 
+    def calisiyor_mu(self, tarih, saat):
+        return calisma_saatinde_mi(self, tarih, saat)
+
+    def calisma_saatleri_json(self):
+        """Randevu formu için haftalık çalışma saatleri (0=Pazartesi ... 6=Pazar) JSON olarak."""
+        import json
+
+        saatler = {}
+        for sira, gun in enumerate(CALISMA_GUNLERI):
+            baslangic = getattr(self, f'{gun}_baslangic')
+            bitis = getattr(self, f'{gun}_bitis')
+            saatler[sira] = {
+                "baslangic": baslangic.strftime('%H:%M') if baslangic else None,
+                "bitis": bitis.strftime('%H:%M') if bitis else None,
+                "kapali": getattr(self, f'{gun}_kapali'),
+            }
+        return json.dumps(saatler)
+
 
 class VeterinerHizmet(models.Model):
     """Veteriner hizmet tanımları"""
@@ -455,7 +533,14 @@ class Randevu(models.Model):
         verbose_name = "Randevu"
         verbose_name_plural = "Randevular"
         ordering = ['-tarih', '-saat']
-        unique_together = ['veteriner', 'tarih', 'saat']
+        constraints = [
+            # İptal edilen randevunun slotu yeniden alınabilir
+            models.UniqueConstraint(
+                fields=['veteriner', 'tarih', 'saat'],
+                condition=~models.Q(durum=RANDEVU_IPTAL),
+                name='randevu_aktif_slot_tekil',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.musteri_adi} - {self.hayvan_adi} ({self.tarih} {self.saat})"
@@ -0,0 +1,76 @@
+# veteriner/nearby.py
+"""
+En yakın klinik ve petshop araması.
+
+Veteriner ve PetShop kayıtlarının `konum_koordinat` metni kayıt sırasında
+latitude/longitude ve indeksli geohash alanlarına çevrilir (save içinde,
+sadece değişen kayıt için). Arama, ortak geohash yardımcılarıyla (core/geo.py)
+genişleyen yarıçapta en yakın k kaydı bulur; istenirse sadece o an çalışma
+saatinde olanlar (calisma_saatinde_mi) sayılır.
+
+Kullanım yerleri: danışman veteriner atama (ilçede aday yoksa), kayıp bildirimi
+sayfası ve herkese açık `veteriner:yakin_isletmeler` API'si.
+"""
+from django.urls import reverse
+from django.utils import timezone
+
+from core.geo import en_yakinlar
+from courseapp.constants import YAKIN_ISLETME_MAKS_MESAFE_M, YAKIN_ISLETME_SAYISI
+
+
+def acik_mi(isletme, zaman=None):
+    zaman = timezone.localtime(zaman)
+    return isletme.calisiyor_mu(zaman.date(), zaman.time())
+
+
+def _en_yakin(qs, lat, lon, k, acik, zaman, maks_mesafe_m):
+    zaman = zaman or timezone.now()
+    filtre = (lambda isletme: acik_mi(isletme, zaman)) if acik else None
+    sonuc = en_yakinlar(qs, lat, lon, k, maks_mesafe_m, filtre=filtre)
+    for isletme in sonuc:
+        isletme.acik = True if acik else acik_mi(isletme, zaman)
+        isletme.mesafe_km = round(isletme.mesafe_m / 1000, 2)
+    return sonuc
+
+
+def en_yakin_klinikler(lat, lon, k=YAKIN_ISLETME_SAYISI, acik=False, zaman=None,
+                       maks_mesafe_m=YAKIN_ISLETME_MAKS_MESAFE_M, qs=None):
+    """
+    Noktaya en yakın aktif veterinerler, yakından uzağa. Her kayda `mesafe_m`,
+    `mesafe_km` ve `acik` öznitelikleri eklenir. `acik=True` ise sadece `zaman` anında
+    (varsayılan: şimdi) çalışma saatinde olanlar döner.
+    """
+    from .models import Veteriner
+
+    qs = Veteriner.objects.filter(aktif=True) if qs is None else qs
+    return _en_yakin(qs.select_related('il', 'ilce'), lat, lon, k, acik, zaman, maks_mesafe_m)
+
+
+def en_yakin_petshoplar(lat, lon, k=YAKIN_ISLETME_SAYISI, acik=False, zaman=None,
+                        maks_mesafe_m=YAKIN_ISLETME_MAKS_MESAFE_M, qs=None):
+    """en_yakin_klinikler'in petshop karşılığı."""
+    from petshop.models import PetShop
+
+    qs = PetShop.objects.filter(aktif=True) if qs is None else qs
+    return _en_yakin(qs.select_related('il', 'ilce'), lat, lon, k, acik, zaman, maks_mesafe_m)
+
+
+def isletme_sozlugu(isletme):
+    """API yanıtı için tek kayıt."""
+    web_url = ''
+    if isletme.web_aktif and isletme.web_slug:
+        uygulama = isletme._meta.app_label
+        web_url = reverse(f'{uygulama}:web_sayfasi_gorunum', args=[isletme.web_slug])
+    return {
+        'id': isletme.pk,
+        'ad': isletme.ad,
+        'telefon': isletme.telefon,
+        'il': isletme.il.ad if isletme.il else '',
+        'ilce': isletme.ilce.ad if isletme.ilce else '',
+        'adres': isletme.adres_detay,
+        'latitude': isletme.latitude,
+        'longitude': isletme.longitude,
+        'mesafe_km': isletme.mesafe_km,
+        'acik': isletme.acik,
+        'web_url': web_url,
+    }
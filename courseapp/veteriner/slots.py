@@ -0,0 +1,163 @@
+# veteriner/slots.py
+"""
+Randevu slot motoru.
+
+Veterinerin 7 gün × 3 alanlık çalışma saatleri, gün başına bir bit maskesine
+derlenir: bit i, günün i. RANDEVU_MINUTES_INTERVAL dakikalık slotunun (i × aralık
+dakikasında başlayan) tamamen çalışma saatleri içinde olduğunu gösterir. Haftalık
+harita 7 tamsayıdan ibarettir, veteriner başına cache'lenir. Anahtar veterinerin
+web_revizyon sayacıyla (her kayıtta artar, veritabanından okunur) sürümlenir;
+böylece süreç başına önbellekler de değişen çalışma saatlerini hemen görür.
+
+Boş slotlar bir tarih aralığı için tek sorguyla bulunur: aralıktaki aktif
+randevular gün başına bir "dolu" maskesine çevrilip çalışma maskesinden düşülür.
+
+Randevu alma kontrol-sonra-ekle değildir: satır doğrudan eklenir, aynı slottaki
+aktif (iptal edilmemiş) randevu tekilliğini veritabanı kısıtı garanti eder.
+Yarışı kaybeden istek IntegrityError yerine SlotDolu alır.
+"""
+import logging
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from courseapp.constants import (
+    RANDEVU_MINUTES_INTERVAL,
+    RANDEVU_SLOT_HARITASI_CACHE_SURESI,
+    VARSAYILAN_CALISMA_BASLANGIC,
+    VARSAYILAN_CALISMA_BITIS,
+)
+
+from .models import CALISMA_GUNLERI, RANDEVU_BEKLENIYOR, RANDEVU_IPTAL, Randevu, VeterinerHizmet
+
+logger = logging.getLogger(__name__)
+
+GUNLUK_SLOT = 24 * 60 // RANDEVU_MINUTES_INTERVAL
+
+
+class SlotGecersiz(Exception):
+    """Seçilen saat veterinerin çalışma saatlerindeki bir slot değil."""
+
+
+class SlotDolu(Exception):
+    """Seçilen slotta zaten aktif bir randevu var."""
+
+
+def _cache_anahtari(veteriner):
+    return f'randevu_slot_haritasi_{veteriner.pk}_{veteriner.web_revizyon}'
+
+
+def _dakika(saat):
+    return saat.hour * 60 + saat.minute
+
+
+def slot_indeksi(saat):
+    """Saatin düştüğü slotun indeksi."""
+    return _dakika(saat) // RANDEVU_MINUTES_INTERVAL
+
+
+def slot_saati(indeks):
+    dakika = indeks * RANDEVU_MINUTES_INTERVAL
+    return time(dakika // 60, dakika % 60)
+
+
+def _gun_maskesi(veteriner, gun):
+    if getattr(veteriner, f'{gun}_kapali'):
+        return 0
+    baslangic, bitis = getattr(veteriner, f'{gun}_baslangic'), getattr(veteriner, f'{gun}_bitis')
+    if not (baslangic and bitis):
+        baslangic, bitis = VARSAYILAN_CALISMA_BASLANGIC, VARSAYILAN_CALISMA_BITIS
+    bas, son = _dakika(baslangic), _dakika(bitis)
+    maske = 0
+    for i in range(GUNLUK_SLOT):
+        if bas <= i * RANDEVU_MINUTES_INTERVAL and (i + 1) * RANDEVU_MINUTES_INTERVAL <= son:
+            maske |= 1 << i
+    return maske
+
+
+def haftalik_harita_derle(veteriner):
+    """Pazartesi'den Pazar'a 7 gün maskesi."""
+    return tuple(_gun_maskesi(veteriner, gun) for gun in CALISMA_GUNLERI)
+
+
+def haftalik_harita(veteriner):
+    harita = cache.get(_cache_anahtari(veteriner))
+    if harita is None:
+        harita = haftalik_harita_derle(veteriner)
+        cache.set(_cache_anahtari(veteriner), harita, RANDEVU_SLOT_HARITASI_CACHE_SURESI)
+    return harita
+
+
+def slot_calisma_saatinde_mi(veteriner, tarih, saat):
+    """Saat bir slot başlangıcı mı ve o slot çalışma saatleri içinde mi?"""
+    if _dakika(saat) % RANDEVU_MINUTES_INTERVAL or saat.second:
+        return False
+    return bool(haftalik_harita(veteriner)[tarih.weekday()] >> slot_indeksi(saat) & 1)
+
+
+def bos_slotlar(veteriner, baslangic, gun_sayisi=7, simdi=None):
+    """
+    baslangic'tan itibaren gun_sayisi gün için boş slotlar: {tarih: [time, ...]}.
+    Aralıktaki randevular tek sorguda okunur; geçmiş günler ve bugünün geçmiş slotları dönmez.
+    """
+    simdi = timezone.localtime(simdi)
+    bitis = baslangic + timedelta(days=gun_sayisi - 1)
+    harita = haftalik_harita(veteriner)
+
+    dolu = defaultdict(int)
+    for tarih, saat in (
+        Randevu.objects.filter(veteriner=veteriner, tarih__range=(baslangic, bitis))
+        .exclude(durum=RANDEVU_IPTAL).values_list('tarih', 'saat')
+    ):
+        dolu[tarih] |= 1 << slot_indeksi(saat)
+
+    sonuc = {}
+    for n in range(gun_sayisi):
+        tarih = baslangic + timedelta(days=n)
+        if tarih < simdi.date():
+            continue
+        bos = harita[tarih.weekday()] & ~dolu[tarih]
+        if tarih == simdi.date():
+            # Başlamış slotlar alınamaz
+            bos &= ~((1 << (slot_indeksi(simdi.time()) + 1)) - 1)
+        sonuc[tarih] = [slot_saati(i) for i in range(GUNLUK_SLOT) if bos >> i & 1]
+    return sonuc
+
+
+def varsayilan_hizmet(veteriner):
+    """Web sayfasından alınan randevuların bağlandığı 'Genel Muayene' hizmeti."""
+    hizmet = VeterinerHizmet.objects.filter(veteriner=veteriner, hizmet_adi="Genel Muayene").order_by('pk').first()
+    if hizmet is None:
+        hizmet = VeterinerHizmet.objects.create(
+            veteriner=veteriner,
+            hizmet_adi="Genel Muayene",
+            hizmet_turu='GENEL',
+            aciklama='Genel veteriner muayenesi',
+            fiyat=0,
+            sure_dakika=RANDEVU_MINUTES_INTERVAL,
+            aktif=True,
+        )
+    return hizmet
+
+
+def randevu_al(veteriner, tarih, saat, **alanlar):
+    """
+    Slotu atomik olarak alır ve randevuyu döndürür.
+    Slot çalışma saatleri dışındaysa SlotGecersiz, başkası almışsa SlotDolu yükseltir.
+    """
+    if not slot_calisma_saatinde_mi(veteriner, tarih, saat):
+        raise SlotGecersiz(f"{tarih} {saat:%H:%M}")
+    alanlar.setdefault('hizmet', varsayilan_hizmet(veteriner))
+    try:
+        with transaction.atomic():
+            return Randevu.objects.create(
+                veteriner=veteriner, tarih=tarih, saat=saat, durum=RANDEVU_BEKLENIYOR, **alanlar
+            )
+    except IntegrityError:
+        if Randevu.objects.filter(veteriner=veteriner, tarih=tarih, saat=saat).exclude(durum=RANDEVU_IPTAL).exists():
+            raise SlotDolu(f"{tarih} {saat:%H:%M}")
+        raise
+
@@ -1,3 +1,352 @@
-from django.test import TestCase
+import threading
+from datetime import datetime, time, timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from anahtarlik.dictionaries import Il, Ilce, Irk, Tur
+from anahtarlik.models import EvcilHayvan, Sahip
+from core.geo import geohash_kodla, koordinat_ayristir
+from core.page_cache import CSRF_YER_TUTUCU, sayfa_getir
+from core.thread_race import eszamanli_calistir
+from etiket.models import KANAL_VET, Etiket
+from veteriner.advisors import danismanlari_yeniden_ata
+from veteriner.models import RANDEVU_BEKLENIYOR, RANDEVU_IPTAL, Randevu, Veteriner, VeterinerYuzde
+from veteriner.nearby import en_yakin_klinikler
+from veteriner.slots import SlotDolu, SlotGecersiz, bos_slotlar, haftalik_harita, randevu_al
+
+MERKEZ = (39.92, 32.85)
+
+
+class EnYakinKlinikTests(TestCase):
+    def setUp(self):
+        self.ankara = Il.objects.create(ad='Ankara')
+        self.kirikkale = Il.objects.create(ad='Kırıkkale')
+        lat, lon = MERKEZ
+        self.yakin = Veteriner.objects.create(
+            ad='Yakın', aktif=True, konum_koordinat=f'{lat + 0.01}, {lon}',
+            pazartesi_baslangic=time(9, 0), pazartesi_bitis=time(18, 0),
+        )
+        self.orta = Veteriner.objects.create(
+            ad='Orta', aktif=True, konum_koordinat=f'{lat + 0.05}, {lon}',
+            pazartesi_baslangic=time(8, 0), pazartesi_bitis=time(22, 0),
+        )
+        self.uzak = Veteriner.objects.create(
+            ad='Uzak', aktif=True, il=self.kirikkale, konum_koordinat=f'{lat + 0.3}, {lon}',
+        )
+        Veteriner.objects.create(ad='Pasif', aktif=False, konum_koordinat=f'{lat + 0.001}, {lon}')
+
+    def test_koordinat_kayitta_indekslenir(self):
+        self.assertEqual(koordinat_ayristir('38.231952, 42.428070'), (38.231952, 42.42807))
+        self.assertEqual(koordinat_ayristir('adres yok'), (None, None))
+        self.assertEqual(self.yakin.geohash, geohash_kodla(MERKEZ[0] + 0.01, MERKEZ[1]))
+
+        self.yakin.konum_koordinat = ''
+        self.yakin.save(update_fields=['konum_koordinat'])
+        self.yakin.refresh_from_db()
+        self.assertIsNone(self.yakin.latitude)
+        self.assertEqual(self.yakin.geohash, '')
+
+    def test_en_yakin_k_klinik(self):
+        sonuc = en_yakin_klinikler(*MERKEZ, k=2)
+        self.assertEqual([v.ad for v in sonuc], ['Yakın', 'Orta'])
+        self.assertAlmostEqual(sonuc[0].mesafe_m, 1112, delta=5)
+
+        # Yarıçap genişleyerek 33 km'deki klinik de bulunur; pasif klinik hiç dönmez
+        self.assertEqual([v.ad for v in en_yakin_klinikler(*MERKEZ, k=5)], ['Yakın', 'Orta', 'Uzak'])
+        self.assertEqual(len(en_yakin_klinikler(*MERKEZ, k=5, maks_mesafe_m=20000)), 2)
+
+    def test_sadece_acik_klinikler(self):
+        pazartesi_aksam = timezone.make_aware(datetime(2026, 10, 19, 20, 0))
+        sonuc = en_yakin_klinikler(*MERKEZ, k=1, acik=True, zaman=pazartesi_aksam)
+        self.assertEqual([v.ad for v in sonuc], ['Orta'])
+        self.assertFalse(self.yakin.calisiyor_mu(pazartesi_aksam.date(), time(20, 0)))
+
+    def test_api(self):
+        url = reverse('veteriner:yakin_isletmeler')
+        yanit = self.client.get(url, {'lat': MERKEZ[0], 'lng': MERKEZ[1], 'k': 2})
+        self.assertEqual(yanit.status_code, 200)
+        self.assertEqual([s['ad'] for s in yanit.json()['sonuclar']], ['Yakın', 'Orta'])
+        self.assertEqual(self.client.get(url, {'lat': 'x', 'lng': 1}).status_code, 400)
+
+    def test_danisman_ilce_disindaki_en_yakin_veteriner(self):
+        lat, lon = MERKEZ
+        sahip = Sahip.objects.create(
+            kullanici=User.objects.create_user('yakin_sahip'),
+            il=self.ankara, ilce=Ilce.objects.create(il=self.ankara, ad='Çankaya'),
+            latitude=lat + 0.31, longitude=lon,
+        )
+        self.assertEqual(sahip.danisman_veteriner_ata(force_update=True), self.uzak)
+        self.assertEqual(sahip.danisman_atanma_sebebi, 'YAKIN_KONUM')
+
+
+class VeterinerAdminListesiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('vet_admin', 'admin@example.com', 'x'))
+        self.il = Il.objects.create(ad='Bursa')
+        self.ilce = Ilce.objects.create(il=self.il, ad='Nilüfer')
+        self.eklenen = 0
+
+    def _veteriner_ekle(self, adet):
+        for _ in range(adet):
+            i = self.eklenen = self.eklenen + 1
+            vet = Veteriner.objects.create(ad=f'Klinik {i}', il=self.il, ilce=self.ilce)
+            for n in range(3):
+                Etiket.objects.create(satici_veteriner=vet, aktif=n < i % 3)
+            Sahip.objects.create(
+                kullanici=User.objects.create_user(f'vet_sahip{i}'), il=self.il, ilce=self.ilce, danisman_veteriner=vet,
+            )
+            VeterinerYuzde.objects.create(veteriner=vet, ilce=self.ilce, yuzde=i * 5)
+
+    def test_sayaclar_sabit_sorguda_ve_siralanabilir(self):
+        url = reverse('admin:veteriner_veteriner_changelist')
+        self.client.get(reverse('admin:index'))
+        for adet in (3, 30):
+            self._veteriner_ekle(adet)
+            with self.subTest(satir=self.eklenen), self.assertNumQueries(13):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+        # Satış sayısına göre azalan; annotasyonlar property'lerin sorguyla hesapladığıyla aynı
+        ilk = self.client.get(url, {'o': '-8'}).context['cl'].result_list[0]
+        taze = Veteriner.objects.get(pk=ilk.pk)
+        self.assertEqual(ilk.satis_sayisi, 2)
+        self.assertEqual(
+            (ilk.danisman_sahip_sayisi, ilk.tahsis_sayisi, ilk.kalan_envanter, ilk.dinamik_kapasite),
+            (taze.danisman_sahip_sayisi, taze.tahsis_sayisi, taze.kalan_envanter, taze.dinamik_kapasite),
+        )
+
+
+def _gelecek_pazartesi():
+    bugun = timezone.localdate()
+    return bugun + timedelta(days=7 - bugun.weekday())
+
+
+MUSTERI = dict(musteri_adi='Ayşe', musteri_telefon='5550000000', hayvan_adi='Pamuk')
+
+
+class RandevuSlotTests(TestCase):
+    def setUp(self):
+        self.vet = Veteriner.objects.create(
+            ad='Slot Klinik', web_slug='slot-klinik', web_aktif=True,
+            pazartesi_baslangic=time(9, 0), pazartesi_bitis=time(12, 15),
+            pazar_kapali=True,
+        )
+        self.pazartesi = _gelecek_pazartesi()
+
+    def test_haftalik_harita(self):
+        harita = haftalik_harita(self.vet)
+        # 09:00-12:15 içinde tamamen kalan 6 yarım saatlik slot; 12:00 slotu taşar
+        self.assertEqual(harita[0], sum(1 << i for i in range(18, 24)))
+        self.assertEqual(harita[6], 0)
+        # Saat girilmemiş gün varsayılan 09:00-18:00
+        self.assertEqual(bin(harita[1]).count('1'), 18)
+
+    def test_bos_slotlar_tek_sorgu(self):
+        randevu_al(self.vet, self.pazartesi, time(9, 0), **MUSTERI)
+        iptal = randevu_al(self.vet, self.pazartesi, time(10, 0), **MUSTERI)
+        Randevu.objects.filter(pk=iptal.pk).update(durum=RANDEVU_IPTAL)
+
+        haftalik_harita(self.vet)
+        with self.assertNumQueries(1):
+            sonuc = bos_slotlar(self.vet, self.pazartesi, gun_sayisi=7)
+        self.assertEqual(sonuc[self.pazartesi], [time(9, 30), time(10, 0), time(10, 30), time(11, 0), time(11, 30)])
+        self.assertEqual(sonuc[self.pazartesi + timedelta(days=6)], [])
+
+        yanit = self.client.get(
+            reverse('veteriner:public_bos_saatler', args=['slot-klinik']),
+            {'baslangic': self.pazartesi.isoformat(), 'gun': 1},
+        )
+        self.assertEqual(yanit.json()['gunler'][self.pazartesi.isoformat()][0], '09:30')
+
+    def test_randevu_al(self):
+        randevu = randevu_al(self.vet, self.pazartesi, time(9, 0), **MUSTERI)
+        self.assertEqual(randevu.durum, RANDEVU_BEKLENIYOR)
+        with self.assertRaises(SlotDolu):
+            randevu_al(self.vet, self.pazartesi, time(9, 0), **MUSTERI)
+        for saat in (time(12, 0), time(9, 15)):
+            with self.assertRaises(SlotGecersiz):
+                randevu_al(self.vet, self.pazartesi, saat, **MUSTERI)
+
+        # İptal edilen slot yeniden alınabilir
+        randevu.durum = RANDEVU_IPTAL
+        randevu.save()
+        randevu_al(self.vet, self.pazartesi, time(9, 0), **MUSTERI)
+
+    def test_dolu_slot_409(self):
+        randevu_al(self.vet, self.pazartesi, time(9, 0), **MUSTERI)
+        yanit = self.client.post(
+            reverse('veteriner:public_randevu_olustur', args=['slot-klinik']),
+            dict(MUSTERI, tarih=self.pazartesi.isoformat(), saat='09:00', hayvan_turu='Kedi', sorun_aciklamasi='Kontrol'),
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(yanit.status_code, 409)
+        self.assertFalse(yanit.json()['ok'])
+
+    def test_profil_kaydinda_harita_yenilenir(self):
+        haftalik_harita(self.vet)
+        self.vet.pazartesi_kapali = True
+        self.vet.save()
+        self.assertEqual(haftalik_harita(self.vet)[0], 0)
+
+
+class EszamanliRandevuTests(TransactionTestCase):
+    ISTEK_SAYISI = 50
+
+    def test_ayni_slota_50_istek(self):
+        vet = Veteriner.objects.create(ad='Yoğun Klinik')
+        pazartesi = _gelecek_pazartesi()
+        randevu_al(vet, pazartesi, time(14, 0), **MUSTERI)  # varsayılan hizmet önceden oluşsun
+        Randevu.objects.all().delete()
+
+        def istek():
+            try:
+                randevu_al(vet, pazartesi, time(10, 0), **MUSTERI)
+                return 'alindi'
+            except SlotDolu:
+                return 'dolu'
+
+        sonuclar = eszamanli_calistir(istek, self.ISTEK_SAYISI)
+
+        self.assertEqual(sonuclar.count('alindi'), 1)
+        self.assertEqual(sonuclar.count('dolu'), self.ISTEK_SAYISI - 1)
+        self.assertEqual(Randevu.objects.filter(veteriner=vet).count(), 1)
+
+
+class WebSayfasiOnbellekTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vet = Veteriner.objects.create(
+            ad='Önbellek Klinik', web_slug='onbellek-klinik', web_aktif=True, web_baslik='İlk Başlık',
+        )
+        self.url = reverse('veteriner:web_sayfasi_gorunum', args=['onbellek-klinik'])
+
+    def test_tekrar_istek_onbellekten_ve_304(self):
+        ilk = self.client.get(self.url)
+        self.assertEqual(ilk.status_code, 200)
+        self.assertContains(ilk, 'İlk Başlık')
+        self.assertNotContains(ilk, CSRF_YER_TUTUCU)
+        self.assertContains(ilk, 'name="csrfmiddlewaretoken"')
+        self.assertTrue(ilk['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', ilk)
+
+        # Önbellekten: sadece revizyon sorgusu
+        with self.assertNumQueries(1):
+            ikinci = self.client.get(self.url)
+        self.assertEqual(ikinci['ETag'], ilk['ETag'])
+
+        kosullu = self.client.get(self.url, HTTP_IF_NONE_MATCH=ilk['ETag'])
+        self.assertEqual(kosullu.status_code, 304)
+        self.assertEqual(kosullu.content, b'')
+
+    def test_csrf_jetonu_degisince_304_donmez(self):
+        ilk = self.client.get(self.url)
+        self.assertNotContains(ilk, 'min="')  # en erken tarih tarayıcıda verilir
+
+        # Giriş jetonu yeniler: tarayıcıdaki eski jetonlu gövde kullanılmamalı
+        self.client.cookies.pop('csrftoken')
+        yanit = self.client.get(self.url, HTTP_IF_NONE_MATCH=ilk['ETag'], HTTP_IF_MODIFIED_SINCE=ilk['Last-Modified'])
+        self.assertEqual(yanit.status_code, 200)
+        self.assertNotEqual(yanit['ETag'], ilk['ETag'])
+
+    def test_profil_kaydi_yeni_surum_uretir(self):
+        ilk = self.client.get(self.url)
+        self.vet.web_baslik = 'Yeni Başlık'
+        self.vet.save(update_fields=['web_baslik'])
+
+        yanit = self.client.get(self.url, HTTP_IF_NONE_MATCH=ilk['ETag'])
+        self.assertEqual(yanit.status_code, 200)
+        self.assertContains(yanit, 'Yeni Başlık')
+        self.assertNotEqual(yanit['ETag'], ilk['ETag'])
+
+        self.vet.web_aktif = False
+        self.vet.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_eszamanli_bos_onbellek_tek_render(self):
+        uretimler = []
+
+        def uret():
+            uretimler.append(1)
+            threading.Event().wait(0.2)  # Yavaş render: diğer istekler kilitte beklesin
+            return '<html>sayfa</html>'
+
+        baslat = threading.Barrier(30)
+        sonuclar = []
+
+        def istek():
+            baslat.wait()
+            sonuclar.append(sayfa_getir('web_sayfa_test_1_1', uret)['etag'])
+
+        threadler = [threading.Thread(target=istek) for _ in range(30)]
+        for t in threadler:
+            t.start()
+        for t in threadler:
+            t.join()
+
+        self.assertEqual(len(uretimler), 1)
+        self.assertEqual(len(sonuclar), 30)
+        self.assertEqual(len(set(sonuclar)), 1)
+
+
+class TopluDanismanAtamaTests(TestCase):
+    SAHIP_SAYISI = 120
+
+    def setUp(self):
+        self.il = Il.objects.create(ad='Eskişehir')
+        self.ilce = Ilce.objects.create(il=self.il, ad='Odunpazarı')
+        self.diger_ilce = Ilce.objects.create(il=self.il, ad='Tepebaşı')
+        self.ayrilan = Veteriner.objects.create(ad='Ayrılan', aktif=True, il=self.il, ilce=self.ilce)
+        self.komsu = Veteriner.objects.create(ad='Komşu', aktif=True, il=self.il, ilce=self.ilce)
+        self.ilde = Veteriner.objects.create(ad='İlde', aktif=True, il=self.il, ilce=self.diger_ilce)
+
+        User.objects.bulk_create([User(username=f'danisman_sahip_{i}') for i in range(self.SAHIP_SAYISI)])
+        Sahip.objects.bulk_create([
+            Sahip(kullanici=kullanici, il=self.il, ilce=self.ilce, danisman_veteriner=self.ayrilan)
+            for kullanici in User.objects.filter(username__startswith='danisman_sahip_')
+        ])
+
+    def test_pasiflesen_veterinerin_sahipleri_kapasiteye_gore_dagitilir(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.ayrilan.aktif = False
+            self.ayrilan.save()
+        # Kayıt sırasında sadece sahipler bırakılır, atama commit sonrasına kalır
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(Sahip.objects.filter(danisman_veteriner__isnull=False).exists())
+
+        with CaptureQueriesContext(connection) as sorgular:
+            rapor = danismanlari_yeniden_ata([self.ilce.pk], parti_boyutu=50)
+        self.assertLess(len(sorgular), 25)
+
+        # Yeni veterinerlerin kapasitesi 50: önce ilçedeki, sonra ildeki veteriner dolar
+        self.assertEqual(rapor, {'atanan': 100, 'atanamayan': 20, 'parti': 3})
+        self.assertEqual(self.komsu.danisman_oldugu_sahipler.filter(danisman_atanma_sebebi='ILCE_ESLESME').count(), 50)
+        self.assertEqual(self.ilde.danisman_oldugu_sahipler.filter(danisman_atanma_sebebi='IL_ESLESME').count(), 50)
+
+        # Yeniden çalıştırma kalan boş sahiplerle devam eder
+        self.assertEqual(danismanlari_yeniden_ata([self.ilce.pk])['atanan'], 0)
+
+    def test_kunye_veterineri_oncelikli(self):
+        sahip = Sahip.objects.order_by('pk').first()
+        tur = Tur.objects.create(ad='Kedi')
+        hayvan = EvcilHayvan.objects.create(ad='Pamuk', tur=tur, irk=Irk.objects.create(tur=tur, ad='Tekir'), sahip=sahip)
+        etiket = Etiket.objects.create(evcil_hayvan=hayvan, aktif=True)
+        Etiket.objects.filter(pk=etiket.pk).update(
+            kanal=KANAL_VET, satici_veteriner=self.ilde, first_activated_at=timezone.now()
+        )
+        Sahip.objects.update(danisman_veteriner=None)
+
+        danismanlari_yeniden_ata([self.ilce.pk])
+        sahip.refresh_from_db()
+        self.assertEqual((sahip.danisman_veteriner, sahip.danisman_atanma_sebebi), (self.ilde, 'KUNYE_ALIMI'))
+
+    def test_bolge_degisince_disarida_kalan_sahipler_birakilir(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.ayrilan.ilce = self.diger_ilce
+            self.ayrilan.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.ayrilan.danisman_oldugu_sahipler.count(), 0)
@@ -45,11 +45,13 @@ urlpatterns = [
     
     # AJAX endpoints
     path("api/districts/", views.districts_for_city, name="districts_for_city"),
+    path("api/yakin-isletmeler/", views.yakin_isletmeler, name="yakin_isletmeler"),
     
     # Mini web
     path("web/", views.web_sayfasi_duzenle, name="web_sayfasi_duzenle"),
     path("web/<trslug:slug>/", views.web_sayfasi_gorunum, name="web_sayfasi_gorunum"),
     path("web/<trslug:slug>/randevu/", views.public_randevu_olustur, name="public_randevu_olustur"),
+    path("web/<trslug:slug>/bos-saatler/", views.public_bos_saatler, name="public_bos_saatler"),
     path("web-id/<int:veteriner_id>/", views.web_sayfasi_gorunum_legacy, name="web_sayfasi_gorunum_legacy"),
 ]
 
@@ -6,12 +6,14 @@ from django.core.paginator import Paginator
 from django.http import JsonResponse
 from django.db.models import Q, Avg, Count
 from django.utils import timezone
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 
-from .models import Veteriner, SiparisIstemi, VeterinerHizmet, VeterinerDegerlendirme, Randevu
+from .models import RANDEVU_BEKLENIYOR, Veteriner, SiparisIstemi, VeterinerHizmet, VeterinerDegerlendirme, Randevu
+from .slots import SlotDolu, SlotGecersiz, bos_slotlar, randevu_al
 from .forms import VeterinerDegerlendirmeForm, VeterinerProfilForm, VeterinerHesapForm
 from etiket.models import Etiket, KANAL_VET
 from anahtarlik.dictionaries import Ilce
+from courseapp.constants import RANDEVU_ADVANCE_DAYS
 
 
 
@@ -337,12 +339,36 @@ def districts_for_city(request):
     from core.views import districts_for_province
     return districts_for_province(request)
 
+@require_http_methods(["GET"])
+def yakin_isletmeler(request):
+    """
+    Herkese açık en yakın klinik / petshop API'si.
+    Parametreler: lat, lng, k (varsayılan 5), acik=1 (sadece şu an açık olanlar),
+    tur=veteriner|petshop (varsayılan veteriner).
+    """
+    from courseapp.constants import YAKIN_ISLETME_MAKS_SAYI, YAKIN_ISLETME_SAYISI
+    from .nearby import en_yakin_klinikler, en_yakin_petshoplar, isletme_sozlugu
+
+    try:
+        lat = float(request.GET.get('lat', ''))
+        lng = float(request.GET.get('lng', ''))
+        k = int(request.GET.get('k', YAKIN_ISLETME_SAYISI))
+    except ValueError:
+        return JsonResponse({"ok": False, "errors": ["Geçerli lat, lng ve k değerleri gerekli."]}, status=400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return JsonResponse({"ok": False, "errors": ["Koordinat aralık dışında."]}, status=400)
+
+    k = max(1, min(k, YAKIN_ISLETME_MAKS_SAYI))
+    acik = request.GET.get('acik') in ('1', 'true')
+    arama = en_yakin_petshoplar if request.GET.get('tur') == 'petshop' else en_yakin_klinikler
+    sonuclar = [isletme_sozlugu(isletme) for isletme in arama(lat, lng, k=k, acik=acik)]
+    return JsonResponse({"ok": True, "sonuclar": sonuclar})
+
 # Web sayfası (geri eklendi)
 from django.http import Http404
 from django.urls import reverse
 
-def web_sayfasi_gorunum(request, slug):
-    veteriner = get_object_or_404(Veteriner, web_slug=slug, web_aktif=True)
+def _web_sayfasi_baglami(veteriner):
     resimler = []
     if veteriner.web_resim1: resimler.append(veteriner.web_resim1)
     if veteriner.web_resim2: resimler.append(veteriner.web_resim2)
@@ -363,16 +389,37 @@ def web_sayfasi_gorunum(request, slug):
         else:
             facebook_url = f"https://facebook.com/{veteriner.facebook}"
     
-    # Session'dan başarı mesajını al
-    randevu_basarili = request.session.pop('randevu_basarili', None)
-    
-    return render(request, 'veteriner/web_public.html', {
+    return {
         "veteriner": veteriner, 
         "resimler": resimler,
         "instagram_url": instagram_url,
         "facebook_url": facebook_url,
-        "randevu_basarili": randevu_basarili,
-    })
+    }
+
+def web_sayfasi_gorunum(request, slug):
+    from core.page_cache import onbellekli_yanit, sablondan, sayfa_anahtari
+
+    # Önbellekteki sayfanın geçerliliği için sadece revizyon okunur
+    sayfa = get_object_or_404(
+        Veteriner.objects.values('pk', 'web_revizyon', 'web_guncelleme'), web_slug=slug, web_aktif=True
+    )
+
+    # Randevu sonrası başarı mesajı ziyaretçiye özel: bu istek önbellek dışında render edilir
+    randevu_basarili = request.session.pop('randevu_basarili', None)
+    if randevu_basarili:
+        veteriner = Veteriner.objects.select_related('il', 'ilce').get(pk=sayfa['pk'])
+        baglam = _web_sayfasi_baglami(veteriner)
+        baglam["randevu_basarili"] = randevu_basarili
+        return render(request, 'veteriner/web_public.html', baglam)
+
+    return onbellekli_yanit(
+        request,
+        sayfa_anahtari('veteriner', sayfa['pk'], sayfa['web_revizyon']),
+        sablondan('veteriner/web_public.html', lambda: _web_sayfasi_baglami(
+            Veteriner.objects.select_related('il', 'ilce').get(pk=sayfa['pk'])
+        )),
+        son_degisiklik=sayfa['web_guncelleme'],
+    )
 
 def web_sayfasi_gorunum_legacy(request, veteriner_id):
     veteriner = get_object_or_404(Veteriner, id=veteriner_id, web_aktif=True)
@@ -457,7 +504,7 @@ def randevu_yonetimi(request):
     
     # İstatistikler
     toplam_randevu = randevular.count()
-    bekleyen_randevu = randevular.filter(durum='BEKLIYOR').count()
+    bekleyen_randevu = randevular.filter(durum=RANDEVU_BEKLENIYOR).count()
     onaylanan_randevu = randevular.filter(durum='ONAYLANDI').count()
     tamamlanan_randevu = randevular.filter(durum='TAMAMLANDI').count()
     iptal_randevu = randevular.filter(durum='IPTAL').count()
@@ -533,8 +580,6 @@ def randevu_durum_guncelle(request, randevu_id):
 
 def public_randevu_olustur(request, slug):
     """Public randevu oluşturma - Herkese açık"""
-    from datetime import datetime, time
-    from django.contrib import messages
     
     veteriner = get_object_or_404(Veteriner, web_slug=slug, web_aktif=True)
     
@@ -585,65 +630,38 @@ def public_randevu_olustur(request, slug):
                         return JsonResponse({"ok": False, "errors": ["Geçmiş tarih seçilemez."]}, status=400)
                     messages.error(request, "Geçmiş tarih seçilemez.")
                 else:
-                    # Çalışma saatleri kontrolü
-                    if not veteriner_working_hours_check(veteriner, randevu_tarihi, randevu_saati):
+                    try:
+                        # Slot doğrudan alınır; aynı slota eşzamanlı ikinci istek SlotDolu alır
+                        randevu = randevu_al(
+                            veteriner, randevu_tarihi, randevu_saati,
+                            musteri_adi=musteri_adi,
+                            musteri_telefon=musteri_telefon,
+                            musteri_email=musteri_email or '',
+                            hayvan_adi=hayvan_adi,
+                            hayvan_turu=hayvan_turu,
+                            sorun_aciklamasi=sorun_aciklamasi,
+                            notlar=notlar or '',
+                        )
+                    except SlotGecersiz:
                         if is_ajax:
                             return JsonResponse({"ok": False, "errors": ["Seçilen tarih ve saatte veteriner çalışmıyor. Lütfen çalışma saatleri içinde bir randevu seçin."]}, status=400)
                         messages.error(request, "Seçilen tarih ve saatte veteriner çalışmıyor. Lütfen çalışma saatleri içinde bir randevu seçin.")
+                    except SlotDolu:
+                        if is_ajax:
+                            return JsonResponse({"ok": False, "errors": ["Bu tarih ve saatte zaten bir randevu bulunmaktadır. Lütfen farklı bir saat seçin."]}, status=409)
+                        messages.error(request, "Bu tarih ve saatte zaten bir randevu bulunmaktadır. Lütfen farklı bir saat seçin.")
                     else:
-                        # Aynı tarih ve saatte randevu var mı kontrol et
-                        existing_randevu = Randevu.objects.filter(
-                            veteriner=veteriner,
-                            tarih=randevu_tarihi,
-                            saat=randevu_saati,
-                            durum__in=['BEKLIYOR', 'ONAYLANDI']
-                        ).exists()
-                        
-                        if existing_randevu:
-                            if is_ajax:
-                                return JsonResponse({"ok": False, "errors": ["Bu tarih ve saatte zaten bir randevu bulunmaktadır. Lütfen farklı bir saat seçin."]}, status=400)
-                            messages.error(request, "Bu tarih ve saatte zaten bir randevu bulunmaktadır. Lütfen farklı bir saat seçin.")
-                        else:
-                            # Varsayılan hizmet oluştur veya mevcut olanı kullan
-                            varsayilan_hizmet, created = VeterinerHizmet.objects.get_or_create(
-                                veteriner=veteriner,
-                                hizmet_adi="Genel Muayene",
-                                defaults={
-                                    'hizmet_turu': 'GENEL',
-                                    'aciklama': 'Genel veteriner muayenesi',
-                                    'fiyat': 0,
-                                    'sure_dakika': 30,
-                                    'aktif': True
-                                }
-                            )
-                            
-                            # Randevu oluştur
-                            randevu = Randevu.objects.create(
-                                veteriner=veteriner,
-                                hizmet=varsayilan_hizmet,
-                                musteri_adi=musteri_adi,
-                                musteri_telefon=musteri_telefon,
-                                musteri_email=musteri_email or '',
-                                hayvan_adi=hayvan_adi,
-                                hayvan_turu=hayvan_turu,
-                                sorun_aciklamasi=sorun_aciklamasi,
-                                notlar=notlar or '',
-                                tarih=randevu_tarihi,
-                                saat=randevu_saati,
-                                durum='BEKLIYOR'
-                            )
-                            
-                            # Başarı mesajını hazırla
-                            basari_mesaji = (
-                                f"Randevu talebiniz başarıyla oluşturuldu! Randevu numaranız: #{randevu.id}. "
-                                "Veterinerimiz en kısa sürede sizinle iletişime geçecektir."
-                            )
-                            if is_ajax:
-                                return JsonResponse({"ok": True, "id": randevu.id, "message": basari_mesaji})
-                            # Ajax değilse önceki davranışı koru
-                            request.session['randevu_basarili'] = basari_mesaji
-                            return redirect('veteriner:web_sayfasi_gorunum', slug=slug)
-                            
+                        # Başarı mesajını hazırla
+                        basari_mesaji = (
+                            f"Randevu talebiniz başarıyla oluşturuldu! Randevu numaranız: #{randevu.id}. "
+                            "Veterinerimiz en kısa sürede sizinle iletişime geçecektir."
+                        )
+                        if is_ajax:
+                            return JsonResponse({"ok": True, "id": randevu.id, "message": basari_mesaji})
+                        # Ajax değilse önceki davranışı koru
+                        request.session['randevu_basarili'] = basari_mesaji
+                        return redirect('veteriner:web_sayfasi_gorunum', slug=slug)
+
             except ValueError as e:
                 if is_ajax:
                     return JsonResponse({"ok": False, "errors": ["Tarih veya saat formatı hatalı."]}, status=400)
@@ -657,50 +675,25 @@ def public_randevu_olustur(request, slug):
     return redirect('veteriner:web_sayfasi_gorunum', slug=slug)
 
 
+def public_bos_saatler(request, slug):
+    """Public boş randevu saatleri (JSON) - ?baslangic=YYYY-MM-DD&gun=7"""
+    veteriner = get_object_or_404(Veteriner, web_slug=slug, web_aktif=True)
+    try:
+        baslangic = datetime.strptime(request.GET.get('baslangic', ''), '%Y-%m-%d').date()
+    except ValueError:
+        baslangic = timezone.localdate()
+    try:
+        gun_sayisi = min(max(int(request.GET.get('gun', 7)), 1), RANDEVU_ADVANCE_DAYS)
+    except ValueError:
+        gun_sayisi = 7
+
+    gunler = bos_slotlar(veteriner, baslangic, gun_sayisi)
+    return JsonResponse({
+        "ok": True,
+        "gunler": {tarih.isoformat(): [saat.strftime('%H:%M') for saat in saatler] for tarih, saatler in gunler.items()},
+    })
+
+
 def veteriner_working_hours_check(veteriner, randevu_tarihi, randevu_saati):
     """Veteriner çalışma saatleri kontrolü"""
-    from datetime import datetime
-    
-    # Haftanın gününü al (0=Pazartesi, 6=Pazar)
-    weekday = randevu_tarihi.weekday()
-    
-    # Çalışma saatleri kontrolü
-    if weekday == 0:  # Pazartesi
-        if veteriner.pazartesi_kapali:
-            return False
-        if veteriner.pazartesi_baslangic and veteriner.pazartesi_bitis:
-            return veteriner.pazartesi_baslangic <= randevu_saati <= veteriner.pazartesi_bitis
-    elif weekday == 1:  # Salı
-        if veteriner.sali_kapali:
-            return False
-        if veteriner.sali_baslangic and veteriner.sali_bitis:
-            return veteriner.sali_baslangic <= randevu_saati <= veteriner.sali_bitis
-    elif weekday == 2:  # Çarşamba
-        if veteriner.carsamba_kapali:
-            return False
-        if veteriner.carsamba_baslangic and veteriner.carsamba_bitis:
-            return veteriner.carsamba_baslangic <= randevu_saati <= veteriner.carsamba_bitis
-    elif weekday == 3:  # Perşembe
-        if veteriner.persembe_kapali:
-            return False
-        if veteriner.persembe_baslangic and veteriner.persembe_bitis:
-            return veteriner.persembe_baslangic <= randevu_saati <= veteriner.persembe_bitis
-    elif weekday == 4:  # Cuma
-        if veteriner.cuma_kapali:
-            return False
-        if veteriner.cuma_baslangic and veteriner.cuma_bitis:
-            return veteriner.cuma_baslangic <= randevu_saati <= veteriner.cuma_bitis
-    elif weekday == 5:  # Cumartesi
-        if veteriner.cumartesi_kapali:
-            return False
-        if veteriner.cumartesi_baslangic and veteriner.cumartesi_bitis:
-            return veteriner.cumartesi_baslangic <= randevu_saati <= veteriner.cumartesi_bitis
-    elif weekday == 6:  # Pazar
-        if veteriner.pazar_kapali:
-            return False
-        if veteriner.pazar_baslangic and veteriner.pazar_bitis:
-            return veteriner.pazar_baslangic <= randevu_saati <= veteriner.pazar_bitis
-    
-    # Eğer çalışma saatleri tanımlanmamışsa varsayılan olarak 09:00-18:00
-    from datetime import time
-    return time(9, 0) <= randevu_saati <= time(18, 0)
\ No newline at end of file
+    return veteriner.calisiyor_mu(randevu_tarihi, randevu_saati)
\ No newline at end of file